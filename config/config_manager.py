@@ -120,6 +120,8 @@ class ConfigManager:
                 "min_confidence": 0.5,
                 "text_only": True,
                 "skip_special": True,
+                "pin_models": False,
+                "idle_timeout": 300,
             },
             "object_detection": {
                 "model_path": "models/yolo26s.pt",
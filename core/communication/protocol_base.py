@@ -13,9 +13,24 @@ import logging
 from enum import Enum
 from typing import Any, Callable, Dict, Optional
 
+from core.tracing import traced
+
 logger = logging.getLogger("Communication")
 
 
+def _send_trace_args(
+    protocol: "ProtocolBase", data: Any = None, *args, **kwargs
+):
+    """通信发送区间的参数：协议名和数据字节数"""
+    if isinstance(data, (bytes, bytearray)):
+        size = len(data)
+    elif isinstance(data, str):
+        size = len(data.encode("utf-8", errors="ignore"))
+    else:
+        size = None
+    return {"protocol": protocol.protocol_name, "bytes": size}
+
+
 class ProtocolType(Enum):
     """协议类型枚举"""
 
@@ -50,6 +65,14 @@ class ProtocolBase:
 
     protocol_name: str = "BaseProtocol"
 
+    def __init_subclass__(cls, **kwargs):
+        """子类实现的 send 自动记录追踪区间"""
+        super().__init_subclass__(**kwargs)
+        if "send" in cls.__dict__:
+            cls.send = traced("comm.send", "communication", _send_trace_args)(
+                cls.__dict__["send"]
+            )
+
     def __init__(self):
         self._state = ConnectionState.DISCONNECTED
         self._config: Dict[str, Any] = {}
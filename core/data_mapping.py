@@ -20,6 +20,39 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.error_management import log_error
 
 
+def compile_path(path: str) -> Callable[[Any], Any]:
+    """将点号分隔的字段路径编译为取值函数
+
+    路径只在编译时拆分一次，取值时不再split。
+
+    Args:
+        path: 字段路径，如"position.x"
+
+    Returns:
+        取值函数，路径不存在时返回None
+    """
+    keys = tuple(path.split("."))
+
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get_value(data: Any) -> Any:
+            return data.get(key) if isinstance(data, dict) else None
+
+        return get_value
+
+    def get_nested_value(data: Any) -> Any:
+        current = data
+        for key in keys:
+            if isinstance(current, dict) and key in current:
+                current = current[key]
+            else:
+                return None
+        return current
+
+    return get_nested_value
+
+
 @dataclass
 class DataMappingRule:
     """数据映射规则
@@ -77,6 +110,8 @@ class DataMapper:
     def __init__(self):
         """初始化数据映射器"""
         self._rules: List[DataMappingRule] = []
+        # 与规则一一对应的预编译取值函数
+        self._accessors: List[Callable[[Any], Any]] = []
     
     def add_rule(self, rule: DataMappingRule) -> None:
         """添加映射规则
@@ -85,6 +120,7 @@ class DataMapper:
             rule: 要添加的数据映射规则
         """
         self._rules.append(rule)
+        self._accessors.append(compile_path(rule.source_field))
     
     def remove_rule(self, rule: DataMappingRule) -> None:
         """删除映射规则
@@ -93,11 +129,14 @@ class DataMapper:
             rule: 要删除的数据映射规则
         """
         if rule in self._rules:
-            self._rules.remove(rule)
+            index = self._rules.index(rule)
+            del self._rules[index]
+            del self._accessors[index]
     
     def clear_rules(self) -> None:
         """清除所有映射规则"""
         self._rules.clear()
+        self._accessors.clear()
     
     def get_rules(self) -> List[DataMappingRule]:
         """获取所有映射规则
@@ -119,16 +158,7 @@ class DataMapper:
         Returns:
             字段值，如果路径不存在则返回None
         """
-        keys = path.split(".")
-        current = data
-        
-        for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            else:
-                return None
-        
-        return current
+        return compile_path(path)(data)
     
     def map(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """执行数据映射
@@ -143,9 +173,9 @@ class DataMapper:
         """
         output_data: Dict[str, Any] = {}
         
-        for rule in self._rules:
-            # 获取源字段值（支持嵌套路径）
-            value = self._get_nested_value(input_data, rule.source_field)
+        for rule, accessor in zip(self._rules, self._accessors):
+            # 获取源字段值（使用预编译的路径取值函数）
+            value = accessor(input_data)
             
             # 如果字段不存在，使用默认值
             if value is None:
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+位置修正模块
+
+定位工具(灰度匹配/形状匹配)找到工件后，发布当前位姿相对基准位姿的刚体变换；
+下游工具的搜索区域和卡尺经该变换重新投影，跟随工件平移和旋转。
+
+- 变换挂在定位工具输出图像的元数据 "fixture" 上，随图像视图传给下游工具
+- 同一帧的下游工具共享同一个 FixtureTransform，区域和卡尺采样点的投影
+  按参数缓存在变换上，每帧只计算一次
+- 角度单位为度，图像坐标系(y轴向下)中顺时针为正，与旋转矩形区域一致
+
+使用示例：
+    transform = FixtureTransform(Fixture(100, 80, 0), Fixture(130, 95, 10))
+    regions = transform.map_regions(
+        {"x": 50, "y": 40, "width": 100, "height": 60}
+    )
+    points = transform.map_points([(50, 40), (150, 40)])
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import math
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from core.communication.dynamic_io import Fixture
+from core.search_region import (
+    REGION_RECT,
+    REGION_ROTATED_RECT,
+    SearchRegion,
+    parse_search_regions,
+)
+
+# 输出图像元数据中位置修正的键
+FIXTURE_METADATA_KEY = "fixture"
+
+
+def _freeze(value: Any) -> Hashable:
+    """把参数值转换为可哈希的缓存键"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return (value.shape, str(value.dtype), value.tobytes())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class FixtureTransform:
+    """
+    位置修正变换
+
+    把基准位姿下的坐标映射到当前帧：p' = R(Δ角度)·S·(p - 基准点) + 当前点，
+    S 为当前与基准的缩放比(定位工具发布的缩放为1，即刚体变换)。
+    """
+
+    def __init__(self, reference: Fixture, current: Fixture, source: str = ""):
+        """
+        初始化变换
+
+        Args:
+            reference: 基准位姿(示教时工件的位置)
+            current: 当前帧定位到的位姿
+            source: 发布变换的工具名称
+        """
+        self.reference = reference
+        self.current = current
+        self.source = source
+        self.angle = float(current.angle - reference.angle)
+
+        scale_x = (
+            current.scale_x / reference.scale_x if reference.scale_x else 1.0
+        )
+        scale_y = (
+            current.scale_y / reference.scale_y if reference.scale_y else 1.0
+        )
+        theta = math.radians(self.angle)
+        cos_val, sin_val = math.cos(theta), math.sin(theta)
+        self._linear = np.array(
+            [
+                [cos_val * scale_x, -sin_val * scale_y],
+                [sin_val * scale_x, cos_val * scale_y],
+            ]
+        )
+        self._offset = np.array(
+            [current.x, current.y]
+        ) - self._linear @ np.array([reference.x, reference.y])
+
+        self._entries: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """2x3 仿射矩阵(基准坐标 -> 当前帧坐标)"""
+        return np.hstack([self._linear, self._offset[:, None]])
+
+    @property
+    def inverse(self) -> np.ndarray:
+        """2x3 逆仿射矩阵(当前帧坐标 -> 基准坐标)"""
+        return cv2.invertAffineTransform(self.matrix)
+
+    @property
+    def is_axis_aligned(self) -> bool:
+        """变换后轴对齐矩形是否仍为轴对齐矩形"""
+        return self.angle % 90 == 0
+
+    def get(
+        self, key: Tuple[Hashable, ...], factory: Callable[[], Any]
+    ) -> Any:
+        """获取缓存的投影结果，不存在时调用factory计算
+
+        同一帧的所有下游工具共享本对象，相同参数的投影只计算一次。
+
+        Args:
+            key: 缓存键，第一个元素为投影类别
+            factory: 计算函数
+
+        Returns:
+            缓存值
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = factory()
+            return self._entries[key]
+
+    def map_points(self, points: Any) -> np.ndarray:
+        """
+        映射点坐标
+
+        Args:
+            points: 点序列 (N, 2)
+
+        Returns:
+            当前帧坐标 (N, 2) float64
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return points @ self._linear.T + self._offset
+
+    def map_angle(self, angle: float) -> float:
+        """映射角度(度)"""
+        return float(angle) + self.angle
+
+    def map_region(self, region: SearchRegion) -> SearchRegion:
+        """
+        映射单个搜索区域
+
+        轴对齐矩形在变换带旋转时变为旋转矩形，其余类型保持不变。
+
+        Args:
+            region: 基准坐标下的区域
+
+        Returns:
+            当前帧坐标下的区域
+        """
+        kind = region.kind
+        if kind == REGION_RECT and not self.is_axis_aligned:
+            kind = REGION_ROTATED_RECT
+        return SearchRegion(
+            kind, self.map_points(region.polygon).astype(np.float32)
+        )
+
+    def map_regions(self, value: Any) -> List[SearchRegion]:
+        """
+        解析并映射 search_region 参数(按参数值缓存)
+
+        Args:
+            value: search_region 参数值
+
+        Returns:
+            当前帧坐标下的搜索区域列表
+        """
+        return self.get(
+            ("regions", _freeze(value)),
+            lambda: [
+                self.map_region(region)
+                for region in parse_search_regions(value)
+            ],
+        )
+
+    def line_samples(
+        self, start: Tuple[float, float], end: Tuple[float, float], count: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        基准坐标下线段上等距采样点在当前帧中的坐标(按参数缓存)
+
+        Args:
+            start, end: 线段端点(基准坐标)
+            count: 采样点数
+
+        Returns:
+            (map_x, map_y)，形状均为 (1, count) 的 float32，可直接用于 cv2.remap
+        """
+        key = (
+            "line",
+            float(start[0]),
+            float(start[1]),
+            float(end[0]),
+            float(end[1]),
+            int(count),
+        )
+
+        def compute():
+            t = np.arange(count, dtype=np.float64) / max(count, 1)
+            nominal = np.stack(
+                [
+                    start[0] + t * (end[0] - start[0]),
+                    start[1] + t * (end[1] - start[1]),
+                ],
+                axis=1,
+            )
+            mapped = self.map_points(nominal).astype(np.float32)
+            return mapped[None, :, 0].copy(), mapped[None, :, 1].copy()
+
+        return self.get(key, compute)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典(结果显示和通信输出)"""
+        return {
+            "source": self.source,
+            "reference": self.reference.to_dict(),
+            "current": self.current.to_dict(),
+            "dx": float(self.current.x - self.reference.x),
+            "dy": float(self.current.y - self.reference.y),
+            "angle": self.angle,
+            "matrix": self.matrix.tolist(),
+        }
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+位置修正工具混入类
+
+为定位工具(灰度匹配、形状匹配)提供位置修正的发布功能。
+
+提供功能：
+- 位置修正参数定义与初始化
+- 示教基准位姿
+- 把当前位姿相对基准位姿的变换挂到输出图像上，供下游工具跟随
+
+Usage:
+    class MyLocator(FixtureToolMixin, VisionAlgorithmToolBase):
+        def _fixture_pose(self):
+            return Fixture(x=..., y=..., angle=...)
+
+        def _post_process(self):
+            self._publish_fixture(self._fixture_pose())
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+from typing import Dict, Optional
+
+from core.communication.dynamic_io import Fixture
+from core.fixture import FIXTURE_METADATA_KEY, FixtureTransform
+from core.tool_base import ToolParameter
+from data.image_data import DataType
+
+
+class FixtureToolMixin:
+    """
+    位置修正工具混入类
+
+    publish_fixture 打开时，定位成功后在输出图像的元数据中发布 FixtureTransform：
+    下游工具的搜索区域和卡尺按基准位姿绘制，运行时投影到当前工件位置。
+    定位失败时发布 None，下游工具按原始区域执行。
+    """
+
+    @classmethod
+    def get_fixture_param_definitions(cls) -> Dict[str, ToolParameter]:
+        """获取位置修正参数定义
+
+        Returns:
+            位置修正参数字典
+        """
+        return {
+            "publish_fixture": ToolParameter(
+                name="发布位置修正",
+                param_type="boolean",
+                default=False,
+                description="把定位结果相对基准位姿的变换传给下游工具，下游搜索区域和卡尺跟随工件",
+            ),
+            "fixture_teach": ToolParameter(
+                name="设为基准位姿",
+                param_type="boolean",
+                default=False,
+                description="下一次定位成功时把当前位姿记为基准位姿，完成后自动关闭",
+            ),
+            "fixture_x": ToolParameter(
+                name="基准X",
+                param_type="float",
+                default=0.0,
+                description="基准位姿的X坐标(像素)",
+            ),
+            "fixture_y": ToolParameter(
+                name="基准Y",
+                param_type="float",
+                default=0.0,
+                description="基准位姿的Y坐标(像素)",
+            ),
+            "fixture_angle": ToolParameter(
+                name="基准角度",
+                param_type="float",
+                default=0.0,
+                description="基准位姿的角度(度，顺时针为正)",
+                min_value=-360.0,
+                max_value=360.0,
+            ),
+        }
+
+    def _init_fixture_params(self):
+        """初始化位置修正参数（子类应调用此方法）"""
+        self.set_param("publish_fixture", False)
+        self.set_param("fixture_teach", False)
+        self.set_param("fixture_x", 0.0)
+        self.set_param("fixture_y", 0.0)
+        self.set_param("fixture_angle", 0.0)
+
+    def get_fixture_reference(self) -> Fixture:
+        """获取基准位姿"""
+        return Fixture(
+            x=float(self.get_param("fixture_x", 0.0)),
+            y=float(self.get_param("fixture_y", 0.0)),
+            angle=float(self.get_param("fixture_angle", 0.0)),
+        )
+
+    def _fixture_pose(self) -> Optional[Fixture]:
+        """当前帧定位到的位姿(整帧坐标)，未定位到时为 None，子类重写"""
+        return None
+
+    def _publish_fixture(self, pose: Optional[Fixture]):
+        """
+        发布位置修正
+
+        Args:
+            pose: 当前位姿，None 表示定位失败
+        """
+        if (
+            not self.get_param("publish_fixture", False)
+            or self._output_data is None
+        ):
+            return
+
+        if pose is None:
+            self._output_data.set_metadata(FIXTURE_METADATA_KEY, None)
+            self._result_data.set_value("fixture_valid", False)
+            self._logger.warning("定位失败，未发布位置修正")
+            return
+
+        if self.get_param("fixture_teach", False):
+            self.set_param("fixture_x", float(pose.x))
+            self.set_param("fixture_y", float(pose.y))
+            self.set_param("fixture_angle", float(pose.angle))
+            self.set_param("fixture_teach", False)
+            self._logger.info(
+                f"已示教基准位姿: x={pose.x:.1f}, y={pose.y:.1f}, "
+                f"angle={pose.angle:.1f}"
+            )
+
+        transform = FixtureTransform(
+            self.get_fixture_reference(), pose, source=self._name
+        )
+        self._output_data.set_metadata(FIXTURE_METADATA_KEY, transform)
+        self._result_data.set_value(
+            "fixture", transform.to_dict(), DataType.DICT
+        )
+        self._result_data.set_value("fixture_valid", True)
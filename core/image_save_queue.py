@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步图像保存队列模块
+
+图像保存工具在检测线程上同步编码写盘，2000万像素的PNG编码往往比检测本身还慢。
+ImageSaveQueue 把保存任务交给有界的编码/写盘线程池，调用方立即返回：
+
+- 排队数达到上限时按策略丢弃或阻塞等待
+- 先写入同目录下的临时文件再原子替换，不会留下写了一半的图像
+- DiskRetention 按磁盘配额和保留时长清理最旧的图像
+- 统计排队深度、写盘速率(字节/秒)、成功/失败/丢弃数
+
+使用示例：
+    save_queue = ImageSaveQueue(max_workers=2, max_pending=8, policy="drop")
+    save_queue.submit(image, "./ng/image_0001.png")
+    print(save_queue.stats)
+    save_queue.flush()
+
+提交的图像在写盘完成前被线程池引用，调用方不应原地修改。
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Sequence,
+    Union,
+)
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# 队列满时的策略
+POLICY_DROP = "drop"
+POLICY_BLOCK = "block"
+
+# 写盘速率统计窗口(秒)
+RATE_WINDOW = 5.0
+
+# 默认参与配额清理的图像扩展名
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+ImageSource = Union[np.ndarray, Callable[[], np.ndarray]]
+
+
+def encode_params(
+    path: str, quality: int = 95, png_compression: int = 3
+) -> List[int]:
+    """根据扩展名生成OpenCV编码参数
+
+    Args:
+        path: 文件路径
+        quality: JPG质量(1-100)
+        png_compression: PNG压缩级别(0-9)
+
+    Returns:
+        cv2.imencode 参数列表
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if ext == ".png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    return []
+
+
+def write_image_atomic(
+    image: np.ndarray, path: str, params: Sequence[int] = ()
+) -> int:
+    """编码图像并原子写入文件
+
+    先写入同目录下的临时文件，再用 os.replace 替换目标文件。
+    使用 cv2.imencode + Python文件接口，支持包含中文的路径。
+
+    Args:
+        image: 图像数据
+        path: 目标路径(扩展名决定编码格式)
+        params: 编码参数
+
+    Returns:
+        写入的字节数
+
+    Raises:
+        IOError: 编码或写入失败
+    """
+    ext = os.path.splitext(path)[1] or ".png"
+    ok, buffer = cv2.imencode(ext, image, list(params))
+    if not ok:
+        raise IOError(f"图像编码失败: {path}")
+
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(buffer)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return int(buffer.nbytes)
+
+
+class DiskRetention:
+    """
+    磁盘保留策略
+
+    按目录记录已保存的图像(首次使用时扫描目录中已有的图像)，
+    每次记录新文件后删除超出保留时长的文件，并在总大小超过配额时
+    从最旧的文件开始删除。最新写入的文件始终保留。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 0,
+        max_age_seconds: float = 0,
+        extensions: Iterable[str] = IMAGE_EXTENSIONS,
+    ):
+        """
+        初始化保留策略
+
+        Args:
+            max_bytes: 每个目录的磁盘配额(字节)，0表示不限制
+            max_age_seconds: 保留时长(秒)，0表示不限制
+            extensions: 参与清理的文件扩展名
+        """
+        self.max_bytes = int(max_bytes)
+        self.max_age_seconds = float(max_age_seconds)
+        self._extensions = tuple(ext.lower() for ext in extensions)
+        # 目录 -> OrderedDict(路径 -> (修改时间, 大小))，按时间从旧到新
+        self._index: Dict[str, "OrderedDict[str, tuple]"] = {}
+        self._totals: Dict[str, int] = {}
+        self._removed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用清理"""
+        return self.max_bytes > 0 or self.max_age_seconds > 0
+
+    @property
+    def removed_count(self) -> int:
+        """累计删除的文件数"""
+        return self._removed
+
+    def record(self, path: str, size: int) -> List[str]:
+        """记录新保存的文件并执行清理
+
+        Args:
+            path: 文件路径
+            size: 文件大小(字节)
+
+        Returns:
+            被删除的文件路径列表
+        """
+        if not self.enabled:
+            return []
+
+        directory = os.path.dirname(os.path.abspath(path))
+        path = os.path.abspath(path)
+        with self._lock:
+            entries = self._entries(directory)
+            old = entries.pop(path, None)
+            if old is not None:
+                self._totals[directory] -= old[1]
+            entries[path] = (time.time(), int(size))
+            self._totals[directory] += int(size)
+            return self._prune(directory, entries)
+
+    def usage(self, directory: str) -> int:
+        """目录中已记录图像的总大小(字节)"""
+        with self._lock:
+            return self._totals.get(os.path.abspath(directory), 0)
+
+    def _entries(self, directory: str) -> "OrderedDict[str, tuple]":
+        """获取目录索引，首次访问时扫描目录"""
+        entries = self._index.get(directory)
+        if entries is None:
+            found = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_file() and entry.name.lower().endswith(
+                            self._extensions
+                        ):
+                            stat = entry.stat()
+                            found.append(
+                                (stat.st_mtime, entry.path, stat.st_size)
+                            )
+            except OSError as e:
+                logger.warning(f"扫描保存目录失败: {directory}, {e}")
+            found.sort()
+            entries = OrderedDict(
+                (os.path.abspath(p), (mtime, size)) for mtime, p, size in found
+            )
+            self._index[directory] = entries
+            self._totals[directory] = sum(size for _, _, size in found)
+        return entries
+
+    def _prune(
+        self, directory: str, entries: "OrderedDict[str, tuple]"
+    ) -> List[str]:
+        """删除过期和超出配额的最旧文件(调用方持有锁)"""
+        removed = []
+        deadline = time.time() - self.max_age_seconds
+        while len(entries) > 1:
+            path, (mtime, size) = next(iter(entries.items()))
+            expired = self.max_age_seconds > 0 and mtime < deadline
+            over_quota = (
+                self.max_bytes > 0 and self._totals[directory] > self.max_bytes
+            )
+            if not (expired or over_quota):
+                break
+            entries.popitem(last=False)
+            self._totals[directory] -= size
+            try:
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除旧图像失败: {path}, {e}")
+        if removed:
+            self._removed += len(removed)
+            logger.debug(f"保留策略清理 {len(removed)} 个文件: {directory}")
+        return removed
+
+
+class ImageSaveQueue:
+    """
+    有界异步图像保存队列
+
+    排队数(等待中和正在写盘的任务)不超过 max_pending。
+    图像可以是数组，也可以是返回数组的函数(例如 ImageData.rendered)，
+    后者在工作线程中调用，标注绘制也不占用检测线程。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 8,
+        policy: str = POLICY_DROP,
+        retention: DiskRetention = None,
+    ):
+        """
+        初始化保存队列
+
+        Args:
+            max_workers: 编码/写盘线程数
+            max_pending: 最大排队数
+            policy: 队列满时的策略，"drop"丢弃新任务，"block"阻塞等待
+            retention: 磁盘保留策略
+        """
+        if policy not in (POLICY_DROP, POLICY_BLOCK):
+            raise ValueError(f"未知的队列满策略: {policy}")
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.policy = policy
+        self.retention = retention
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="ImageSaver"
+        )
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._submitted = 0
+        self._saved = 0
+        self._failed = 0
+        self._dropped = 0
+        self._bytes_written = 0
+        self._recent = deque()  # (完成时间, 字节数)
+        self._last_error = ""
+        self._closed = False
+
+    def submit(
+        self,
+        image: ImageSource,
+        path: str,
+        params: Sequence[int] = None,
+        timeout: float = None,
+    ) -> bool:
+        """提交保存任务
+
+        Args:
+            image: 图像数组或返回图像数组的函数
+            path: 目标路径
+            params: 编码参数，默认由扩展名决定
+            timeout: 阻塞策略下的最长等待时间(秒)，None表示一直等待
+
+        Returns:
+            是否已入队，False表示被丢弃
+        """
+        if self._closed:
+            raise RuntimeError("保存队列已关闭")
+
+        if self.policy == POLICY_BLOCK:
+            acquired = self._slots.acquire(timeout=timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._dropped += 1
+            logger.warning(f"保存队列已满({self.max_pending})，丢弃: {path}")
+            return False
+
+        with self._lock:
+            self._pending += 1
+            self._submitted += 1
+        if params is None:
+            params = encode_params(path)
+        try:
+            self._executor.submit(self._save, image, path, params)
+        except Exception:
+            self._finish()
+            raise
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待所有已提交的任务完成
+
+        Args:
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            是否全部完成
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self, wait: bool = True):
+        """关闭队列
+
+        Args:
+            wait: 是否等待已提交的任务写盘完成
+        """
+        self._closed = True
+        self._executor.shutdown(wait=wait)
+
+    @property
+    def pending(self) -> int:
+        """当前排队数"""
+        return self._pending
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """队列统计"""
+        with self._lock:
+            return {
+                "queue_depth": self._pending,
+                "max_pending": self.max_pending,
+                "submitted": self._submitted,
+                "saved": self._saved,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "bytes_written": self._bytes_written,
+                "bytes_per_second": self._rate(time.time()),
+                "removed": (
+                    self.retention.removed_count if self.retention else 0
+                ),
+                "last_error": self._last_error,
+            }
+
+    def _save(self, image: ImageSource, path: str, params: Sequence[int]):
+        """工作线程：编码、原子写入并执行保留策略"""
+        try:
+            data = image() if callable(image) else image
+            size = write_image_atomic(data, path, params)
+            if self.retention is not None:
+                self.retention.record(path, size)
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+                self._last_error = f"{path}: {e}"
+            logger.error(f"异步保存图像失败: {path}, {e}")
+        else:
+            now = time.time()
+            with self._lock:
+                self._saved += 1
+                self._bytes_written += size
+                self._recent.append((now, size))
+        finally:
+            self._finish()
+
+    def _finish(self):
+        """释放排队名额"""
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+        self._slots.release()
+
+    def _rate(self, now: float) -> float:
+        """统计窗口内的写盘速率(调用方持有锁)"""
+        while self._recent and self._recent[0][0] < now - RATE_WINDOW:
+            self._recent.popleft()
+        if not self._recent:
+            return 0.0
+        return sum(size for _, size in self._recent) / RATE_WINDOW
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置模块
+
+高频路径(工具执行、参数设置、通讯发送)的日志不应拖慢检测节拍：
+
+- setup_logging 在根日志器上安装 AsyncQueueHandler，记录只在调用线程合并消息后入队，
+  时间格式化和写控制台/文件由后台 QueueListener 线程完成；队列满时丢弃并计数，不阻塞
+- RateLimitFilter 对重复的警告/错误限流，恢复输出时附带被抑制的次数
+- ToolLogger 为每个工具实例提供可在运行时切换的调试开关，开启后该工具的DEBUG日志
+  输出，不影响同类型的其他工具
+
+使用示例：
+    setup_logging(level=logging.INFO, log_file="vision_system.log")
+
+    tool.debug_logging = True  # 只打开这个工具的调试日志
+    print(get_log_stats())  # {"queued", "dropped", "suppressed"}
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# 日志队列容量(条)，超出后丢弃新记录
+DEFAULT_QUEUE_SIZE = 10000
+
+# 相同警告的最短输出间隔(秒)
+DEFAULT_RATE_LIMIT_INTERVAL = 5.0
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["AsyncQueueHandler"] = None
+_rate_filter: Optional["RateLimitFilter"] = None
+_setup_lock = threading.Lock()
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """入队处理器：调用线程只合并消息参数，格式化由监听线程完成"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.queued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """合并消息参数并展开异常信息，使记录可以安全跨线程传递"""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """重复日志限流
+
+    同一日志器、同一级别、同一消息在 interval 秒内只输出一次；
+    之后再次输出时在消息末尾注明期间被抑制的次数。
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_RATE_LIMIT_INTERVAL,
+        min_level: int = logging.WARNING,
+        max_keys: int = 2048,
+    ):
+        super().__init__()
+        self.interval = interval
+        self.min_level = min_level
+        self.max_keys = max_keys
+        self.suppressed_total = 0
+        self._last: Dict[Tuple, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.interval <= 0:
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last[0] < self.interval:
+                self._last[key] = (last[0], last[1] + 1)
+                self.suppressed_total += 1
+                return False
+            if len(self._last) >= self.max_keys:
+                self._last.clear()
+            self._last[key] = (now, 0)
+        if last is not None and last[1]:
+            record.msg = f"{message} (期间重复 {last[1]} 次已抑制)"
+            record.args = None
+        return True
+
+
+class ToolLogger(logging.LoggerAdapter):
+    """工具日志器，支持按工具实例开启调试日志
+
+    同类型的工具共享底层日志器；debug_enabled 只放开本实例的DEBUG日志。
+    """
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger, None)
+        self.debug_enabled = False
+
+    def isEnabledFor(self, level: int) -> bool:
+        if self.logger.manager.disable >= level:
+            return False
+        if self.debug_enabled and level >= logging.DEBUG:
+            return True
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level: int, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            # 绕过底层日志器的级别判断，调试开关打开时DEBUG记录也能到达处理器
+            self.logger._log(level, msg, args, **kwargs)
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    log_file: Optional[str] = "vision_system.log",
+    console: bool = True,
+    fmt: str = DEFAULT_FORMAT,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    rate_limit_interval: float = DEFAULT_RATE_LIMIT_INTERVAL,
+) -> logging.handlers.QueueListener:
+    """配置异步日志
+
+    重复调用会先停止之前的监听线程并替换根日志器上的处理器。
+
+    Args:
+        level: 根日志器级别
+        log_file: 日志文件路径，None表示不写文件
+        console: 是否输出到控制台
+        fmt: 日志格式
+        queue_size: 日志队列容量
+        rate_limit_interval: 重复警告的最短输出间隔(秒)，0表示不限流
+
+    Returns:
+        后台监听器
+    """
+    global _listener, _queue_handler, _rate_filter
+
+    with _setup_lock:
+        _stop_listener()
+
+        formatter = logging.Formatter(fmt)
+        handlers = []
+        if console:
+            handlers.append(logging.StreamHandler())
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = AsyncQueueHandler(log_queue)
+        _rate_filter = RateLimitFilter(rate_limit_interval)
+        _queue_handler.addFilter(_rate_filter)
+
+        # 替换根日志器上已有的同步处理器(例如各模块的basicConfig)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        return _listener
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def shutdown_logging():
+    """停止后台监听线程，写完队列中剩余的日志"""
+    global _queue_handler
+    with _setup_lock:
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _queue_handler = None
+        _stop_listener()
+
+
+def get_log_stats() -> Dict[str, int]:
+    """获取日志管道统计
+
+    Returns:
+        {"queued": 已入队, "dropped": 队列满丢弃, "suppressed": 限流抑制, "pending": 待写出}
+    """
+    handler, rate_filter = _queue_handler, _rate_filter
+    return {
+        "queued": handler.queued if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "suppressed": rate_filter.suppressed_total if rate_filter else 0,
+        "pending": handler.queue.qsize() if handler else 0,
+    }
+
+
+atexit.register(shutdown_logging)
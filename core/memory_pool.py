@@ -2,128 +2,590 @@
 """
 图像缓冲区内存池模块
 
-提供预分配的图像内存缓冲区管理，避免频繁的malloc/free操作
+提供预分配的图像内存缓冲区管理，避免频繁的malloc/free操作。
+
+缓冲区按 (形状, 数据类型) 分为多个尺寸类，每类独立复用：
+- 借出的数组不再被引用时(包括由它派生的切片视图)自动归还，无需 __del__ 或手动释放；
+  也可以用 borrow() 上下文管理器或 release() 提前归还
+- 归还时默认不清零，避免每帧一次整幅内存写
+- 每类记录借出数量的高水位，next_frame() 定期把空闲缓冲区收缩到近期高水位
+- 借出超过 leak_frames 帧仍未归还的缓冲区记为泄漏并告警
+- get_stats() 报告命中/未命中次数和常驻字节数
 
 Author: AI Agent
 Date: 2026-02-03
 """
 
-import numpy as np
+import logging
 import threading
-import queue
-from typing import Optional, Tuple, Set
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 小于该字节数的图像直接分配，池化收益不足以抵消记录开销
+POOL_MIN_BYTES = 256 * 1024
+
+# 借出超过该帧数视为泄漏
+DEFAULT_LEAK_FRAMES = 500
+
+# 每隔多少帧按高水位收缩一次空闲缓冲区
+DEFAULT_TRIM_INTERVAL = 100
+
+# 全局内存池的常驻内存上限
+DEFAULT_MAX_RESIDENT_BYTES = 512 * 1024 * 1024
+
+_logger = logging.getLogger("MemoryPool")
+
+
+class _SizeClass:
+    """同一形状和数据类型的缓冲区"""
+
+    __slots__ = (
+        "shape", "dtype", "nbytes", "free", "total", "outstanding",
+        "high_water", "recent_high_water", "hits", "misses", "last_used",
+    )
+
+    def __init__(self, shape: Tuple[int, ...], dtype: np.dtype):
+        self.shape = shape
+        self.dtype = dtype
+        self.nbytes = int(np.prod(shape)) * dtype.itemsize
+        self.free: List[bytearray] = []
+        self.total = 0
+        self.outstanding = 0
+        self.high_water = 0
+        self.recent_high_water = 0
+        self.hits = 0
+        self.misses = 0
+        self.last_used = 0
+
+    @property
+    def label(self) -> str:
+        return "x".join(str(s) for s in self.shape) + "/" + self.dtype.name
+
+
+class _Lease:
+    """一次借出记录"""
+
+    __slots__ = ("size_class", "slab", "frame", "finalizer", "reported")
+
+    def __init__(self, size_class: _SizeClass, slab: bytearray, frame: int):
+        self.size_class = size_class
+        self.slab = slab
+        self.frame = frame
+        self.finalizer = None
+        self.reported = False
 
 
 class ImageBufferPool:
     """图像缓冲区内存池
-    
-    预分配固定大小的图像内存，避免频繁的malloc/free
-    线程安全
+
+    按 (形状, 数据类型) 分类复用缓冲区，线程安全。
+
+    借出的数组由内存池持有的字节块支撑，数组及其所有视图都不再被引用时
+    缓冲区自动回到所属尺寸类，因此调整默认形状也不会丢失仍在使用中的缓冲区。
+
+    示例：
+        pool = ImageBufferPool(max_size=4, buffer_shape=(1080, 1920, 3))
+        frame = pool.acquire()                       # 默认尺寸类
+        gray = pool.acquire((1080, 1920), timeout=0) # 其他尺寸类，耗尽时返回None
+
+        with pool.borrow((480, 640)) as scratch:     # 离开with时归还
+            ...
     """
-    
-    def __init__(self, max_size: int = 10, buffer_shape: Tuple = (480, 640, 3), 
-                 dtype=np.uint8):
+
+    def __init__(
+        self,
+        max_size: int = 10,
+        buffer_shape: Optional[Tuple] = (480, 640, 3),
+        dtype=np.uint8,
+        zero_on_release: bool = False,
+        leak_frames: int = DEFAULT_LEAK_FRAMES,
+        trim_interval: int = DEFAULT_TRIM_INTERVAL,
+        max_resident_bytes: Optional[int] = None,
+    ):
         """
         Args:
-            max_size: 缓冲区最大数量
-            buffer_shape: 图像形状 (H, W, C)
-            dtype: 数据类型
+            max_size: 每个尺寸类的缓冲区最大数量
+            buffer_shape: 默认图像形状 (H, W, C)，会预分配 max_size 个；None表示不预分配
+            dtype: 默认数据类型
+            zero_on_release: 归还时是否清零
+            leak_frames: 借出超过该帧数视为泄漏，0表示不检测
+            trim_interval: 每隔多少帧按高水位收缩空闲缓冲区，0表示不收缩
+            max_resident_bytes: 常驻内存上限，None表示不限
         """
         self._max_size = max_size
-        self._buffer_shape = buffer_shape
-        self._dtype = dtype
-        
-        # 预分配缓冲区
-        self._available = queue.Queue(maxsize=max_size)
-        self._in_use: Set[int] = set()  # 使用id()来跟踪
-        self._lock = threading.Lock()
-        self._buffer_map: dict = {}  # id -> buffer映射
-        
-        # 预分配内存
-        for _ in range(max_size):
-            buffer = np.zeros(buffer_shape, dtype=dtype)
-            self._available.put(buffer)
-            self._buffer_map[id(buffer)] = buffer
-    
-    def acquire(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        self._buffer_shape = (
+            tuple(buffer_shape) if buffer_shape is not None else None
+        )
+        self._dtype = np.dtype(dtype)
+        self._zero_on_release = zero_on_release
+        self._leak_frames = leak_frames
+        self._trim_interval = trim_interval
+        self._max_resident_bytes = max_resident_bytes
+
+        self._classes: Dict[Tuple, _SizeClass] = {}
+        self._leases: Dict[int, _Lease] = {}
+        self._resident_bytes = 0
+        self._frame = 0
+        self._exhausted = 0
+        self._leaks = 0
+        # 可重入：持锁期间触发的垃圾回收可能在同一线程内执行归还回调
+        self._cond = threading.Condition(threading.RLock())
+
+        if self._buffer_shape is not None:
+            self.preallocate(self._buffer_shape, self._dtype, max_size)
+
+    # ------------------------------------------------------------------
+    # 借出与归还
+    # ------------------------------------------------------------------
+
+    def acquire(self, shape: Optional[Tuple] = None, dtype=None,
+                timeout: Optional[float] = None) -> Optional[np.ndarray]:
         """获取一个缓冲区
-        
+
         Args:
-            timeout: 等待超时时间(秒)，None表示无限等待
-            
+            shape: 图像形状，None表示默认形状
+            dtype: 数据类型，None表示默认类型
+            timeout: 尺寸类耗尽时的等待时间(秒)，None表示无限等待，0表示不等待
+
         Returns:
-            可用的缓冲区，或None(如果超时)
+            可用的缓冲区(内容未初始化)，或None(如果超时)
         """
-        try:
-            buffer = self._available.get(timeout=timeout)
-            with self._lock:
-                self._in_use.add(id(buffer))
-            return buffer
-        except queue.Empty:
-            return None
-    
+        size_class = self._get_class(shape, dtype)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                slab = self._take_slab(size_class)
+                if slab is not None:
+                    break
+                remaining = (
+                    None if deadline is None else deadline - time.monotonic()
+                )
+                if remaining is not None and remaining <= 0:
+                    self._exhausted += 1
+                    return None
+                self._cond.wait(remaining)
+
+            lease = _Lease(size_class, slab, self._frame)
+            size_class.outstanding += 1
+            size_class.last_used = self._frame
+            size_class.high_water = max(
+                size_class.high_water, size_class.outstanding
+            )
+            size_class.recent_high_water = max(
+                size_class.recent_high_water, size_class.outstanding
+            )
+
+        buffer = np.ndarray(size_class.shape, size_class.dtype, buffer=slab)
+        key = id(buffer)
+        with self._cond:
+            self._leases[key] = lease
+        lease.finalizer = weakref.finalize(buffer, self._reclaim, key)
+        lease.finalizer.atexit = False
+        return buffer
+
     def release(self, buffer: Optional[np.ndarray]) -> None:
-        """释放缓冲区回内存池
-        
+        """提前归还缓冲区
+
+        调用方保证之后不再访问该数组及其视图；不归还时缓冲区在数组不再被引用后自动回收。
+
         Args:
             buffer: 要释放的缓冲区
         """
         if buffer is None:
             return
-            
-        buffer_id = id(buffer)
-        with self._lock:
-            if buffer_id in self._in_use:
-                self._in_use.discard(buffer_id)
-                # 重置缓冲区内容(可选)
-                buffer.fill(0)
-                try:
-                    self._available.put_nowait(buffer)
-                except queue.Full:
-                    pass  # 队列已满，丢弃
-    
-    def available_count(self) -> int:
-        """获取可用缓冲区数量"""
-        return self._available.qsize()
-    
+        lease = self._leases.get(id(buffer))
+        if lease is not None and lease.finalizer is not None:
+            # 触发终结器即归还，之后数组被回收时不会重复归还
+            lease.finalizer()
+
+    @contextmanager
+    def borrow(self, shape: Optional[Tuple] = None, dtype=None,
+               timeout: Optional[float] = 0):
+        """借用缓冲区，离开with时归还
+
+        尺寸类耗尽时退化为普通分配，调用方无需处理None。
+
+        Args:
+            shape: 图像形状，None表示默认形状
+            dtype: 数据类型，None表示默认类型
+            timeout: 尺寸类耗尽时的等待时间(秒)
+
+        Yields:
+            缓冲区
+        """
+        buffer = self.acquire(shape, dtype, timeout=timeout)
+        if buffer is None:
+            size_class = self._get_class(shape, dtype)
+            buffer = np.empty(size_class.shape, size_class.dtype)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def owns(self, buffer: np.ndarray) -> bool:
+        """判断数组是否是当前借出的缓冲区"""
+        return id(buffer) in self._leases
+
+    def _get_class(self, shape, dtype) -> _SizeClass:
+        shape = (
+            self._buffer_shape
+            if shape is None
+            else tuple(int(s) for s in shape)
+        )
+        if shape is None:
+            raise ValueError("未指定缓冲区形状")
+        dtype = self._dtype if dtype is None else np.dtype(dtype)
+        key = (shape, dtype.str)
+        size_class = self._classes.get(key)
+        if size_class is None:
+            with self._cond:
+                size_class = self._classes.setdefault(
+                    key, _SizeClass(shape, dtype)
+                )
+        return size_class
+
+    def _take_slab(self, size_class: _SizeClass) -> Optional[bytearray]:
+        """取空闲缓冲区或新分配(需持有锁)"""
+        if size_class.free:
+            size_class.hits += 1
+            return size_class.free.pop()
+        if size_class.total >= self._max_size:
+            return None
+        if not self._reserve(size_class.nbytes, size_class):
+            return None
+        size_class.misses += 1
+        size_class.total += 1
+        return bytearray(size_class.nbytes)
+
+    def _reserve(self, nbytes: int, requester: _SizeClass) -> bool:
+        """为新缓冲区预留常驻内存，超出上限时先回收最久未用尺寸类的空闲缓冲区"""
+        limit = self._max_resident_bytes
+        if limit is not None and self._resident_bytes + nbytes > limit:
+            for size_class in sorted(
+                self._classes.values(), key=lambda c: c.last_used
+            ):
+                if size_class is requester:
+                    continue
+                while (
+                    size_class.free and self._resident_bytes + nbytes > limit
+                ):
+                    self._drop_free(size_class)
+            if self._resident_bytes + nbytes > limit:
+                return False
+        self._resident_bytes += nbytes
+        return True
+
+    def _drop_free(self, size_class: _SizeClass):
+        """释放一个空闲缓冲区(需持有锁)"""
+        size_class.free.pop()
+        size_class.total -= 1
+        self._resident_bytes -= size_class.nbytes
+
+    def _reclaim(self, key: int):
+        """终结器回调：缓冲区回到所属尺寸类"""
+        with self._cond:
+            lease = self._leases.pop(key, None)
+            if lease is None:
+                return
+            size_class = lease.size_class
+            size_class.outstanding -= 1
+            if self._zero_on_release:
+                np.ndarray(
+                    size_class.nbytes, np.uint8, buffer=lease.slab
+                ).fill(0)
+            size_class.free.append(lease.slab)
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # 帧计数、泄漏检测与收缩
+    # ------------------------------------------------------------------
+
+    def next_frame(self) -> List[Dict[str, Any]]:
+        """推进帧计数，检查泄漏并按高水位收缩空闲缓冲区
+
+        Returns:
+            本次新发现的泄漏列表
+        """
+        with self._cond:
+            self._frame += 1
+            if self._trim_interval and self._frame % self._trim_interval == 0:
+                self._trim_to_high_water()
+            new_leaks = []
+            if self._leak_frames:
+                for lease in list(self._leases.values()):
+                    age = self._frame - lease.frame
+                    if not lease.reported and age > self._leak_frames:
+                        lease.reported = True
+                        self._leaks += 1
+                        new_leaks.append(
+                            {
+                                "size_class": lease.size_class.label,
+                                "frames": age,
+                            }
+                        )
+        for leak in new_leaks:
+            _logger.warning(
+                "缓冲区借出超过%d帧未归还: %s", leak["frames"], leak["size_class"]
+            )
+        return new_leaks
+
+    def find_leaks(
+        self, max_frames: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """列出借出时间超过指定帧数的缓冲区
+
+        Args:
+            max_frames: 帧数阈值，None表示使用 leak_frames
+
+        Returns:
+            [{"size_class": "480x640x3/uint8", "frames": 借出帧数}, ...]
+        """
+        limit = self._leak_frames if max_frames is None else max_frames
+        with self._cond:
+            return [
+                {
+                    "size_class": lease.size_class.label,
+                    "frames": self._frame - lease.frame,
+                }
+                for lease in list(self._leases.values())
+                if self._frame - lease.frame > limit
+            ]
+
+    def _trim_to_high_water(self):
+        """把每类空闲缓冲区收缩到近期高水位(需持有锁)"""
+        for size_class in self._classes.values():
+            while (
+                size_class.free
+                and size_class.total > size_class.recent_high_water
+            ):
+                self._drop_free(size_class)
+            size_class.recent_high_water = size_class.outstanding
+
+    def trim(self, shape: Optional[Tuple] = None, dtype=None) -> int:
+        """释放空闲缓冲区
+
+        Args:
+            shape: 只释放该形状的尺寸类，None表示全部
+            dtype: 数据类型，None表示默认类型
+
+        Returns:
+            释放的字节数
+        """
+        with self._cond:
+            before = self._resident_bytes
+            if shape is None:
+                classes = list(self._classes.values())
+            else:
+                dtype = self._dtype if dtype is None else np.dtype(dtype)
+                size_class = self._classes.get((tuple(shape), dtype.str))
+                classes = [size_class] if size_class is not None else []
+            for size_class in classes:
+                while size_class.free:
+                    self._drop_free(size_class)
+            return before - self._resident_bytes
+
+    def preallocate(
+        self, shape: Tuple, dtype=None, count: Optional[int] = None
+    ) -> int:
+        """预分配缓冲区
+
+        Args:
+            shape: 图像形状
+            dtype: 数据类型，None表示默认类型
+            count: 数量，None表示 max_size
+
+        Returns:
+            实际新分配的数量
+        """
+        size_class = self._get_class(shape, dtype)
+        count = self._max_size if count is None else min(count, self._max_size)
+        allocated = 0
+        with self._cond:
+            while size_class.total < count and self._reserve(
+                size_class.nbytes, size_class
+            ):
+                size_class.free.append(bytearray(size_class.nbytes))
+                size_class.total += 1
+                allocated += 1
+        return allocated
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def available_count(
+        self, shape: Optional[Tuple] = None, dtype=None
+    ) -> int:
+        """获取可用缓冲区数量
+
+        Args:
+            shape: 尺寸类形状，None表示所有尺寸类
+            dtype: 数据类型，None表示默认类型
+        """
+        with self._cond:
+            if shape is None:
+                return sum(len(c.free) for c in self._classes.values())
+            dtype = self._dtype if dtype is None else np.dtype(dtype)
+            size_class = self._classes.get((tuple(shape), dtype.str))
+            return len(size_class.free) if size_class is not None else 0
+
     def in_use_count(self) -> int:
         """获取正在使用的缓冲区数量"""
-        with self._lock:
-            return len(self._in_use)
-    
+        with self._cond:
+            return len(self._leases)
+
+    @property
+    def resident_bytes(self) -> int:
+        """内存池持有的内存字节数(空闲和借出)"""
+        return self._resident_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息
+
+        Returns:
+            命中/未命中次数、耗尽次数、泄漏数、常驻和借出字节数，以及各尺寸类的明细
+        """
+        with self._cond:
+            classes = {
+                c.label: {
+                    "hits": c.hits,
+                    "misses": c.misses,
+                    "free": len(c.free),
+                    "in_use": c.outstanding,
+                    "high_water": c.high_water,
+                    "resident_bytes": c.total * c.nbytes,
+                }
+                for c in self._classes.values()
+            }
+            return {
+                "hits": sum(c["hits"] for c in classes.values()),
+                "misses": sum(c["misses"] for c in classes.values()),
+                "exhausted": self._exhausted,
+                "leaks": self._leaks,
+                "frame": self._frame,
+                "resident_bytes": self._resident_bytes,
+                "in_use_bytes": sum(
+                    c.outstanding * c.nbytes for c in self._classes.values()
+                ),
+                "classes": classes,
+            }
+
     def resize(self, new_shape: Tuple) -> None:
-        """调整缓冲区大小(释放所有并重新分配)"""
-        # 清空现有缓冲区
-        while not self._available.empty():
-            try:
-                self._available.get_nowait()
-            except queue.Empty:
-                break
-        
-        self._buffer_shape = new_shape
-        
-        # 重新分配
-        for _ in range(self._max_size):
-            buffer = np.zeros(new_shape, dtype=self._dtype)
-            self._available.put(buffer)
+        """调整默认缓冲区形状
+
+        释放旧默认尺寸类的空闲缓冲区并预分配新形状；借出中的旧缓冲区归还后仍回到旧尺寸类。
+        """
+        if self._buffer_shape is not None:
+            self.trim(self._buffer_shape)
+        self._buffer_shape = tuple(new_shape)
+        self.preallocate(self._buffer_shape)
 
 
 class PooledImageData:
-    """使用内存池的图像数据类"""
-    
+    """使用内存池的图像数据类
+
+    支持with语句；离开with或对象不再被引用时缓冲区归还内存池。
+    """
+
     def __init__(self, pool: ImageBufferPool, data: Optional[np.ndarray] = None):
         self._pool = pool
-        self._buffer = pool.acquire()
-        
+        shape = data.shape if data is not None else None
+        dtype = data.dtype if data is not None else None
+        self._buffer = pool.acquire(shape, dtype, timeout=0)
+
         if data is not None and self._buffer is not None:
             # 复制数据到缓冲区
             np.copyto(self._buffer, data)
-    
-    def __del__(self):
-        """析构时自动释放回内存池"""
-        if hasattr(self, '_pool') and self._pool is not None and self._buffer is not None:
+
+    def release(self):
+        """提前归还缓冲区"""
+        if self._buffer is not None:
             self._pool.release(self._buffer)
-    
+            self._buffer = None
+
+    def __enter__(self) -> "PooledImageData":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
     @property
     def data(self) -> Optional[np.ndarray]:
         return self._buffer
+
+
+# 全局内存池(单例)
+_global_pool_lock = threading.Lock()
+_global_pool: Optional[ImageBufferPool] = None
+
+
+def get_global_pool(
+    max_size: int = 8, max_resident_bytes: int = DEFAULT_MAX_RESIDENT_BYTES
+) -> ImageBufferPool:
+    """获取全局图像内存池
+
+    ImageData、相机采集和分块执行的输出共用该内存池；参数只在首次创建时生效。
+
+    Args:
+        max_size: 每个尺寸类的缓冲区最大数量
+        max_resident_bytes: 常驻内存上限
+
+    Returns:
+        全局内存池
+    """
+    global _global_pool
+    with _global_pool_lock:
+        if _global_pool is None:
+            _global_pool = ImageBufferPool(
+                max_size=max_size,
+                buffer_shape=None,
+                max_resident_bytes=max_resident_bytes,
+            )
+        return _global_pool
+
+
+def allocate_image_buffer(shape: Tuple, dtype=np.uint8) -> np.ndarray:
+    """分配图像缓冲区
+
+    足够大的图像从全局内存池借用(不再被引用时自动归还)，
+    小图像或尺寸类耗尽时普通分配。内容未初始化。
+
+    Args:
+        shape: 图像形状
+        dtype: 数据类型
+
+    Returns:
+        缓冲区
+    """
+    dtype = np.dtype(dtype)
+    if int(np.prod(shape)) * dtype.itemsize >= POOL_MIN_BYTES:
+        buffer = get_global_pool().acquire(shape, dtype, timeout=0)
+        if buffer is not None:
+            return buffer
+    return np.empty(shape, dtype)
+
+
+def pooled_copy(
+    data: np.ndarray, pool: Optional[ImageBufferPool] = None
+) -> np.ndarray:
+    """把图像复制到内存池缓冲区
+
+    Args:
+        data: 源图像
+        pool: 内存池，None表示全局内存池(仅用于足够大的图像)
+
+    Returns:
+        拷贝
+    """
+    if pool is None:
+        buffer = allocate_image_buffer(data.shape, data.dtype)
+    else:
+        buffer = pool.acquire(data.shape, data.dtype, timeout=0)
+        if buffer is None:
+            return data.copy()
+    np.copyto(buffer, data)
+    return buffer
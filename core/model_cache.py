@@ -15,6 +15,8 @@ from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 class ModelCache:
     """
@@ -54,13 +56,17 @@ class ModelCache:
         """
         cache_key = cls._make_key(model_type, model_path)
         
-        if cache_key in cls._cache:
-            logger.debug(f"从缓存获取模型: {cache_key}")
-            return cls._cache[cache_key]
+        # 无锁快速路径：单次字典读取，避免并发clear时检查与读取之间被删除
+        model = cls._cache.get(cache_key, _MISSING)
+        if model is not _MISSING:
+            logger.debug("从缓存获取模型: %s", cache_key)
+            return model
         
+        # 不同模型可在各自的锁下并行创建，同一模型只创建一次
         with cls._get_lock(cache_key):
-            if cache_key in cls._cache:
-                return cls._cache[cache_key]
+            model = cls._cache.get(cache_key, _MISSING)
+            if model is not _MISSING:
+                return model
             
             logger.info(f"创建新模型实例: {cache_key}")
             try:
@@ -97,20 +103,27 @@ class ModelCache:
         Args:
             model_type: 如果指定，只清除该类型的模型；否则清除所有
         """
-        if model_type:
-            keys_to_remove = [k for k in cls._cache if k.startswith(f"{model_type}:")]
-            for key in keys_to_remove:
-                del cls._cache[key]
-                logger.info(f"已清除模型缓存: {key}")
-        else:
-            count = len(cls._cache)
-            cls._cache.clear()
-            logger.info(f"已清除所有模型缓存 ({count}个)")
+        with cls._lock:
+            if model_type:
+                keys_to_remove = [
+                    k
+                    for k in list(cls._cache)
+                    if k.startswith(f"{model_type}:")
+                ]
+                for key in keys_to_remove:
+                    cls._cache.pop(key, None)
+                    logger.info(f"已清除模型缓存: {key}")
+            else:
+                count = len(cls._cache)
+                cls._cache.clear()
+                logger.info(f"已清除所有模型缓存 ({count}个)")
     
     @classmethod
     def get_cache_info(cls) -> Dict[str, Any]:
         """获取缓存信息"""
+        with cls._lock:
+            keys = list(cls._cache)
         return {
-            "cached_models": list(cls._cache.keys()),
-            "cache_count": len(cls._cache),
+            "cached_models": keys,
+            "cache_count": len(keys),
         }
@@ -3,6 +3,7 @@
 提供统一的参数序列化和反序列化功能
 """
 
+import base64
 import json
 from abc import ABC, abstractmethod
 from enum import Enum
@@ -49,13 +50,21 @@ class ParameterSerializer:
     MAX_RECURSION_DEPTH = 100
     
     @classmethod
-    def serialize(cls, value: Any, _depth: int = 0, _visited: Optional[set] = None) -> Any:
+    def serialize(
+        cls,
+        value: Any,
+        _depth: int = 0,
+        _visited: Optional[set] = None,
+        arrays: Optional[Any] = None,
+    ) -> Any:
         """将参数值序列化为JSON兼容格式
         
         Args:
             value: 要序列化的值
             _depth: 当前递归深度（内部使用）
             _visited: 已访问对象集合（用于循环引用检测）
+            arrays: 数组仓库（core.solution_container.ArrayStore），
+                提供时numpy数组只保存引用，数据写入方案容器
             
         Returns:
             JSON兼容的序列化值
@@ -105,12 +114,15 @@ class ParameterSerializer:
         
         # 处理列表和元组
         if isinstance(value, (list, tuple)):
-            return [cls.serialize(item, _depth + 1, _visited) for item in value]
+            return [
+                cls.serialize(item, _depth + 1, _visited, arrays)
+                for item in value
+            ]
         
         # 处理字典
         if isinstance(value, dict):
             return {
-                key: cls.serialize(val, _depth + 1, _visited)
+                key: cls.serialize(val, _depth + 1, _visited, arrays)
                 for key, val in value.items()
             }
         
@@ -118,11 +130,19 @@ class ParameterSerializer:
         try:
             import numpy as np
             if isinstance(value, np.ndarray):
+                if arrays is not None:
+                    return {
+                        "__type__": "numpy_ref",
+                        "key": arrays.add(value),
+                        "shape": list(value.shape),
+                        "dtype": str(value.dtype)
+                    }
                 return {
                     "__type__": "numpy",
                     "shape": value.shape,
                     "dtype": str(value.dtype),
-                    "data": value.tobytes().hex()
+                    "encoding": "base64",
+                    "data": base64.b64encode(value.tobytes()).decode("ascii")
                 }
         except ImportError:
             pass
@@ -148,7 +168,8 @@ class ParameterSerializer:
         
         Args:
             value: 序列化的值
-            context: 上下文信息（用于还原复杂对象）
+            context: 上下文信息（用于还原复杂对象），
+                "arrays"为方案容器读取器，用于还原numpy_ref
             _depth: 当前递归深度（内部使用）
             
         Returns:
@@ -198,6 +219,10 @@ class ParameterSerializer:
                 # 还原numpy数组
                 return cls._restore_numpy(value)
             
+            elif type_mark == "numpy_ref":
+                # 还原方案容器中的数组（内存映射）
+                return cls._restore_numpy_ref(value, context)
+
             elif type_mark == "custom":
                 # 还原自定义类型
                 return cls._restore_custom(value)
@@ -264,10 +289,12 @@ class ParameterSerializer:
             import numpy as np
             shape = tuple(data["shape"])
             dtype = data["dtype"]
-            hex_data = data["data"]
             
-            # 从hex字符串还原字节
-            bytes_data = bytes.fromhex(hex_data)
+            # 旧版本使用hex编码，没有encoding字段
+            if data.get("encoding") == "base64":
+                bytes_data = base64.b64decode(data["data"])
+            else:
+                bytes_data = bytes.fromhex(data["data"])
             
             # 创建数组
             return np.frombuffer(bytes_data, dtype=dtype).reshape(shape)
@@ -275,6 +302,19 @@ class ParameterSerializer:
             logger.error(f"还原numpy数组失败: {e}")
             return None
     
+    @classmethod
+    def _restore_numpy_ref(cls, data: Dict, context: Dict) -> Any:
+        """从方案容器还原numpy数组"""
+        arrays = context.get("arrays")
+        if arrays is None:
+            logger.error(f"缺少方案容器，无法还原数组: {data.get('key')}")
+            return None
+        try:
+            return arrays.get(data["key"])
+        except Exception as e:
+            logger.error(f"还原容器数组失败: {e}")
+            return None
+
     @classmethod
     def _restore_custom(cls, data: Dict) -> Any:
         """还原自定义类型"""
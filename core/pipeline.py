@@ -17,6 +17,8 @@ import numpy as np
 from typing import Callable, Optional, List, Dict, Any
 from dataclasses import dataclass
 
+from core.tracing import record_span, trace_span
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +29,7 @@ class Frame:
     data: np.ndarray
     metadata: Dict[str, Any]
     timestamp: float
+    enqueue_ns: int = 0  # 放入阶段输入队列的时间(perf_counter_ns)，用于统计排队等待
 
 
 class PipelineStage:
@@ -72,9 +75,21 @@ class PipelineStage:
             try:
                 # 获取输入帧
                 frame = self.input_queue.get(timeout=0.1)
+                if frame.enqueue_ns:
+                    record_span(
+                        "queue_wait",
+                        "pipeline",
+                        frame.enqueue_ns,
+                        time.perf_counter_ns() - frame.enqueue_ns,
+                        stage=self.name,
+                        frame_id=frame.frame_id,
+                    )
                 
                 # 处理帧
-                result = self.process_func(frame)
+                with trace_span(
+                    self.name, "pipeline", frame_id=frame.frame_id
+                ):
+                    result = self.process_func(frame)
                 
                 # 放入输出队列
                 try:
@@ -191,7 +206,8 @@ class DeterministicPipeline:
                     frame_id=frame_id,
                     data=data,
                     metadata=metadata,
-                    timestamp=time.time()
+                    timestamp=time.time(),
+                    enqueue_ns=time.perf_counter_ns(),
                 )
                 
                 # 发送到第一个阶段
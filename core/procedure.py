@@ -12,17 +12,25 @@ Date: 2025-01-04
 import logging
 import os
 import sys
+import threading
 import time
+from abc import ABC, abstractmethod
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.tool_base import ToolBase, ToolRegistry
+from core.tracing import begin_span, trace_span
 from data.image_data import ImageData, ResultData
 from utils.exceptions import ProcedureException
 
+# 流程执行后端
+BACKEND_THREAD = "thread"
+BACKEND_PROCESS = "process"
+
 
 @dataclass
 class ToolConnection:
@@ -34,6 +42,35 @@ class ToolConnection:
     to_port: str = "InputImage"  # 目标端口
 
 
+class RemoteSegment(ABC):
+    """
+    在流程外执行的一段连续工具(多进程后端使用)
+
+    Procedure.run 执行到工具段的第一个工具时调用 run()，用返回的结果代替
+    段内工具的执行，再把段内工具的输出传递给后续工具；run() 抛出异常时
+    段内工具在本线程中执行。
+    """
+
+    @property
+    @abstractmethod
+    def tool_names(self) -> List[str]:
+        """段内工具名称(执行顺序中连续)"""
+
+    @abstractmethod
+    def run(
+        self, input_data: Optional[ImageData]
+    ) -> Tuple[Dict[str, Any], Optional[ImageData]]:
+        """
+        执行工具段
+
+        Args:
+            input_data: 执行到工具段时的当前输入
+
+        Returns:
+            (段内工具的结果, 段执行后的当前输入)
+        """
+
+
 class Procedure:
     """
     流程类，管理一组工具的执行
@@ -360,12 +397,17 @@ class Procedure:
 
         return result
 
-    def run(self, input_data: ImageData = None) -> Dict[str, Any]:
+    def run(
+        self,
+        input_data: ImageData = None,
+        remote: Optional[RemoteSegment] = None,
+    ) -> Dict[str, Any]:
         """
         执行流程
 
         Args:
             input_data: 输入图像数据（可选）
+            remote: 在流程外执行的工具段（可选，多进程后端使用）
 
         Returns:
             执行结果字典，包含每个工具的输出
@@ -383,23 +425,54 @@ class Procedure:
 
         start_time = time.time()
         results = {}
+        span = begin_span(self._name, "procedure")
 
         try:
-            self._logger.info(f"开始执行流程: {self._name}")
+            self._logger.debug("开始执行流程: %s", self._name)
 
             # 获取执行顺序
             execution_order = self.get_execution_order()
-            self._logger.debug(f"执行顺序: {execution_order}")
+            self._logger.debug("执行顺序: %s", execution_order)
+            debug = self._logger.isEnabledFor(logging.DEBUG)
 
             # 记录当前可用的输入数据
             current_input = input_data
+            remote_names = (
+                set(remote.tool_names) if remote is not None else set()
+            )
 
             # 执行每个工具
             for tool_name in execution_order:
+                if tool_name in remote_names:
+                    if remote is None:
+                        continue
+                    segment, remote = remote, None
+                    try:
+                        segment_results, segment_output = segment.run(
+                            current_input
+                        )
+                    except Exception as e:
+                        self._logger.warning(
+                            f"工具段外部执行失败，在本线程中执行: {self._name}, {e}"
+                        )
+                        remote_names = set()
+                    else:
+                        for name, item in segment_results.items():
+                            results[name] = item
+                            if isinstance(item, dict) and "error" not in item:
+                                self._propagate_output(
+                                    name,
+                                    item.get("output"),
+                                    item.get("result"),
+                                )
+                        if segment_output is not None:
+                            current_input = segment_output
+                        continue
+
                 tool = self._tools[tool_name]
 
                 if not tool.is_enabled:
-                    self._logger.debug(f"工具已禁用，跳过: {tool_name}")
+                    self._logger.debug("工具已禁用，跳过: %s", tool_name)
                     continue
 
                 # 处理输入数据：
@@ -410,14 +483,22 @@ class Procedure:
                 # 这确保了即使工具之间没有连接，每个工具都能获得输入数据
                 if not has_connections and current_input is not None:
                     tool.set_input(current_input)
-                    self._logger.debug(
-                        f"为工具 {tool_name} 设置当前可用输入数据: {current_input.shape if current_input.is_valid else '无效'}"
-                    )
+                    if debug:
+                        self._logger.debug(
+                            "为工具 %s 设置当前可用输入数据: %s",
+                            tool_name,
+                            (
+                                current_input.shape
+                                if current_input.is_valid
+                                else "无效"
+                            ),
+                        )
 
                 # 3. 检查工具是否有输入数据
-                self._logger.debug(
-                    f"工具 {tool_name} 输入状态: 有输入={tool.has_input()}"
-                )
+                if debug:
+                    self._logger.debug(
+                        "工具 %s 输入状态: 有输入=%s", tool_name, tool.has_input()
+                    )
 
                 # 执行工具
                 try:
@@ -430,10 +511,14 @@ class Procedure:
                         results[tool_name] = {
                             "output": output,
                             "result": result,
+                            "execution_time": tool.execution_time,
                         }
-                        self._logger.debug(
-                            f"工具 {tool_name} 输出: {output.shape if output.is_valid else '无效'}"
-                        )
+                        if debug:
+                            self._logger.debug(
+                                "工具 %s 输出: %s",
+                                tool_name,
+                                output.shape if output.is_valid else "无效",
+                            )
 
                         # 更新当前可用的输入数据为该工具的输出
                         current_input = output
@@ -448,8 +533,10 @@ class Procedure:
                     results[tool_name] = {"error": str(e), "result": None}
 
             self._execution_time = time.time() - start_time
-            self._logger.info(
-                f"流程执行完成: {self._name}, 耗时={self._execution_time*1000:.2f}ms"
+            self._logger.debug(
+                "流程执行完成: %s, 耗时=%.2fms",
+                self._name,
+                self._execution_time * 1000,
             )
 
             return results
@@ -463,6 +550,7 @@ class Procedure:
 
         finally:
             self._is_running = False
+            span.end(ok=self._last_error is None)
 
     def _propagate_output(self, tool_name: str, output: Optional[ImageData],
                           result: Optional[ResultData] = None):
@@ -478,13 +566,19 @@ class Procedure:
             return
 
         connections = self.get_connections_from(tool_name)
-        for conn in connections:
-            target_tool = self._tools.get(conn.to_tool)
-            if target_tool is not None:
-                target_tool.set_input(output, conn.to_port)
-                # 同时传递结果数据，供通讯工具等使用
-                if result is not None:
-                    target_tool.set_upstream_result(result)
+        with trace_span(
+            "propagate",
+            "procedure",
+            tool=tool_name,
+            connections=len(connections),
+        ):
+            for conn in connections:
+                target_tool = self._tools.get(conn.to_tool)
+                if target_tool is not None:
+                    target_tool.set_input(output, conn.to_port)
+                    # 同时传递结果数据，供通讯工具等使用
+                    if result is not None:
+                        target_tool.set_upstream_result(result)
 
     def reset(self):
         """重置流程状态"""
@@ -534,6 +628,80 @@ class Procedure:
 
         return new_procedure
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出流程配置(与方案文件中的流程格式相同)
+
+        Returns:
+            包含流程名称、工具(类别/名称/参数)和连接的字典
+        """
+        return {
+            "name": self._name,
+            "is_enabled": self._is_enabled,
+            "tools": [
+                {
+                    "category": tool.tool_category,
+                    "name": tool.tool_name,
+                    "display_name": tool.name,
+                    "params": tool.get_all_params(),
+                    "position": tool.position,
+                    "is_enabled": tool.is_enabled,
+                }
+                for tool in self._tools.values()
+            ],
+            "connections": [
+                {
+                    "from": conn.from_tool,
+                    "to": conn.to_tool,
+                    "from_port": conn.from_port,
+                    "to_port": conn.to_port,
+                }
+                for conn in self._connections
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Procedure":
+        """
+        由 to_dict 导出的配置重建流程(工具通过 ToolRegistry 创建)
+
+        Args:
+            data: 流程配置
+
+        Returns:
+            新的流程
+
+        Raises:
+            ProcedureException: 工具无法创建
+        """
+        procedure = cls(data.get("name", "Procedure"))
+        procedure.is_enabled = data.get("is_enabled", True)
+
+        for tool_data in data.get("tools", []):
+            category = tool_data.get("category")
+            tool_name = tool_data.get("name")
+            try:
+                tool = ToolRegistry.create_tool(
+                    category, tool_name, tool_data.get("display_name")
+                )
+            except Exception as e:
+                raise ProcedureException(
+                    f"创建工具失败: {category}.{tool_name}, {e}"
+                )
+            tool.restore_params(tool_data.get("params", {}))
+            tool.position = tool_data.get("position")
+            tool.is_enabled = tool_data.get("is_enabled", True)
+            procedure.add_tool(tool)
+
+        for conn_data in data.get("connections", []):
+            procedure.connect(
+                conn_data.get("from"),
+                conn_data.get("to"),
+                conn_data.get("from_port", "OutputImage"),
+                conn_data.get("to_port", "InputImage"),
+            )
+        return procedure
+
     def __repr__(self) -> str:
         return f"Procedure(name={self._name}, tools={self.tool_count}, connections={len(self._connections)})"
 
@@ -544,12 +712,27 @@ class Procedure:
 class ProcedureManager:
     """
     流程管理器，管理多个流程
+
+    默认按添加顺序依次运行流程；set_max_workers(n) 后相互独立的流程
+    (例如各相机工位各自的流程)在最多n个线程上并发运行。
+    set_backend("process") 后每个流程在各自的常驻工作进程中运行
+    (见 core.process_backend)，不能跨进程的流程仍按线程方式运行。
     """
 
     def __init__(self):
         self._procedures: Dict[str, Procedure] = {}
         self._logger = logging.getLogger("ProcedureManager")
 
+        # 并发执行(0或1表示顺序执行)
+        self._max_workers = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._last_timing: Dict[str, Any] = {}
+
+        # 执行后端
+        self._backend = BACKEND_THREAD
+        self._process_backend = None
+
     @property
     def procedure_count(self) -> int:
         """获取流程数量"""
@@ -607,22 +790,189 @@ class ProcedureManager:
         """
         return self._procedures.get(name)
 
-    def run_all(self, input_data: ImageData = None) -> Dict[str, Any]:
+    @property
+    def max_workers(self) -> int:
+        """并发运行流程的线程数，0或1表示顺序执行"""
+        return self._max_workers
+
+    def set_max_workers(self, max_workers: int):
+        """
+        设置并发运行流程的线程数
+
+        流程之间不能共享工具或互相依赖输出；共享的单例(模型缓存、通讯管理器)是线程安全的。
+
+        Args:
+            max_workers: 线程数，0或1表示顺序执行
+        """
+        max_workers = max(0, int(max_workers))
+        if max_workers == self._max_workers:
+            return
+        self._max_workers = max_workers
+        self._shutdown_executor()
+
+    @property
+    def backend(self) -> str:
+        """执行后端: thread(线程) / process(工作进程)"""
+        return self._backend
+
+    def set_backend(self, backend: str):
+        """
+        设置执行后端
+
+        process 后端中每个流程在各自的常驻工作进程中运行，帧经共享内存传递；
+        含有相机、通讯等不能跨进程的工具的流程回退到线程执行。
+
+        Args:
+            backend: thread 或 process
+
+        Raises:
+            ValueError: 未知的后端
+        """
+        if backend not in (BACKEND_THREAD, BACKEND_PROCESS):
+            raise ValueError(f"未知的执行后端: {backend}")
+        if backend == self._backend:
+            return
+        self._backend = backend
+        self._shutdown_process_backend()
+
+    def run_all(
+        self,
+        input_data: ImageData = None,
+        inputs: Optional[Dict[str, ImageData]] = None,
+    ) -> Dict[str, Any]:
         """
         运行所有流程
 
         Args:
             input_data: 输入图像数据
+            inputs: 按流程名称指定的输入，未指定的流程使用input_data
 
         Returns:
-            所有流程的执行结果
-        """
+            所有流程的执行结果(按流程添加顺序)
+        """
+        inputs = inputs or {}
+        procedures = [p for p in self._procedures.values() if p.is_enabled]
+        frames = [inputs.get(p.name, input_data) for p in procedures]
+        use_process = self._backend == BACKEND_PROCESS and len(procedures) > 0
+        concurrent = self._max_workers > 1 and len(procedures) > 1
+
+        start = time.perf_counter()
+        if use_process:
+            outcomes = self._get_process_backend().run(
+                procedures, frames, self._run_on_threads
+            )
+        else:
+            outcomes = self._run_on_threads(procedures, frames)
+        total = time.perf_counter() - start
+
         results = {}
-        for procedure in self._procedures.values():
-            if procedure.is_enabled:
-                results[procedure.name] = procedure.run(input_data)
+        timing = {}
+        for procedure, (result, elapsed) in zip(procedures, outcomes):
+            results[procedure.name] = result
+            timing[procedure.name] = elapsed * 1000
+        self._last_timing = {
+            "mode": "concurrent" if concurrent else "sequential",
+            "workers": (
+                min(self._max_workers, len(procedures)) if concurrent else 1
+            ),
+            "total_ms": total * 1000,
+            "sum_ms": sum(timing.values()),
+            "procedures": timing,
+        }
+        if use_process:
+            stats = self._process_backend.get_stats()
+            self._last_timing.update(
+                {
+                    "mode": "process",
+                    "workers": len(stats["workers"]),
+                    "fallback": stats["fallback"],
+                    "errors": stats["errors"],
+                }
+            )
         return results
 
+    def _run_on_threads(
+        self, procedures: List[Procedure], frames: List[Optional[ImageData]]
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """在当前线程顺序运行，或设置了并发线程数时在线程池上运行"""
+        if self._max_workers > 1 and len(procedures) > 1:
+            executor = self._get_executor()
+            futures = [
+                executor.submit(self._run_timed, p, frame)
+                for p, frame in zip(procedures, frames)
+            ]
+            return [future.result() for future in futures]
+        return [
+            self._run_timed(p, frame) for p, frame in zip(procedures, frames)
+        ]
+
+    @staticmethod
+    def _run_timed(procedure: Procedure, input_data: Optional[ImageData]):
+        """运行单个流程并计时(流程内部已捕获异常)"""
+        start = time.perf_counter()
+        result = procedure.run(input_data)
+        return result, time.perf_counter() - start
+
+    def get_last_timing(self) -> Dict[str, Any]:
+        """
+        获取最近一次run_all的耗时
+
+        Returns:
+            {"mode": "concurrent"/"sequential"/"process", "workers": 线程数或工作进程数,
+             "total_ms": 总墙钟耗时, "sum_ms": 各流程耗时之和,
+             "procedures": {流程名: 墙钟耗时ms}}；
+            process 模式另有 "fallback": {回退到线程的流程名: 原因}
+            和 "errors": {工作进程加载失败的流程名: 错误}
+        """
+        return dict(self._last_timing)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="Procedure",
+                )
+            return self._executor
+
+    def _get_process_backend(self):
+        with self._executor_lock:
+            if self._process_backend is None:
+                from core.process_backend import ProcessProcedureBackend
+
+                self._process_backend = ProcessProcedureBackend()
+            return self._process_backend
+
+    def get_backend_stats(self) -> Dict[str, Any]:
+        """
+        获取执行后端状态
+
+        Returns:
+            后端名称；process 后端另有工作进程、回退流程和共享帧统计
+        """
+        stats = {"backend": self._backend}
+        backend = self._process_backend
+        if backend is not None:
+            stats.update(backend.get_stats())
+        return stats
+
+    def shutdown(self):
+        """停止并发执行线程和工作进程"""
+        self._shutdown_executor()
+        self._shutdown_process_backend()
+
+    def _shutdown_executor(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _shutdown_process_backend(self):
+        with self._executor_lock:
+            backend, self._process_backend = self._process_backend, None
+        if backend is not None:
+            backend.shutdown()
+
     def reset_all(self):
         """重置所有流程"""
         for procedure in self._procedures.values():
@@ -633,10 +983,14 @@ class ProcedureManager:
         for procedure in self._procedures.values():
             procedure.clear()
         self._procedures.clear()
+        self.shutdown()
 
     def get_info(self) -> Dict[str, Any]:
         """获取管理器信息"""
         return {
             "procedure_count": self.procedure_count,
+            "max_workers": self._max_workers,
+            "backend": self._backend,
+            "last_timing": self.get_last_timing(),
             "procedures": [p.get_info() for p in self._procedures.values()],
         }
@@ -0,0 +1,1094 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程流程执行模块
+
+纯Python部分较重的工具(结果格式化、匹配结果收集、Hu矩循环等)在线程中
+会因GIL串行。ProcessProcedureBackend 为每个流程启动一个常驻工作进程：
+
+- 图像源、通讯等不能跨进程的工具(PROCESS_SAFE 为 False 或未在工具注册表中
+  登记)留在主进程：流程按执行顺序取最长的一段连续可跨进程工具放到工作进程，
+  其前后的工具在主进程中执行(如 图像源 -> [滤波 -> 匹配 -> 斑点] -> 发送数据)
+- 工具段配置只在首次运行或配置变化时发送，工作进程在本地重建工具并预热，
+  模型在每个工作进程中只加载一次
+- 帧写入 multiprocessing.shared_memory 的环形槽位，同一帧只写一次，
+  各工作进程按句柄零拷贝读取；进程间只传递句柄和不含图像的 ResultData
+- 输出图像为输入帧视图时，在主进程中由输入帧和叠加图元重建；工具自己
+  生成的图像留在工作进程中(结果中 output 为 None)，连接到主进程工具的
+  输出图像才回传
+- 工作进程在运行中修改的参数(如示教的基准位姿)回传主进程的工具
+- 没有可跨进程的工具、配置无法序列化的流程回退到线程执行；工作进程加载
+  失败记录为错误(get_stats()["errors"])，加载时退出的工作进程间隔一段时间
+  后重新启动
+
+使用示例：
+    manager = ProcedureManager()
+    manager.set_backend("process")
+    results = manager.run_all(image)
+    print(manager.get_last_timing()["fallback"])
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _PROJECT_ROOT)
+
+import numpy as np
+
+from core.procedure import Procedure, RemoteSegment
+from core.tool_base import ToolBase, ToolRegistry
+from data.image_data import ImageData, ResultData
+from utils.exceptions import ProcedureException
+
+_logger = logging.getLogger("ProcessBackend")
+
+# 共享内存槽位按页对齐
+_PAGE_SIZE = 4096
+
+# 等待工作进程回复时检查进程存活的间隔(秒)
+_POLL_INTERVAL = 0.1
+
+# 工作进程加载时退出后，间隔多久重新启动(秒)
+RESTART_DELAY = 10.0
+
+# 工作进程中代表主进程输入的工具名称
+_SEGMENT_INPUT = "__segment_input__"
+
+# 启动工作进程时临时调整 sys.path
+_START_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class FrameHandle:
+    """共享内存中一帧的句柄(跨进程传递)"""
+
+    segment: str
+    slot: int
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+    timestamp: float
+    camera_id: Optional[str] = None
+
+
+class SharedFrameRing:
+    """
+    共享内存帧环形缓冲(主进程写入，工作进程只读)
+
+    共享内存段分为 slots 个等大的槽位，写入时占用一个空闲槽位，
+    所有读取该帧的工作进程回复后释放。帧大于槽位时，等所有槽位释放后
+    按新的帧大小重建共享内存段(句柄带有段名，工作进程据此重新映射)。
+    """
+
+    def __init__(self, slots: int = 4):
+        """
+        初始化环形缓冲
+
+        Args:
+            slots: 槽位数(同时在途的帧数上限)
+        """
+        self._slots = max(1, int(slots))
+        self._slot_bytes = 0
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._free: List[int] = []
+        self._cond = threading.Condition()
+        self._writes = 0
+        self._bytes_written = 0
+
+    @property
+    def slots(self) -> int:
+        """槽位数"""
+        return self._slots
+
+    @property
+    def slot_bytes(self) -> int:
+        """每个槽位的字节数"""
+        return self._slot_bytes
+
+    def write(
+        self, image: ImageData, timeout: Optional[float] = None
+    ) -> FrameHandle:
+        """
+        把一帧写入空闲槽位
+
+        Args:
+            image: 图像数据
+            timeout: 等待空闲槽位的超时(秒)，None表示一直等待
+
+        Returns:
+            帧句柄
+
+        Raises:
+            TimeoutError: 等待空闲槽位超时
+        """
+        data = image.data
+        with self._cond:
+            if data.nbytes > self._slot_bytes:
+                if self._segment is not None and not self._cond.wait_for(
+                    lambda: len(self._free) == self._slots, timeout
+                ):
+                    raise TimeoutError("等待共享帧槽位释放超时")
+                self._allocate(data.nbytes)
+            if not self._cond.wait_for(lambda: self._free, timeout):
+                raise TimeoutError("共享帧槽位已满")
+            slot = self._free.pop(0)
+            segment = self._segment
+            offset = slot * self._slot_bytes
+            self._writes += 1
+            self._bytes_written += data.nbytes
+
+        target = np.ndarray(
+            data.shape, data.dtype, buffer=segment.buf, offset=offset
+        )
+        np.copyto(target, data)
+        del target
+        return FrameHandle(
+            segment=segment.name,
+            slot=slot,
+            offset=offset,
+            shape=tuple(data.shape),
+            dtype=data.dtype.str,
+            timestamp=image.timestamp,
+            camera_id=image.camera_id,
+        )
+
+    def release(self, handle: FrameHandle):
+        """释放帧占用的槽位"""
+        with self._cond:
+            if (
+                self._segment is not None
+                and handle.segment == self._segment.name
+            ):
+                self._free.append(handle.slot)
+                self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        with self._cond:
+            return {
+                "slots": self._slots,
+                "slot_bytes": self._slot_bytes,
+                "free_slots": len(self._free),
+                "writes": self._writes,
+                "bytes_written": self._bytes_written,
+            }
+
+    def reserve(self, slots: int):
+        """
+        确保至少有 slots 个槽位(没有在途帧时调用)
+
+        Args:
+            slots: 槽位数
+        """
+        with self._cond:
+            if slots > self._slots:
+                self._release_segment()
+                self._slots = slots
+                self._slot_bytes = 0
+
+    def close(self):
+        """释放共享内存段"""
+        with self._cond:
+            self._release_segment()
+            self._slot_bytes = 0
+
+    def _allocate(self, nbytes: int):
+        """按帧大小重建共享内存段(调用方持有锁)"""
+        self._release_segment()
+        self._slot_bytes = -(-nbytes // _PAGE_SIZE) * _PAGE_SIZE
+        self._segment = shared_memory.SharedMemory(
+            create=True, size=self._slot_bytes * self._slots
+        )
+        self._free = list(range(self._slots))
+
+    def _release_segment(self):
+        """关闭并删除当前共享内存段(调用方持有锁)"""
+        segment, self._segment = self._segment, None
+        self._free = []
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+
+class _SegmentReader:
+    """工作进程中按段名映射共享内存，把句柄还原为零拷贝的 ImageData"""
+
+    def __init__(self):
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+
+    def frame(self, handle: FrameHandle) -> ImageData:
+        """句柄对应的帧(像素直接引用共享内存)"""
+        segment = self._segments.get(handle.segment)
+        if segment is None:
+            # 主进程重建了共享内存段，关闭旧段
+            self.close()
+            segment = shared_memory.SharedMemory(name=handle.segment)
+            self._segments[handle.segment] = segment
+        data = np.ndarray(
+            handle.shape,
+            np.dtype(handle.dtype),
+            buffer=segment.buf,
+            offset=handle.offset,
+        )
+        return ImageData(
+            data=data,
+            timestamp=handle.timestamp,
+            camera_id=handle.camera_id,
+            _copy=False,
+        )
+
+    def close(self):
+        """关闭已映射的段(仍被工具引用的段保留到下次)"""
+        for name, segment in list(self._segments.items()):
+            try:
+                segment.close()
+            except BufferError:
+                continue
+            del self._segments[name]
+
+
+def _snapshot_params(procedure: Procedure) -> Dict[str, Dict[str, Any]]:
+    """各工具参数的快照"""
+    return {tool.name: dict(tool.get_all_params()) for tool in procedure.tools}
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    """参数值是否相同(支持numpy数组)"""
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return (
+            isinstance(a, np.ndarray)
+            and isinstance(b, np.ndarray)
+            and np.array_equal(a, b)
+        )
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _changed_params(
+    procedure: Procedure, snapshot: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """运行中被工具修改的参数，并更新快照"""
+    changed = {}
+    for tool in procedure.tools:
+        before = snapshot.setdefault(tool.name, {})
+        for key, value in tool.get_all_params().items():
+            if key.startswith("__"):
+                continue
+            if key not in before or not _same_value(before[key], value):
+                changed.setdefault(tool.name, {})[key] = value
+                before[key] = value
+    return changed
+
+
+class _SegmentInput(ToolBase):
+    """工作进程中代表主进程工具输出的输入工具(不在工具注册表中登记)"""
+
+    tool_name = "SegmentInput"
+    tool_category = "Internal"
+
+    def _run_impl(self):
+        return self._input_data
+
+
+@dataclass
+class OffloadPlan:
+    """流程中放到工作进程执行的工具段"""
+
+    segment: List[str]  # 段内工具(执行顺序中连续)
+    source: Optional[str]  # 向工具段输入图像的主进程工具
+    inputs: List[Tuple[str, str]]  # 主进程工具连接到的段内(工具, 端口)
+    export: List[str]  # 输出连接到主进程工具的段内工具
+    export_last: bool  # 段后还有主进程工具，需要回传段执行后的当前输入
+
+    def spec(self, procedure: Procedure) -> Dict[str, Any]:
+        """工作进程重建工具段的配置"""
+        data = procedure.to_dict()
+        names = set(self.segment)
+        data["tools"] = [
+            t for t in data["tools"] if t["display_name"] in names
+        ]
+        data["connections"] = [
+            c
+            for c in data["connections"]
+            if c["from"] in names and c["to"] in names
+        ]
+        return {
+            "procedure": data,
+            "inputs": self.inputs,
+            "export": self.export,
+            "export_last": self.export_last,
+        }
+
+
+def tool_unsafe_reason(tool: ToolBase) -> Optional[str]:
+    """
+    工具不能在工作进程中执行的原因
+
+    Args:
+        tool: 工具
+
+    Returns:
+        原因，可以跨进程执行时为 None
+    """
+    if not tool.PROCESS_SAFE:
+        return f"工具 {tool.name} 持有主进程资源"
+    try:
+        tool_class = ToolRegistry.get_tool_class(
+            tool.tool_category, tool.tool_name
+        )
+    except Exception:
+        tool_class = None
+    if tool_class is not type(tool):
+        return f"工具 {tool.name} 未在工具注册表中登记"
+    return None
+
+
+def plan_offload(
+    procedure: Procedure,
+) -> Tuple[Optional[OffloadPlan], Optional[str]]:
+    """
+    选择流程中放到工作进程执行的工具段
+
+    取执行顺序中最长的一段连续可跨进程工具，其前后的工具在主进程中执行。
+
+    Args:
+        procedure: 流程
+
+    Returns:
+        (工具段, None)；没有可用的工具段时为 (None, 原因)
+    """
+    order = procedure.get_execution_order()
+    reasons = [tool_unsafe_reason(procedure.get_tool(name)) for name in order]
+    best = (0, 0)
+    start = None
+    for index, reason in enumerate(reasons + ["end"]):
+        if reason is None:
+            if start is None:
+                start = index
+        elif start is not None:
+            if index - start > best[1] - best[0]:
+                best = (start, index)
+            start = None
+    if best[1] == best[0]:
+        return None, next((r for r in reasons if r), "流程中没有工具")
+
+    segment = order[best[0] : best[1]]
+    names = set(segment)
+    incoming = [
+        c
+        for c in procedure.connections
+        if c.to_tool in names and c.from_tool not in names
+    ]
+    sources = sorted({c.from_tool for c in incoming})
+    if len(sources) > 1:
+        return None, f"工具段有多个主进程输入: {', '.join(sources)}"
+    export = [
+        name
+        for name in segment
+        if any(
+            c.to_tool not in names
+            for c in procedure.get_connections_from(name)
+        )
+    ]
+    plan = OffloadPlan(
+        segment=segment,
+        source=sources[0] if sources else None,
+        inputs=[(c.to_tool, c.to_port) for c in incoming],
+        export=export,
+        export_last=best[1] < len(order),
+    )
+    return plan, None
+
+
+def _build_segment(spec: Dict[str, Any]) -> Procedure:
+    """在工作进程中重建工具段，主进程工具的输入由输入工具代替"""
+    procedure = Procedure.from_dict(spec["procedure"])
+    if spec["inputs"]:
+        procedure.add_tool(_SegmentInput(_SEGMENT_INPUT))
+        for to_tool, to_port in spec["inputs"]:
+            procedure.connect(_SEGMENT_INPUT, to_tool, "OutputImage", to_port)
+    return procedure
+
+
+def _pack_results(
+    results: Dict[str, Any],
+    frame: Optional[ImageData],
+    export: Sequence[str] = (),
+    export_last: bool = False,
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    把工具段结果转换为跨进程传递的形式
+
+    输出图像为输入帧视图时只传叠加图元；连接到主进程工具的输出(以及需要时
+    段内最后一个输出)传图像本身，其余只传形状；结果去掉图像。
+
+    Returns:
+        (结果, 段内最后一个有输出的工具)
+    """
+    last = None
+    for tool_name, item in results.items():
+        if (
+            tool_name != _SEGMENT_INPUT
+            and isinstance(item, dict)
+            and item.get("output") is not None
+        ):
+            last = tool_name
+
+    packed = {}
+    for tool_name, item in results.items():
+        if tool_name == _SEGMENT_INPUT:
+            continue
+        if not isinstance(item, dict):
+            packed[tool_name] = item
+            continue
+        entry = {
+            key: value
+            for key, value in item.items()
+            if key not in ("output", "result")
+        }
+        result = item.get("result")
+        entry["result"] = (
+            result.without_images() if result is not None else None
+        )
+
+        output = item.get("output")
+        if output is not None:
+            if (
+                frame is not None
+                and output.data is not None
+                and output.shape == frame.shape
+                and np.may_share_memory(output.data, frame.data)
+            ):
+                entry["overlay"] = output.overlay
+            elif tool_name in export or (export_last and tool_name == last):
+                entry["image"] = (
+                    output.data,
+                    output.overlay,
+                    output.timestamp,
+                    output.camera_id,
+                )
+            else:
+                entry["output_shape"] = output.shape
+        packed[tool_name] = entry
+    return packed, last
+
+
+def _dumps(message: Tuple) -> bytes:
+    """序列化回复；结果中无法序列化的值替换为其字符串表示"""
+    try:
+        return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        pass
+    for entry in message[1].values():
+        result = entry.get("result") if isinstance(entry, dict) else None
+        if result is None:
+            continue
+        for key, value in result.get_all_values().items():
+            try:
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                result.set_value(key, repr(value))
+        if result.has_overlay:
+            try:
+                pickle.dumps(result.overlay, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                result.overlay = None
+    return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _worker_main(connection):
+    """
+    工作进程入口
+
+    消息：("load", 工具段配置bytes) -> ("loaded", 错误或None)；
+    ("run", 帧句柄) -> ("done", 结果, 最后有输出的工具, 修改的参数, 耗时)
+    或 ("error", 消息)；("stop",) 退出。
+    """
+    reader = _SegmentReader()
+    procedure: Optional[Procedure] = None
+    spec: Dict[str, Any] = {}
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            command = message[0]
+            if command == "stop":
+                break
+
+            if command == "load":
+                try:
+                    spec = pickle.loads(message[1])
+                    procedure = _build_segment(spec)
+                    for tool in procedure.tools:
+                        tool.warmup()
+                    snapshot = _snapshot_params(procedure)
+                    connection.send(("loaded", None))
+                except Exception as e:
+                    procedure = None
+                    connection.send(("loaded", str(e)))
+                continue
+
+            start = time.perf_counter()
+            try:
+                if procedure is None:
+                    raise ProcedureException("工作进程未加载流程")
+                handle = message[1]
+                frame = reader.frame(handle) if handle is not None else None
+                results = procedure.run(frame)
+                packed, last = _pack_results(
+                    results, frame, spec["export"], spec["export_last"]
+                )
+                data = _dumps(
+                    (
+                        "done",
+                        packed,
+                        last,
+                        _changed_params(procedure, snapshot),
+                        time.perf_counter() - start,
+                    )
+                )
+            except Exception as e:
+                data = pickle.dumps(("error", str(e)))
+            connection.send_bytes(data)
+    finally:
+        procedure = None
+        reader.close()
+
+
+def _worker_sys_path(path: Sequence[str]) -> List[str]:
+    """
+    工作进程启动时使用的 sys.path
+
+    spawn 的子进程按启动时的 sys.path 导入本模块。项目内的一些包会把自己的
+    目录插到 sys.path 最前(如 modules/cpu_optimization，其下有同名的 core 和
+    utils 包，utils 还会盖过项目根目录下的命名空间包)，因此子进程只保留
+    项目根目录和项目之外的路径，项目根目录排在最前。
+    """
+    entries = [_PROJECT_ROOT]
+    for entry in path:
+        full = os.path.abspath(entry or os.curdir)
+        if full == _PROJECT_ROOT or full.startswith(_PROJECT_ROOT + os.sep):
+            continue
+        entries.append(entry)
+    return entries
+
+
+class WorkerLostError(ProcedureException):
+    """工作进程退出或通信中断"""
+
+
+class ProcedureWorker:
+    """
+    流程的常驻工作进程(主进程侧)
+
+    每个流程固定在同一个工作进程中顺序执行，工具状态在帧之间保持。
+    """
+
+    def __init__(self, procedure: Procedure, context):
+        """
+        初始化工作进程句柄(首次 sync 时启动进程)
+
+        Args:
+            procedure: 主进程中的流程
+            context: multiprocessing 上下文
+        """
+        self._procedure = procedure
+        self._context = context
+        self._process = None
+        self._connection = None
+        self._spec: Optional[bytes] = None
+        self._loads = 0
+
+    @property
+    def procedure(self) -> Procedure:
+        """主进程中的流程"""
+        return self._procedure
+
+    @property
+    def pid(self) -> Optional[int]:
+        """工作进程ID"""
+        return self._process.pid if self._process is not None else None
+
+    @property
+    def load_count(self) -> int:
+        """向工作进程发送流程配置的次数"""
+        return self._loads
+
+    def is_alive(self) -> bool:
+        """工作进程是否存活"""
+        return self._process is not None and self._process.is_alive()
+
+    def sync(self, spec: bytes):
+        """
+        确保工作进程运行且工具段配置与主进程一致
+
+        Args:
+            spec: pickle 后的工具段配置
+
+        Raises:
+            ProcedureException: 工作进程加载流程失败
+            WorkerLostError: 工作进程退出
+        """
+        if not self.is_alive():
+            self._start()
+        if spec == self._spec:
+            return
+        self._send(("load", spec))
+        status, error = self._receive(raw=False)
+        self._loads += 1
+        if error:
+            raise ProcedureException(f"工作进程加载流程失败: {error}")
+        self._spec = spec
+
+    def mark_synced(self, spec: bytes):
+        """主进程已同步了工作进程回传的参数，记录当前配置避免重新加载"""
+        self._spec = spec
+
+    def submit(self, handle: Optional[FrameHandle]):
+        """发送一帧"""
+        self._send(("run", handle))
+
+    def collect(self) -> Tuple:
+        """等待一帧的执行结果"""
+        return pickle.loads(self._receive(raw=True))
+
+    def stop(self, timeout: float = 2.0):
+        """停止工作进程"""
+        process, connection = self._process, self._connection
+        self._process = self._connection = None
+        self._spec = None
+        if connection is not None:
+            try:
+                connection.send(("stop",))
+            except (OSError, ValueError):
+                pass
+        if process is not None:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+        if connection is not None:
+            connection.close()
+
+    def _start(self):
+        """启动工作进程"""
+        self.stop()
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child,),
+            name=f"Procedure-{self._procedure.name}",
+            daemon=True,
+        )
+        with _START_LOCK:
+            saved = list(sys.path)
+            sys.path[:] = _worker_sys_path(saved)
+            try:
+                process.start()
+            finally:
+                sys.path[:] = saved
+        child.close()
+        self._process, self._connection = process, parent
+        _logger.info(
+            f"启动流程工作进程: {self._procedure.name} (pid={process.pid})"
+        )
+
+    def _send(self, message: Tuple):
+        try:
+            self._connection.send(message)
+        except (OSError, ValueError, AttributeError) as e:
+            raise WorkerLostError(
+                f"工作进程通信中断: {self._procedure.name}, {e}"
+            )
+
+    def _receive(self, raw: bool):
+        """等待回复，期间检查工作进程是否退出"""
+        try:
+            while not self._connection.poll(_POLL_INTERVAL):
+                if not self._process.is_alive():
+                    raise WorkerLostError(
+                        f"工作进程已退出: {self._procedure.name} "
+                        f"(exitcode={self._process.exitcode})"
+                    )
+            return (
+                self._connection.recv_bytes()
+                if raw
+                else self._connection.recv()
+            )
+        except (EOFError, OSError, AttributeError) as e:
+            raise WorkerLostError(
+                f"工作进程通信中断: {self._procedure.name}, {e}"
+            )
+
+
+class _WorkerSegment(RemoteSegment):
+    """在工作进程中执行的工具段(由 Procedure.run 在主进程线程中调用)"""
+
+    def __init__(
+        self,
+        backend: "ProcessProcedureBackend",
+        worker: ProcedureWorker,
+        plan: OffloadPlan,
+        handles: Dict[int, Optional[FrameHandle]],
+    ):
+        self._backend = backend
+        self._worker = worker
+        self._plan = plan
+        self._handles = handles
+        self.lost: Optional[str] = None  # 执行中工作进程退出的原因
+
+    @property
+    def tool_names(self) -> List[str]:
+        return self._plan.segment
+
+    def run(
+        self, input_data: Optional[ImageData]
+    ) -> Tuple[Dict[str, Any], Optional[ImageData]]:
+        procedure = self._worker.procedure
+        frame = input_data
+        if self._plan.source is not None:
+            frame = procedure.get_tool(self._plan.source).get_output()
+        try:
+            self._worker.submit(
+                self._backend._handle_for(frame, self._handles)
+            )
+            reply = self._worker.collect()
+        except WorkerLostError as e:
+            self.lost = str(e)
+            raise
+        if reply[0] == "error":
+            raise ProcedureException(reply[1])
+
+        _, packed, last, changed, _ = reply
+        results = ProcessProcedureBackend._apply(procedure, frame, packed)
+        if changed:
+            for tool_name, params in changed.items():
+                tool = procedure.get_tool(tool_name)
+                if tool is not None:
+                    for key, value in params.items():
+                        tool.set_param(key, value)
+            self._worker.mark_synced(
+                pickle.dumps(
+                    self._plan.spec(procedure),
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            )
+        output = results[last]["output"] if last in results else None
+        return results, output
+
+
+class ProcessProcedureBackend:
+    """
+    多进程流程执行后端
+
+    run() 在主进程线程中执行各流程，流程执行到工具段时把段的输入帧写入
+    共享内存(同一帧只写一次)并等待工作进程的结果；回退到线程的流程同时
+    在主进程中执行。
+    """
+
+    def __init__(self, ring_slots: int = 4, start_method: str = "spawn"):
+        """
+        初始化后端
+
+        Args:
+            ring_slots: 共享帧槽位数(流程多于槽位数时自动扩充)
+            start_method: 工作进程启动方式，默认 spawn(不继承主进程的线程和锁)
+        """
+        self._context = multiprocessing.get_context(start_method)
+        self._ring = SharedFrameRing(ring_slots)
+        self._workers: Dict[str, ProcedureWorker] = {}
+        self._fallback: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        # 加载失败的流程 -> (失败时的配置, 重新启动的时间或None)
+        # 配置不变时在重新启动时间前不再重试，None 表示配置变化前不再重试
+        self._failed: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.restart_delay = RESTART_DELAY
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+        self._lock = threading.Lock()
+        self._frames_lock = threading.Lock()
+        self._finalizer = weakref.finalize(
+            self, SharedFrameRing.close, self._ring
+        )
+
+    def run(
+        self,
+        procedures: Sequence[Procedure],
+        frames: Sequence[Optional[ImageData]],
+        thread_runner: Callable[
+            [List[Procedure], List[Optional[ImageData]]], List[Tuple]
+        ],
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        运行一组流程
+
+        Args:
+            procedures: 流程列表
+            frames: 各流程的输入帧
+            thread_runner: 回退到线程的流程的执行函数，返回 [(结果, 耗时秒)]
+
+        Returns:
+            按流程顺序的 [(结果, 耗时秒)]
+        """
+        with self._lock:
+            self._prune(procedures)
+            outcomes: List[Optional[Tuple]] = [None] * len(procedures)
+            handles: Dict[int, Optional[FrameHandle]] = {}
+            segments = []
+            local = []
+            for index, procedure in enumerate(procedures):
+                segment = self._prepare(procedure, handles)
+                if segment is None:
+                    local.append(index)
+                else:
+                    segments.append((index, segment))
+
+            try:
+                futures = []
+                if segments:
+                    self._ring.reserve(len(segments))
+                    executor = self._get_executor(len(segments))
+                    futures = [
+                        (
+                            index,
+                            segment,
+                            executor.submit(
+                                self._run_timed,
+                                procedures[index],
+                                frames[index],
+                                segment,
+                            ),
+                        )
+                        for index, segment in segments
+                    ]
+
+                if local:
+                    local_outcomes = thread_runner(
+                        [procedures[i] for i in local],
+                        [frames[i] for i in local],
+                    )
+                    for index, outcome in zip(local, local_outcomes):
+                        outcomes[index] = outcome
+
+                for index, segment, future in futures:
+                    outcomes[index] = future.result()
+                    if segment.lost is not None:
+                        self._drop(procedures[index].name, segment.lost)
+            finally:
+                for handle in handles.values():
+                    if handle is not None:
+                        self._ring.release(handle)
+            return outcomes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取后端状态
+
+        Returns:
+            各工作进程(pid、存活、加载次数)、回退到线程的流程及原因、
+            加载错误、共享帧统计
+        """
+        with self._lock:
+            return {
+                "workers": {
+                    name: {
+                        "pid": worker.pid,
+                        "alive": worker.is_alive(),
+                        "loads": worker.load_count,
+                    }
+                    for name, worker in self._workers.items()
+                },
+                "fallback": dict(self._fallback),
+                "errors": dict(self._errors),
+                "ring": self._ring.get_stats(),
+            }
+
+    def shutdown(self):
+        """停止所有工作进程并释放共享内存"""
+        with self._lock:
+            workers, self._workers = self._workers, {}
+            executor, self._executor = self._executor, None
+            self._executor_workers = 0
+            self._fallback.clear()
+            self._errors.clear()
+            self._failed.clear()
+        for worker in workers.values():
+            worker.stop()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._ring.close()
+
+    @staticmethod
+    def _run_timed(
+        procedure: Procedure,
+        frame: Optional[ImageData],
+        segment: "_WorkerSegment",
+    ) -> Tuple[Dict[str, Any], float]:
+        """在主进程线程中执行流程，工具段交给工作进程"""
+        start = time.perf_counter()
+        result = procedure.run(frame, remote=segment)
+        return result, time.perf_counter() - start
+
+    def _get_executor(self, workers: int) -> ThreadPoolExecutor:
+        """执行流程的线程池(流程数增加时重建)"""
+        if self._executor is None or workers > self._executor_workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="ProcessBackend"
+            )
+            self._executor_workers = workers
+        return self._executor
+
+    def _prepare(
+        self, procedure: Procedure, handles: Dict[int, Optional[FrameHandle]]
+    ) -> Optional[_WorkerSegment]:
+        """取得流程的工作进程并同步工具段配置，不能跨进程时返回 None"""
+        name = procedure.name
+        plan, reason = plan_offload(procedure)
+        spec = None
+        if plan is not None:
+            try:
+                spec = pickle.dumps(
+                    plan.spec(procedure), protocol=pickle.HIGHEST_PROTOCOL
+                )
+            except Exception as e:
+                reason = f"流程配置无法序列化: {e}"
+        failed = self._failed.get(name)
+        if (
+            reason is None
+            and failed is not None
+            and failed[0] == spec
+            and (failed[1] is None or time.monotonic() < failed[1])
+        ):
+            reason = self._fallback.get(name, "工作进程加载失败")
+        if reason is not None:
+            self._set_fallback(name, reason)
+            worker = self._workers.pop(name, None)
+            if worker is not None:
+                worker.stop()
+            return None
+
+        worker = self._workers.get(name)
+        if worker is None or worker.procedure is not procedure:
+            if worker is not None:
+                worker.stop()
+            worker = self._workers[name] = ProcedureWorker(
+                procedure, self._context
+            )
+        try:
+            worker.sync(spec)
+        except WorkerLostError as e:
+            # 工作进程在加载时退出(如子进程导入失败)，间隔一段时间后重新启动
+            self._failed[name] = (spec, time.monotonic() + self.restart_delay)
+            self._report_error(name, f"工作进程加载流程时退出: {e}")
+            self._drop(name, str(e))
+            return None
+        except ProcedureException as e:
+            self._failed[name] = (spec, None)
+            self._report_error(name, str(e))
+            self._drop(name, str(e))
+            return None
+        self._failed.pop(name, None)
+        self._fallback.pop(name, None)
+        self._errors.pop(name, None)
+        return _WorkerSegment(self, worker, plan, handles)
+
+    def _handle_for(
+        self,
+        frame: Optional[ImageData],
+        handles: Dict[int, Optional[FrameHandle]],
+    ) -> Optional[FrameHandle]:
+        """写入帧(同一帧只写一次)"""
+        if frame is None or frame.data is None:
+            return None
+        key = id(frame)
+        with self._frames_lock:
+            if key not in handles:
+                handles[key] = self._ring.write(frame)
+            return handles[key]
+
+    @staticmethod
+    def _apply(
+        procedure: Procedure,
+        frame: Optional[ImageData],
+        packed: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """还原工具段结果，并记录到主进程的工具上"""
+        results = {}
+        for tool_name, entry in packed.items():
+            if not isinstance(entry, dict) or "error" in entry:
+                results[tool_name] = entry
+                continue
+            result: Optional[ResultData] = entry.get("result")
+            output = None
+            if "overlay" in entry and frame is not None:
+                output = frame.view(entry["overlay"])
+            elif "image" in entry:
+                data, overlay, timestamp, camera_id = entry["image"]
+                output = ImageData(
+                    data=data,
+                    timestamp=timestamp,
+                    camera_id=camera_id,
+                    _copy=False,
+                )
+                output.overlay = overlay
+            item = {
+                "output": output,
+                "result": result,
+                "execution_time": entry.get("execution_time", 0.0),
+            }
+            if "output_shape" in entry:
+                item["output_shape"] = entry["output_shape"]
+            results[tool_name] = item
+
+            tool = procedure.get_tool(tool_name)
+            if tool is not None:
+                tool.apply_run_result(output, result, item["execution_time"])
+        return results
+
+    def _prune(self, procedures: Sequence[Procedure]):
+        """停止已移除流程的工作进程"""
+        names = {procedure.name for procedure in procedures}
+        for name in [name for name in self._workers if name not in names]:
+            self._workers.pop(name).stop()
+
+    def _drop(self, name: str, reason: str):
+        """停止工作进程并回退到线程"""
+        worker = self._workers.pop(name, None)
+        if worker is not None:
+            worker.stop()
+        self._set_fallback(name, reason)
+
+    def _report_error(self, name: str, error: str):
+        """记录工作进程加载错误(错误变化时记录日志)"""
+        if self._errors.get(name) != error:
+            _logger.error(f"流程 {name} 的工作进程加载失败: {error}")
+        self._errors[name] = error
+
+    def _set_fallback(self, name: str, reason: str):
+        """记录回退原因(原因变化时记录日志)"""
+        if self._fallback.get(name) != reason:
+            _logger.warning(f"流程 {name} 回退到线程执行: {reason}")
+        self._fallback[name] = reason
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索区域模块
+
+视觉工具的 search_region 参数限定只在图像的部分区域内搜索：
+
+- 矩形: {"x", "y", "width", "height"}
+- 旋转矩形: {"center_x", "center_y", "width", "height", "angle"}(角度为度)
+- 多边形: {"points": [[x, y], ...]}
+- 多个区域: 以上格式组成的列表
+
+每个区域按外接矩形(裁剪到图像内)切出原帧的零拷贝视图交给工具处理，
+旋转矩形和多边形另带视图大小的掩码，由工具用 ToolBase.in_search_region
+过滤结果。区域坐标下的结果和叠加图元平移回整帧坐标，多个区域的结果合并。
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from numbers import Real
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from data.image_data import DataType, ImageData, ResultData
+from data.overlay import Overlay
+from utils.exceptions import ParameterException
+
+_logger = logging.getLogger("SearchRegion")
+
+REGION_RECT = "rect"
+REGION_ROTATED_RECT = "rotated_rect"
+REGION_POLYGON = "polygon"
+
+# 结果中按x/y坐标平移的键
+X_KEYS = frozenset(
+    {"x", "cx", "center_x", "best_x", "code_x", "qrcode_x", "x1", "x2"}
+)
+Y_KEYS = frozenset(
+    {"y", "cy", "center_y", "best_y", "code_y", "qrcode_y", "y1", "y2"}
+)
+# 结果中为点序列 (N, 2) 的键
+POINT_KEYS = frozenset(
+    {"points", "polygon", "bbox", "corners", "contour", "box"}
+)
+
+
+@dataclass
+class SearchRegion:
+    """
+    搜索区域(整帧坐标)
+
+    Attributes:
+        kind: rect / rotated_rect / polygon
+        polygon: 区域顶点 (N, 2) float32；矩形为四个角点
+    """
+
+    kind: str
+    polygon: np.ndarray
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> Optional["SearchRegion"]:
+        """
+        解析单个区域
+
+        Args:
+            value: 区域字典
+
+        Returns:
+            搜索区域，宽高为0或没有顶点时为 None
+
+        Raises:
+            ParameterException: 格式无法识别
+        """
+        try:
+            if "points" in value:
+                points = np.asarray(value["points"], dtype=np.float32).reshape(
+                    -1, 2
+                )
+                if len(points) < 3:
+                    return None
+                return cls(REGION_POLYGON, points)
+
+            width = float(value.get("width", 0))
+            height = float(value.get("height", 0))
+            if width <= 0 or height <= 0:
+                return None
+
+            angle = float(value.get("angle", 0) or 0)
+            if "center_x" in value:
+                center = (float(value["center_x"]), float(value["center_y"]))
+            else:
+                center = (
+                    float(value["x"]) + width / 2,
+                    float(value["y"]) + height / 2,
+                )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ParameterException(f"无法解析搜索区域: {value} ({e})")
+
+        corners = cv2.boxPoints((center, (width, height), angle)).astype(
+            np.float32
+        )
+        kind = REGION_ROTATED_RECT if angle % 360 else REGION_RECT
+        return cls(kind, corners)
+
+    @property
+    def is_rect(self) -> bool:
+        """是否为轴对齐矩形(不需要掩码)"""
+        return self.kind == REGION_RECT
+
+    def _window(self) -> Tuple[int, int, int, int]:
+        """未裁剪的外接矩形 (x, y, 宽, 高)"""
+        if self.is_rect:
+            # 矩形角点在像素边界上，右下角点所在的像素不属于区域
+            low = np.round(self.polygon.min(axis=0)).astype(int)
+            high = np.round(self.polygon.max(axis=0)).astype(int)
+        else:
+            low = np.floor(self.polygon.min(axis=0)).astype(int)
+            high = np.ceil(self.polygon.max(axis=0)).astype(int) + 1
+        return (
+            int(low[0]),
+            int(low[1]),
+            int(high[0] - low[0]),
+            int(high[1] - low[1]),
+        )
+
+    def bounds(
+        self, width: int, height: int
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """
+        裁剪到图像内的外接矩形
+
+        Args:
+            width, height: 图像宽高
+
+        Returns:
+            (x, y, 宽, 高)，与图像不相交时为 None
+        """
+        x, y, w, h = self._window()
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, width), min(y + h, height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1 - x0, y1 - y0
+
+    def mask(
+        self, x: int, y: int, width: int, height: int
+    ) -> Optional[np.ndarray]:
+        """
+        区域在给定窗口内的掩码
+
+        Args:
+            x, y, width, height: 窗口(整帧坐标)
+
+        Returns:
+            uint8 掩码(255为区域内)，轴对齐矩形返回 None
+        """
+        if self.is_rect:
+            return None
+        mask = np.zeros((height, width), dtype=np.uint8)
+        points = np.round(self.polygon - np.float32((x, y))).astype(np.int32)
+        cv2.fillPoly(mask, [points], 255)
+        return mask
+
+    def contains(self, xs: Any, ys: Any) -> np.ndarray:
+        """
+        点是否在区域内(整帧坐标)
+
+        Args:
+            xs, ys: 坐标(标量或数组)
+
+        Returns:
+            布尔数组
+        """
+        x, y, w, h = self._window()
+        return _mask_contains(
+            self.mask(x, y, w, h),
+            np.asarray(xs, dtype=np.float64) - x,
+            np.asarray(ys, dtype=np.float64) - y,
+            w,
+            h,
+        )
+
+
+def _mask_contains(
+    mask: Optional[np.ndarray],
+    xs: np.ndarray,
+    ys: np.ndarray,
+    width: float,
+    height: float,
+) -> np.ndarray:
+    """窗口坐标下的点是否在窗口内且(有掩码时)落在掩码上"""
+    inside = (xs >= 0) & (ys >= 0) & (xs < width) & (ys < height)
+    if mask is None or not inside.any():
+        return inside
+    cols = np.clip(xs.astype(int), 0, mask.shape[1] - 1)
+    rows = np.clip(ys.astype(int), 0, mask.shape[0] - 1)
+    return inside & (mask[rows, cols] > 0)
+
+
+def parse_search_regions(value: Any) -> List[SearchRegion]:
+    """
+    解析 search_region 参数
+
+    Args:
+        value: 区域字典、区域字典列表，或 None/空值(不限定区域)
+
+    Returns:
+        搜索区域列表，空列表表示整幅图像
+    """
+    if not value:
+        return []
+    items = value if isinstance(value, (list, tuple)) else [value]
+    regions = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ParameterException(f"无法解析搜索区域: {item}")
+        region = SearchRegion.from_dict(item)
+        if region is not None:
+            regions.append(region)
+    return regions
+
+
+@dataclass
+class RegionView:
+    """
+    搜索区域在一帧上的视图
+
+    Attributes:
+        region: 搜索区域
+        frame: 整帧图像
+        image: 外接矩形的零拷贝视图
+        x, y, width, height: 外接矩形(整帧坐标)
+        mask: 视图大小的区域掩码，轴对齐矩形为 None
+    """
+
+    region: SearchRegion
+    frame: ImageData
+    image: ImageData
+    x: int
+    y: int
+    width: int
+    height: int
+    mask: Optional[np.ndarray] = None
+
+    @property
+    def pixels(self) -> int:
+        """视图像素数"""
+        return self.width * self.height
+
+    def contains(self, xs: Any, ys: Any) -> np.ndarray:
+        """
+        点是否在区域内(视图坐标)
+
+        Args:
+            xs, ys: 坐标(标量或数组)
+
+        Returns:
+            布尔数组
+        """
+        return _mask_contains(
+            self.mask,
+            np.asarray(xs, dtype=np.float64),
+            np.asarray(ys, dtype=np.float64),
+            self.width,
+            self.height,
+        )
+
+
+def make_region_views(
+    frame: ImageData, regions: List[SearchRegion]
+) -> List[RegionView]:
+    """
+    为每个搜索区域创建零拷贝视图
+
+    Args:
+        frame: 整帧图像
+        regions: 搜索区域
+
+    Returns:
+        视图列表(与图像不相交的区域被跳过)
+    """
+    views = []
+    for region in regions:
+        bounds = region.bounds(frame.width, frame.height)
+        if bounds is None:
+            _logger.debug("搜索区域在图像之外: %s", region.polygon.tolist())
+            continue
+        x, y, width, height = bounds
+        views.append(
+            RegionView(
+                region,
+                frame,
+                frame.region_view(x, y, width, height),
+                x,
+                y,
+                width,
+                height,
+                region.mask(x, y, width, height),
+            )
+        )
+    return views
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (Real, np.ndarray)) and not isinstance(
+        value, (bool, np.bool_)
+    )
+
+
+def _is_number_list(value: Any) -> bool:
+    return isinstance(value, list) and all(_is_number(v) for v in value)
+
+
+def _offset_points(value: Any, dx: int, dy: int) -> Any:
+    """平移点序列，保持原有的容器类型"""
+    if isinstance(value, np.ndarray):
+        if value.shape and value.shape[-1] == 2:
+            return value + np.asarray((dx, dy), dtype=value.dtype)
+        return value
+    if isinstance(value, (list, tuple)):
+        if len(value) == 2 and all(_is_number(v) for v in value):
+            return type(value)((value[0] + dx, value[1] + dy))
+        return type(value)(_offset_points(item, dx, dy) for item in value)
+    return value
+
+
+def offset_coordinates(value: Any, dx: int, dy: int) -> Any:
+    """
+    把结果值中的坐标从区域视图坐标平移到整帧坐标
+
+    字典中 X_KEYS/Y_KEYS 的数值(或列数组、数值列表)加上偏移，POINT_KEYS 的点序列逐点平移，
+    列表中的 (x, y, ...) 元组平移前两个元素，其他值原样返回。
+
+    Args:
+        value: 结果值
+        dx, dy: 视图在整帧中的偏移
+
+    Returns:
+        平移后的新值(不修改原值)
+    """
+    if isinstance(value, dict):
+        shifted = {}
+        for key, item in value.items():
+            if key in X_KEYS and _is_number(item):
+                shifted[key] = item + dx
+            elif key in Y_KEYS and _is_number(item):
+                shifted[key] = item + dy
+            elif key in X_KEYS and _is_number_list(item):
+                shifted[key] = [v + dx for v in item]
+            elif key in Y_KEYS and _is_number_list(item):
+                shifted[key] = [v + dy for v in item]
+            elif key in POINT_KEYS:
+                shifted[key] = _offset_points(item, dx, dy)
+            else:
+                shifted[key] = offset_coordinates(item, dx, dy)
+        return shifted
+    if isinstance(value, list):
+        shifted = []
+        for item in value:
+            if (
+                isinstance(item, tuple)
+                and len(item) >= 2
+                and _is_number(item[0])
+                and _is_number(item[1])
+            ):
+                shifted.append((item[0] + dx, item[1] + dy) + item[2:])
+            else:
+                shifted.append(offset_coordinates(item, dx, dy))
+        return shifted
+    return value
+
+
+def offset_result(result: ResultData, dx: int, dy: int) -> ResultData:
+    """
+    把区域视图上的结果平移到整帧坐标
+
+    Args:
+        result: 区域视图上的结果
+        dx, dy: 视图在整帧中的偏移
+
+    Returns:
+        新的结果(值和叠加图元已平移)
+    """
+    shifted = result.copy()
+    if not dx and not dy:
+        return shifted
+    for key, value, data_type in result.get_values_with_types():
+        shifted.set_value(key, offset_coordinates(value, dx, dy), data_type)
+    if result.has_overlay:
+        shifted.overlay = result.overlay.translate(dx, dy)
+    return shifted
+
+
+def is_count_key(key: str) -> bool:
+    """多区域合并时求和的计数键"""
+    return key == "count" or key.endswith("_count") or key.endswith("pixels")
+
+
+def _is_column_dict(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and bool(value)
+        and (
+            all(isinstance(v, np.ndarray) for v in value.values())
+            or all(isinstance(v, list) for v in value.values())
+        )
+    )
+
+
+def _is_id(value: Any) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(
+        value, (bool, np.bool_)
+    )
+
+
+def _renumber_items(values: List[list]) -> List[Any]:
+    """拼接各区域的列表；元素为带整数 id 的字典时，id 按前面区域的数量顺延"""
+    merged = []
+    for items in values:
+        offset = len(merged)
+        for item in items:
+            if offset and isinstance(item, dict) and _is_id(item.get("id")):
+                item = dict(item, id=item["id"] + offset)
+            merged.append(item)
+    return merged
+
+
+def _renumber_columns(values: List[dict]) -> List[dict]:
+    """列字典的 id 列按前面区域的行数顺延"""
+    renumbered = []
+    offset = 0
+    for columns in values:
+        ids = columns.get("id")
+        if offset and ids is not None and len(ids):
+            if isinstance(ids, np.ndarray):
+                columns = dict(columns, id=ids + offset)
+            elif all(_is_id(v) for v in ids):
+                columns = dict(columns, id=[v + offset for v in ids])
+        renumbered.append(columns)
+        offset += len(next(iter(columns.values())))
+    return renumbered
+
+
+def _concat_columns(columns: List[Any]) -> Any:
+    """拼接同一列在各区域的值(数组或列表)"""
+    if all(isinstance(column, np.ndarray) for column in columns):
+        return np.concatenate(columns)
+    return [item for column in columns for item in column]
+
+
+def merge_results(results: List[ResultData]) -> ResultData:
+    """
+    合并多个搜索区域的结果
+
+    列表拼接，列字典(数组或列表)按列拼接，计数键求和；
+    各区域内从头编号的 id 合并后按区域顺延，保持唯一；其他值取第一个有检测结果
+    (某个列表非空)的区域，都没有时取第一个区域。叠加图元依次合并。
+
+    Args:
+        results: 各区域结果(已平移到整帧坐标)
+
+    Returns:
+        合并后的结果
+    """
+    if len(results) == 1:
+        return results[0]
+
+    first = results[0]
+    merged = ResultData()
+    merged.tool_name = first.tool_name
+    merged.result_category = first.result_category
+    merged.status = all(result.status for result in results)
+    merged.message = first.message
+
+    overlay = Overlay()
+    for result in results:
+        if result.has_overlay:
+            overlay.extend(result.overlay)
+    merged.overlay = overlay
+
+    primary = next(
+        (
+            result
+            for result in results
+            if any(
+                isinstance(v, list) and v
+                for v in result.get_all_values().values()
+            )
+        ),
+        first,
+    )
+
+    keys = list(
+        dict.fromkeys(
+            key for result in results for key in result.get_all_values()
+        )
+    )
+    for key in keys:
+        present = [result for result in results if result.has_value(key)]
+        values = [result.get_value(key) for result in present]
+        data_type = present[0].get_value_type(key)
+
+        if all(isinstance(v, list) for v in values):
+            value = _renumber_items(values)
+        elif (
+            all(_is_column_dict(v) for v in values)
+            and len({tuple(v) for v in values}) == 1
+        ):
+            values = _renumber_columns(values)
+            value = {
+                name: _concat_columns([v[name] for v in values])
+                for name in values[0]
+            }
+            data_type = DataType.DICT
+        elif is_count_key(key) and all(_is_number(v) for v in values):
+            value = sum(values)
+        elif primary.has_value(key):
+            value = primary.get_value(key)
+        else:
+            value = values[0]
+        merged.set_value(key, value, data_type)
+    return merged
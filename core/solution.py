@@ -14,7 +14,8 @@ import os
 import sys
 import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional
@@ -22,24 +23,16 @@ from typing import Any, Callable, Dict, List, Optional
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# 添加Qt相关导入用于非阻塞操作
-try:
-    from PyQt5.QtCore import QEventLoop, QTimer
-    from PyQt5.QtWidgets import QApplication
-    QT_AVAILABLE = True
-except ImportError:
-    QT_AVAILABLE = False
-    try:
-        from PyQt6.QtCore import QEventLoop, QTimer
-        from PyQt6.QtWidgets import QApplication
-        QT_AVAILABLE = True
-    except ImportError:
-        QT_AVAILABLE = False
-
+from core.memory_pool import get_global_pool
 from core.procedure import Procedure, ProcedureManager
 from data.image_data import ImageData
+from data.result_store import ResultStore
 from utils.exceptions import SolutionException
 from core.pipeline import DeterministicPipeline, PipelineStage
+from core.tool_warmup import ToolLoadRecord, ToolWarmup
+
+# 运行前等待工具预热的最长时间(秒)，超时后直接运行，未预热的工具在运行时加载
+WARMUP_WAIT_TIMEOUT = 30.0
 
 
 class SolutionState(Enum):
@@ -143,7 +136,15 @@ class Solution:
         self._pipeline: Optional[DeterministicPipeline] = None
         self._pipeline_mode = False
         self._pipeline_buffer_size = 3
-        self._results: Dict = {}
+        # 流水线最近的帧结果(有界)，完整历史以列式存储在 _result_store 中
+        self._results: "OrderedDict[int, Dict]" = OrderedDict()
+        self._max_pipeline_results = 64
+        self._result_store = ResultStore()
+
+        # 加载预热相关
+        self._warmup: Optional[ToolWarmup] = None
+        self.warmup_wait_timeout = WARMUP_WAIT_TIMEOUT
+        self._warmup_timed_out = False  # 本次预热已等待超时，不再等待
 
         self._callback = SolutionCallback()
         self._logger = logging.getLogger(f"Solution.{self._name}")
@@ -180,6 +181,26 @@ class Solution:
         """设置运行间隔(ms)"""
         self._run_interval = max(0, value)
 
+    @property
+    def procedure_workers(self) -> int:
+        """获取并发运行流程的线程数，0表示顺序执行"""
+        return self._procedure_manager.max_workers
+
+    @procedure_workers.setter
+    def procedure_workers(self, value: int):
+        """设置并发运行流程的线程数(各流程须相互独立)"""
+        self._procedure_manager.set_max_workers(value)
+
+    @property
+    def procedure_backend(self) -> str:
+        """获取流程执行后端: thread(线程) / process(常驻工作进程)"""
+        return self._procedure_manager.backend
+
+    @procedure_backend.setter
+    def procedure_backend(self, value: str):
+        """设置流程执行后端"""
+        self._procedure_manager.set_backend(value)
+
     @property
     def is_running(self) -> bool:
         """获取运行状态"""
@@ -273,12 +294,17 @@ class Solution:
         """
         return self._procedure_manager.get_procedure(name)
 
-    def run(self, input_data: ImageData = None) -> Dict[str, Any]:
+    def run(
+        self,
+        input_data: ImageData = None,
+        inputs: Optional[Dict[str, ImageData]] = None,
+    ) -> Dict[str, Any]:
         """
         单次运行方案
 
         Args:
             input_data: 输入图像数据（可选）
+            inputs: 按流程名称指定的输入（可选），例如各相机工位各自的图像
 
         Returns:
             执行结果字典
@@ -302,7 +328,7 @@ class Solution:
         results = {}
 
         try:
-            self._logger.info(f"开始运行方案: {self._name}")
+            self._logger.debug("开始运行方案: %s", self._name)
 
             # 触发开始事件
             self._callback.trigger("run_started")
@@ -310,8 +336,20 @@ class Solution:
             # 使用提供的输入数据或当前输入数据
             input_image = input_data or self._current_input
 
+            # 等待加载时的工具预热完成，避免与预热同时访问模型；
+            # 预热卡住(模型下载、相机)时不阻塞检测
+            if not self._warmup_timed_out and not self.wait_ready(
+                self.warmup_wait_timeout
+            ):
+                self._warmup_timed_out = True
+                self._logger.warning(
+                    "工具预热 %.1f 秒未完成，不再等待，未预热的工具在运行时加载",
+                    self.warmup_wait_timeout,
+                )
+
             # 执行所有流程
-            results = self._procedure_manager.run_all(input_image)
+            results = self._procedure_manager.run_all(input_image, inputs)
+            self._record_results(results)
 
             self._execution_time = time.time() - start_time
             self._state = SolutionState.IDLE
@@ -320,8 +358,10 @@ class Solution:
             # 触发完成事件
             self._callback.trigger("run_completed", data=results)
 
-            self._logger.info(
-                f"方案运行完成: {self._name}, 耗时={self._execution_time*1000:.2f}ms"
+            self._logger.debug(
+                "方案运行完成: %s, 耗时=%.2fms",
+                self._name,
+                self._execution_time * 1000,
             )
 
             return results
@@ -357,12 +397,7 @@ class Solution:
         
         # 阶段1: 执行流程
         def execute_stage(frame):
-            results = {}
-            for proc in self._procedure_manager.procedures:
-                if proc.is_enabled:
-                    result = proc.run(frame.data)
-                    results[proc.name] = result
-            return results
+            return self._procedure_manager.run_all(frame.data)
         
         stage = PipelineStage("execute", execute_stage,
                              output_callback=self._on_pipeline_output)
@@ -377,6 +412,33 @@ class Solution:
             "timestamp": frame.timestamp,
             "result": result
         }
+        while len(self._results) > self._max_pipeline_results:
+            self._results.popitem(last=False)
+        self._record_results(result, frame.frame_id, frame.timestamp)
+
+    @property
+    def result_store(self) -> ResultStore:
+        """检测结果历史存储"""
+        return self._result_store
+
+    def set_result_store(self, store: ResultStore):
+        """设置检测结果历史存储(例如配置了SQLite/Parquet落盘的存储)
+
+        Args:
+            store: 结果存储
+        """
+        self._result_store = store
+
+    def _record_results(
+        self, results: Dict, frame_id: int = None, timestamp: float = None
+    ):
+        """把一帧结果追加到历史存储，失败不影响检测"""
+        try:
+            self._result_store.append_frame(results, frame_id, timestamp)
+        except Exception as e:
+            self._logger.warning(f"记录结果历史失败: {e}")
+        # 推进内存池帧计数(泄漏检测和空闲缓冲区收缩)
+        get_global_pool().next_frame()
     
     def put_input(self, image_data: ImageData) -> bool:
         """放入输入图像(流水线模式)
@@ -552,15 +614,29 @@ class Solution:
 
         Returns:
             保存成功返回True
+
+        参数中包含numpy数组时保存为方案容器(数组以.npy存放，加载时内存映射)，
+        否则保存为JSON。
         """
-        import json
+        from core.solution_container import materialize, save_solution_data
 
         path = path or f"{self._name}.vmsol"
 
         try:
+            # 覆盖当前加载的方案文件前，先将映射的数组复制到内存
+            if self._solution_path and os.path.abspath(
+                path
+            ) == os.path.abspath(self._solution_path):
+                for procedure in self.procedures:
+                    for tool in procedure.tools:
+                        for key, value in tool.get_all_params().items():
+                            tool._params[key] = materialize(value)
+
             data = {
                 "name": self._name,
                 "run_interval": self._run_interval,
+                "procedure_workers": self.procedure_workers,
+                "procedure_backend": self.procedure_backend,
                 "procedures": [],
                 "communication_config": [],  # 通讯配置
             }
@@ -612,8 +688,7 @@ class Solution:
 
                 data["procedures"].append(proc_data)
 
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            save_solution_data(data, path)
 
             # 保存路径
             self._solution_path = path
@@ -625,29 +700,37 @@ class Solution:
             self._logger.error(f"保存方案失败: {e}")
             return False
 
-    def load(self, path: str, password: str = None) -> bool:
+    def load(
+        self, path: str, password: str = None, warmup: bool = True
+    ) -> bool:
         """
         加载方案
 
+        参数以批量方式恢复；加载完成后在线程池中并行预热工具的重量级资源，
+        预热完成时触发 "load_ready" 事件，可用 wait_ready() 等待。
+
         Args:
             path: 加载路径
             password: 密码（暂未实现）
+            warmup: 是否在后台预热工具
 
         Returns:
             加载成功返回True
         """
-        import json
+        from core.solution_container import load_solution_data
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = load_solution_data(path)
 
             # 清空当前方案
             self._procedure_manager.clear()
             self._name = data.get("name", "Solution")
             self._run_interval = data.get("run_interval", 100)
+            self.procedure_workers = data.get("procedure_workers", 0)
+            self.procedure_backend = data.get("procedure_backend", "thread")
 
             # 加载流程
+            loaded_tools = []
             for proc_data in data.get("procedures", []):
                 procedure = Procedure(proc_data.get("name", "Procedure"))
                 procedure.is_enabled = proc_data.get("is_enabled", True)
@@ -662,13 +745,23 @@ class Solution:
                     try:
                         from core.tool_base import ToolRegistry
 
+                        start = time.perf_counter()
                         tool = ToolRegistry.create_tool(
                             category, tool_name, display_name
                         )
+                        created = time.perf_counter()
 
-                        # 设置参数
-                        for key, value in tool_data.get("params", {}).items():
-                            tool.set_param(key, value)
+                        # 批量恢复参数
+                        tool.restore_params(tool_data.get("params", {}))
+
+                        record = ToolLoadRecord(
+                            procedure=procedure.name,
+                            tool=tool.name,
+                            tool_type=f"{category}.{tool_name}",
+                            create_time=created - start,
+                            restore_time=time.perf_counter() - created,
+                        )
+                        loaded_tools.append((tool, record))
 
                         procedure.add_tool(tool)
                         tool_instances[display_name] = tool
@@ -721,6 +814,9 @@ class Solution:
             # 保存加载的路径
             self._solution_path = path
 
+            if warmup:
+                self.start_warmup(loaded_tools)
+
             self._logger.info(f"方案已加载: {path}")
             return True
 
@@ -728,6 +824,72 @@ class Solution:
             self._logger.error(f"加载方案失败: {e}")
             return False
 
+    def start_warmup(self, tools=None, max_workers: int = None) -> ToolWarmup:
+        """
+        在后台并行预热工具
+
+        Args:
+            tools: (工具, 加载记录) 列表，默认为方案中的全部工具
+            max_workers: 预热线程数
+
+        Returns:
+            预热器
+        """
+        if tools is None:
+            tools = [
+                (
+                    tool,
+                    ToolLoadRecord(
+                        procedure=procedure.name,
+                        tool=tool.name,
+                        tool_type=f"{tool.tool_category}.{tool.tool_name}",
+                    ),
+                )
+                for procedure in self.procedures
+                for tool in procedure.tools
+            ]
+
+        self._warmup = ToolWarmup(max_workers)
+        self._warmup_timed_out = False
+        self._warmup.add_ready_callback(self._on_warmup_ready)
+        return self._warmup.start(tools)
+
+    def _on_warmup_ready(self, report: List[ToolLoadRecord]):
+        """预热完成回调（在预热线程中调用）"""
+        self._callback.trigger(
+            "load_ready", data=[record.to_dict() for record in report]
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        """工具预热是否已完成（未预热时为True）"""
+        return self._warmup is None or self._warmup.is_ready
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """
+        等待工具预热完成
+
+        Args:
+            timeout: 超时时间(秒)，None表示一直等待
+
+        Returns:
+            是否已就绪
+        """
+        if self._warmup is None:
+            return True
+        return self._warmup.wait(timeout)
+
+    def get_load_report(self) -> List[Dict[str, Any]]:
+        """
+        获取逐工具的加载耗时报告
+
+        Returns:
+            加载记录字典列表，按总耗时降序
+        """
+        if self._warmup is None:
+            return []
+        return [record.to_dict() for record in self._warmup.get_report()]
+
     def reset(self):
         """重置方案状态"""
         self.stop_run()
@@ -751,13 +913,27 @@ class Solution:
             "is_running": self.is_running,
             "procedure_count": self.procedure_count,
             "execution_time": self._execution_time,
+            "procedure_workers": self.procedure_workers,
+            "procedure_backend": self.procedure_backend,
+            "procedure_timing": self.get_last_run_timing(),
             "procedures": [p.get_info() for p in self.procedures],
         }
 
+    def get_last_run_timing(self) -> Dict[str, Any]:
+        """
+        获取最近一次运行中各流程的耗时
+
+        Returns:
+            总墙钟耗时(total_ms)、各流程耗时之和(sum_ms)及每个流程的耗时(procedures)
+        """
+        return self._procedure_manager.get_last_timing()
+
     def copy(self) -> "Solution":
         """创建方案拷贝"""
         new_solution = Solution(self._name)
         new_solution._run_interval = self._run_interval
+        new_solution.procedure_workers = self.procedure_workers
+        new_solution.procedure_backend = self.procedure_backend
 
         for procedure in self.procedures:
             new_solution.add_procedure(procedure.copy())
@@ -783,6 +959,10 @@ class SolutionManager:
     def __init__(self):
         self._solutions: Dict[str, Solution] = {}
         self._logger = logging.getLogger("SolutionManager")
+        # 并发运行方案的线程池(按线程数常驻，避免每帧创建线程)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
 
     @property
     def solution_count(self) -> int:
@@ -850,20 +1030,35 @@ class SolutionManager:
         """
         return self._solutions.get(name)
 
-    def run_all(self, input_data: ImageData = None) -> Dict[str, Any]:
+    def run_all(
+        self, input_data: ImageData = None, max_workers: int = 0
+    ) -> Dict[str, Any]:
         """
         运行所有方案
 
         Args:
             input_data: 输入图像数据
+            max_workers: 并发运行方案的线程数，0或1表示顺序执行
 
         Returns:
             所有方案的执行结果
         """
+        solutions = [
+            s
+            for s in self._solutions.values()
+            if getattr(s, "is_enabled", True)
+        ]
+        if max_workers > 1 and len(solutions) > 1:
+            executor = self._get_executor(max_workers)
+            futures = [executor.submit(s.run, input_data) for s in solutions]
+            return {
+                s.name: future.result()
+                for s, future in zip(solutions, futures)
+            }
+
         results = {}
-        for solution in self._solutions.values():
-            if solution.is_enabled:
-                results[solution.name] = solution.run(input_data)
+        for solution in solutions:
+            results[solution.name] = solution.run(input_data)
         return results
 
     def stop_all(self):
@@ -876,6 +1071,28 @@ class SolutionManager:
         for solution in self._solutions.values():
             solution.stop_run()
         self._solutions.clear()
+        self.shutdown()
+
+    def shutdown(self):
+        """停止并发运行方案的线程池"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+            self._executor_workers = 0
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self, max_workers: int) -> ThreadPoolExecutor:
+        """获取常驻线程池，线程数变化时重建"""
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers != max_workers:
+                if self._executor is not None:
+                    # 其他线程可能仍在使用旧线程池，不等待
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="Solution"
+                )
+                self._executor_workers = max_workers
+            return self._executor
 
     def get_info(self) -> Dict[str, Any]:
         """获取管理器信息"""
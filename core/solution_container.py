@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+方案容器模块
+
+方案文件的二进制容器格式：一个不压缩(ZIP_STORED)的ZIP归档，包含
+- solution.json: 方案清单(JSON)，数组以 {"__type__": "numpy_ref"} 引用
+- arrays/NNNN.npy: 每个数组一个.npy成员，数据起始位置按64字节对齐
+
+加载时整个文件以写时复制方式内存映射，数组直接指向映射区域，
+不经过hex/base64解码；数据页只有在工具第一次访问时才由操作系统读入，
+修改数组也不会写回文件。
+
+没有数组的方案仍保存为普通JSON，旧的JSON方案和旧的压缩vmsol
+(内含solution.json的ZIP)都可以直接加载。
+
+使用示例：
+    save_solution_data(data, "demo.vmsol")
+    data = load_solution_data("demo.vmsol")
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import zipfile
+from typing import Any, Dict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.parameter_serializer import ParameterSerializer
+
+logger = logging.getLogger(__name__)
+
+# 容器内的清单文件名(与旧的压缩vmsol一致)
+MANIFEST_NAME = "solution.json"
+
+# 数组成员目录
+ARRAY_DIR = "arrays/"
+
+# 数组数据起始位置的对齐字节数
+ARRAY_ALIGN = 64
+
+# 用于填充对齐的ZIP扩展字段ID
+_PADDING_EXTRA_ID = 0x5650
+
+# ZIP本地文件头: 固定30字节，文件名长度和扩展字段长度位于第10、11个字段
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_ZIP64_EXTRA_SIZE = 20
+
+
+class ArrayStore:
+    """
+    数组仓库
+
+    保存时收集方案中的数组，为每个数组分配容器内的键；
+    同一个数组对象只保存一次。
+    """
+
+    def __init__(self):
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._keys_by_id: Dict[int, str] = {}
+
+    def add(self, array: np.ndarray) -> str:
+        """添加数组
+
+        Args:
+            array: numpy数组
+
+        Returns:
+            数组在容器中的键
+        """
+        key = self._keys_by_id.get(id(array))
+        if key is None:
+            key = f"{len(self._arrays):04d}"
+            self._arrays[key] = array
+            self._keys_by_id[id(array)] = key
+        return key
+
+    def items(self):
+        """遍历 (键, 数组)"""
+        return self._arrays.items()
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+
+class ContainerReader:
+    """
+    方案容器读取器
+
+    以写时复制方式映射整个容器文件，按需返回指向映射区域的数组。
+    数组持有映射的引用，读取器本身可以在加载完成后丢弃。
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._zip = zipfile.ZipFile(path, "r")
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    @property
+    def path(self) -> str:
+        """容器路径"""
+        return self._path
+
+    def read_manifest(self) -> Dict[str, Any]:
+        """读取方案清单(未还原数组引用)"""
+        with self._zip.open(MANIFEST_NAME) as f:
+            return json.load(f)
+
+    def get(self, key: str) -> np.ndarray:
+        """获取数组
+
+        Args:
+            key: 数组键
+
+        Returns:
+            指向映射区域的数组(可写，修改不会写回文件)
+        """
+        array = self._arrays.get(key)
+        if array is None:
+            array = self._map_array(self._zip.getinfo(f"{ARRAY_DIR}{key}.npy"))
+            self._arrays[key] = array
+        return array
+
+    def close(self):
+        """关闭归档；已返回的数组仍然有效"""
+        self._zip.close()
+
+    def _map_array(self, info: zipfile.ZipInfo) -> np.ndarray:
+        """将.npy成员映射为数组"""
+        if info.compress_type != zipfile.ZIP_STORED:
+            # 压缩成员无法映射，退回到完整读取
+            with self._zip.open(info) as f:
+                return np.load(io.BytesIO(f.read()), allow_pickle=False)
+
+        offset = info.header_offset
+        fields = _LOCAL_HEADER.unpack_from(self._mmap, offset)
+        start = offset + _LOCAL_HEADER.size + fields[10] + fields[11]
+
+        header = io.BytesIO(
+            self._mmap[start : start + min(info.file_size, 65536)]
+        )
+        version = np.lib.format.read_magic(header)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(
+                header
+            )
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(
+                header
+            )
+        if dtype.hasobject:
+            raise ValueError(f"容器中不允许对象数组: {info.filename}")
+
+        return np.ndarray(
+            shape,
+            dtype=dtype,
+            buffer=self._mmap,
+            offset=start + header.tell(),
+            order="F" if fortran_order else "C",
+        )
+
+
+def is_container(path: str) -> bool:
+    """判断文件是否为方案容器(ZIP格式)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == b"PK\x03\x04"
+    except OSError:
+        return False
+
+
+def is_mapped(value: Any) -> bool:
+    """判断数组是否指向容器的内存映射"""
+    base = value
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return isinstance(base, mmap.mmap)
+
+
+def materialize(value: Any) -> Any:
+    """将值中指向内存映射的数组复制到内存
+
+    覆盖正在映射的容器文件前调用(Windows不允许替换已映射的文件)。
+
+    Args:
+        value: 参数值(可嵌套dict/list)
+
+    Returns:
+        不再引用映射区域的值
+    """
+    if isinstance(value, np.ndarray):
+        return np.array(value) if is_mapped(value) else value
+    if isinstance(value, dict):
+        return {k: materialize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [materialize(v) for v in value]
+    return value
+
+
+def _padding_extra(offset: int, name: str, zip64: bool) -> bytes:
+    """生成使成员数据按ARRAY_ALIGN对齐的扩展字段"""
+    header_size = _LOCAL_HEADER.size + len(name.encode("utf-8")) + 4
+    if zip64:
+        header_size += _ZIP64_EXTRA_SIZE
+    pad = -(offset + header_size) % ARRAY_ALIGN
+    return struct.pack("<HH", _PADDING_EXTRA_ID, pad) + b"\0" * pad
+
+
+def _write_array(zf: zipfile.ZipFile, name: str, array: np.ndarray):
+    """以.npy格式写入一个不压缩的对齐成员"""
+    array = np.ascontiguousarray(array)
+    if array.dtype.hasobject:
+        raise ValueError(f"容器中不允许对象数组: {name}")
+
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        header, np.lib.format.header_data_from_array_1_0(array)
+    )
+    header_bytes = header.getvalue()
+
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_STORED
+    info.file_size = len(header_bytes) + array.nbytes
+    zip64 = info.file_size > zipfile.ZIP64_LIMIT
+    info.extra = _padding_extra(zf.fp.tell(), name, zip64)
+
+    with zf.open(info, "w", force_zip64=zip64) as dst:
+        dst.write(header_bytes)
+        dst.write(array.reshape(-1).view(np.uint8).data)
+
+
+def save_container(
+    manifest: Dict[str, Any],
+    arrays: ArrayStore,
+    path: str,
+    compress_manifest: bool = False,
+):
+    """保存方案容器
+
+    先写入临时文件再替换目标文件，写入失败不会破坏原方案。
+
+    Args:
+        manifest: 已序列化的方案清单
+        arrays: 清单引用的数组
+        path: 保存路径
+        compress_manifest: 是否压缩清单(数组始终不压缩以便映射)
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as zf:
+            for key, array in arrays.items():
+                _write_array(zf, f"{ARRAY_DIR}{key}.npy", array)
+            zf.writestr(
+                MANIFEST_NAME,
+                json.dumps(manifest, ensure_ascii=False, indent=2),
+                (
+                    zipfile.ZIP_DEFLATED
+                    if compress_manifest
+                    else zipfile.ZIP_STORED
+                ),
+            )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_container(path: str) -> Dict[str, Any]:
+    """加载方案容器
+
+    Args:
+        path: 容器路径
+
+    Returns:
+        方案数据，数组为指向文件映射的ndarray
+    """
+    reader = ContainerReader(path)
+    try:
+        return ParameterSerializer.deserialize(
+            reader.read_manifest(), {"arrays": reader}
+        )
+    finally:
+        reader.close()
+
+
+def save_solution_data(
+    data: Dict[str, Any], path: str, compress: bool = False
+) -> bool:
+    """保存方案数据
+
+    数据中包含numpy数组(或要求压缩)时保存为容器，否则保存为JSON。
+
+    Args:
+        data: 方案数据，参数值可以包含numpy数组
+        path: 保存路径
+        compress: 是否压缩清单
+
+    Returns:
+        是否保存为容器
+    """
+    arrays = ArrayStore()
+    manifest = ParameterSerializer.serialize(data, arrays=arrays)
+
+    if arrays or compress:
+        save_container(manifest, arrays, path, compress_manifest=compress)
+        logger.debug(f"方案容器已保存: {path} ({len(arrays)} 个数组)")
+        return True
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return False
+
+
+def load_solution_data(path: str) -> Dict[str, Any]:
+    """加载方案数据，自动识别容器与JSON格式
+
+    Args:
+        path: 方案文件路径
+
+    Returns:
+        方案数据
+    """
+    if is_container(path):
+        return load_container(path)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return ParameterSerializer.deserialize(json.load(f))
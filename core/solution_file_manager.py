@@ -18,10 +18,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 import yaml
 
+from core.parameter_serializer import ParameterSerializer
 from core.procedure import Procedure
 from core.solution import Solution
+from core.solution_container import load_solution_data, save_solution_data
 from core.tool_base import ToolBase
 
 
@@ -155,7 +158,11 @@ class SolutionFileManager:
                 )
                 zf.writestr(
                     "solution.json",
-                    json.dumps(solution_data, ensure_ascii=False, indent=2),
+                    json.dumps(
+                        ParameterSerializer.serialize(solution_data),
+                        ensure_ascii=False,
+                        indent=2,
+                    ),
                 )
 
                 # 生成并保存代码
@@ -252,25 +259,14 @@ class SolutionFileManager:
                     },
                 }
 
-                # 包含图像数据
+                # 包含图像数据（保存时由序列化器写入容器或内联编码）
                 if include_images and hasattr(tool, "get_output_image"):
                     try:
                         output = tool.get_output()
-                        if output and hasattr(output, "data"):
-                            import base64
-
-                            import numpy as np
-
-                            if isinstance(output.data, np.ndarray):
-                                img_data = base64.b64encode(
-                                    output.data.tobytes()
-                                ).decode("utf-8")
-                                tool_data["output_image"] = {
-                                    "format": "numpy_base64",
-                                    "shape": output.data.shape,
-                                    "dtype": str(output.data.dtype),
-                                    "data": img_data,
-                                }
+                        if output and isinstance(
+                            getattr(output, "data", None), np.ndarray
+                        ):
+                            tool_data["output_image"] = output.data
                     except Exception:
                         pass
 
@@ -292,15 +288,24 @@ class SolutionFileManager:
         return data
 
     def _save_json(self, data: Dict[str, Any], path: str):
-        """保存为JSON格式"""
+        """保存为JSON格式（数组内联编码）"""
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json.dump(
+                ParameterSerializer.serialize(data),
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
 
     def _save_yaml(self, data: Dict[str, Any], path: str):
-        """保存为YAML格式"""
+        """保存为YAML格式（数组内联编码）"""
         with open(path, "w", encoding="utf-8") as f:
             yaml.dump(
-                data, f, default_flow_style=False, allow_unicode=True, indent=2
+                ParameterSerializer.serialize(data),
+                f,
+                default_flow_style=False,
+                allow_unicode=True,
+                indent=2,
             )
 
     def _save_pickle(self, data: Dict[str, Any], path: str):
@@ -311,25 +316,21 @@ class SolutionFileManager:
     def _save_vmsol(
         self, data: Dict[str, Any], path: str, compress: bool = False
     ):
-        """保存为VisionMaster格式"""
-        if compress:
-            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
-                zf.writestr(
-                    "solution.json",
-                    json.dumps(data, ensure_ascii=False, indent=2),
-                )
-        else:
-            self._save_json(data, path)
+        """保存为VisionMaster格式
+
+        包含数组或要求压缩时保存为方案容器，数组以.npy存放并在加载时内存映射。
+        """
+        save_solution_data(data, str(path), compress=compress)
 
     def _load_json(self, path: str) -> Dict[str, Any]:
         """加载JSON格式"""
         with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            return ParameterSerializer.deserialize(json.load(f))
 
     def _load_yaml(self, path: str) -> Dict[str, Any]:
         """加载YAML格式"""
         with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+            return ParameterSerializer.deserialize(yaml.safe_load(f))
 
     def _load_pickle(self, path: str) -> Dict[str, Any]:
         """加载Pickle格式"""
@@ -337,13 +338,8 @@ class SolutionFileManager:
             return pickle.load(f)
 
     def _load_vmsol(self, path: str) -> Dict[str, Any]:
-        """加载VisionMaster格式"""
-        if path.endswith(".zip"):
-            with zipfile.ZipFile(path, "r") as zf:
-                with zf.open("solution.json") as f:
-                    return json.load(f)
-        else:
-            return self._load_json(path)
+        """加载VisionMaster格式（方案容器、旧的压缩包或JSON）"""
+        return load_solution_data(path)
 
     def _create_solution_from_data(self, data: Dict[str, Any]) -> Solution:
         """从数据创建方案实例"""
@@ -369,9 +365,8 @@ class SolutionFileManager:
                         category, tool_name, display_name
                     )
 
-                    # 设置参数
-                    for key, value in tool_data.get("params", {}).items():
-                        tool.set_param(key, value)
+                    # 批量恢复参数
+                    tool.restore_params(tool_data.get("params", {}))
 
                     procedure.add_tool(tool)
                     tool_instances[display_name] = tool
@@ -405,6 +400,8 @@ class SolutionFileManager:
 
             solution.add_procedure(procedure)
 
+        # 后台预热工具的重量级资源
+        solution.start_warmup()
         return solution
 
     def import_solution_package(self, path: str) -> Optional[Solution]:
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块并行执行模块
+
+将邻域类图像运算(滤波、形态学、自适应阈值等)按行带分块，
+在线程池中并行执行后写回预分配的输出图像。
+
+每个分块在上下两侧各带一圈由核半径决定的光环(halo)，
+处理后只把中心区域写回，因此结果与整图处理逐像素一致、没有拼缝。
+图像像素数低于阈值或只有一个CPU核心时直接整图处理。
+
+使用示例：
+    output = run_tiled(
+        image,
+        lambda patch: cv2.GaussianBlur(patch, (7, 7), 0),
+        halo=kernel_halo(7),
+    )
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.memory_pool import allocate_image_buffer
+
+logger = logging.getLogger(__name__)
+
+# 自动分块的最小像素数(约1600x1200)
+DEFAULT_TILE_MIN_PIXELS = 2_000_000
+
+# 分块中心区域的最小行数，避免光环开销超过有效计算
+MIN_TILE_ROWS = 64
+
+# 默认工作线程数
+DEFAULT_TILE_WORKERS = min(8, os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class Tile:
+    """行带分块
+
+    [y0, y1) 为写回输出的中心区域，[pad_y0, pad_y1) 为带光环的输入区域。
+    """
+
+    y0: int
+    y1: int
+    pad_y0: int
+    pad_y1: int
+
+    @property
+    def crop(self) -> Tuple[int, int]:
+        """中心区域在带光环分块中的行范围"""
+        return self.y0 - self.pad_y0, self.y1 - self.pad_y0
+
+
+def kernel_halo(kernel_size: int, passes: int = 1) -> int:
+    """计算方形核运算需要的光环宽度
+
+    Args:
+        kernel_size: 核大小
+        passes: 核连续作用的次数(迭代次数、开闭运算的两步等)
+
+    Returns:
+        光环宽度(像素)
+    """
+    return max(0, int(kernel_size) // 2) * max(1, int(passes))
+
+
+def plan_tiles(height: int, halo: int, count: int) -> List[Tile]:
+    """将图像按行划分为带光环的分块
+
+    Args:
+        height: 图像高度
+        halo: 光环宽度
+        count: 期望分块数
+
+    Returns:
+        分块列表，分块数不超过 height // MIN_TILE_ROWS
+    """
+    count = max(1, min(count, height // max(MIN_TILE_ROWS, 2 * halo, 1)))
+    bounds = np.linspace(0, height, count + 1).astype(int)
+    return [
+        Tile(y0, y1, max(0, y0 - halo), min(height, y1 + halo))
+        for y0, y1 in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+class TileExecutor:
+    """
+    分块并行执行器
+
+    分块由工作线程直接写入输出的不相交行区间，无需额外拼接。
+    在分块处理函数内部再次调用时退化为整图处理，避免线程池嵌套等待。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        min_pixels: int = DEFAULT_TILE_MIN_PIXELS,
+    ):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 工作线程数，默认为 min(8, CPU核数)
+            min_pixels: 自动分块的最小像素数
+        """
+        self._max_workers = max_workers or DEFAULT_TILE_WORKERS
+        self._min_pixels = min_pixels
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def max_workers(self) -> int:
+        """工作线程数"""
+        return self._max_workers
+
+    def should_tile(self, image: np.ndarray) -> bool:
+        """图像是否足够大、值得分块并行
+
+        Args:
+            image: 输入图像
+
+        Returns:
+            是否分块
+        """
+        if self._max_workers < 2 or getattr(self._local, "active", False):
+            return False
+        return image.shape[0] * image.shape[1] >= self._min_pixels
+
+    def run(
+        self,
+        image: np.ndarray,
+        func: Callable[[np.ndarray], np.ndarray],
+        halo: int,
+        out: np.ndarray = None,
+        force: bool = False,
+    ) -> np.ndarray:
+        """分块执行邻域运算
+
+        Args:
+            image: 输入图像
+            func: 处理函数，输入输出图像尺寸相同
+            halo: 光环宽度，不小于运算的有效邻域半径
+            out: 预分配的输出图像，默认与输入相同形状和类型
+            force: 忽略像素数阈值强制分块(线程数仍需大于1)
+
+        Returns:
+            输出图像
+        """
+        nested = getattr(self._local, "active", False)
+        if nested or self._max_workers < 2:
+            return self._run_whole(image, func, out)
+        if not (force or self.should_tile(image)):
+            return self._run_whole(image, func, out)
+
+        tiles = plan_tiles(image.shape[0], halo, self._max_workers)
+        if len(tiles) < 2:
+            return self._run_whole(image, func, out)
+
+        if out is None:
+            out = allocate_image_buffer(image.shape, image.dtype)
+
+        logger.debug(f"分块并行执行: {len(tiles)} 块, halo={halo}")
+        executor = self._get_executor()
+        # 最后一块在调用线程中处理
+        futures = [
+            executor.submit(self._run_tile, image, func, tile, out)
+            for tile in tiles[:-1]
+        ]
+        self._run_tile(image, func, tiles[-1], out)
+        for future in futures:
+            future.result()
+        return out
+
+    def shutdown(self):
+        """关闭线程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """按需创建线程池"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers - 1,
+                    thread_name_prefix="TileWorker",
+                )
+            return self._executor
+
+    @staticmethod
+    def _run_whole(
+        image: np.ndarray,
+        func: Callable[[np.ndarray], np.ndarray],
+        out: Optional[np.ndarray],
+    ) -> np.ndarray:
+        """整图执行"""
+        result = func(image)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    def _run_tile(
+        self,
+        image: np.ndarray,
+        func: Callable[[np.ndarray], np.ndarray],
+        tile: Tile,
+        out: np.ndarray,
+    ):
+        """处理单个分块并写回中心区域"""
+        self._local.active = True
+        try:
+            result = func(image[tile.pad_y0 : tile.pad_y1])
+        finally:
+            self._local.active = False
+
+        top, bottom = tile.crop
+        target = out[tile.y0 : tile.y1]
+        if result.shape[1:] != target.shape[1:] or result.shape[0] < bottom:
+            raise ValueError(
+                f"分块输出尺寸不匹配: {result.shape} -> {target.shape}"
+            )
+        target[...] = result[top:bottom]
+
+
+_default_executor: Optional[TileExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_tile_executor() -> TileExecutor:
+    """获取全局分块执行器"""
+    global _default_executor
+    if _default_executor is None:
+        with _default_lock:
+            if _default_executor is None:
+                _default_executor = TileExecutor()
+    return _default_executor
+
+
+def run_tiled(
+    image: np.ndarray,
+    func: Callable[[np.ndarray], np.ndarray],
+    halo: int,
+    out: np.ndarray = None,
+    force: bool = False,
+) -> np.ndarray:
+    """使用全局执行器分块执行邻域运算，小图直接整图处理
+
+    Args:
+        image: 输入图像
+        func: 处理函数，输入输出图像尺寸相同
+        halo: 光环宽度
+        out: 预分配的输出图像
+        force: 忽略像素数阈值强制分块
+
+    Returns:
+        输出图像
+    """
+    return get_tile_executor().run(image, func, halo, out=out, force=force)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图像瓦片金字塔模块
+
+超大图像(如拼接工具输出的上亿像素图)不能整张转换为 QPixmap 显示。
+TilePyramid 在后台线程中逐级生成 1/2、1/4 ... 的缩小图，
+显示时按当前缩放选择层级，只取可见区域的瓦片；TileCache 按字节数限制
+已转换瓦片的内存占用，最近最少使用的瓦片先被淘汰。
+
+- 第0层直接引用原图，不复制
+- 先生成最粗的一层，缩小查看时很快就有概览图，再由粗到细补齐其他层
+- 与Qt无关，瓦片到 QImage 的转换和绘制在 core/zoomable_image.py 中
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import math
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TILE_SIZE = 512
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class TilePyramid:
+    """
+    图像瓦片金字塔
+
+    第k层尺寸为原图的 1/2^k(向上取整)，最粗一层不超过一个瓦片。
+    层级在后台线程中生成，未生成的层级 get_tile 返回 None。
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        on_level_ready: Optional[Callable[[int], None]] = None,
+        background: bool = True,
+    ):
+        """
+        Args:
+            image: 原图(第0层，不复制，显示期间不应原地修改)
+            tile_size: 瓦片边长(像素)
+            on_level_ready: 每生成一层后调用，参数为层号(在后台线程中调用)
+            background: 是否在后台线程生成缩小层，False 时在构造时同步生成
+        """
+        if image is None or image.ndim < 2 or image.size == 0:
+            raise ValueError("无效图像")
+
+        self.tile_size = max(16, int(tile_size))
+        self.height, self.width = image.shape[:2]
+
+        longest = max(self.width, self.height)
+        self.level_count = 1
+        if longest > self.tile_size:
+            self.level_count += int(
+                math.ceil(math.log2(longest / self.tile_size))
+            )
+
+        self._levels: List[Optional[np.ndarray]] = [image] + [None] * (
+            self.level_count - 1
+        )
+        self._on_level_ready = on_level_ready
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if self.level_count == 1:
+            self._done.set()
+        elif background:
+            self._thread = threading.Thread(
+                target=self._build, name="TilePyramid", daemon=True
+            )
+            self._thread.start()
+        else:
+            self._build()
+
+    def _build(self):
+        """生成缩小层：先最粗一层(概览)，再由第1层起逐级减半"""
+        try:
+            order = [self.level_count - 1] + list(
+                range(1, self.level_count - 1)
+            )
+            for level in order:
+                if self._cancelled.is_set():
+                    return
+                # 最粗层直接由原图缩小；其余层由上一层减半，总计算量约为原图的两倍
+                source_level = (
+                    0 if level == self.level_count - 1 else level - 1
+                )
+                source = self._levels[source_level]
+                w, h = self.level_size(level)
+                self._levels[level] = cv2.resize(
+                    source, (w, h), interpolation=cv2.INTER_AREA
+                )
+                if self._on_level_ready is not None:
+                    self._on_level_ready(level)
+        except Exception as e:
+            logger.error(f"生成瓦片金字塔失败: {e}")
+        finally:
+            self._done.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待所有层生成完成"""
+        return self._done.wait(timeout)
+
+    def close(self):
+        """取消尚未完成的生成并释放缩小层"""
+        self._cancelled.set()
+        if (
+            self._thread is not None
+            and self._thread is not threading.current_thread()
+        ):
+            self._thread.join(timeout=5.0)
+        self._levels[1:] = [None] * (self.level_count - 1)
+
+    def is_ready(self, level: int) -> bool:
+        """该层是否已生成"""
+        return (
+            0 <= level < self.level_count and self._levels[level] is not None
+        )
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        """第level层的尺寸 (宽, 高)"""
+        factor = 1 << level
+        return (
+            max(1, (self.width + factor - 1) // factor),
+            max(1, (self.height + factor - 1) // factor),
+        )
+
+    def level_for_scale(self, scale: float) -> int:
+        """
+        按显示缩放比例选择层级
+
+        选择分辨率不低于屏幕显示所需的最粗层，避免缩小查看时处理原图像素。
+
+        Args:
+            scale: 原图像素到屏幕像素的缩放比例
+
+        Returns:
+            层号
+        """
+        if scale <= 0:
+            return self.level_count - 1
+        level = int(math.floor(math.log2(1.0 / scale))) if scale < 1.0 else 0
+        return min(max(level, 0), self.level_count - 1)
+
+    def ready_level(self, level: int) -> Optional[int]:
+        """
+        不低于指定层级的最近已生成层(更粗的层作为临时替代)
+
+        Returns:
+            层号，没有可用层时返回 None
+        """
+        for candidate in range(level, self.level_count):
+            if self._levels[candidate] is not None:
+                return candidate
+        return None
+
+    def tile_grid(self, level: int) -> Tuple[int, int]:
+        """第level层的瓦片列数和行数"""
+        w, h = self.level_size(level)
+        return (
+            (w + self.tile_size - 1) // self.tile_size,
+            (h + self.tile_size - 1) // self.tile_size,
+        )
+
+    def tiles_in_rect(
+        self, level: int, x: float, y: float, width: float, height: float
+    ) -> List[Tuple[int, int]]:
+        """
+        与原图坐标矩形相交的瓦片
+
+        Args:
+            level: 层号
+            x, y, width, height: 原图(第0层)坐标下的区域
+
+        Returns:
+            (列, 行) 列表，按行优先排列
+        """
+        cols, rows = self.tile_grid(level)
+        sx, sy = self._level_scale(level)
+        span_x = self.tile_size * sx
+        span_y = self.tile_size * sy
+
+        x0 = max(0, int(math.floor(max(x, 0) / span_x)))
+        y0 = max(0, int(math.floor(max(y, 0) / span_y)))
+        x1 = min(
+            cols - 1, int(math.ceil(min(x + width, self.width) / span_x)) - 1
+        )
+        y1 = min(
+            rows - 1, int(math.ceil(min(y + height, self.height) / span_y)) - 1
+        )
+        return [
+            (tx, ty) for ty in range(y0, y1 + 1) for tx in range(x0, x1 + 1)
+        ]
+
+    def _level_scale(self, level: int) -> Tuple[float, float]:
+        """该层一个像素对应的原图像素数 (x, y)"""
+        w, h = self.level_size(level)
+        return self.width / w, self.height / h
+
+    def tile_rect(
+        self, level: int, tx: int, ty: int
+    ) -> Tuple[float, float, float, float]:
+        """
+        瓦片在原图坐标下的矩形
+
+        Returns:
+            (x, y, width, height)
+        """
+        w, h = self.level_size(level)
+        sx, sy = self._level_scale(level)
+        px, py = tx * self.tile_size, ty * self.tile_size
+        tw = min(self.tile_size, w - px)
+        th = min(self.tile_size, h - py)
+        return px * sx, py * sy, tw * sx, th * sy
+
+    def get_tile(self, level: int, tx: int, ty: int) -> Optional[np.ndarray]:
+        """
+        取瓦片像素(该层数组的视图，不复制)
+
+        Returns:
+            瓦片数组，该层未生成或超出范围时返回 None
+        """
+        data = self._levels[level] if 0 <= level < self.level_count else None
+        if data is None:
+            return None
+        px, py = tx * self.tile_size, ty * self.tile_size
+        if px < 0 or py < 0 or px >= data.shape[1] or py >= data.shape[0]:
+            return None
+        return data[py : py + self.tile_size, px : px + self.tile_size]
+
+    def get_info(self) -> Dict[str, Any]:
+        """获取金字塔信息"""
+        return {
+            "size": (self.width, self.height),
+            "tile_size": self.tile_size,
+            "levels": self.level_count,
+            "ready": [
+                self.is_ready(level) for level in range(self.level_count)
+            ],
+        }
+
+
+class TileCache:
+    """
+    按字节数限制的瓦片缓存(最近最少使用淘汰)
+
+    线程安全：瓦片在后台线程转换后放入，在界面线程绘制时读取。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Args:
+            max_bytes: 缓存占用上限(字节)
+        """
+        self.max_bytes = max(1, int(max_bytes))
+        self._items: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """取缓存项并标记为最近使用，不存在时返回 None"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._hits += 1
+            return item[0]
+
+    def peek(self, key: Hashable) -> Any:
+        """取缓存项但不影响淘汰顺序和统计"""
+        with self._lock:
+            item = self._items.get(key)
+            return item[0] if item is not None else None
+
+    def put(self, key: Hashable, value: Any, nbytes: int):
+        """放入缓存，超出上限时淘汰最久未使用的项"""
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, (_, size) = self._items.popitem(last=False)
+                self._bytes -= size
+                self._evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
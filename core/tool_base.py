@@ -10,6 +10,7 @@ Author: Vision System Team
 Date: 2025-01-04
 """
 
+import importlib
 import logging
 import os
 import sys
@@ -20,9 +21,22 @@ from typing import Any, Dict, List, Optional, Type
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import numpy as np
+
+from core.fixture import FIXTURE_METADATA_KEY, FixtureTransform
+from core.log_config import ToolLogger
+from core.search_region import (
+    RegionView,
+    SearchRegion,
+    make_region_views,
+    merge_results,
+    offset_result,
+    parse_search_regions,
+)
+from core.tracing import begin_span
 from data.image_data import ImageData, ResultData
 from utils.error_management import get_error_message, log_error
-from utils.error_recovery import recover_from_error
+from utils.error_recovery import CircuitBreaker, submit_recovery
 from utils.exceptions import (
     CameraException,
     ImageException,
@@ -47,6 +61,23 @@ class ToolParameter:
     unit: str = ""  # 单位
 
 
+# 输入问题(参数错误、图像无效)的错误码，只影响当前帧，不计入熔断
+INPUT_ERROR_CODES = (400, 422)
+
+
+def search_region_parameter() -> ToolParameter:
+    """搜索区域参数定义，支持搜索区域的工具加入 PARAM_DEFINITIONS["search_region"]"""
+    return ToolParameter(
+        name="搜索区域",
+        param_type="roi_rect",
+        default=None,
+        description=(
+            "只在该区域内搜索：矩形、旋转矩形(center_x/center_y/width/height/angle)、"
+            "多边形(points)或它们的列表，留空为整幅图像"
+        ),
+    )
+
+
 # 参数中文名称映射
 PARAM_CHINESE_NAMES = {
     # 通用参数
@@ -72,6 +103,11 @@ PARAM_CHINESE_NAMES = {
     "angle_range": "角度范围",
     "scale_range": "缩放范围",
     "pyramid_level": "金字塔层级",
+    "publish_fixture": "发布位置修正",
+    "fixture_teach": "设为基准位姿",
+    "fixture_x": "基准X",
+    "fixture_y": "基准Y",
+    "fixture_angle": "基准角度",
     # 检测参数
     "detect_type": "检测类型",
     "min_size": "最小尺寸",
@@ -245,6 +281,10 @@ class ToolBase(ABC):
     - 执行控制 (运行/重置)
     - 状态管理 (启用/禁用)
     - 日志记录
+    - 搜索区域 (SUPPORTS_SEARCH_REGION 为 True 时，按 search_region 参数
+      在区域的零拷贝视图上执行 _run_impl，结果平移回整帧坐标)
+    - 位置修正 (输入图像带有上游定位工具发布的 fixture 时，
+      搜索区域经其变换投影到当前帧)
 
     子类必须实现：
     - tool_name: 工具名称
@@ -274,6 +314,13 @@ class ToolBase(ABC):
         ToolPort("Result", "output", "value", "检测结果"),
     ]
 
+    # 是否支持 search_region 参数(参数定义见 search_region_parameter)
+    SUPPORTS_SEARCH_REGION = False
+
+    # 能否在多进程流程后端的工作进程中执行：状态全部在参数中、
+    # 不持有主进程的设备或连接的工具为True
+    PROCESS_SAFE = True
+
     def __init__(self, name: str = None):
         """
         初始化工具
@@ -294,11 +341,22 @@ class ToolBase(ABC):
         self._execution_time = 0.0
         self._position: Optional[Dict[str, float]] = None  # 工具在算法编辑器中的位置
 
-        # 获取日志器
-        self._logger = logging.getLogger(
-            f"Tool.{self.tool_category}.{self.tool_name}"
+        # 获取日志器(同类型工具共享，调试开关按实例)
+        self._logger = ToolLogger(
+            logging.getLogger(f"Tool.{self.tool_category}.{self.tool_name}")
         )
 
+        # 熔断器：连续失败后本周期直接失败，不再执行和恢复
+        self._circuit_breaker = CircuitBreaker(f"Tool.{self._name}")
+
+        # 当前执行的搜索区域视图(在视图上执行时 _input_data 为区域图像)
+        self._search_view: Optional[RegionView] = None
+        self._pixel_stats = {
+            "frames": 0,
+            "frame_pixels": 0,
+            "processed_pixels": 0,
+        }
+
         # 初始化参数
         self._init_params()
 
@@ -310,7 +368,7 @@ class ToolBase(ABC):
                 if hasattr(param_def, "default"):
                     self._params[key] = param_def.default
                     self._logger.debug(
-                        f"初始化参数: {self._name}.{key} = {param_def.default}"
+                        "初始化参数: %s.%s = %s", self._name, key, param_def.default
                     )
 
     @property
@@ -327,6 +385,12 @@ class ToolBase(ABC):
     def name(self, value: str):
         """设置工具名称"""
         self._name = value
+        self._circuit_breaker.component = f"Tool.{value}"
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """获取工具的熔断器"""
+        return self._circuit_breaker
 
     @property
     def full_name(self) -> str:
@@ -343,6 +407,16 @@ class ToolBase(ABC):
         """设置启用状态"""
         self._is_enabled = value
 
+    @property
+    def debug_logging(self) -> bool:
+        """是否输出本工具的调试日志"""
+        return self._logger.debug_enabled
+
+    @debug_logging.setter
+    def debug_logging(self, value: bool):
+        """运行时开关本工具的调试日志，不影响同类型的其他工具"""
+        self._logger.debug_enabled = bool(value)
+
     @property
     def position(self) -> Optional[Dict[str, float]]:
         """获取工具在算法编辑器中的位置"""
@@ -409,11 +483,9 @@ class ToolBase(ABC):
         # 验证并修正参数值
         fixed_value = self._validate_and_fix_param(key, value)
 
-        # 如果值被修正，记录日志
-        if fixed_value != value:
-            self._logger.debug(
-                f"参数 {key} 自动修正: {value} -> {fixed_value}"
-            )
+        # 如果值被修正，记录日志（按对象比较，参数可能是numpy数组）
+        if fixed_value is not value:
+            self._logger.debug("参数 %s 自动修正: %s -> %s", key, value, fixed_value)
 
         try:
             old_value = self._params.get(key)
@@ -427,9 +499,25 @@ class ToolBase(ABC):
             if options is not None:
                 self._params[f"__options_{key}"] = options
 
-            value_str = str(fixed_value) if not isinstance(fixed_value, (dict, list)) else repr(fixed_value)
-            old_value_str = str(old_value) if not isinstance(old_value, (dict, list)) else repr(old_value)
-            self._logger.info(f"【set_param】设置参数: {self._name}.{key} = '{value_str}' (旧值: '{old_value_str}')")
+            if self._logger.isEnabledFor(logging.DEBUG):
+                value_str = (
+                    str(fixed_value)
+                    if not isinstance(fixed_value, (dict, list))
+                    else repr(fixed_value)
+                )
+                old_value_str = (
+                    str(old_value)
+                    if not isinstance(old_value, (dict, list))
+                    else repr(old_value)
+                )
+                self._logger.debug(
+                    "【set_param】设置参数: %s.%s = '%s' (旧值: '%s')",
+                    self._name, key, value_str, old_value_str,
+                )
+
+            # 用户修改参数后重新允许执行(执行过程中工具自己设置的参数不算)
+            if not self._is_running:
+                self._circuit_breaker.reset()
 
             # 触发参数变更回调
             self._on_param_changed(key, old_value, fixed_value)
@@ -861,6 +949,17 @@ class ToolBase(ABC):
         self._params.clear()
         self._init_params()
 
+    def restore_params(self, params: Dict[str, Any]):
+        """批量恢复参数（加载方案时使用）
+
+        保存的参数在设置时已经校验过，这里直接写入，不逐项校验、
+        不记录日志、也不触发参数变更回调。
+
+        Args:
+            params: 参数字典
+        """
+        self._params.update(params)
+
     def set_input(self, image_data: ImageData, port: str = "InputImage"):
         """
         设置输入数据
@@ -870,9 +969,11 @@ class ToolBase(ABC):
             port: 输入端口名称
         """
         self._input_data = image_data
-        self._logger.debug(
-            f"设置输入: {port}, shape={image_data.shape if image_data.is_valid else 'None'}"
-        )
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                "设置输入: %s, shape=%s",
+                port, image_data.shape if image_data.is_valid else None,
+            )
 
     def get_input(self, port: str = "InputImage") -> Optional[ImageData]:
         """
@@ -930,9 +1031,11 @@ class ToolBase(ABC):
             result_data: 上游工具的结果数据
         """
         self._upstream_result_data = result_data
-        self._logger.debug(
-            f"设置上游结果数据: {result_data.get_all_values().keys() if result_data else 'None'}"
-        )
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                "设置上游结果数据: %s",
+                list(result_data.get_all_values()) if result_data else None,
+            )
 
     def get_upstream_result(self) -> Optional[ResultData]:
         """获取上游工具的结果数据
@@ -963,32 +1066,51 @@ class ToolBase(ABC):
             ToolException: 执行失败
         """
         if not self._is_enabled:
-            self._logger.debug(f"工具已禁用，跳过执行: {self._name}")
+            self._logger.debug("工具已禁用，跳过执行: %s", self._name)
             return True
 
         if self._is_running:
-            self._logger.warning(f"工具正在运行中: {self._name}")
+            self._logger.warning("工具正在运行中: %s", self._name)
             return False
 
+        if not self._circuit_breaker.allow():
+            # 熔断中：本周期直接失败，不执行也不再提交恢复
+            self._last_error = (
+                f"连续执行失败，已熔断，{self._circuit_breaker.retry_in():.1f}秒后重试"
+            )
+            self._result_data = ResultData()
+            self._result_data.status = False
+            self._result_data.message = get_error_message(
+                500, self._last_error
+            )
+            self._result_data.error_code = 500
+            self._result_data.error_type = "CircuitOpen"
+            raise ToolException(
+                get_error_message(500, f"{self._name}: {self._last_error}"),
+                error_code=500,
+                details={"tool": self._name, "circuit": "open"},
+            )
+
         self._is_running = True
         self._last_error = None
         self._result_data = ResultData()
 
         start_time = time.time()
+        span = begin_span(self._name, "tool", tool=self.tool_name)
 
         try:
-            self._logger.info(f"开始执行: {self._name}")
+            self._logger.debug("开始执行: %s", self._name)
 
             # 检查输入
             if not self._check_input():
-                raise ToolException(
+                raise ParameterException(
                     "输入数据无效",
                     error_code=400,
                     details={"tool": self._name, "check": "input"},
                 )
 
-            # 执行实际处理
-            output = self._run_impl()
+            # 执行实际处理(设置了搜索区域时在各区域视图上执行)
+            output = self._run_search_regions()
 
             # 处理输出数据
             if output is not None:
@@ -1012,8 +1134,8 @@ class ToolBase(ABC):
             self._post_process()
 
             self._execution_time = time.time() - start_time
-            self._logger.info(
-                f"执行完成: {self._name}, 耗时={self._execution_time*1000:.2f}ms"
+            self._logger.debug(
+                "执行完成: %s, 耗时=%.2fms", self._name, self._execution_time * 1000
             )
 
             return True
@@ -1033,8 +1155,8 @@ class ToolBase(ABC):
                 400, f"{self._name}: {self._last_error}", {"tool": self._name}
             )
 
-            # 执行错误恢复
-            recover_from_error(
+            # 后台执行错误恢复，不阻塞检测线程
+            submit_recovery(
                 error_type="ParameterError",
                 error_code=400,
                 error_message=self._last_error,
@@ -1063,8 +1185,8 @@ class ToolBase(ABC):
                 422, f"{self._name}: {self._last_error}", {"tool": self._name}
             )
 
-            # 执行错误恢复
-            recover_from_error(
+            # 后台执行错误恢复，不阻塞检测线程
+            submit_recovery(
                 error_type="ImageError",
                 error_code=422,
                 error_message=self._last_error,
@@ -1093,8 +1215,8 @@ class ToolBase(ABC):
                 502, f"{self._name}: {self._last_error}", {"tool": self._name}
             )
 
-            # 执行错误恢复
-            recover_from_error(
+            # 后台执行错误恢复，不阻塞检测线程
+            submit_recovery(
                 error_type="CameraError",
                 error_code=502,
                 error_message=self._last_error,
@@ -1132,8 +1254,8 @@ class ToolBase(ABC):
             # 使用错误管理模块记录错误
             log_error(500, f"{self._name}: {self._last_error}", details)
 
-            # 执行错误恢复
-            recover_from_error(
+            # 后台执行错误恢复，不阻塞检测线程
+            submit_recovery(
                 error_type="InternalError",
                 error_code=500,
                 error_message=self._last_error,
@@ -1149,11 +1271,162 @@ class ToolBase(ABC):
 
         finally:
             self._is_running = False
+            if self._last_error is None:
+                self._circuit_breaker.record_success()
+            elif self._result_data.error_code in INPUT_ERROR_CODES:
+                # 空帧、缺少输入等只影响本帧，不代表工具故障
+                self._circuit_breaker.record_ignored()
+            else:
+                self._circuit_breaker.record_failure()
+            span.end(ok=self._last_error is None)
 
     def _check_input(self) -> bool:
         """检查输入数据有效性，子类可以重写"""
         return self.has_input()
 
+    @property
+    def frame_input(self) -> Optional[ImageData]:
+        """整帧输入图像(在搜索区域视图上执行时 _input_data 只是区域视图)"""
+        view = self._search_view
+        return view.frame if view is not None else self._input_data
+
+    def get_fixture(self) -> Optional[FixtureTransform]:
+        """上游定位工具发布的位置修正(整帧输入图像的 fixture 元数据)，没有时为 None"""
+        frame = self.frame_input
+        if frame is None:
+            return None
+        return frame.get_metadata(FIXTURE_METADATA_KEY)
+
+    def get_search_regions(self) -> List[SearchRegion]:
+        """解析 search_region 参数，未设置时为空列表
+
+        有位置修正时区域按基准位姿定义，经变换投影到当前帧(同一帧共享投影结果)。
+        """
+        if not self.SUPPORTS_SEARCH_REGION:
+            return []
+        value = self.get_param("search_region")
+        fixture = self.get_fixture()
+        if fixture is not None and value:
+            return fixture.map_regions(value)
+        return parse_search_regions(value)
+
+    def _use_search_region_views(self) -> bool:
+        """是否在搜索区域视图上执行，子类可以按模式重写
+
+        返回False时工具处理整幅图像，可用 in_search_region 按整帧坐标过滤结果。
+        """
+        return True
+
+    def in_search_region(self, xs: Any, ys: Any) -> np.ndarray:
+        """点是否在搜索区域内
+
+        坐标为工具当前看到的图像坐标：在区域视图上执行时为视图坐标，
+        否则为整帧坐标。轴对齐矩形区域的视图内所有点都在区域内，
+        旋转矩形和多边形需要用它过滤结果。
+
+        Args:
+            xs, ys: 坐标(标量或数组)
+
+        Returns:
+            布尔数组；未设置搜索区域时全为True
+        """
+        view = self._search_view
+        if view is not None:
+            return view.contains(xs, ys)
+        inside = np.zeros(
+            np.broadcast(np.asarray(xs), np.asarray(ys)).shape, dtype=bool
+        )
+        regions = self.get_search_regions()
+        if not regions:
+            return ~inside
+        for region in regions:
+            inside |= region.contains(xs, ys)
+        return inside
+
+    def search_region_mask(self) -> Optional[np.ndarray]:
+        """当前区域视图的掩码(视图坐标，uint8，255为区域内)
+
+        Returns:
+            旋转矩形或多边形区域的掩码；轴对齐矩形或不在区域视图上执行时为 None
+        """
+        view = self._search_view
+        return view.mask if view is not None else None
+
+    def _run_search_regions(self):
+        """按搜索区域执行 _run_impl
+
+        没有搜索区域时直接处理整帧；否则依次把各区域的零拷贝视图作为输入执行，
+        结果和叠加图元平移回整帧坐标后合并，输出图像为整帧视图。
+        """
+        if not self.SUPPORTS_SEARCH_REGION or not self.has_input():
+            return self._run_impl()
+
+        frame = self._input_data
+        frame_pixels = frame.width * frame.height
+        regions = (
+            self.get_search_regions()
+            if self._use_search_region_views()
+            else []
+        )
+        if not regions:
+            self._count_pixels(frame_pixels, frame_pixels)
+            return self._run_impl()
+
+        views = make_region_views(frame, regions)
+        self._count_pixels(frame_pixels, sum(view.pixels for view in views))
+        if not views:
+            raise ParameterException("搜索区域不在图像范围内")
+
+        results = []
+        try:
+            for view in views:
+                self._input_data = view.image
+                self._search_view = view
+                self._result_data = ResultData()
+                self._run_impl()
+                results.append(
+                    offset_result(self._result_data, view.x, view.y)
+                )
+        finally:
+            self._input_data = frame
+            self._search_view = None
+
+        self._result_data = self._merge_region_results(results)
+        self._output_data = frame.view(self._result_data.overlay)
+        return None
+
+    def _merge_region_results(self, results: List[ResultData]) -> ResultData:
+        """合并各搜索区域的结果(已在整帧坐标下)，子类可以重写修正比例等派生值"""
+        return merge_results(results)
+
+    def _count_pixels(self, frame_pixels: int, processed_pixels: int):
+        """累计像素处理统计"""
+        stats = self._pixel_stats
+        stats["frames"] += 1
+        stats["frame_pixels"] += frame_pixels
+        stats["processed_pixels"] += processed_pixels
+
+    def get_pixel_stats(self) -> Dict[str, Any]:
+        """获取像素处理统计(支持搜索区域的工具)
+
+        Returns:
+            帧数、整帧像素总数、实际处理的像素总数，以及节省的比例
+        """
+        stats = dict(self._pixel_stats)
+        total = stats["frame_pixels"]
+        stats["saved_ratio"] = (
+            1.0 - stats["processed_pixels"] / total if total else 0.0
+        )
+        return stats
+
+    def reset_pixel_stats(self):
+        """清空像素处理统计"""
+        self._pixel_stats = {
+            "frames": 0,
+            "frame_pixels": 0,
+            "processed_pixels": 0,
+        }
+
     @abstractmethod
     def _run_impl(self):
         """
@@ -1171,6 +1444,17 @@ class ToolBase(ABC):
         """执行后处理，子类可以重写"""
         pass
 
+    def warmup(self) -> bool:
+        """预热重量级资源（模型、模板、标定映射等），子类可以重写
+
+        加载方案时在工作线程中调用，使首次运行不再承担加载耗时。
+        实现需要与run()互斥的部分自行加锁；方案在预热完成前不会运行。
+
+        Returns:
+            预热成功返回True
+        """
+        return True
+
     def reset(self):
         """重置工具状态"""
         self._output_data = None
@@ -1194,6 +1478,24 @@ class ToolBase(ABC):
         self.clear_output()
         self.reset()
 
+    def apply_run_result(
+        self,
+        output: Optional[ImageData],
+        result: Optional[ResultData],
+        execution_time: float,
+    ):
+        """
+        记录在工作进程中执行的结果(多进程流程后端使用)
+
+        Args:
+            output: 输出图像
+            result: 结果数据
+            execution_time: 执行耗时(秒)
+        """
+        self._output_data = output
+        self._result_data = result
+        self._execution_time = execution_time
+
     def copy(self) -> "ToolBase":
         """创建工具拷贝"""
         new_tool = self.__class__(self._name)
@@ -1231,6 +1533,9 @@ class ToolBase(ABC):
 class ImageSourceToolBase(ToolBase):
     """图像源工具基类"""
 
+    # 相机等图像源由主进程持有
+    PROCESS_SAFE = False
+
     OUTPUT_PORTS = [ToolPort("OutputImage", "output", "image", "输出图像")]
 
     def _check_input(self) -> bool:
@@ -1288,10 +1593,16 @@ class RecognitionToolBase(ToolBase):
 
 
 class ToolRegistry:
-    """工具注册表，用于管理所有可用的工具"""
+    """工具注册表，用于管理所有可用的工具
+
+    注册表以静态工具清单(tools/tool_manifest.json)为后盾：类别、名称和
+    参数定义直接从清单读取，工具模块只在 get_tool_class/create_tool
+    真正需要工具类时才导入。工具模块导入时仍通过 register 装饰器登记。
+    """
 
     _instance = None
     _tools: Dict[str, Type[ToolBase]] = {}
+    _manifest = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -1305,22 +1616,102 @@ class ToolRegistry:
         cls._tools[key] = tool_class
         return tool_class
 
+    @classmethod
+    def get_manifest(cls):
+        """获取工具清单(首次调用时加载)"""
+        if cls._manifest is None:
+            from core.tool_manifest import load_manifest
+
+            cls._manifest = load_manifest()
+        return cls._manifest
+
+    @classmethod
+    def set_manifest(cls, manifest):
+        """替换工具清单，传入None则在下次使用时重新加载"""
+        cls._manifest = manifest
+
+    @classmethod
+    def _load_tool_class(cls, key: str) -> Optional[Type[ToolBase]]:
+        """按清单导入工具模块，返回注册的工具类"""
+        entry = cls.get_manifest().get(key)
+        if entry is None:
+            return None
+
+        try:
+            importlib.import_module(entry.module)
+        except Exception as e:
+            logging.getLogger("ToolRegistry").error(
+                f"导入工具模块失败: {entry.module}, {e}"
+            )
+            return None
+
+        return cls._tools.get(key)
+
     @classmethod
     def get_tool_class(cls, category: str, name: str) -> Type[ToolBase]:
         """获取工具类"""
         key = f"{category}.{name}"
-        return cls._tools.get(key)
+        tool_class = cls._tools.get(key)
+        if tool_class is None:
+            tool_class = cls._load_tool_class(key)
+        return tool_class
+
+    @classmethod
+    def is_loaded(cls, category: str, name: str) -> bool:
+        """工具模块是否已导入"""
+        return f"{category}.{name}" in cls._tools
+
+    @classmethod
+    def get_tool_info(cls, category: str, name: str):
+        """获取工具清单条目(不导入工具模块)"""
+        return cls.get_manifest().get(f"{category}.{name}")
+
+    @classmethod
+    def get_param_definitions(cls, category: str, name: str) -> Any:
+        """获取工具参数定义
+
+        优先使用清单中的定义，不触发工具模块导入；
+        清单中没有该工具时退回到已注册工具类的PARAM_DEFINITIONS。
+        """
+        entry = cls.get_tool_info(category, name)
+        if entry is not None:
+            return entry.params
+
+        tool_class = cls._tools.get(f"{category}.{name}")
+        if tool_class is None:
+            return {}
+
+        from core.tool_manifest import serialize_param_definitions
+
+        return serialize_param_definitions(
+            getattr(tool_class, "PARAM_DEFINITIONS", None)
+        )
+
+    @classmethod
+    def get_tool_names(cls, category: str = None) -> List[str]:
+        """获取工具键列表(类别.名称)，不导入工具模块"""
+        keys = cls.get_manifest().keys()
+        keys += [k for k in cls._tools.keys() if k not in keys]
+        if category is None:
+            return keys
+        return [k for k in keys if k.startswith(f"{category}.")]
 
     @classmethod
     def get_tools_by_category(cls, category: str) -> Dict[str, Type[ToolBase]]:
         """获取指定类别的所有工具"""
-        return {
-            k: v for k, v in cls._tools.items() if k.startswith(f"{category}.")
-        }
+        result = {}
+        for key in cls.get_tool_names(category):
+            tool_class = cls.get_tool_class(*key.split(".", 1))
+            if tool_class is not None:
+                result[key] = tool_class
+        return result
 
     @classmethod
     def get_all_tools(cls) -> Dict[str, Type[ToolBase]]:
-        """获取所有已注册的工具"""
+        """获取所有已注册的工具(会导入清单中的全部工具模块)"""
+        for key in cls.get_manifest().keys():
+            if key not in cls._tools:
+                cls._load_tool_class(key)
         return cls._tools.copy()
 
     @classmethod
@@ -1337,7 +1728,7 @@ class ToolRegistry:
     def get_categories(cls) -> List[str]:
         """获取所有工具类别"""
         categories = set()
-        for key in cls._tools.keys():
+        for key in cls.get_tool_names():
             parts = key.split(".")
             if len(parts) >= 1:
                 categories.add(parts[0])
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工具清单模块
+
+维护一份静态工具清单(tools/tool_manifest.json)，记录每个工具的
+类别、名称、所在模块和参数定义。ToolRegistry 依据清单按需导入工具
+模块，使启动时不再加载全部工具及其重量级依赖(easyocr/torch、
+ultralytics、numba、polars、Qt 对话框、相机SDK等)。
+
+新增或修改工具后需重新生成清单：
+    python -m core.tool_manifest          # 重新生成
+    python -m core.tool_manifest --check  # 仅校验清单是否与代码一致
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import argparse
+import dataclasses
+import importlib
+import json
+import logging
+import os
+import pkgutil
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+# 清单文件默认位置
+MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tools",
+    "tool_manifest.json",
+)
+
+# 清单格式版本
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ToolManifestEntry:
+    """工具清单条目"""
+
+    category: str  # 工具类别
+    name: str  # 工具名称
+    module: str  # 工具类所在模块
+    class_name: str  # 工具类名
+    description: str = ""  # 工具描述
+    params: Any = field(default_factory=dict)  # 参数定义(JSON兼容格式)
+
+    @property
+    def key(self) -> str:
+        """注册表键 (类别.名称)"""
+        return f"{self.category}.{self.name}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolManifestEntry":
+        """从字典创建"""
+        return cls(
+            category=data["category"],
+            name=data["name"],
+            module=data["module"],
+            class_name=data["class_name"],
+            description=data.get("description", ""),
+            params=data.get("params", {}),
+        )
+
+
+def serialize_param_definitions(param_definitions: Any) -> Any:
+    """将工具类的PARAM_DEFINITIONS转换为JSON兼容格式
+
+    支持三种现有写法：
+    - 字典，值为ToolParameter
+    - 字典，值为普通字典
+    - 列表，元素为普通字典
+
+    Args:
+        param_definitions: 工具类的PARAM_DEFINITIONS
+
+    Returns:
+        JSON兼容的参数定义
+    """
+    if not param_definitions:
+        return {}
+
+    def _convert(param_def):
+        if dataclasses.is_dataclass(param_def):
+            return dataclasses.asdict(param_def)
+        if isinstance(param_def, dict):
+            return dict(param_def)
+        return {"name": str(param_def)}
+
+    if isinstance(param_definitions, dict):
+        return {
+            key: _convert(value) for key, value in param_definitions.items()
+        }
+    return [_convert(value) for value in param_definitions]
+
+
+class ToolManifest:
+    """
+    静态工具清单
+
+    只包含描述信息，读取清单不会导入任何工具模块。
+
+    示例：
+        manifest = ToolManifest.load()
+        entry = manifest.get("ImageFilter.高斯滤波")
+        print(entry.module)  # tools.vision.image_filter
+    """
+
+    def __init__(self, entries: Optional[List[ToolManifestEntry]] = None):
+        self._entries: Dict[str, ToolManifestEntry] = {}
+        for entry in entries or []:
+            self._entries[entry.key] = entry
+
+    @property
+    def entries(self) -> List[ToolManifestEntry]:
+        """获取所有条目"""
+        return list(self._entries.values())
+
+    def get(self, key: str) -> Optional[ToolManifestEntry]:
+        """按注册表键获取条目"""
+        return self._entries.get(key)
+
+    def get_by_category(self, category: str) -> List[ToolManifestEntry]:
+        """获取指定类别的所有条目"""
+        return [e for e in self._entries.values() if e.category == category]
+
+    def get_categories(self) -> List[str]:
+        """获取所有类别"""
+        categories = []
+        for entry in self._entries.values():
+            if entry.category not in categories:
+                categories.append(entry.category)
+        return categories
+
+    def keys(self) -> List[str]:
+        """获取所有注册表键"""
+        return list(self._entries.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "version": MANIFEST_VERSION,
+            "tools": [entry.to_dict() for entry in self._entries.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolManifest":
+        """从字典创建"""
+        return cls(
+            [ToolManifestEntry.from_dict(d) for d in data.get("tools", [])]
+        )
+
+    @classmethod
+    def load(cls, path: str = None) -> "ToolManifest":
+        """加载清单文件
+
+        Args:
+            path: 清单路径，默认为tools/tool_manifest.json
+
+        Returns:
+            清单实例；文件不存在或损坏时返回空清单
+        """
+        path = path or MANIFEST_PATH
+        if not os.path.exists(path):
+            logger.warning(f"工具清单不存在，将退回到显式导入: {path}")
+            return cls()
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"读取工具清单失败: {path}, {e}")
+            return cls()
+
+    def save(self, path: str = None):
+        """保存清单文件
+
+        Args:
+            path: 清单路径，默认为tools/tool_manifest.json
+        """
+        path = path or MANIFEST_PATH
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    @classmethod
+    def build(cls, package: str = "tools") -> "ToolManifest":
+        """导入包内全部模块，根据已注册的工具类生成清单
+
+        Args:
+            package: 工具包名称
+
+        Returns:
+            新生成的清单
+        """
+        from core.tool_base import ToolRegistry
+
+        root = importlib.import_module(package)
+        for module_info in pkgutil.walk_packages(
+            root.__path__, prefix=f"{package}."
+        ):
+            try:
+                importlib.import_module(module_info.name)
+            except Exception as e:
+                logger.warning(f"导入模块失败: {module_info.name}, {e}")
+
+        entries = []
+        for key, tool_class in ToolRegistry._tools.items():
+            if not tool_class.__module__.startswith(f"{package}."):
+                continue
+            entries.append(
+                ToolManifestEntry(
+                    category=tool_class.tool_category,
+                    name=tool_class.tool_name,
+                    module=tool_class.__module__,
+                    class_name=tool_class.__name__,
+                    description=tool_class.tool_description,
+                    params=serialize_param_definitions(
+                        getattr(tool_class, "PARAM_DEFINITIONS", None)
+                    ),
+                )
+            )
+
+        entries.sort(key=lambda e: (e.module, e.key))
+        return cls(entries)
+
+    def diff(self, other: "ToolManifest") -> List[str]:
+        """比较两个清单
+
+        Args:
+            other: 另一个清单
+
+        Returns:
+            差异描述列表，为空表示一致
+        """
+        differences = []
+        for key in self.keys():
+            if key not in other:
+                differences.append(f"多余条目: {key}")
+        for key in other.keys():
+            if key not in self:
+                differences.append(f"缺少条目: {key}")
+            elif self.get(key).to_dict() != other.get(key).to_dict():
+                differences.append(f"条目不一致: {key}")
+        return differences
+
+
+def load_manifest(path: str = None) -> ToolManifest:
+    """加载工具清单"""
+    return ToolManifest.load(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：重新生成或校验工具清单"""
+    parser = argparse.ArgumentParser(description="生成或校验工具清单")
+    parser.add_argument(
+        "--check", action="store_true", help="只校验清单，不写入文件"
+    )
+    parser.add_argument("--path", default=MANIFEST_PATH, help="清单路径")
+    args = parser.parse_args(argv)
+
+    built = ToolManifest.build()
+
+    if args.check:
+        differences = ToolManifest.load(args.path).diff(built)
+        for line in differences:
+            print(line)
+        if differences:
+            print("工具清单已过期，请运行: python -m core.tool_manifest")
+            return 1
+        print(f"工具清单一致 ({len(built)} 个工具)")
+        return 0
+
+    built.save(args.path)
+    print(f"已生成工具清单: {args.path} ({len(built)} 个工具)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
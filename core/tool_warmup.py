@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工具预热模块
+
+加载方案时在线程池中并行预热各工具的重量级资源(检测模型、OCR模型、
+模板图像、标定映射等)，并提供就绪信号和逐工具的加载耗时报告。
+
+使用示例：
+    warmup = ToolWarmup(max_workers=4)
+    warmup.add_ready_callback(lambda report: print("就绪"))
+    warmup.start([(tool, ToolLoadRecord("流程1", tool.name, "Vision.灰度匹配"))])
+    warmup.wait(timeout=30)
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolBase
+
+logger = logging.getLogger(__name__)
+
+# 默认预热线程数
+DEFAULT_WARMUP_WORKERS = min(4, os.cpu_count() or 1)
+
+
+@dataclass
+class ToolLoadRecord:
+    """单个工具的加载记录"""
+
+    procedure: str  # 所属流程
+    tool: str  # 工具实例名称
+    tool_type: str  # 工具类型 (类别.名称)
+    create_time: float = 0.0  # 创建耗时(秒)，含按需导入工具模块
+    restore_time: float = 0.0  # 参数恢复耗时(秒)
+    warmup_time: float = 0.0  # 预热耗时(秒)
+    warmed: bool = False  # 是否执行了预热
+    success: bool = True  # 预热是否成功
+    error: Optional[str] = None  # 预热错误信息
+
+    @property
+    def total_time(self) -> float:
+        """总耗时(秒)"""
+        return self.create_time + self.restore_time + self.warmup_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        data = asdict(self)
+        data["total_time"] = self.total_time
+        return data
+
+
+def needs_warmup(tool: ToolBase) -> bool:
+    """工具类是否重写了warmup"""
+    return type(tool).warmup is not ToolBase.warmup
+
+
+class ToolWarmup:
+    """
+    工具并行预热器
+
+    只有重写了 ToolBase.warmup 的工具才会提交到线程池；
+    全部完成后设置就绪信号并调用就绪回调(在预热线程中调用)。
+    """
+
+    def __init__(self, max_workers: int = None):
+        """
+        初始化预热器
+
+        Args:
+            max_workers: 预热线程数，默认为 min(4, CPU核数)
+        """
+        self._max_workers = max_workers or DEFAULT_WARMUP_WORKERS
+        self._records: List[ToolLoadRecord] = []
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._ready_callbacks: List[Callable[[List[ToolLoadRecord]], None]] = (
+            []
+        )
+        self._start_time = 0.0
+        self._elapsed = 0.0
+
+    @property
+    def is_ready(self) -> bool:
+        """是否已全部预热完成"""
+        return self._ready.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        """从开始到就绪的耗时(秒)"""
+        return self._elapsed
+
+    def add_ready_callback(
+        self, callback: Callable[[List[ToolLoadRecord]], None]
+    ):
+        """添加就绪回调，已就绪时立即调用
+
+        Args:
+            callback: 回调函数，参数为加载记录列表
+        """
+        with self._lock:
+            if not self._ready.is_set():
+                self._ready_callbacks.append(callback)
+                return
+        callback(self.get_report())
+
+    def start(
+        self, tools: List[Tuple[ToolBase, ToolLoadRecord]]
+    ) -> "ToolWarmup":
+        """开始预热
+
+        Args:
+            tools: (工具, 加载记录) 列表
+
+        Returns:
+            预热器自身
+        """
+        self._start_time = time.perf_counter()
+        self._records = [record for _, record in tools]
+        heavy = [
+            (tool, record) for tool, record in tools if needs_warmup(tool)
+        ]
+
+        if not heavy:
+            self._finish()
+            return self
+
+        self._pending = len(heavy)
+        executor = ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(heavy)),
+            thread_name_prefix="ToolWarmup",
+        )
+        for tool, record in heavy:
+            executor.submit(self._warmup_tool, tool, record)
+        # 不等待，线程在任务完成后自动退出
+        executor.shutdown(wait=False)
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待预热完成
+
+        Args:
+            timeout: 超时时间(秒)，None表示一直等待
+
+        Returns:
+            是否已就绪
+        """
+        return self._ready.wait(timeout)
+
+    def get_report(self) -> List[ToolLoadRecord]:
+        """获取加载记录(按总耗时降序)"""
+        return sorted(self._records, key=lambda r: r.total_time, reverse=True)
+
+    def _warmup_tool(self, tool: ToolBase, record: ToolLoadRecord):
+        """预热单个工具"""
+        start = time.perf_counter()
+        try:
+            record.success = bool(tool.warmup())
+            if not record.success:
+                record.error = "预热返回失败"
+        except Exception as e:
+            record.success = False
+            record.error = str(e)
+            logger.warning(f"工具预热失败: {record.tool}, {e}")
+        finally:
+            record.warmed = True
+            record.warmup_time = time.perf_counter() - start
+
+        with self._lock:
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self._finish()
+
+    def _finish(self):
+        """设置就绪信号并通知回调"""
+        self._elapsed = time.perf_counter() - self._start_time
+        with self._lock:
+            self._ready.set()
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+
+        report = self.get_report()
+        warmed = [r for r in report if r.warmed]
+        failed = [r for r in warmed if not r.success]
+        logger.info(
+            f"工具预热完成: {len(warmed)}/{len(report)} 个工具, "
+            f"失败 {len(failed)} 个, 耗时 {self._elapsed * 1000:.1f}ms"
+        )
+
+        for callback in callbacks:
+            try:
+                callback(report)
+            except Exception as e:
+                logger.error(f"就绪回调执行失败: {e}")
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行追踪模块
+
+记录工具执行、输入传递、流水线排队等待、相机采集、通信发送和
+ImageData拷贝等区间(span)，用于分析一帧的时间花在哪里。
+
+- 每个线程写入自己的环形缓冲区，记录时不加锁；缓冲区满后覆盖最旧的记录
+- 线程退出后其缓冲区在被收集(导出)过之后丢弃，未收集的最多保留
+  MAX_DEAD_BUFFERS 个，线程池反复创建线程时内存仍有上界
+- 未启用时 trace_span/begin_span 返回共享的空对象，开销只有一次函数调用和标志判断
+- export_chrome_trace 导出 Chrome trace / Perfetto 可直接打开的JSON
+- latency_histogram 按区间名统计耗时分布(例如每个工具)
+
+使用示例：
+    enable_tracing()
+    solution.run(image)
+
+    with trace_span("my_step", "custom", frame=3) as span:
+        ...
+        span.set(bytes=1024)
+
+    export_chrome_trace("trace.json")   # chrome://tracing 或 ui.perfetto.dev
+    print(latency_histogram("tool"))
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+# 每个线程的默认环形缓冲区容量(区间数)
+DEFAULT_BUFFER_CAPACITY = 16384
+
+# 已退出且未被收集的线程缓冲区最多保留的个数(超出时丢弃最早的)
+MAX_DEAD_BUFFERS = 64
+
+# 耗时直方图的默认桶上界(毫秒)
+DEFAULT_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_now_ns = time.perf_counter_ns
+
+_enabled = False
+_capacity = DEFAULT_BUFFER_CAPACITY
+_generation = 0
+_buffers: List["_RingBuffer"] = []
+_buffers_lock = threading.Lock()
+_local = threading.local()
+
+
+class _RingBuffer:
+    """单线程环形缓冲区，只由所属线程写入"""
+
+    __slots__ = (
+        "events",
+        "count",
+        "capacity",
+        "tid",
+        "thread_name",
+        "generation",
+        "thread",
+        "collected",
+    )
+
+    def __init__(self, capacity: int, generation: int):
+        thread = threading.current_thread()
+        self.events: List[Optional[tuple]] = [None] * capacity
+        self.count = 0
+        self.capacity = capacity
+        self.tid = threading.get_ident()
+        self.thread_name = thread.name
+        self.generation = generation
+        self.thread = weakref.ref(thread)
+        # 上次被收集时的记录数，-1 表示未被收集过
+        self.collected = -1
+
+    def is_alive(self) -> bool:
+        """所属线程是否仍在运行"""
+        thread = self.thread()
+        return thread is not None and thread.is_alive()
+
+    def add(self, event: tuple):
+        self.events[self.count % self.capacity] = event
+        self.count += 1
+
+    def snapshot(self) -> List[tuple]:
+        """按时间顺序复制当前记录"""
+        count = self.count
+        if count <= self.capacity:
+            return [
+                event for event in self.events[:count] if event is not None
+            ]
+        start = count % self.capacity
+        events = self.events[start:] + self.events[:start]
+        return [event for event in events if event is not None]
+
+
+def _buffer() -> _RingBuffer:
+    """获取当前线程的缓冲区，首次使用或重新启用后创建"""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None or buffer.generation != _generation:
+        buffer = _RingBuffer(_capacity, _generation)
+        _local.buffer = buffer
+        with _buffers_lock:
+            _prune_buffers()
+            _buffers.append(buffer)
+    return buffer
+
+
+def _prune_buffers():
+    """丢弃已退出线程的缓冲区(调用方持有 _buffers_lock)
+
+    已收集过全部记录的直接丢弃；未收集的超过 MAX_DEAD_BUFFERS 个时丢弃最早的。
+    """
+    dead = [buffer for buffer in _buffers if not buffer.is_alive()]
+    if not dead:
+        return
+    drop = {id(buffer) for buffer in dead if buffer.collected == buffer.count}
+    pending = [buffer for buffer in dead if id(buffer) not in drop]
+    drop.update(
+        id(buffer)
+        for buffer in pending[: max(0, len(pending) - MAX_DEAD_BUFFERS)]
+    )
+    if drop:
+        _buffers[:] = [buffer for buffer in _buffers if id(buffer) not in drop]
+
+
+class Span:
+    """进行中的追踪区间"""
+
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = _now_ns()
+
+    def set(self, **args) -> "Span":
+        """附加参数(例如字节数、状态)"""
+        self.args.update(args)
+        return self
+
+    def end(self, **args):
+        """结束区间并写入当前线程的缓冲区"""
+        if args:
+            self.args.update(args)
+        _buffer().add(
+            (
+                self.name,
+                self.category,
+                self.start,
+                _now_ns() - self.start,
+                self.args,
+            )
+        )
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+        return False
+
+
+class _NullSpan:
+    """未启用追踪时使用的空区间"""
+
+    __slots__ = ()
+
+    def set(self, **args) -> "_NullSpan":
+        return self
+
+    def end(self, **args):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable_tracing(capacity: int = DEFAULT_BUFFER_CAPACITY):
+    """启用追踪
+
+    Args:
+        capacity: 每个线程的环形缓冲区容量(区间数)
+    """
+    global _enabled, _capacity, _generation
+    with _buffers_lock:
+        if capacity != _capacity:
+            _capacity = max(16, int(capacity))
+            _generation += 1
+            _buffers.clear()
+    _enabled = True
+    logger.info(f"执行追踪已启用，每线程缓冲 {_capacity} 个区间")
+
+
+def disable_tracing():
+    """停用追踪(已记录的区间保留，可继续导出)"""
+    global _enabled
+    _enabled = False
+
+
+def is_tracing_enabled() -> bool:
+    """是否已启用追踪"""
+    return _enabled
+
+
+def clear_trace():
+    """清空所有线程已记录的区间"""
+    global _generation
+    with _buffers_lock:
+        _generation += 1
+        _buffers.clear()
+
+
+def trace_span(name: str, category: str = "", **args):
+    """创建追踪区间(上下文管理器)
+
+    Args:
+        name: 区间名
+        category: 类别，例如 "tool"、"pipeline"、"camera"
+        **args: 附加参数
+
+    Returns:
+        Span，未启用追踪时为空对象
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, category, args)
+
+
+# 非上下文管理器的写法：span = begin_span(...); ...; span.end()
+begin_span = trace_span
+
+
+def record_span(
+    name: str, category: str, start_ns: int, duration_ns: int, **args
+):
+    """直接记录一个已知起止时间的区间(例如排队等待)
+
+    Args:
+        name: 区间名
+        category: 类别
+        start_ns: 开始时间(time.perf_counter_ns)
+        duration_ns: 持续时间(纳秒)
+        **args: 附加参数
+    """
+    if _enabled:
+        _buffer().add((name, category, start_ns, max(0, duration_ns), args))
+
+
+def traced(
+    name: str = None, category: str = "", args: Callable[..., Dict] = None
+):
+    """函数追踪装饰器
+
+    Args:
+        name: 区间名，默认为函数的限定名
+        category: 类别
+        args: 根据调用参数生成附加参数的函数
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*call_args, **call_kwargs):
+            if not _enabled:
+                return func(*call_args, **call_kwargs)
+            extra = args(*call_args, **call_kwargs) if args else {}
+            with Span(span_name, category, extra):
+                return func(*call_args, **call_kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def collect_spans(category: str = None) -> List[Dict[str, Any]]:
+    """收集所有线程已记录的区间
+
+    Args:
+        category: 类别过滤
+
+    Returns:
+        区间字典列表(按开始时间排序)，时间单位为纳秒
+    """
+    with _buffers_lock:
+        buffers = list(_buffers)
+    spans = []
+    for buffer in buffers:
+        count = buffer.count
+        events = buffer.snapshot()
+        buffer.collected = count
+        for name, cat, start, duration, args in events:
+            if category is not None and cat != category:
+                continue
+            spans.append(
+                {
+                    "name": name,
+                    "category": cat,
+                    "start_ns": start,
+                    "duration_ns": duration,
+                    "tid": buffer.tid,
+                    "thread": buffer.thread_name,
+                    "args": dict(args),
+                }
+            )
+    spans.sort(key=lambda span: span["start_ns"])
+    return spans
+
+
+def export_chrome_trace(path: str = None) -> Dict[str, Any]:
+    """导出 Chrome trace 格式(Perfetto兼容)
+
+    Args:
+        path: 输出文件路径，None表示只返回数据
+
+    Returns:
+        trace字典 {"traceEvents": [...], "displayTimeUnit": "ms"}
+    """
+    pid = os.getpid()
+    spans = collect_spans()
+    events = []
+    threads = {}
+    for span in spans:
+        threads[span["tid"]] = span["thread"]
+        events.append(
+            {
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": span["start_ns"] / 1000.0,
+                "dur": span["duration_ns"] / 1000.0,
+                "pid": pid,
+                "tid": span["tid"],
+                "args": {
+                    key: _json_value(value)
+                    for key, value in span["args"].items()
+                },
+            }
+        )
+    for tid, thread_name in threads.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread_name},
+            }
+        )
+
+    trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+        logger.info(f"追踪数据已导出: {path}, {len(spans)} 个区间")
+    return trace
+
+
+def latency_histogram(
+    category: str = "tool",
+    buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS,
+) -> Dict[str, Dict[str, Any]]:
+    """按区间名统计耗时分布
+
+    Args:
+        category: 类别，默认统计工具执行区间
+        buckets_ms: 直方图桶上界(毫秒)，最后一个桶包含所有更大的值
+
+    Returns:
+        {区间名: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+                  "buckets": [(上界ms, 数量), ...]}}
+    """
+    durations: Dict[str, List[int]] = {}
+    for span in collect_spans(category):
+        durations.setdefault(span["name"], []).append(span["duration_ns"])
+
+    edges = np.asarray(buckets_ms, dtype=np.float64)
+    histogram = {}
+    for name, values in durations.items():
+        ms = np.asarray(values, dtype=np.float64) / 1e6
+        counts = np.bincount(
+            np.searchsorted(edges, ms, side="left"), minlength=len(edges) + 1
+        )
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        histogram[name] = {
+            "count": int(ms.size),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(ms.max()),
+            "buckets": list(
+                zip(list(buckets_ms) + [float("inf")], counts.tolist())
+            ),
+        }
+    return histogram
+
+
+def _json_value(value: Any) -> Any:
+    """把参数转换为可JSON序列化的值"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
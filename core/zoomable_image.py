@@ -10,6 +10,7 @@
 - 拖拽平移
 - 缩放范围限制
 - 缩放变化信号
+- 超大图像分块显示(瓦片金字塔，只绘制可见瓦片，后台逐步加载)
 
 Usage:
 # 方式1: 继承使用
@@ -21,15 +22,31 @@ class MyImageCanvas(ZoomableGraphicsView):
 # 方式2: 嵌入使用
 canvas = ZoomableGraphicsView(parent)
 canvas.set_image(qpixmap)
+
+# 方式3: 直接显示numpy图像，超大图像自动使用分块显示
+canvas.set_image_array(image)
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+import cv2
+import numpy as np
+
+from core.tile_pyramid import (
+    DEFAULT_CACHE_BYTES,
+    DEFAULT_TILE_SIZE,
+    TileCache,
+    TilePyramid,
+)
+
 try:
-    from PyQt6.QtCore import QPointF, QSize, Qt, pyqtSignal
+    from PyQt6.QtCore import QObject, QRectF, Qt, pyqtSignal
     from PyQt6.QtGui import QBrush, QColor, QImage, QPainter, QPixmap
     from PyQt6.QtWidgets import (
+        QGraphicsItem,
         QGraphicsPixmapItem,
         QGraphicsScene,
         QGraphicsView,
@@ -38,9 +55,10 @@ try:
 
     PYQT_VERSION = 6
 except Exception:
-    from PyQt5.QtCore import QPointF, QSize, Qt, pyqtSignal
+    from PyQt5.QtCore import QObject, QRectF, Qt, pyqtSignal
     from PyQt5.QtGui import QBrush, QColor, QImage, QPainter, QPixmap
     from PyQt5.QtWidgets import (
+        QGraphicsItem,
         QGraphicsPixmapItem,
         QGraphicsScene,
         QGraphicsView,
@@ -82,6 +100,228 @@ def _get_aspect_ratio_mode():
         return Qt.KeepAspectRatio
 
 
+# 超过该像素数的图像使用分块显示
+TILED_IMAGE_PIXELS = 4096 * 4096
+
+# 后台转换瓦片的线程数
+TILE_LOADER_WORKERS = 2
+
+
+def array_to_qimage(image: np.ndarray) -> QImage:
+    """
+    将OpenCV图像(BGR/BGRA/灰度)转换为独立持有数据的QImage
+
+    Args:
+        image: numpy图像
+
+    Returns:
+        QImage
+    """
+    if image.ndim == 2:
+        data = np.ascontiguousarray(image)
+        fmt = QImage.Format.Format_Grayscale8
+        channels = 1
+    elif image.shape[2] == 4:
+        data = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+        fmt = QImage.Format.Format_RGBA8888
+        channels = 4
+    else:
+        data = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        fmt = QImage.Format.Format_RGB888
+        channels = 3
+    h, w = data.shape[:2]
+    # copy() 使QImage拥有自己的内存，不依赖numpy数组的生命周期
+    return QImage(data.data, w, h, w * channels, fmt).copy()
+
+
+class _TileSignals(QObject):
+    """后台线程通知界面线程重绘(跨线程信号自动排队到界面线程)"""
+
+    updated = pyqtSignal()
+
+
+class TiledImageItem(QGraphicsItem):
+    """
+    分块显示的图像项
+
+    与 QGraphicsPixmapItem 一样以原图像素为场景坐标，可直接替换使用；
+    绘制时按缩放选择金字塔层级，只绘制可见瓦片。缓存中没有的瓦片先用
+    更粗层级的已缓存瓦片代替，同时交给后台线程转换，完成后重绘。
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        parent: QGraphicsItem = None,
+    ):
+        """
+        Args:
+            image: OpenCV图像(BGR/BGRA/灰度)，显示期间不应原地修改
+            tile_size: 瓦片边长
+            cache_bytes: 已转换瓦片的缓存上限(字节)
+            parent: 父图形项
+        """
+        super().__init__(parent)
+        self._logger = logging.getLogger("TiledImageItem")
+        self._signals = _TileSignals()
+        self._signals.updated.connect(self._on_updated)
+
+        self._cache = TileCache(cache_bytes)
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=TILE_LOADER_WORKERS, thread_name_prefix="TileLoader"
+        )
+        self._closed = False
+
+        self._pyramid = TilePyramid(
+            image,
+            tile_size,
+            on_level_ready=lambda level: self._signals.updated.emit(),
+        )
+        self._rect = QRectF(0, 0, self._pyramid.width, self._pyramid.height)
+
+        # exposedRect 只包含需要重绘的区域
+        self.setFlag(
+            QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True
+        )
+
+    @property
+    def pyramid(self) -> TilePyramid:
+        """瓦片金字塔"""
+        return self._pyramid
+
+    @property
+    def cache(self) -> TileCache:
+        """瓦片缓存"""
+        return self._cache
+
+    def boundingRect(self) -> QRectF:
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        """只绘制可见区域内当前层级的瓦片"""
+        if self._closed:
+            return
+        scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = self._pyramid.level_for_scale(scale)
+        draw_level = self._pyramid.ready_level(level)
+        if draw_level is None:
+            # 所需层级和更粗层级都未生成，等待后台生成后重绘
+            return
+
+        exposed = option.exposedRect.intersected(self._rect)
+        if exposed.isEmpty():
+            return
+
+        tiles = self._pyramid.tiles_in_rect(
+            draw_level,
+            exposed.x(),
+            exposed.y(),
+            exposed.width(),
+            exposed.height(),
+        )
+        for tx, ty in tiles:
+            target = QRectF(*self._pyramid.tile_rect(draw_level, tx, ty))
+            image = self._cache.get((draw_level, tx, ty))
+            if image is not None:
+                painter.drawImage(target, image)
+                continue
+            self._request_tile(draw_level, tx, ty)
+            self._draw_placeholder(painter, draw_level, tx, ty, target)
+
+    def _draw_placeholder(
+        self, painter, level: int, tx: int, ty: int, target: QRectF
+    ):
+        """用更粗层级中已缓存的覆盖瓦片临时代替"""
+        for coarse in range(level + 1, self._pyramid.level_count):
+            shift = coarse - level
+            key = (coarse, tx >> shift, ty >> shift)
+            image = self._cache.peek(key)
+            if image is None:
+                continue
+            cx, cy, cw, ch = self._pyramid.tile_rect(*key)
+            sx = image.width() / cw
+            sy = image.height() / ch
+            source = QRectF(
+                (target.x() - cx) * sx,
+                (target.y() - cy) * sy,
+                target.width() * sx,
+                target.height() * sy,
+            )
+            painter.drawImage(target, image, source)
+            return
+
+    def _request_tile(self, level: int, tx: int, ty: int):
+        """提交瓦片转换任务(同一瓦片只提交一次)"""
+        key = (level, tx, ty)
+        with self._pending_lock:
+            if key in self._pending or self._closed:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._load_tile, key)
+
+    def _load_tile(self, key):
+        """后台线程：取瓦片像素并转换为QImage放入缓存"""
+        try:
+            if self._closed:
+                return
+            tile = self._pyramid.get_tile(*key)
+            if tile is None:
+                return
+            image = array_to_qimage(tile)
+            self._cache.put(key, image, image.bytesPerLine() * image.height())
+            if not self._closed:
+                self._signals.updated.emit()
+        except Exception as e:
+            self._logger.error(f"加载瓦片失败 {key}: {e}")
+        finally:
+            with self._pending_lock:
+                self._pending.discard(key)
+
+    def _on_updated(self):
+        """界面线程：瓦片或层级就绪后重绘"""
+        if not self._closed and self.scene() is not None:
+            self.update()
+
+    def close(self):
+        """停止后台任务并释放金字塔和缓存(移出场景时调用)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pyramid.close()
+        self._cache.clear()
+
+
+def create_image_item(image: np.ndarray, tiled_pixels: Optional[int] = None):
+    """
+    为OpenCV图像创建图形项，超大图像使用分块显示
+
+    Args:
+        image: OpenCV图像(BGR/BGRA/灰度)
+        tiled_pixels: 使用分块显示的像素数阈值，默认 TILED_IMAGE_PIXELS
+
+    Returns:
+        TiledImageItem 或 QGraphicsPixmapItem
+    """
+    if tiled_pixels is None:
+        tiled_pixels = TILED_IMAGE_PIXELS
+    if image.shape[0] * image.shape[1] >= tiled_pixels:
+        return TiledImageItem(image)
+    item = QGraphicsPixmapItem(QPixmap.fromImage(array_to_qimage(image)))
+    item.setTransformationMode(_get_smooth_transformation())
+    return item
+
+
+def release_image_item(item):
+    """释放图形项占用的后台资源(分块显示项)"""
+    if isinstance(item, TiledImageItem):
+        item.close()
+
+
 class ZoomableGraphicsView(QGraphicsView):
     """可缩放图形视图组件"""
 
@@ -172,22 +412,17 @@ class ZoomableGraphicsView(QGraphicsView):
             f"[ZoomableGraphicsView] 从变换更新缩放: {self._zoom:.2f}"
         )
 
-    def set_image_pixmap(self, pixmap: QPixmap):
-        """设置图像（QPixmap格式）"""
+    def _remove_image_item(self):
+        """移除当前图像项"""
         # 显式删除旧的pixmap_item - QGraphicsItem使用removeItem
         if self._pixmap_item:
             self.scene().removeItem(self._pixmap_item)
+            release_image_item(self._pixmap_item)
             self._pixmap_item = None
 
-        if pixmap.isNull():
-            self._logger.warning("[ZoomableGraphicsView] 无效的QPixmap")
-            return
-
-        # 保存原始图像
-        self._original_pixmap = pixmap
-
-        self._pixmap_item = QGraphicsPixmapItem(pixmap)
-        self._pixmap_item.setTransformationMode(_get_smooth_transformation())
+    def _add_image_item(self, item):
+        """添加图像项并居中，重置缩放"""
+        self._pixmap_item = item
         self.scene().addItem(self._pixmap_item)
 
         rect = self.scene().sceneRect()
@@ -198,6 +433,38 @@ class ZoomableGraphicsView(QGraphicsView):
         # 重置缩放
         self.reset_zoom()
 
+    def set_image_array(self, image: np.ndarray):
+        """设置图像（OpenCV numpy格式）
+
+        超过 TILED_IMAGE_PIXELS 的图像使用分块显示，不生成整张QPixmap。
+        """
+        self._remove_image_item()
+        self._original_pixmap = None
+
+        if image is None or image.size == 0:
+            self._logger.warning("[ZoomableGraphicsView] 无效的图像")
+            return
+
+        self._add_image_item(create_image_item(image))
+        self._logger.debug(
+            f"[ZoomableGraphicsView] 设置图像: {image.shape[1]}x{image.shape[0]}"
+        )
+
+    def set_image_pixmap(self, pixmap: QPixmap):
+        """设置图像（QPixmap格式）"""
+        self._remove_image_item()
+
+        if pixmap.isNull():
+            self._logger.warning("[ZoomableGraphicsView] 无效的QPixmap")
+            return
+
+        # 保存原始图像
+        self._original_pixmap = pixmap
+
+        item = QGraphicsPixmapItem(pixmap)
+        item.setTransformationMode(_get_smooth_transformation())
+        self._add_image_item(item)
+
         self._logger.debug(
             f"[ZoomableGraphicsView] 设置图像: {pixmap.width()}x{pixmap.height()}"
         )
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+派生图像缓存模块
+
+一帧图像通常会分发给多个工具，每个工具都各自把它转成灰度、
+做高斯模糊或Canny边缘检测。DerivedImageCache 挂在 ImageData 上，
+按(运算, 参数)记忆这些派生图像，同一帧的后续请求直接复用。
+
+- 返回只读视图，防止某个工具原地修改共享结果
+- 同一键并发请求时只计算一次，其余线程等待结果
+- 随帧释放；帧数据被重新赋值时自动清空
+- 提供单帧和全局的命中率统计
+
+使用示例：
+    derived = image_data.derived
+    gray = derived.gray()
+    edges = derived.canny(50, 150)
+    print(get_cache_stats())
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import os
+import sys
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+# 全局统计: 运算名 -> [命中, 未命中]
+_stats_lock = threading.Lock()
+_global_stats: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """返回数组的只读视图"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """获取全局派生图像缓存统计
+
+    Returns:
+        统计字典，包含总命中数、未命中数、命中率和按运算划分的明细
+    """
+    with _stats_lock:
+        by_op = {
+            op: {"hits": hits, "misses": misses}
+            for op, (hits, misses) in _global_stats.items()
+        }
+    hits = sum(item["hits"] for item in by_op.values())
+    misses = sum(item["misses"] for item in by_op.values())
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "operations": by_op,
+    }
+
+
+def reset_cache_stats():
+    """清空全局统计"""
+    with _stats_lock:
+        _global_stats.clear()
+
+
+class DerivedImageCache:
+    """
+    单帧派生图像缓存
+
+    缓存键为 (运算名, 参数...) 元组；所有派生运算都以灰度图为基础。
+    源数组被原地修改时缓存不会感知，修改帧数据应通过 ImageData.data 赋值。
+    """
+
+    def __init__(self, source: np.ndarray):
+        """
+        初始化缓存
+
+        Args:
+            source: 帧图像数据(BGR/BGRA或灰度)
+        """
+        self._source = source
+        self._entries: Dict[Tuple, Any] = {}
+        self._pending: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(
+        self, key: Tuple[Hashable, ...], factory: Callable[[], Any]
+    ) -> Any:
+        """获取缓存项，不存在时调用factory计算
+
+        Args:
+            key: 缓存键，第一个元素为运算名
+            factory: 计算函数
+
+        Returns:
+            缓存值(数组为只读视图)
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._count(key[0], hit=True)
+                    return self._entries[key]
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    self._count(key[0], hit=False)
+                    break
+            # 其他线程正在计算同一项
+            event.wait()
+
+        try:
+            value = factory()
+            if isinstance(value, np.ndarray):
+                value = _read_only(value)
+            elif isinstance(value, list):
+                value = [_read_only(item) for item in value]
+            with self._lock:
+                self._entries[key] = value
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+
+    def gray(self) -> np.ndarray:
+        """灰度图"""
+        return self.get(("gray",), self._compute_gray)
+
+    def gaussian(self, ksize: int = 5, sigma: float = 0) -> np.ndarray:
+        """灰度图的高斯模糊
+
+        Args:
+            ksize: 核大小(奇数)
+            sigma: 标准差，0表示由核大小计算
+        """
+        return self.get(
+            ("gaussian", int(ksize), float(sigma)),
+            lambda: cv2.GaussianBlur(self.gray(), (ksize, ksize), sigma),
+        )
+
+    def pyramid(self, levels: int) -> List[np.ndarray]:
+        """灰度图的高斯金字塔
+
+        Args:
+            levels: 层数(含原图)
+
+        Returns:
+            各层图像列表，第0层为灰度原图
+        """
+        layers = [self.gray()]
+        for level in range(1, max(1, levels)):
+            previous = layers[-1]
+            layers.append(
+                self.get(("pyramid", level), lambda: cv2.pyrDown(previous))
+            )
+        return layers
+
+    def canny(
+        self,
+        threshold1: float,
+        threshold2: float,
+        aperture_size: int = 3,
+        l2_gradient: bool = False,
+        blur_ksize: int = 0,
+    ) -> np.ndarray:
+        """灰度图(或其高斯模糊)的Canny边缘图
+
+        Args:
+            threshold1: 低阈值
+            threshold2: 高阈值
+            aperture_size: Sobel孔径
+            l2_gradient: 是否使用L2梯度幅值
+            blur_ksize: 先做高斯模糊的核大小，0表示不模糊
+        """
+        key = (
+            "canny",
+            float(threshold1),
+            float(threshold2),
+            int(aperture_size),
+            bool(l2_gradient),
+            int(blur_ksize),
+        )
+
+        def compute():
+            base = self.gaussian(blur_ksize) if blur_ksize else self.gray()
+            return cv2.Canny(
+                base,
+                threshold1,
+                threshold2,
+                apertureSize=aperture_size,
+                L2gradient=l2_gradient,
+            )
+
+        return self.get(key, compute)
+
+    def gradient(
+        self, dx: int, dy: int, ksize: int = 3, ddepth: int = cv2.CV_16S
+    ) -> np.ndarray:
+        """灰度图的Sobel梯度
+
+        Args:
+            dx: x方向导数阶数
+            dy: y方向导数阶数
+            ksize: Sobel核大小
+            ddepth: 输出深度
+        """
+        return self.get(
+            ("gradient", int(dx), int(dy), int(ksize), int(ddepth)),
+            lambda: cv2.Sobel(self.gray(), ddepth, dx, dy, ksize=ksize),
+        )
+
+    def integral(self, squared: bool = False) -> np.ndarray:
+        """灰度图的积分图
+
+        Args:
+            squared: 是否同时计算平方积分图，为True时返回 (积分图, 平方积分图)
+        """
+        if squared:
+            return self.get(
+                ("integral2",), lambda: list(cv2.integral2(self.gray()))
+            )
+        return self.get(("integral",), lambda: cv2.integral(self.gray()))
+
+    def crop(
+        self, x: int, y: int, width: int, height: int
+    ) -> "DerivedImageCache":
+        """创建子区域的派生图像缓存
+
+        源和已计算的灰度图以切片视图共享；模糊、边缘等邻域运算在区域边界
+        处与整帧结果不同，子区域按需重新计算。
+
+        Args:
+            x, y: 区域左上角
+            width, height: 区域宽高
+
+        Returns:
+            子区域缓存
+        """
+        region = np.s_[y : y + height, x : x + width]
+        child = DerivedImageCache(self._source[region])
+        with self._lock:
+            gray = self._entries.get(("gray",))
+        if isinstance(gray, np.ndarray):
+            child._entries[("gray",)] = gray[region]
+        return child
+
+    def clear(self):
+        """清空缓存项(统计保留)"""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """本帧缓存统计"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "nbytes": sum(
+                    self._nbytes(value) for value in self._entries.values()
+                ),
+            }
+
+    def _compute_gray(self) -> np.ndarray:
+        """计算灰度图，源为灰度时直接引用"""
+        source = self._source
+        if source.ndim == 2:
+            return source
+        if source.shape[2] == 1:
+            return source[:, :, 0]
+        if source.shape[2] == 4:
+            return cv2.cvtColor(source, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
+
+    def _count(self, op: Hashable, hit: bool):
+        """记录命中/未命中(调用方持有self._lock)"""
+        if hit:
+            self._hits += 1
+        else:
+            self._misses += 1
+        with _stats_lock:
+            _global_stats[op][0 if hit else 1] += 1
+
+    @staticmethod
+    def _nbytes(value: Any) -> int:
+        """缓存值占用字节数"""
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, list):
+            return sum(item.nbytes for item in value)
+        return 0
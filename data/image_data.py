@@ -16,33 +16,42 @@ import time
 import threading
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import numpy as np
 
+if TYPE_CHECKING:
+    from data.derived_cache import DerivedImageCache
+    from data.overlay import Overlay
+
+
 # 延迟导入内存池，避免循环导入
-def _get_memory_pool_class():
-    """延迟导入ImageBufferPool"""
-    from core.memory_pool import ImageBufferPool
-    return ImageBufferPool
+def _pooled_copy(data: np.ndarray, pool=None) -> np.ndarray:
+    """复制图像数据到内存池缓冲区(缓冲区不再被引用时自动归还)"""
+    from core.memory_pool import pooled_copy
+
+    return pooled_copy(data, pool)
+
+
+def _copy_span(site: str, nbytes: int):
+    """图像拷贝追踪区间(延迟导入追踪模块，避免循环导入)"""
+    from core.tracing import trace_span
+
+    return trace_span("ImageData.copy", "memory", site=site, bytes=nbytes)
 
 
-# 全局内存池(单例)
-_global_pool_lock = threading.Lock()
-_global_pool = None
+# 派生图像缓存创建锁
+_derived_lock = threading.Lock()
 
 
-def get_global_pool(shape=(480, 640, 3), max_size=10):
-    """获取全局图像内存池"""
-    global _global_pool
-    with _global_pool_lock:
-        if _global_pool is None:
-            ImageBufferPool = _get_memory_pool_class()
-            _global_pool = ImageBufferPool(max_size=max_size, buffer_shape=shape)
-        return _global_pool
+def get_global_pool():
+    """获取全局图像内存池(按形状和数据类型分类复用)"""
+    from core.memory_pool import get_global_pool as _get_global_pool
+
+    return _get_global_pool()
 
 
 class PixelFormat(Enum):
@@ -143,7 +152,7 @@ class ImageData:
     __slots__ = (
         '_data', '_timestamp', '_roi', '_camera_id', '_pixel_format',
         '_image_type', '_metadata', '_height', '_width', '_channels',
-        '_pool', '_use_pool', '_buffer'
+        '_derived', '_overlay'
     )
 
     def __init__(
@@ -158,6 +167,7 @@ class ImageData:
         pixel_format: PixelFormat = None,
         image_type: ImageDataType = None,
         _pool = None,
+        _copy: bool = True,
     ):
         """
         初始化图像数据
@@ -172,7 +182,8 @@ class ImageData:
             camera_id: 相机ID
             pixel_format: 像素格式
             image_type: 图像类型
-            _pool: 可选的内存池(内部使用)
+            _pool: 可选的内存池(内部使用)，默认使用全局内存池
+            _copy: 是否复制图像数据(内部使用)，False时直接持有data
         """
         # 验证图像数据
         if data is not None:
@@ -183,29 +194,16 @@ class ImageData:
             if len(data.shape) < 2 or len(data.shape) > 3:
                 raise ValueError(f"图像数据维度不正确，应为2D或3D，实际: {len(data.shape)}维")
         
-        self._use_pool = False
-        self._pool = None
+        self._derived = None
+        self._overlay = None
         
-        # 使用内存池获取缓冲区
-        if data is not None and _pool is not None:
-            self._pool = _pool
-            self._buffer = _pool.acquire()
-            
-            if self._buffer is not None:
-                # 确保形状匹配
-                if data.shape == self._buffer.shape:
-                    np.copyto(self._buffer, data)
-                    self._data = self._buffer
-                    self._use_pool = True
-                else:
-                    # 形状不匹配，回退到普通分配
-                    self._pool.release(self._buffer)
-                    self._data = data.copy()
-            else:
-                # 内存池耗尽，直接分配
-                self._data = data.copy()
+        if data is not None and not _copy:
+            self._data = data
+        elif data is not None:
+            with _copy_span("init", data.nbytes):
+                self._data = _pooled_copy(data, _pool)
         else:
-            self._data = data.copy() if data is not None else None
+            self._data = None
         
         self._timestamp = timestamp or time.time()
         self._roi = roi
@@ -261,7 +259,12 @@ class ImageData:
     @data.setter
     def data(self, value: np.ndarray):
         """设置图像数据"""
-        self._data = value.copy() if value is not None else None
+        if value is not None:
+            with _copy_span("setter", value.nbytes):
+                self._data = _pooled_copy(value)
+        else:
+            self._data = None
+        self._derived = None
         if value is not None:
             self._height = value.shape[0]
             self._width = value.shape[1]
@@ -343,6 +346,96 @@ class ImageData:
         """图像是否有效"""
         return self._data is not None and self._data.size > 0
 
+    @property
+    def derived(self) -> "DerivedImageCache":
+        """获取本帧的派生图像缓存(灰度、金字塔、边缘、梯度、积分图)
+
+        同一帧分发给多个工具时共享计算结果，帧数据重新赋值后缓存失效。
+        """
+        derived = self._derived
+        if derived is None:
+            if self._data is None:
+                raise ValueError("图像数据为空，无法创建派生图像缓存")
+            with _derived_lock:
+                if self._derived is None:
+                    from data.derived_cache import DerivedImageCache
+
+                    self._derived = DerivedImageCache(self._data)
+                derived = self._derived
+        return derived
+
+    def release_derived(self):
+        """释放派生图像缓存"""
+        self._derived = None
+
+    @property
+    def overlay(self) -> Optional["Overlay"]:
+        """获取叠加图元(显示或保存标注图像时绘制)"""
+        return self._overlay
+
+    @overlay.setter
+    def overlay(self, value: Optional["Overlay"]):
+        """设置叠加图元"""
+        self._overlay = value
+
+    def view(self, overlay: "Overlay" = None) -> "ImageData":
+        """创建共享图像数据的新实例(不复制像素)
+
+        视觉工具用它作为输出图像：像素和派生图像缓存与输入共享，
+        检测结果以叠加图元的形式附加。图元沿工具链累积，新实例的
+        叠加图元为输入已有的图元加上 overlay。
+
+        Args:
+            overlay: 本次追加的叠加图元
+
+        Returns:
+            新的ImageData
+        """
+        result = ImageData.__new__(ImageData)
+        for name in self.__slots__:
+            setattr(result, name, getattr(self, name, None))
+        result._metadata = dict(self._metadata)
+        if overlay is not None and self._overlay:
+            overlay = self._overlay + overlay
+        elif overlay is None:
+            overlay = self._overlay
+        result._overlay = overlay
+        return result
+
+    def region_view(
+        self, x: int, y: int, width: int, height: int
+    ) -> "ImageData":
+        """创建子区域的零拷贝视图
+
+        像素为原数组的切片，灰度缓存与原帧共享；roi 记录区域在原帧中的位置。
+
+        Args:
+            x, y: 区域左上角(须在图像内)
+            width, height: 区域宽高
+
+        Returns:
+            新的ImageData
+        """
+        result = ImageData(
+            data=self._data[y : y + height, x : x + width],
+            timestamp=self._timestamp,
+            roi=ROI(x, y, width, height),
+            camera_id=self._camera_id,
+            pixel_format=self._pixel_format,
+            image_type=self._image_type,
+            _copy=False,
+        )
+        result._metadata = dict(self._metadata)
+        if self._derived is not None:
+            result._derived = self._derived.crop(x, y, width, height)
+        return result
+
+    def rendered(self) -> np.ndarray:
+        """获取绘制叠加图元后的图像数据，没有图元时返回原数据"""
+        if self._overlay and self.is_valid:
+            return self._overlay.render(self._data)
+        return self.data
+
     def get_metadata(self, key: str, default: Any = None) -> Any:
         """获取元数据"""
         return self._metadata.get(key, default)
@@ -352,9 +445,9 @@ class ImageData:
         self._metadata[key] = value
 
     def copy(self) -> "ImageData":
-        """创建深拷贝"""
+        """创建深拷贝(构造函数负责复制像素)"""
         return ImageData(
-            data=self._data.copy() if self._data is not None else None,
+            data=self._data,
             width=self._width,
             height=self._height,
             channels=self._channels,
@@ -367,6 +460,8 @@ class ImageData:
 
     def to_gray(self) -> "ImageData":
         """转换为灰度图像"""
+        import cv2
+
         if not self.is_valid:
             return self.copy()
 
@@ -392,6 +487,8 @@ class ImageData:
 
     def to_rgb(self) -> "ImageData":
         """转换为RGB图像"""
+        import cv2
+
         if not self.is_valid:
             return self.copy()
 
@@ -418,6 +515,8 @@ class ImageData:
 
     def to_bgr(self) -> "ImageData":
         """转换为BGR图像"""
+        import cv2
+
         if not self.is_valid:
             return self.copy()
 
@@ -487,6 +586,8 @@ class ImageData:
         Returns:
             调整大小后的图像
         """
+        import cv2
+
         if not self.is_valid:
             return self.copy()
 
@@ -546,6 +647,22 @@ class ImageData:
         """
         return cls(data=frame, camera_id=camera_id, timestamp=time.time())
 
+    @classmethod
+    def adopt(cls, data: np.ndarray, **kwargs) -> "ImageData":
+        """
+        直接持有已有数组创建ImageData(不复制像素)
+
+        用于相机采集等数组刚分配、没有其他持有者的场合；调用方之后不应再修改该数组。
+
+        Args:
+            data: 图像数据
+            **kwargs: 其他构造参数
+
+        Returns:
+            ImageData对象
+        """
+        return cls(data=data, _copy=False, **kwargs)
+
     @classmethod
     def create_empty(
         cls, width: int = 0, height: int = 0, channels: int = 1
@@ -564,17 +681,6 @@ class ImageData:
         data = np.zeros((height, width, channels), dtype=np.uint8)
         return cls(data=data)
 
-    def __del__(self):
-        """析构函数"""
-        # 如果使用内存池，释放缓冲区
-        if hasattr(self, "_use_pool") and self._use_pool:
-            if hasattr(self, "_pool") and self._pool is not None:
-                if hasattr(self, "_buffer") and self._buffer is not None:
-                    self._pool.release(self._buffer)
-        
-        if hasattr(self, "_data"):
-            del self._data
-
     def __repr__(self) -> str:
         return (
             f"ImageData(width={self._width}, height={self._height}, "
@@ -624,6 +730,7 @@ class ResultData:
         self._timestamp = time.time()
         self._tool_name = ""
         self._result_category = ""
+        self._overlay = None
 
     @property
     def status(self) -> bool:
@@ -784,6 +891,25 @@ class ResultData:
         """检查是否存在图像"""
         return key in self._images
 
+    @property
+    def overlay(self) -> "Overlay":
+        """获取叠加图元列表(首次访问时创建)"""
+        if self._overlay is None:
+            from data.overlay import Overlay
+
+            self._overlay = Overlay()
+        return self._overlay
+
+    @overlay.setter
+    def overlay(self, value: Optional["Overlay"]):
+        """设置叠加图元列表"""
+        self._overlay = value
+
+    @property
+    def has_overlay(self) -> bool:
+        """是否有叠加图元"""
+        return bool(self._overlay)
+
     def clear(self):
         """清空结果"""
         self._values.clear()
@@ -796,6 +922,7 @@ class ResultData:
         self._timestamp = time.time()
         self._tool_name = ""
         self._result_category = ""
+        self._overlay = None
 
     def copy(self) -> "ResultData":
         """创建拷贝"""
@@ -809,6 +936,32 @@ class ResultData:
         result._error_type = self._error_type
         result._tool_name = self._tool_name
         result._result_category = self._result_category
+        result._overlay = self._overlay.copy() if self._overlay else None
+        return result
+
+    def without_images(self) -> "ResultData":
+        """
+        创建不含图像的浅拷贝(跨进程传递结果时使用)
+
+        图像结果和值为ImageData的项被去掉，其余值和叠加图元共享引用。
+        """
+        result = ResultData()
+        result._values = {
+            k: v
+            for k, v in self._values.items()
+            if not isinstance(v, ImageData)
+        }
+        result._value_types = {
+            k: v for k, v in self._value_types.items() if k in result._values
+        }
+        result._status = self._status
+        result._message = self._message
+        result._error_code = self._error_code
+        result._error_type = self._error_type
+        result._timestamp = self._timestamp
+        result._tool_name = self._tool_name
+        result._result_category = self._result_category
+        result._overlay = self._overlay
         return result
 
     @property
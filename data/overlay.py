@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果叠加图形模块
+
+视觉工具不再把检测结果画到一份全分辨率的输入图像拷贝上，
+而是把矩形、折线、圆、文本等矢量图元记录在 ResultData.overlay 中，
+输出图像保持为输入图像的视图。只有界面显示或图像保存工具需要
+标注图像时才调用 Overlay.render 栅格化。
+
+使用示例：
+    overlay = self._result_data.overlay
+    overlay.add_rect(x, y, w, h, color=(0, 255, 0))
+    overlay.add_text("0.95", (x, y - 5))
+    self._output_data = self._input_data.view(overlay)
+
+    annotated = self._output_data.rendered()
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+Color = Tuple[int, int, int]  # BGR
+
+# 非ASCII文本使用的字体(按顺序尝试)
+_FONT_CANDIDATES = [
+    "C:/Windows/Fonts/msyh.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+]
+
+# 字号缓存: size -> PIL字体
+_font_cache: Dict[int, Any] = {}
+
+
+def _load_font(size: int):
+    """加载支持中文的PIL字体，失败时使用默认字体"""
+    font = _font_cache.get(size)
+    if font is None:
+        from PIL import ImageFont
+
+        for path in _FONT_CANDIDATES:
+            try:
+                font = ImageFont.truetype(path, size)
+                break
+            except Exception:
+                continue
+        else:
+            font = ImageFont.load_default()
+        _font_cache[size] = font
+    return font
+
+
+@dataclass
+class OverlayShape:
+    """叠加图元"""
+
+    kind: str  # rect / polyline / circle / text
+    points: np.ndarray  # int32 (N, 2)，rect为两个角点，circle/text为一个点
+    color: Color = (0, 255, 0)
+    thickness: int = 2  # -1 表示填充
+    closed: bool = False  # polyline是否闭合
+    radius: int = 0  # circle半径
+    text: str = ""  # text内容
+    font_scale: float = 0.5  # text字号比例
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        data = {
+            "kind": self.kind,
+            "points": self.points.tolist(),
+            "color": list(self.color),
+            "thickness": self.thickness,
+        }
+        if self.kind == "polyline":
+            data["closed"] = self.closed
+        elif self.kind == "circle":
+            data["radius"] = self.radius
+        elif self.kind == "text":
+            data["text"] = self.text
+            data["font_scale"] = self.font_scale
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OverlayShape":
+        """从字典创建"""
+        return cls(
+            kind=data["kind"],
+            points=np.asarray(data["points"], dtype=np.int32).reshape(-1, 2),
+            color=tuple(data.get("color", (0, 255, 0))),
+            thickness=data.get("thickness", 2),
+            closed=data.get("closed", False),
+            radius=data.get("radius", 0),
+            text=data.get("text", ""),
+            font_scale=data.get("font_scale", 0.5),
+        )
+
+
+def _points(points: Any) -> np.ndarray:
+    """将点序列/轮廓转换为 int32 (N, 2) 数组"""
+    return np.asarray(points).reshape(-1, 2).round().astype(np.int32)
+
+
+class Overlay:
+    """
+    叠加图元列表
+
+    坐标均为原图像素坐标，颜色为BGR。
+    """
+
+    def __init__(self, shapes: List[OverlayShape] = None):
+        """
+        初始化叠加图元列表
+
+        Args:
+            shapes: 初始图元
+        """
+        self._shapes: List[OverlayShape] = list(shapes or [])
+
+    def add_rect(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        color: Color = (0, 255, 0),
+        thickness: int = 2,
+    ) -> "Overlay":
+        """添加矩形
+
+        Args:
+            x, y: 左上角
+            width, height: 宽高
+            color: 颜色
+            thickness: 线宽，-1表示填充
+        """
+        points = _points([(x, y), (x + width, y + height)])
+        self._shapes.append(OverlayShape("rect", points, color, thickness))
+        return self
+
+    def add_line(
+        self,
+        pt1: Sequence[int],
+        pt2: Sequence[int],
+        color: Color = (0, 255, 0),
+        thickness: int = 2,
+    ) -> "Overlay":
+        """添加线段"""
+        return self.add_polyline([pt1, pt2], False, color, thickness)
+
+    def add_polyline(
+        self,
+        points: Any,
+        closed: bool = True,
+        color: Color = (0, 255, 0),
+        thickness: int = 2,
+    ) -> "Overlay":
+        """添加折线/多边形/轮廓
+
+        Args:
+            points: 点序列，也可以是OpenCV轮廓 (N, 1, 2)
+            closed: 是否闭合
+            color: 颜色
+            thickness: 线宽，-1表示填充(仅闭合时)
+        """
+        self._shapes.append(
+            OverlayShape("polyline", _points(points), color, thickness, closed)
+        )
+        return self
+
+    def add_circle(
+        self,
+        center: Sequence[int],
+        radius: int,
+        color: Color = (0, 255, 0),
+        thickness: int = 2,
+    ) -> "Overlay":
+        """添加圆，thickness为-1时填充"""
+        self._shapes.append(
+            OverlayShape(
+                "circle",
+                _points([center]),
+                color,
+                thickness,
+                radius=int(radius),
+            )
+        )
+        return self
+
+    def add_text(
+        self,
+        text: str,
+        position: Sequence[int],
+        color: Color = (0, 255, 0),
+        font_scale: float = 0.5,
+        thickness: int = 1,
+    ) -> "Overlay":
+        """添加文本
+
+        Args:
+            text: 文本，包含非ASCII字符时使用PIL字体绘制
+            position: 左下角(OpenCV约定)
+            color: 颜色
+            font_scale: 字号比例
+            thickness: 线宽
+        """
+        self._shapes.append(
+            OverlayShape(
+                "text",
+                _points([position]),
+                color,
+                thickness,
+                text=str(text),
+                font_scale=font_scale,
+            )
+        )
+        return self
+
+    def extend(self, other: "Overlay") -> "Overlay":
+        """追加另一组图元"""
+        self._shapes.extend(other._shapes)
+        return self
+
+    def __add__(self, other: "Overlay") -> "Overlay":
+        """拼接两组图元，返回新的图元列表(图元共享)"""
+        return Overlay(self._shapes + other._shapes)
+
+    def clear(self):
+        """清空图元"""
+        self._shapes.clear()
+
+    @property
+    def shapes(self) -> List[OverlayShape]:
+        """图元列表"""
+        return list(self._shapes)
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def __iter__(self) -> Iterator[OverlayShape]:
+        return iter(self._shapes)
+
+    def copy(self) -> "Overlay":
+        """浅拷贝(图元共享)"""
+        return Overlay(self._shapes)
+
+    def translate(self, dx: int, dy: int) -> "Overlay":
+        """平移全部图元，返回新的图元列表
+
+        Args:
+            dx, dy: 平移量(像素)
+        """
+        offset = np.array([dx, dy], dtype=np.int32)
+        return Overlay(
+            [
+                replace(shape, points=shape.points + offset)
+                for shape in self._shapes
+            ]
+        )
+
+    def render(self, image: np.ndarray) -> np.ndarray:
+        """将图元绘制到图像拷贝上
+
+        Args:
+            image: 原图(灰度图先转换为BGR)
+
+        Returns:
+            标注后的BGR图像
+        """
+        if image.ndim == 2:
+            output = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            output = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        else:
+            output = image.copy()
+
+        unicode_texts = []
+        for shape in self._shapes:
+            if shape.kind == "text" and not shape.text.isascii():
+                unicode_texts.append(shape)
+            else:
+                self._draw(output, shape)
+
+        if unicode_texts:
+            output = self._draw_unicode_texts(output, unicode_texts)
+        return output
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """转换为字典列表"""
+        return [shape.to_dict() for shape in self._shapes]
+
+    @classmethod
+    def from_list(cls, data: List[Dict[str, Any]]) -> "Overlay":
+        """从字典列表创建"""
+        return cls([OverlayShape.from_dict(item) for item in data])
+
+    @staticmethod
+    def _draw(output: np.ndarray, shape: OverlayShape):
+        """使用OpenCV绘制单个图元"""
+        points = shape.points
+        if shape.kind == "rect":
+            cv2.rectangle(
+                output,
+                tuple(points[0].tolist()),
+                tuple(points[1].tolist()),
+                shape.color,
+                shape.thickness,
+            )
+        elif shape.kind == "polyline":
+            if shape.thickness < 0 and shape.closed:
+                cv2.fillPoly(output, [points], shape.color)
+            else:
+                cv2.polylines(
+                    output,
+                    [points],
+                    shape.closed,
+                    shape.color,
+                    max(1, shape.thickness),
+                )
+        elif shape.kind == "circle":
+            cv2.circle(
+                output,
+                tuple(points[0].tolist()),
+                shape.radius,
+                shape.color,
+                shape.thickness,
+            )
+        elif shape.kind == "text":
+            cv2.putText(
+                output,
+                shape.text,
+                tuple(points[0].tolist()),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                shape.font_scale,
+                shape.color,
+                shape.thickness,
+            )
+        else:
+            logger.warning(f"未知的叠加图元类型: {shape.kind}")
+
+    @staticmethod
+    def _draw_unicode_texts(
+        output: np.ndarray, shapes: List[OverlayShape]
+    ) -> np.ndarray:
+        """使用PIL绘制包含中文的文本"""
+        from PIL import Image, ImageDraw
+
+        pil_image = Image.fromarray(cv2.cvtColor(output, cv2.COLOR_BGR2RGB))
+        draw = ImageDraw.Draw(pil_image)
+        for shape in shapes:
+            size = max(8, int(round(32 * shape.font_scale)))
+            x, y = shape.points[0].tolist()
+            b, g, r = shape.color
+            # PIL以左上角定位，转换为OpenCV的左下角约定
+            draw.text(
+                (x, y - size),
+                shape.text,
+                fill=(r, g, b),
+                font=_load_font(size),
+            )
+        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
@@ -0,0 +1,795 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果历史存储模块
+
+把每帧各工具的结果追加到预分配的列式缓冲区，而不是保存一个个 ResultData/字典：
+
+- tools 表：每帧每个工具一行(序号、帧号、时间戳、流程、工具、状态、耗时)
+- values 表：长表格式的数值结果(序号、流程、工具、字段、行号、数值)，
+  标量的行号为 -1；匹配、斑点、缺陷等列表结果按元素展开为多行
+- 字符串(流程/工具/字段名)以字典编码为整数
+- 内存中只保留最近 window 帧；配置了落盘目标时由后台线程按批写入 SQLite 或 Parquet
+- 良率、Cpk、工具耗时等统计直接在列数组上计算
+
+使用示例：
+    store = ResultStore(window=10000, sink=SQLiteResultSink("history.db"))
+    store.append_frame(solution.run(image))
+    print(store.yield_rate())
+    print(store.cpk("width", lsl=9.8, usl=10.2, tool="卡尺测量"))
+    store.close()
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.image_data import ResultData
+
+logger = logging.getLogger(__name__)
+
+# 尝试导入pyarrow(Parquet落盘)
+pyarrow_available = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pyarrow_available = True
+except ImportError:
+    pa = None
+    pq = None
+
+# 表结构: 列名 -> dtype
+TOOL_SCHEMA = {
+    "seq": np.int64,
+    "frame_id": np.int64,
+    "timestamp": np.float64,
+    "procedure": np.int32,
+    "tool": np.int32,
+    "status": np.bool_,
+    "exec_ms": np.float64,
+}
+VALUE_SCHEMA = {
+    "seq": np.int64,
+    "procedure": np.int32,
+    "tool": np.int32,
+    "key": np.int32,
+    "row": np.int32,
+    "value": np.float64,
+}
+# 以字典编码存储的字符串列
+STRING_COLUMNS = ("procedure", "tool", "key")
+
+
+def _is_number(value: Any) -> bool:
+    """是否为数值标量(布尔值按0/1处理)"""
+    return isinstance(
+        value, (int, float, np.number, np.bool_)
+    ) and not isinstance(value, str)
+
+
+def flatten_values(
+    values: Mapping[str, Any], max_rows: Optional[int] = None
+) -> Iterator[Tuple[str, int, float]]:
+    """将结果值展开为 (字段, 行号, 数值)
+
+    - 数值标量: (key, -1, value)
+    - 数值字典: (key.子键, -1, value)
+    - 字典/元组列表: (key.字段, 元素序号, value)
+    - 数值列表: (key, 元素序号, value)
+    字符串、图像数组等非数值结果被忽略。
+
+    Args:
+        values: ResultData.get_all_values() 的结果
+        max_rows: 单个列表结果最多展开的行数，None表示全部展开
+
+    Yields:
+        (字段, 行号, 数值)
+    """
+    for key, value in values.items():
+        if _is_number(value):
+            yield key, -1, float(value)
+        elif isinstance(value, dict):
+            for name, number in _flatten_dict(key, value):
+                yield name, -1, number
+        elif isinstance(value, (list, tuple)):
+            rows = value if max_rows is None else value[:max_rows]
+            for row, item in enumerate(rows):
+                if _is_number(item):
+                    yield key, row, float(item)
+                elif isinstance(item, dict):
+                    for name, number in _flatten_dict(key, item):
+                        yield name, row, number
+                elif isinstance(item, (list, tuple)):
+                    for index, field in enumerate(item):
+                        if _is_number(field):
+                            yield f"{key}.{index}", row, float(field)
+
+
+def _flatten_dict(
+    prefix: str, value: dict, depth: int = 2
+) -> Iterator[Tuple[str, float]]:
+    """展开嵌套的数值字典"""
+    for name, item in value.items():
+        if _is_number(item):
+            yield f"{prefix}.{name}", float(item)
+        elif isinstance(item, dict) and depth > 1:
+            yield from _flatten_dict(f"{prefix}.{name}", item, depth - 1)
+
+
+class _StringDictionary:
+    """字符串字典编码"""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def encode(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self._names)
+            self._names.append(name)
+        return code
+
+    def lookup(self, name: str) -> int:
+        """查询编码，不存在时返回 -1"""
+        return self._codes.get(name, -1)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """批量解码为字符串数组"""
+        names = np.array(self._names + [""], dtype=object)
+        return names[codes]
+
+
+class ColumnTable:
+    """
+    预分配的列式表
+
+    容量不足时按倍数扩容；append 一次写入一批行。
+    """
+
+    def __init__(self, schema: Dict[str, Any], capacity: int = 1024):
+        """
+        初始化列式表
+
+        Args:
+            schema: 列名 -> dtype
+            capacity: 初始容量(行)
+        """
+        self._schema = dict(schema)
+        self._columns = {
+            name: np.zeros(max(1, capacity), dtype=dtype)
+            for name, dtype in self._schema.items()
+        }
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        """当前容量(行)"""
+        return len(next(iter(self._columns.values())))
+
+    @property
+    def nbytes(self) -> int:
+        """缓冲区占用字节数"""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def append(self, rows: Dict[str, Any]):
+        """追加一批行
+
+        Args:
+            rows: 列名 -> 序列(各列长度相同)
+        """
+        count = len(next(iter(rows.values())))
+        if count == 0:
+            return
+        self._reserve(self.size + count)
+        end = self.size + count
+        for name, column in self._columns.items():
+            column[self.size : end] = rows[name]
+        self.size = end
+
+    def column(self, name: str) -> np.ndarray:
+        """列的有效部分(视图)"""
+        return self._columns[name][: self.size]
+
+    def slice(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        """复制行区间"""
+        return {
+            name: column[start:stop].copy()
+            for name, column in self._columns.items()
+        }
+
+    def drop_front(self, count: int):
+        """删除最前面的 count 行"""
+        count = min(count, self.size)
+        if count <= 0:
+            return
+        remaining = self.size - count
+        for column in self._columns.values():
+            column[:remaining] = column[count : self.size]
+        self.size = remaining
+
+    def _reserve(self, required: int):
+        """保证容量不小于 required"""
+        capacity = self.capacity
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            self._columns[name] = grown
+
+
+class ResultSink(ABC):
+    """结果落盘目标基类，write 在后台写入线程中调用"""
+
+    @abstractmethod
+    def write(self, table: str, columns: Dict[str, np.ndarray]):
+        """写入一批行
+
+        Args:
+            table: 表名("tools" 或 "values")
+            columns: 列名 -> 数组(字符串列已解码)
+        """
+        pass
+
+    def close(self):
+        """关闭"""
+
+
+class SQLiteResultSink(ResultSink):
+    """SQLite落盘，表名为 tool_results 和 result_values"""
+
+    TABLES = {
+        "tools": (
+            "tool_results",
+            "seq INTEGER, frame_id INTEGER, timestamp REAL, procedure TEXT, "
+            "tool TEXT, status INTEGER, exec_ms REAL",
+        ),
+        "values": (
+            "result_values",
+            "seq INTEGER, procedure TEXT, tool TEXT, key TEXT, row INTEGER, "
+            "value REAL",
+        ),
+    }
+
+    def __init__(self, path: str):
+        """
+        初始化SQLite落盘
+
+        Args:
+            path: 数据库文件路径
+        """
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def write(self, table: str, columns: Dict[str, np.ndarray]):
+        name, definition = self.TABLES[table]
+        if self._connection is None:
+            # 连接在写入线程中创建
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False
+            )
+            for table_name, table_definition in self.TABLES.values():
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table_name} "
+                    f"({table_definition})"
+                )
+        names = list(columns.keys())
+        rows = zip(*(columns[column].tolist() for column in names))
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT INTO {name} ({', '.join(names)}) "
+                f"VALUES ({', '.join('?' * len(names))})",
+                rows,
+            )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class ParquetResultSink(ResultSink):
+    """Parquet落盘，每批写入一个文件: <目录>/<表名>_<批次号>.parquet"""
+
+    def __init__(self, directory: str):
+        """
+        初始化Parquet落盘
+
+        Args:
+            directory: 输出目录
+
+        Raises:
+            ImportError: pyarrow未安装
+        """
+        if not pyarrow_available:
+            raise ImportError("pyarrow未安装，无法写入Parquet")
+        self.directory = directory
+        self._batches = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, table: str, columns: Dict[str, np.ndarray]):
+        self._batches += 1
+        path = os.path.join(
+            self.directory,
+            f"{table}_{int(time.time())}_{self._batches:06d}.parquet",
+        )
+        pq.write_table(pa.table(columns), path)
+
+
+class ResultStore:
+    """
+    检测结果历史存储
+
+    append_frame 接受 Solution.run / Procedure.run 的返回值或 {工具名: ResultData}。
+    所有方法线程安全；落盘在后台线程中进行，不阻塞检测线程。
+    """
+
+    def __init__(
+        self,
+        window: int = 10000,
+        sink: ResultSink = None,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_rows_per_key: Optional[int] = None,
+    ):
+        """
+        初始化结果存储
+
+        Args:
+            window: 内存中保留的帧数
+            sink: 落盘目标，None表示只保留内存窗口
+            batch_size: 累计多少个工具结果行后触发一次落盘
+            flush_interval: 最长落盘间隔(秒)
+            max_rows_per_key: 单个列表结果(如斑点列表)最多记录的行数，
+                None表示全部记录
+        """
+        self.window = max(1, int(window))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_rows_per_key = max_rows_per_key
+        self._sink = sink
+        self._tools = ColumnTable(TOOL_SCHEMA, min(self.window, 1024))
+        self._values = ColumnTable(VALUE_SCHEMA, min(self.window, 1024) * 8)
+        self._strings = _StringDictionary()
+        self._lock = threading.RLock()
+        self._next_seq = 0
+        self._first_seq = 0
+        # 各表中已交给写入线程的行数
+        self._flushed = {"tools": 0, "values": 0}
+        self._written = {"tools": 0, "values": 0}
+        self._last_flush = time.time()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        if sink is not None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="ResultStoreWriter", daemon=True
+            )
+            self._writer.start()
+
+    # ------------------------------------------------------------------
+    # 追加
+    # ------------------------------------------------------------------
+
+    def append_frame(
+        self,
+        results: Mapping[str, Any],
+        frame_id: int = None,
+        timestamp: float = None,
+    ) -> int:
+        """追加一帧的结果
+
+        Args:
+            results: {流程名: {工具名: {"result", "execution_time"}}}、
+                {工具名: {"result", "execution_time"}} 或 {工具名: ResultData}
+            frame_id: 帧号，默认与内部序号相同
+            timestamp: 时间戳，默认为当前时间
+
+        Returns:
+            内部帧序号
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        tool_rows = {name: [] for name in TOOL_SCHEMA}
+        value_rows = {name: [] for name in VALUE_SCHEMA}
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("结果存储已关闭")
+            seq = self._next_seq
+            self._next_seq += 1
+            frame_id = seq if frame_id is None else int(frame_id)
+
+            for procedure, tool, result, exec_time, ok in _iter_tool_results(
+                results
+            ):
+                procedure_code = self._strings.encode(procedure)
+                tool_code = self._strings.encode(tool)
+                tool_rows["seq"].append(seq)
+                tool_rows["frame_id"].append(frame_id)
+                tool_rows["timestamp"].append(timestamp)
+                tool_rows["procedure"].append(procedure_code)
+                tool_rows["tool"].append(tool_code)
+                tool_rows["status"].append(ok)
+                tool_rows["exec_ms"].append(exec_time * 1000.0)
+                if result is None:
+                    continue
+                for key, row, value in flatten_values(
+                    result.get_all_values(), self.max_rows_per_key
+                ):
+                    value_rows["seq"].append(seq)
+                    value_rows["procedure"].append(procedure_code)
+                    value_rows["tool"].append(tool_code)
+                    value_rows["key"].append(self._strings.encode(key))
+                    value_rows["row"].append(row)
+                    value_rows["value"].append(value)
+
+            self._tools.append(tool_rows)
+            self._values.append(value_rows)
+            if self._sink is None:
+                self._flushed = {
+                    "tools": self._tools.size,
+                    "values": self._values.size,
+                }
+            elif (
+                self._tools.size - self._flushed["tools"] >= self.batch_size
+                or time.time() - self._last_flush >= self.flush_interval
+            ):
+                self._enqueue_pending()
+            self._trim()
+        return seq
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def values(
+        self,
+        key: str,
+        tool: str = None,
+        procedure: str = None,
+        rows: bool = False,
+    ) -> np.ndarray:
+        """获取窗口内某个字段的全部数值
+
+        Args:
+            key: 字段名，列表结果使用 "键.字段"，例如 "blobs.area"
+            tool: 工具名过滤
+            procedure: 流程名过滤
+            rows: 是否返回列表元素行(否则只返回标量)
+
+        Returns:
+            数值数组(按时间顺序)
+        """
+        with self._lock:
+            mask = self._value_mask(key, tool, procedure)
+            row = self._values.column("row")
+            mask &= (row >= 0) if rows else (row < 0)
+            return self._values.column("value")[mask].copy()
+
+    def yield_rate(self, tool: str = None, procedure: str = None) -> float:
+        """良率：所有(或指定)工具均成功的帧所占比例
+
+        Args:
+            tool: 工具名过滤
+            procedure: 流程名过滤
+
+        Returns:
+            良率(0~1)，没有数据时为0
+        """
+        with self._lock:
+            mask = self._tool_mask(tool, procedure)
+            seq = self._tools.column("seq")[mask]
+            if seq.size == 0:
+                return 0.0
+            frames = np.unique(seq)
+            failed = np.unique(seq[~self._tools.column("status")[mask]])
+            return 1.0 - failed.size / frames.size
+
+    def cpk(
+        self,
+        key: str,
+        lsl: float = None,
+        usl: float = None,
+        tool: str = None,
+        procedure: str = None,
+    ) -> Dict[str, Any]:
+        """过程能力指数
+
+        Args:
+            key: 字段名
+            lsl: 规格下限
+            usl: 规格上限
+            tool: 工具名过滤
+            procedure: 流程名过滤
+
+        Returns:
+            {"count", "mean", "std", "min", "max", "cp", "cpk"}，
+            样本不足或标准差为0时 cp/cpk 为 None
+        """
+        samples = self.values(key, tool, procedure)
+        stats = {
+            "count": int(samples.size),
+            "mean": None,
+            "std": None,
+            "min": None,
+            "max": None,
+            "cp": None,
+            "cpk": None,
+        }
+        if samples.size == 0:
+            return stats
+        mean = float(samples.mean())
+        std = float(samples.std(ddof=1)) if samples.size > 1 else 0.0
+        stats.update(
+            mean=mean,
+            std=std,
+            min=float(samples.min()),
+            max=float(samples.max()),
+        )
+        if std > 0:
+            sides = []
+            if usl is not None:
+                sides.append((usl - mean) / (3 * std))
+            if lsl is not None:
+                sides.append((mean - lsl) / (3 * std))
+            if sides:
+                stats["cpk"] = min(sides)
+            if usl is not None and lsl is not None:
+                stats["cp"] = (usl - lsl) / (6 * std)
+        return stats
+
+    def tool_timing(
+        self, procedure: str = None
+    ) -> Dict[str, Dict[str, float]]:
+        """各工具的耗时统计(毫秒)
+
+        Args:
+            procedure: 流程名过滤
+
+        Returns:
+            {工具名: {"count", "mean_ms", "p50_ms", "p95_ms", "max_ms"}}
+        """
+        with self._lock:
+            mask = self._tool_mask(None, procedure)
+            tools = self._tools.column("tool")[mask]
+            exec_ms = self._tools.column("exec_ms")[mask]
+            codes = np.unique(tools)
+            names = self._strings.decode(codes)
+
+        timing = {}
+        for code, name in zip(codes, names):
+            samples = exec_ms[tools == code]
+            p50, p95 = np.percentile(samples, [50, 95])
+            timing[name] = {
+                "count": int(samples.size),
+                "mean_ms": float(samples.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "max_ms": float(samples.max()),
+            }
+        return timing
+
+    def to_columns(self, table: str = "tools") -> Dict[str, np.ndarray]:
+        """导出窗口内的列(字符串列已解码)
+
+        Args:
+            table: "tools" 或 "values"
+
+        Returns:
+            列名 -> 数组
+        """
+        with self._lock:
+            data = self._table(table)
+            return self._decode(data.slice(0, data.size))
+
+    def to_polars(self, table: str = "tools"):
+        """导出为Polars DataFrame，Polars不可用时返回None"""
+        from utils.performance_optimization import (
+            DataProcessor,
+            polars_available,
+        )
+
+        if not polars_available:
+            return None
+        columns = self.to_columns(table)
+        return DataProcessor.process_detection_results(
+            {name: column.tolist() for name, column in columns.items()}
+        )
+
+    @property
+    def frame_count(self) -> int:
+        """窗口内的帧数"""
+        return self._next_seq - self._first_seq
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        with self._lock:
+            return {
+                "frames": self._next_seq,
+                "window_frames": self.frame_count,
+                "tool_rows": self._tools.size,
+                "value_rows": self._values.size,
+                "pending_rows": self._tools.size - self._flushed["tools"],
+                "written_rows": dict(self._written),
+                "nbytes": self._tools.nbytes + self._values.nbytes,
+            }
+
+    # ------------------------------------------------------------------
+    # 落盘
+    # ------------------------------------------------------------------
+
+    def flush(self, timeout: float = None) -> bool:
+        """把未落盘的行交给写入线程并等待写完
+
+        Args:
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            是否全部写完
+        """
+        if self._sink is None:
+            return True
+        with self._lock:
+            self._enqueue_pending()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def clear(self):
+        """清空内存窗口(已交给写入线程的行仍会落盘)"""
+        with self._lock:
+            if self._sink is not None:
+                self._enqueue_pending()
+            self._tools.drop_front(self._tools.size)
+            self._values.drop_front(self._values.size)
+            self._flushed = {"tools": 0, "values": 0}
+            self._first_seq = self._next_seq
+
+    def close(self):
+        """落盘剩余数据并关闭"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._sink.close()
+
+    # ------------------------------------------------------------------
+    # 内部方法
+    # ------------------------------------------------------------------
+
+    def _table(self, table: str) -> ColumnTable:
+        return self._tools if table == "tools" else self._values
+
+    def _decode(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """把字典编码列解码为字符串"""
+        for name in STRING_COLUMNS:
+            if name in columns:
+                columns[name] = self._strings.decode(columns[name])
+        return columns
+
+    def _tool_mask(
+        self, tool: Optional[str], procedure: Optional[str]
+    ) -> np.ndarray:
+        """tools 表的过滤掩码(调用方持有锁)"""
+        mask = np.ones(self._tools.size, dtype=bool)
+        if tool is not None:
+            mask &= self._tools.column("tool") == self._strings.lookup(tool)
+        if procedure is not None:
+            mask &= self._tools.column("procedure") == self._strings.lookup(
+                procedure
+            )
+        return mask
+
+    def _value_mask(
+        self, key: str, tool: Optional[str], procedure: Optional[str]
+    ) -> np.ndarray:
+        """values 表的过滤掩码(调用方持有锁)"""
+        mask = self._values.column("key") == self._strings.lookup(key)
+        if tool is not None:
+            mask &= self._values.column("tool") == self._strings.lookup(tool)
+        if procedure is not None:
+            mask &= self._values.column("procedure") == self._strings.lookup(
+                procedure
+            )
+        return mask
+
+    def _enqueue_pending(self):
+        """把未落盘的行复制后交给写入线程(调用方持有锁)"""
+        for name in ("tools", "values"):
+            table = self._table(name)
+            start = self._flushed[name]
+            if table.size > start:
+                self._queue.put(
+                    (name, self._decode(table.slice(start, table.size)))
+                )
+                self._flushed[name] = table.size
+        self._last_flush = time.time()
+
+    def _trim(self):
+        """超出窗口时删除最旧的帧(调用方持有锁)
+
+        超出窗口的 1/4 后才整理一次，摊销数组移动的开销。
+        """
+        if self.frame_count <= self.window + self.window // 4:
+            return
+        if self._sink is not None:
+            self._enqueue_pending()
+        cutoff = self._next_seq - self.window
+        for name in ("tools", "values"):
+            table = self._table(name)
+            count = int(np.searchsorted(table.column("seq"), cutoff))
+            table.drop_front(count)
+            self._flushed[name] = max(0, self._flushed[name] - count)
+        self._first_seq = cutoff
+
+    def _write_loop(self):
+        """写入线程：按批写入落盘目标，空闲超时时落盘积压的行"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self._lock:
+                    if not self._closed:
+                        self._enqueue_pending()
+                continue
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            name, columns = item
+            try:
+                self._sink.write(name, columns)
+                self._written[name] += len(columns["seq"])
+            except Exception as e:
+                logger.error(f"结果落盘失败: {name}, {e}")
+
+
+def _iter_tool_results(
+    results: Mapping[str, Any], procedure: str = ""
+) -> Iterator[Tuple[str, str, Optional[ResultData], float, bool]]:
+    """遍历结果字典中的工具结果
+
+    Yields:
+        (流程名, 工具名, 结果, 耗时秒, 是否成功)
+    """
+    for name, entry in results.items():
+        if isinstance(entry, ResultData):
+            yield procedure, name, entry, 0.0, bool(entry.status)
+        elif isinstance(entry, dict) and (
+            "result" in entry or "error" in entry
+        ):
+            result = entry.get("result")
+            if not isinstance(result, ResultData):
+                result = None
+            ok = (
+                result is not None
+                and bool(result.status)
+                and "error" not in entry
+            )
+            yield procedure, name, result, float(
+                entry.get("execution_time", 0.0)
+            ), ok
+        elif isinstance(entry, dict) and not procedure:
+            yield from _iter_tool_results(entry, name)
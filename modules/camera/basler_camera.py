@@ -22,6 +22,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import numpy as np
 
+from core.tracing import traced
 from data.image_data import ImageData, PixelFormat
 from .camera_adapter import (
     CameraAdapter,
@@ -227,6 +228,11 @@ class BaslerCameraAdapter(CameraAdapter):
                 if not self._stop_event.is_set():
                     self._logger.debug(f"取帧时发生错误: {e}")
 
+    @traced(
+        "camera.grab",
+        "camera",
+        lambda self, *args, **kwargs: {"camera": "basler"},
+    )
     def capture_frame(self, timeout_ms: int = 1000) -> Optional[ImageData]:
         """采集一帧图像"""
         if not self._is_connected:
@@ -24,6 +24,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import cv2
 
+from core.memory_pool import allocate_image_buffer
+from core.tracing import traced
 from data.image_data import ImageData, PixelFormat
 from utils.exceptions import (
     CameraCaptureException,
@@ -418,9 +420,14 @@ class HikCamera:
 
             pData = cast(stOutFrame.pBufAddr, POINTER(c_ubyte))
 
-            # 创建numpy数组的副本，避免原始缓冲区被释放后访问无效内存
-            temp = np.ctypeslib.as_array(pData, shape=(frame_len,)).copy()
-            image = temp.reshape((height, width))
+            # 复制到内存池缓冲区，避免原始缓冲区被释放后访问无效内存
+            image = allocate_image_buffer((height, width), np.uint8)
+            np.copyto(
+                image.reshape(-1),
+                np.ctypeslib.as_array(pData, shape=(frame_len,))[
+                    : height * width
+                ],
+            )
 
             self._camera.MV_CC_FreeImageBuffer(stOutFrame)
 
@@ -430,6 +437,11 @@ class HikCamera:
             self._logger.error(f"获取图像失败: {e}")
             return None
 
+    @traced(
+        "camera.grab",
+        "camera",
+        lambda self, *args, **kwargs: {"camera": "hik"},
+    )
     def capture_frame(self, timeout_ms: int = 1000) -> Optional[ImageData]:
         """采集一帧图像"""
         if not self._is_connected:
@@ -446,10 +458,11 @@ class HikCamera:
             self._logger.error("无法获取图像帧")
             return None
 
-        self._logger.debug(f"采集图像: {frame.shape}")
+        self._logger.debug("采集图像: %s", frame.shape)
 
-        return ImageData(
-            data=frame,
+        # 帧缓冲区刚从内存池复制得到，直接持有，不再复制
+        return ImageData.adopt(
+            frame,
             width=frame.shape[1],
             height=frame.shape[0],
             camera_id=str(self._device_info),
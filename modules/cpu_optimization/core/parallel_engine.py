@@ -19,6 +19,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
+
 logger = logging.getLogger("CPUOptimization.ParallelEngine")
 
 
@@ -453,44 +455,69 @@ def process_image_tiles(
     tile_size: int = 256,
     overlap: int = 32,
     workers: int = None,
+    out=None,
 ) -> Any:
     """
-    将图像分块后并行处理
+    将图像分块后并行处理并拼接回整图
+
+    每个块在四周各扩展 overlap 像素作为光环输入处理函数，
+    处理后只把块的中心区域写回预分配的输出图像，块之间没有拼缝。
+    overlap 应不小于处理函数的邻域半径(如核大小的一半)。
 
     Args:
         image: 输入图像
-        process_func: 图像块处理函数
-        tile_size: 块大小
-        overlap: 块重叠区域
+        process_func: 图像块处理函数，输出尺寸与输入块相同
+        tile_size: 块大小(不含光环)
+        overlap: 块四周的光环宽度
         workers: 工作线程数
+        out: 预分配的输出图像，默认与输入相同形状和类型
 
     Returns:
-        处理后的图像或结果
+        处理后的图像
     """
-    engine = ParallelEngine()
     h, w = image.shape[:2]
+    tile_size = max(1, tile_size)
 
-    # 计算分块位置
+    # 计算分块位置: (中心区域, 带光环区域)
     tiles = []
-    for y in range(0, h, tile_size - overlap):
-        for x in range(0, w, tile_size - overlap):
+    for y in range(0, h, tile_size):
+        for x in range(0, w, tile_size):
             y_end = min(y + tile_size, h)
             x_end = min(x + tile_size, w)
-            tiles.append((y, x, y_end, x_end))
+            padded = (
+                max(0, y - overlap),
+                max(0, x - overlap),
+                min(h, y_end + overlap),
+                min(w, x_end + overlap),
+            )
+            tiles.append(((y, x, y_end, x_end), padded))
 
-    if not tiles:
-        return process_func(image)
+    if len(tiles) <= 1:
+        result = process_func(image)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    if out is None:
+        out = np.empty_like(image)
 
-    # 提取图像块
-    patches = []
-    for y, x, y_end, x_end in tiles:
-        patch = image[y:y_end, x:x_end]
-        patches.append(patch)
+    def run_tile(tile):
+        (y, x, y_end, x_end), (py, px, py_end, px_end) = tile
+        result = process_func(image[py:py_end, px:px_end])
+        out[y:y_end, x:x_end] = result[
+            y - py : y_end - py, x - px : x_end - px
+        ]
 
-    # 并行处理
-    results = engine.map_function(process_func, patches, use_threading=True)
+    engine = ParallelEngine()
+    with ThreadPoolExecutor(
+        max_workers=workers or engine.get_worker_count(),
+        thread_name_prefix="TileWorker",
+    ) as executor:
+        # 取结果以便传播处理函数中的异常
+        list(executor.map(run_tile, tiles))
 
-    return results, tiles
+    return out
 
 
 if __name__ == "__main__":
@@ -504,8 +531,6 @@ if __name__ == "__main__":
     # 测试并行计算
     import time
 
-    import numpy as np
-
     def heavy_computation(x):
         time.sleep(0.1)
         return x**2
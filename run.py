@@ -30,15 +30,10 @@ if project_root not in sys.path:
 
 
 def setup_logging():
-    """配置日志"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler("vision_system.log", encoding="utf-8"),
-        ],
-    )
+    """配置日志(控制台和文件由后台线程写出，重复警告限流)"""
+    from core.log_config import setup_logging as setup_async_logging
+
+    setup_async_logging(level=logging.INFO, log_file="vision_system.log")
 
 
 def start_gui():
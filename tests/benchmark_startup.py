@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+启动时间基准测试
+
+在全新的解释器进程中测量冷启动耗时（注册表查询、创建两个滤波工具等），
+并检查启动过程没有导入重量级依赖。
+
+Usage:
+    python tests/benchmark_startup.py
+    python tests/benchmark_startup.py --importtime two_filters
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 冷启动场景：场景名 -> 在新进程中执行的代码
+SCENARIOS = {
+    # 基线：解释器 + numpy + OpenCV，任何场景都无法低于此值
+    "floor": "import numpy, cv2",
+    # 只查询注册表（工具库面板、方案校验）
+    "registry": (
+        "from core.tool_base import ToolRegistry\n"
+        "ToolRegistry.get_categories()\n"
+        "ToolRegistry.get_param_definitions('Vision', '灰度匹配')\n"
+    ),
+    # 加载一个只用到两个滤波工具的方案
+    "two_filters": (
+        "from core.tool_base import ToolRegistry\n"
+        "ToolRegistry.create_tool('ImageFilter', '高斯滤波', 'g')\n"
+        "ToolRegistry.create_tool('ImageFilter', '中值滤波', 'm')\n"
+    ),
+    # 旧行为参考：导入全部工具
+    "all_tools": (
+        "from core.tool_base import ToolRegistry\n"
+        "ToolRegistry.get_all_tools()\n"
+    ),
+}
+
+# 各场景相对floor允许的额外耗时(秒)，超出即视为启动回退
+STARTUP_BUDGET = {
+    "registry": 0.4,
+    "two_filters": 0.6,
+}
+
+# 无头场景中不允许出现的重量级依赖
+FORBIDDEN_MODULES = (
+    "torch",
+    "easyocr",
+    "ultralytics",
+    "polars",
+    "PyQt5",
+    "PyQt6",
+    "PySide6",
+    "pyzbar",
+    "pypylon",
+    "MvImport",
+)
+
+_PROBE = """
+import json, sys, time
+_start = time.perf_counter()
+exec(compile({code!r}, "<scenario>", "exec"))
+_elapsed = time.perf_counter() - _start
+print(json.dumps({{"elapsed": _elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_scenario(name: str) -> dict:
+    """在新进程中运行一次场景
+
+    Args:
+        name: 场景名称
+
+    Returns:
+        {"wall": 进程总耗时, "elapsed": 场景代码耗时, "modules": 已导入模块}
+    """
+    code = _PROBE.format(code=SCENARIOS[name])
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall"] = wall
+    return result
+
+
+def measure_cold_start(name: str, repeats: int = 3) -> dict:
+    """多次测量场景冷启动耗时，取中位数
+
+    Args:
+        name: 场景名称
+        repeats: 重复次数
+
+    Returns:
+        测量结果字典
+    """
+    runs = [run_scenario(name) for _ in range(repeats)]
+    return {
+        "scenario": name,
+        "repeats": repeats,
+        "wall_s": statistics.median(r["wall"] for r in runs),
+        "min_wall_s": min(r["wall"] for r in runs),
+        "modules": runs[-1]["modules"],
+    }
+
+
+def forbidden_imports(modules) -> list:
+    """返回模块列表中出现的重量级依赖"""
+    return sorted({m.split(".")[0] for m in modules} & set(FORBIDDEN_MODULES))
+
+
+def check_budget(name: str, repeats: int = 3) -> dict:
+    """测量场景并与预算比较
+
+    Returns:
+        包含overhead_s/budget_s/passed的结果字典
+    """
+    floor = measure_cold_start("floor", repeats)
+    result = measure_cold_start(name, repeats)
+    # 使用最小值比较，降低机器负载抖动的影响
+    overhead = result["min_wall_s"] - floor["min_wall_s"]
+    budget = STARTUP_BUDGET[name]
+    result.update(
+        {
+            "floor_s": floor["min_wall_s"],
+            "overhead_s": overhead,
+            "budget_s": budget,
+            "forbidden": forbidden_imports(result["modules"]),
+        }
+    )
+    result["passed"] = overhead <= budget and not result["forbidden"]
+    return result
+
+
+def print_importtime(name: str, top: int = 15):
+    """使用 -X importtime 打印场景中累计耗时最多的导入"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCENARIOS[name]],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        cumulative_us, module = fields[1].strip(), fields[2].rstrip()
+        rows.append((int(cumulative_us), module))
+    for cumulative_us, module in sorted(rows, reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:8.1f}ms  {module}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="启动时间基准测试")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--importtime", metavar="SCENARIO", help="打印场景的导入耗时明细"
+    )
+    args = parser.parse_args()
+
+    if args.importtime:
+        print_importtime(args.importtime)
+        sys.exit(0)
+
+    print("Running startup benchmarks...")
+    failed = False
+    for index, name in enumerate(SCENARIOS, 1):
+        result = measure_cold_start(name, args.repeats)
+        print(f"\n{index}. {name}:")
+        print(f"   Wall: {result['wall_s'] * 1000:.1f}ms")
+        heavy = forbidden_imports(result["modules"])
+        if heavy:
+            print(f"   Heavy imports: {', '.join(heavy)}")
+        if name in STARTUP_BUDGET:
+            check = check_budget(name, args.repeats)
+            status = "OK" if check["passed"] else "REGRESSION"
+            print(
+                f"   Overhead: {check['overhead_s'] * 1000:.1f}ms "
+                f"(budget {check['budget_s'] * 1000:.0f}ms) {status}"
+            )
+            failed = failed or not check["passed"]
+
+    print("\nBenchmarks completed!")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,926 @@
+# -*- coding: utf-8 -*-
+"""
+性能回归基准套件
+
+覆盖所有已注册工具(合成图像与仓库样例图像，VGA到20MP多种分辨率)、
+参考流程、ImageData创建/拷贝、方案保存/加载、通信协议往返(本地替身服务)
+以及冷启动。结果保存为JSON基线，之后的运行按容差与基线比较，
+出现回退时以非零状态码退出。
+
+Usage:
+    python tests/benchmark_suite.py --list
+    python tests/benchmark_suite.py --save benchmarks/baseline.json
+    python tests/benchmark_suite.py --compare benchmarks/baseline.json
+    python tests/benchmark_suite.py --groups tools --resolutions vga,20mp \
+        --filter 滤波
+
+基线与机器相关，应在同一台机器上生成和比较。
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import argparse
+import contextlib
+import http.server
+import json
+import logging
+import os
+import platform
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+BASELINE_VERSION = 1
+
+# 分辨率预设：名称 -> (宽, 高)；也可以直接写 "WxH"
+RESOLUTIONS = {
+    "vga": (640, 480),
+    "2mp": (1600, 1200),
+    "5mp": (2592, 1944),
+    "12mp": (4000, 3000),
+    "20mp": (5472, 3648),
+}
+
+# 图像来源：合成图像，或缩放到目标分辨率的仓库样例图像
+IMAGE_KINDS = ("synthetic", "sample")
+SAMPLE_IMAGES = ("A1.jpg", "C1.bmp", "D1.bmp", "A2.jpg")
+
+GROUPS = (
+    "tools",
+    "procedures",
+    "imagedata",
+    "solution",
+    "protocols",
+    "startup",
+)
+
+# 无法在基准中运行的工具及原因
+SKIPPED_TOOLS = {
+    "ImageSource.相机": "需要相机硬件",
+    "ImageSource.相机参数设置": "需要相机硬件",
+}
+
+# 参考流程：流程名 -> 依次连接的工具
+REFERENCE_PROCEDURES = {
+    "blob_inspection": [
+        ("ImageFilter", "高斯滤波"),
+        ("ImageFilter", "形态学处理"),
+        ("Analysis", "斑点分析"),
+    ],
+    "template_inspection": [
+        ("ImageFilter", "中值滤波"),
+        ("Vision", "灰度匹配"),
+    ],
+    "measurement": [
+        ("Vision", "几何变换"),
+        ("Analysis", "卡尺测量"),
+        ("Analysis", "像素计数"),
+    ],
+    "surface_inspection": [
+        ("ImageFilter", "高斯滤波"),
+        ("Vision", "表面缺陷检测"),
+    ],
+}
+
+# 冷启动场景(见 benchmark_startup.py)
+STARTUP_SCENARIOS = ("registry", "two_filters")
+
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 0.5
+
+# 单次采样的最短时间，过快的用例在一次采样内循环多次
+MIN_SAMPLE_SECONDS = 0.002
+
+
+@dataclass
+class BenchmarkCase:
+    """基准用例
+
+    setup 接收 contextlib.ExitStack(用于注册清理)，返回被计时的无参函数。
+    """
+
+    name: str
+    group: str
+    setup: Callable[[contextlib.ExitStack], Callable[[], Any]]
+    repeats: Optional[int] = None
+    warmup: Optional[int] = None
+
+
+# ---------------------------------------------------------------- 输入图像
+
+
+def parse_resolution(spec: str) -> tuple:
+    """解析分辨率名称或 "WxH"
+
+    Returns:
+        (宽, 高)
+    """
+    spec = spec.strip().lower()
+    if spec in RESOLUTIONS:
+        return RESOLUTIONS[spec]
+    width, _, height = spec.partition("x")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise ValueError(f"未知的分辨率: {spec}") from None
+
+
+def synthetic_image(width: int, height: int) -> np.ndarray:
+    """生成确定性的合成检测图像(渐变背景、圆、矩形、直线、文字和轻微噪声)"""
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(60, 120, width, dtype=np.float32)
+    image = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+    image = image.astype(np.uint8)
+
+    scale = min(width, height) / 480.0
+    for i in range(6):
+        center = (int(width * (0.15 + 0.14 * i)), int(height * 0.3))
+        cv2.circle(image, center, int(30 * scale), (220, 220, 220), -1)
+    for i in range(4):
+        x = int(width * (0.1 + 0.2 * i))
+        y = int(height * 0.55)
+        cv2.rectangle(
+            image,
+            (x, y),
+            (x + int(60 * scale), y + int(40 * scale)),
+            (20, 20, 20),
+            -1,
+        )
+    cv2.line(
+        image,
+        (int(width * 0.05), int(height * 0.8)),
+        (int(width * 0.95), int(height * 0.85)),
+        (250, 250, 250),
+        max(1, int(3 * scale)),
+    )
+    cv2.putText(
+        image,
+        "VISION 2026",
+        (int(width * 0.1), int(height * 0.95)),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        1.2 * scale,
+        (240, 240, 240),
+        max(1, int(2 * scale)),
+    )
+    noise = rng.integers(-6, 7, image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def sample_image(width: int, height: int) -> Optional[np.ndarray]:
+    """读取仓库样例图像并缩放到目标分辨率，没有样例时返回None"""
+    for name in SAMPLE_IMAGES:
+        path = os.path.join(PROJECT_ROOT, name)
+        if not os.path.exists(path):
+            continue
+        image = cv2.imdecode(np.fromfile(path, np.uint8), cv2.IMREAD_COLOR)
+        if image is not None:
+            return cv2.resize(
+                image, (width, height), interpolation=cv2.INTER_AREA
+            )
+    return None
+
+
+_image_cache: Dict[tuple, Optional[np.ndarray]] = {}
+
+
+def load_input(kind: str, resolution: str) -> Optional[np.ndarray]:
+    """获取输入图像(按来源和分辨率缓存)"""
+    key = (kind, resolution)
+    if key not in _image_cache:
+        width, height = parse_resolution(resolution)
+        if kind == "synthetic":
+            _image_cache[key] = synthetic_image(width, height)
+        else:
+            _image_cache[key] = sample_image(width, height)
+    return _image_cache[key]
+
+
+# ---------------------------------------------------------------- 工具准备
+
+
+def _write_image(image: np.ndarray, path: str) -> str:
+    cv2.imencode(os.path.splitext(path)[1], image)[1].tofile(path)
+    return path
+
+
+def _template_crop(image: np.ndarray) -> np.ndarray:
+    """取同分辨率合成图像中第一个圆附近的区域作为模板(样例图像也使用该模板)"""
+    height, width = image.shape[:2]
+    image = load_input("synthetic", f"{width}x{height}")
+    size = max(16, int(min(width, height) * 0.16))
+    cx, cy = int(width * 0.15), int(height * 0.3)
+    y0, x0 = max(0, cy - size // 2), max(0, cx - size // 2)
+    return image[y0 : y0 + size, x0 : x0 + size]
+
+
+def _prepare_reader(tool, image, workdir):
+    tool.set_param(
+        "file_path", _write_image(image, os.path.join(workdir, "frame.png"))
+    )
+
+
+def _prepare_selector(tool, image, workdir):
+    tool.set_param(
+        "图像文件列表",
+        [_write_image(image, os.path.join(workdir, "frame.png"))],
+    )
+
+
+def _prepare_gray_match(tool, image, workdir):
+    tool.set_param(
+        "template_path",
+        _write_image(
+            _template_crop(image), os.path.join(workdir, "template.png")
+        ),
+    )
+
+
+def _prepare_shape_match(tool, image, workdir):
+    from data.image_data import ImageData
+
+    tool.set_template(ImageData(data=_template_crop(image)))
+
+
+def _prepare_saver(tool, image, workdir):
+    tool.set_param("保存路径", workdir)
+
+
+# 工具需要的额外准备：工具键 -> prepare(tool, image, workdir)
+TOOL_PREPARE = {
+    "ImageSource.图像读取器": _prepare_reader,
+    "ImageSource.多图像选择器": _prepare_selector,
+    "Vision.灰度匹配": _prepare_gray_match,
+    "Vision.形状匹配": _prepare_shape_match,
+    "Vision.图像保存": _prepare_saver,
+}
+
+
+def _create_tool(category: str, name: str, image: np.ndarray, workdir: str):
+    from core.tool_base import ToolRegistry
+
+    tool = ToolRegistry.create_tool(category, name)
+    prepare = TOOL_PREPARE.get(f"{category}.{name}")
+    if prepare:
+        prepare(tool, image, workdir)
+    return tool
+
+
+def _workdir(stack: contextlib.ExitStack) -> str:
+    return stack.enter_context(tempfile.TemporaryDirectory(prefix="vs_bench_"))
+
+
+# ---------------------------------------------------------------- 用例构建
+
+
+def tool_cases(
+    resolutions: Sequence[str], kinds: Sequence[str]
+) -> List[BenchmarkCase]:
+    """所有已注册工具的单工具用例"""
+    from core.tool_base import ToolRegistry
+
+    cases = []
+    for key in sorted(ToolRegistry.get_tool_names()):
+        category, name = key.split(".", 1)
+        for resolution in resolutions:
+            for kind in kinds:
+
+                def setup(
+                    stack,
+                    category=category,
+                    name=name,
+                    kind=kind,
+                    resolution=resolution,
+                ):
+                    from data.image_data import ImageData
+
+                    key = f"{category}.{name}"
+                    if key in SKIPPED_TOOLS:
+                        raise BenchmarkSkipped(SKIPPED_TOOLS[key])
+                    image = load_input(kind, resolution)
+                    if image is None:
+                        raise BenchmarkSkipped("没有样例图像")
+                    tool = _create_tool(category, name, image, _workdir(stack))
+                    frame = ImageData(data=image)
+
+                    def run():
+                        tool.set_input(frame)
+                        tool.run()
+
+                    return run
+
+                cases.append(
+                    BenchmarkCase(
+                        f"tool/{key}/{resolution}/{kind}", "tools", setup
+                    )
+                )
+    return cases
+
+
+def build_procedure(name: str, image: np.ndarray, workdir: str):
+    """按 REFERENCE_PROCEDURES 构建参考流程"""
+    from core.procedure import Procedure
+
+    procedure = Procedure(name)
+    previous = None
+    for category, tool_name in REFERENCE_PROCEDURES[name]:
+        tool = _create_tool(category, tool_name, image, workdir)
+        procedure.add_tool(tool)
+        if previous is not None:
+            procedure.connect(previous.name, tool.name)
+        previous = tool
+    return procedure
+
+
+def procedure_cases(
+    resolutions: Sequence[str], kinds: Sequence[str]
+) -> List[BenchmarkCase]:
+    """参考流程用例"""
+    cases = []
+    for name in REFERENCE_PROCEDURES:
+        for resolution in resolutions:
+            for kind in kinds:
+
+                def setup(stack, name=name, kind=kind, resolution=resolution):
+                    from data.image_data import ImageData
+
+                    image = load_input(kind, resolution)
+                    if image is None:
+                        raise BenchmarkSkipped("没有样例图像")
+                    procedure = build_procedure(name, image, _workdir(stack))
+                    frame = ImageData(data=image)
+                    return lambda: procedure.run(frame)
+
+                cases.append(
+                    BenchmarkCase(
+                        f"procedure/{name}/{resolution}/{kind}",
+                        "procedures",
+                        setup,
+                    )
+                )
+    return cases
+
+
+def imagedata_cases(resolutions: Sequence[str]) -> List[BenchmarkCase]:
+    """ImageData 创建、拷贝、视图和灰度转换用例"""
+    from data.image_data import ImageData
+
+    operations = {
+        "create": lambda frame, array: ImageData(data=array),
+        "copy": lambda frame, array: frame.copy(),
+        "view": lambda frame, array: frame.view(),
+        "to_gray": lambda frame, array: frame.to_gray(),
+    }
+    cases = []
+    for resolution in resolutions:
+        for op_name, operation in operations.items():
+
+            def setup(stack, operation=operation, resolution=resolution):
+                array = load_input("synthetic", resolution)
+                frame = ImageData(data=array)
+                return lambda: operation(frame, array)
+
+            cases.append(
+                BenchmarkCase(
+                    f"imagedata/{op_name}/{resolution}", "imagedata", setup
+                )
+            )
+    return cases
+
+
+def _reference_solution(workdir: str):
+    from core.solution import Solution
+
+    solution = Solution("benchmark")
+    image = load_input("synthetic", "vga")
+    for name in REFERENCE_PROCEDURES:
+        solution.add_procedure(build_procedure(name, image, workdir))
+    return solution
+
+
+def solution_cases() -> List[BenchmarkCase]:
+    """方案保存、加载和整体运行用例(VGA合成图像)"""
+
+    def save_setup(stack):
+        workdir = _workdir(stack)
+        solution = _reference_solution(workdir)
+        path = os.path.join(workdir, "benchmark.vmsol")
+        return lambda: solution.save(path)
+
+    def load_setup(stack):
+        from core.solution import Solution
+
+        workdir = _workdir(stack)
+        path = os.path.join(workdir, "benchmark.vmsol")
+        if not _reference_solution(workdir).save(path):
+            raise RuntimeError("保存参考方案失败")
+        solution = Solution("benchmark")
+        return lambda: solution.load(path, warmup=False)
+
+    def run_setup(stack):
+        from data.image_data import ImageData
+
+        solution = _reference_solution(_workdir(stack))
+        frame = ImageData(data=load_input("synthetic", "vga"))
+        return lambda: solution.run(frame)
+
+    return [
+        BenchmarkCase("solution/save", "solution", save_setup),
+        BenchmarkCase("solution/load", "solution", load_setup),
+        BenchmarkCase("solution/run/vga", "solution", run_setup),
+    ]
+
+
+# ---------------------------------------------------------------- 协议替身服务
+
+
+class _EchoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                break
+            self.request.sendall(data)
+
+
+class _JSONEchoHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，关闭Nagle避免与延迟确认叠加出40ms等待
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _ThreadingHTTPServer(
+    socketserver.ThreadingMixIn, http.server.HTTPServer
+):
+    daemon_threads = True
+
+
+def start_local_server(stack: contextlib.ExitStack, kind: str) -> int:
+    """在本机启动替身服务，返回端口
+
+    Args:
+        stack: 退出时关闭服务
+        kind: "tcp_echo" 或 "http_echo"
+    """
+    if kind == "tcp_echo":
+        server = _ThreadingTCPServer(("127.0.0.1", 0), _EchoHandler)
+    else:
+        server = _ThreadingHTTPServer(("127.0.0.1", 0), _JSONEchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+
+    stack.callback(stop)
+    return server.server_address[1]
+
+
+def protocol_cases() -> List[BenchmarkCase]:
+    """通信协议往返用例"""
+    payload = json.dumps({"result": "OK", "values": list(range(32))}).encode(
+        "utf-8"
+    )
+
+    def tcp_setup(stack):
+        from core.communication.tcp_client import TCPClient
+
+        port = start_local_server(stack, "tcp_echo")
+        client = TCPClient()
+        if not client.connect(
+            {"host": "127.0.0.1", "port": port, "timeout": 2.0}
+        ):
+            raise RuntimeError("连接替身TCP服务失败")
+        stack.callback(client.disconnect)
+
+        def round_trip():
+            client.send(payload)
+            received = 0
+            while received < len(payload):
+                data = client.receive(timeout=2.0)
+                if data is None:
+                    raise TimeoutError("TCP往返超时")
+                received += len(data)
+
+        return round_trip
+
+    def http_setup(stack):
+        from core.communication.http_client import HTTPClient
+
+        port = start_local_server(stack, "http_echo")
+        client = HTTPClient()
+        client.connect(
+            {"base_url": f"http://127.0.0.1:{port}", "timeout": 2.0}
+        )
+        stack.callback(client.disconnect)
+
+        def round_trip():
+            response = client.post("/result", data=payload)
+            if not response.get("success"):
+                raise RuntimeError(response.get("error"))
+
+        return round_trip
+
+    return [
+        BenchmarkCase("protocol/tcp_client/echo", "protocols", tcp_setup),
+        BenchmarkCase("protocol/http_client/post", "protocols", http_setup),
+    ]
+
+
+def startup_cases() -> List[BenchmarkCase]:
+    """冷启动用例(每次采样启动新的解释器)"""
+    cases = []
+    for scenario in STARTUP_SCENARIOS:
+
+        def setup(stack, scenario=scenario):
+            from tests.benchmark_startup import run_scenario
+
+            return lambda: run_scenario(scenario)
+
+        cases.append(
+            BenchmarkCase(
+                f"startup/{scenario}", "startup", setup, repeats=3, warmup=0
+            )
+        )
+    return cases
+
+
+def build_cases(
+    groups: Sequence[str] = GROUPS,
+    resolutions: Sequence[str] = ("vga",),
+    kinds: Sequence[str] = IMAGE_KINDS,
+    filters: Sequence[str] = (),
+) -> List[BenchmarkCase]:
+    """构建用例列表
+
+    Args:
+        groups: 用例分组
+        resolutions: 分辨率(预设名或 "WxH")
+        kinds: 图像来源
+        filters: 名称过滤，包含任一子串即保留
+
+    Returns:
+        用例列表
+    """
+    cases = []
+    if "tools" in groups:
+        cases += tool_cases(resolutions, kinds)
+    if "procedures" in groups:
+        cases += procedure_cases(resolutions, kinds)
+    if "imagedata" in groups:
+        cases += imagedata_cases(resolutions)
+    if "solution" in groups:
+        cases += solution_cases()
+    if "protocols" in groups:
+        cases += protocol_cases()
+    if "startup" in groups:
+        cases += startup_cases()
+    if filters:
+        cases = [
+            case for case in cases if any(f in case.name for f in filters)
+        ]
+    return cases
+
+
+# ---------------------------------------------------------------- 计时
+
+
+class BenchmarkSkipped(Exception):
+    """用例在当前环境下无法运行"""
+
+
+def _calibrate(func: Callable[[], Any], first_seconds: float) -> int:
+    """确定每次采样的循环次数，使单次采样不短于 MIN_SAMPLE_SECONDS"""
+    if first_seconds >= MIN_SAMPLE_SECONDS:
+        return 1
+    number = 1
+    while number < 10000:
+        number *= 10
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            break
+    return number
+
+
+def run_case(
+    case: BenchmarkCase,
+    repeats: int = 10,
+    warmup: int = 1,
+    max_case_seconds: float = 5.0,
+) -> Dict[str, Any]:
+    """运行单个用例
+
+    Args:
+        case: 用例
+        repeats: 采样次数(用例自带的设置优先)
+        warmup: 预热次数
+        max_case_seconds: 单个用例的计时预算，慢用例会减少采样次数(至少3次)
+
+    Returns:
+        {"name", "group", "status", "median_ms", "p95_ms", "min_ms",
+         "repeats", "number", "error"}
+    """
+    repeats = case.repeats or repeats
+    warmup = case.warmup if case.warmup is not None else warmup
+    result = {"name": case.name, "group": case.group, "status": "ok"}
+
+    with contextlib.ExitStack() as stack:
+        try:
+            func = case.setup(stack)
+            first = None
+            for _ in range(max(warmup, 1) if warmup else 0):
+                start = time.perf_counter()
+                func()
+                first = time.perf_counter() - start
+
+            if first is not None:
+                repeats = max(
+                    3, min(repeats, int(max_case_seconds / max(first, 1e-9)))
+                )
+            number = _calibrate(func, first) if first is not None else 1
+
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                for _ in range(number):
+                    func()
+                samples.append((time.perf_counter() - start) / number * 1000)
+        except BenchmarkSkipped as e:
+            result.update(status="skipped", error=str(e))
+            return result
+        except Exception as e:
+            result.update(status="error", error=f"{type(e).__name__}: {e}")
+            return result
+
+    result.update(
+        median_ms=statistics.median(samples),
+        p95_ms=float(np.percentile(samples, 95)),
+        min_ms=min(samples),
+        repeats=len(samples),
+        number=number,
+    )
+    return result
+
+
+def run_suite(
+    cases: Sequence[BenchmarkCase],
+    repeats: int = 10,
+    warmup: int = 1,
+    max_case_seconds: float = 5.0,
+    progress: Callable[[Dict[str, Any]], None] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """依次运行用例
+
+    Returns:
+        {用例名: 结果}
+    """
+    results = {}
+    for case in cases:
+        result = run_case(case, repeats, warmup, max_case_seconds)
+        results[case.name] = result
+        if progress:
+            progress(result)
+    return results
+
+
+# ---------------------------------------------------------------- 基线
+
+
+def machine_info() -> Dict[str, Any]:
+    """记录生成结果的机器信息"""
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    """保存结果为JSON基线"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    data = {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": machine_info(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """读取JSON基线"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"不支持的基线版本: {data.get('version')}")
+    return data
+
+
+def compare_results(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> List[Dict[str, Any]]:
+    """与基线比较
+
+    中位数超过 基线×(1+tolerance) 且差值超过 min_delta_ms 视为回退；
+    基线中成功的用例现在失败视为损坏。只比较本次运行过的用例。
+
+    Args:
+        baseline: 基线结果 {用例名: 结果}
+        current: 本次结果
+        tolerance: 相对容差
+        min_delta_ms: 最小绝对差(毫秒)，避免极快用例的抖动被判为回退
+
+    Returns:
+        比较列表，verdict 为 "regression"、"broken"、"improved"、
+        "unchanged"、"new" 或 "unavailable"
+    """
+    rows = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        row = {
+            "name": name,
+            "baseline_ms": base.get("median_ms") if base else None,
+            "current_ms": result.get("median_ms"),
+            "ratio": None,
+        }
+        if result["status"] != "ok":
+            broken = base is not None and base.get("status") == "ok"
+            row["verdict"] = "broken" if broken else "unavailable"
+        elif base is None or base.get("status") != "ok":
+            row["verdict"] = "new"
+        else:
+            baseline_ms, current_ms = base["median_ms"], result["median_ms"]
+            row["ratio"] = (
+                current_ms / baseline_ms if baseline_ms > 0 else None
+            )
+            delta = current_ms - baseline_ms
+            if (
+                current_ms > baseline_ms * (1 + tolerance)
+                and delta > min_delta_ms
+            ):
+                row["verdict"] = "regression"
+            elif (
+                baseline_ms > current_ms * (1 + tolerance)
+                and -delta > min_delta_ms
+            ):
+                row["verdict"] = "improved"
+            else:
+                row["verdict"] = "unchanged"
+        rows.append(row)
+    return rows
+
+
+def has_regression(rows: Sequence[Dict[str, Any]]) -> bool:
+    """比较结果中是否存在回退或损坏"""
+    return any(row["verdict"] in ("regression", "broken") for row in rows)
+
+
+# ---------------------------------------------------------------- 命令行
+
+
+def _print_result(result: Dict[str, Any]):
+    if result["status"] == "ok":
+        print(
+            f"   {result['name']:<56} {result['median_ms']:10.3f}ms "
+            f"(p95 {result['p95_ms']:.3f}ms, n={result['repeats']})"
+        )
+    else:
+        print(
+            f"   {result['name']:<56} {result['status'].upper()}: "
+            f"{result.get('error')}"
+        )
+
+
+def _print_comparison(rows: Sequence[Dict[str, Any]]):
+    for row in rows:
+        if row["verdict"] in ("unchanged", "unavailable"):
+            continue
+        ratio = f"x{row['ratio']:.2f}" if row["ratio"] is not None else ""
+        print(f"   {row['verdict'].upper():<11} {row['name']} {ratio}")
+    counts = {}
+    for row in rows:
+        counts[row["verdict"]] = counts.get(row["verdict"], 0) + 1
+    print(
+        "   "
+        + ", ".join(f"{key}={value}" for key, value in sorted(counts.items()))
+    )
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="性能回归基准套件")
+    parser.add_argument(
+        "--groups", default=",".join(GROUPS), help="用例分组，逗号分隔"
+    )
+    parser.add_argument(
+        "--resolutions", default="vga", help="分辨率，如 vga,5mp,20mp,800x600"
+    )
+    parser.add_argument(
+        "--images", default=",".join(IMAGE_KINDS), help="图像来源"
+    )
+    parser.add_argument(
+        "--filter", action="append", default=[], help="用例名子串过滤"
+    )
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--max-case-seconds", type=float, default=5.0)
+    parser.add_argument("--save", metavar="PATH", help="保存结果为基线")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="与基线比较，回退时返回1"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS
+    )
+    parser.add_argument("--list", action="store_true", help="只列出用例")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(
+        _split(args.groups),
+        _split(args.resolutions),
+        _split(args.images),
+        args.filter,
+    )
+    if args.list:
+        for case in cases:
+            print(case.name)
+        return 0
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    if baseline and baseline.get("machine") != machine_info():
+        print(
+            "Warning: baseline was recorded on a different machine/environment"
+        )
+
+    print(f"Running {len(cases)} benchmarks...")
+    results = run_suite(
+        cases,
+        args.repeats,
+        args.warmup,
+        args.max_case_seconds,
+        progress=_print_result,
+    )
+
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\nBaseline saved: {args.save}")
+
+    if baseline:
+        print("\nComparison with baseline:")
+        rows = compare_results(
+            baseline["results"], results, args.tolerance, args.min_delta_ms
+        )
+        _print_comparison(rows)
+        if has_regression(rows):
+            print("\nREGRESSION")
+            return 1
+
+    print("\nBenchmarks completed!")
+    return 0
+
+
+if __name__ == "__main__":
+    # 工具在未配置时会记录错误日志，基准输出中不显示
+    logging.disable(logging.CRITICAL)
+    sys.exit(main())
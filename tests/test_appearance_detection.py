@@ -19,7 +19,7 @@ import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data.image_data import ImageData
-from tools.appearance_detection import (
+from tools.vision.appearance_detection import (
     AppearanceDetector,
     SurfaceDefectDetector,
 )
@@ -140,6 +140,19 @@ class TestAppearanceDetection(unittest.TestCase):
         defects = detector.get_result("defects")
         self.assertIsInstance(defects, list)
 
+    def test_surface_defect_detector_draws_defects(self):
+        """测试表面缺陷检测器发现缺陷时添加叠加图元"""
+        image = np.full((200, 300), 200, dtype=np.uint8)
+        cv2.rectangle(image, (100, 80), (160, 100), 40, -1)
+
+        detector = SurfaceDefectDetector()
+        detector.set_param("use_multiscale", False)
+        detector.set_input(ImageData(image))
+
+        self.assertTrue(detector.run())
+        self.assertGreater(detector.get_result("defect_count"), 0)
+        self.assertGreater(len(detector.get_result().overlay), 0)
+
     def test_surface_defect_detector_no_input(self):
         """测试表面缺陷检测器无输入情况"""
         detector = SurfaceDefectDetector()
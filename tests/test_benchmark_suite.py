@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能回归基准套件测试
+
+验证用例构建、计时、基线保存/比较、协议替身服务，
+以及命令行在出现回退时返回非零状态码。
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.benchmark_suite import (
+    BenchmarkCase,
+    BenchmarkSkipped,
+    build_cases,
+    compare_results,
+    has_regression,
+    load_baseline,
+    main,
+    parse_resolution,
+    run_case,
+    run_suite,
+    save_baseline,
+)
+
+
+def _ok(median_ms):
+    return {"status": "ok", "median_ms": median_ms}
+
+
+class TestCompare:
+    """测试基线比较"""
+
+    def test_verdicts(self):
+        """回退、改进、容差内、损坏、新增和不可用"""
+        baseline = {
+            "slow": _ok(10.0),
+            "fast": _ok(10.0),
+            "same": _ok(10.0),
+            "tiny": _ok(0.01),
+            "broken": _ok(1.0),
+            "still_error": {"status": "error"},
+        }
+        current = {
+            "slow": _ok(13.0),
+            "fast": _ok(7.0),
+            "same": _ok(12.0),
+            "tiny": _ok(0.05),
+            "broken": {"status": "error"},
+            "still_error": {"status": "error"},
+            "added": _ok(1.0),
+        }
+        rows = {
+            row["name"]: row
+            for row in compare_results(
+                baseline, current, tolerance=0.25, min_delta_ms=0.5
+            )
+        }
+
+        assert rows["slow"]["verdict"] == "regression"
+        assert rows["slow"]["ratio"] == pytest.approx(1.3)
+        assert rows["fast"]["verdict"] == "improved"
+        assert rows["same"]["verdict"] == "unchanged"
+        assert rows["tiny"]["verdict"] == "unchanged"
+        assert rows["broken"]["verdict"] == "broken"
+        assert rows["still_error"]["verdict"] == "unavailable"
+        assert rows["added"]["verdict"] == "new"
+        assert has_regression(rows.values())
+        assert not has_regression([rows["fast"], rows["added"]])
+
+    def test_baseline_roundtrip(self, tmp_path):
+        """基线包含机器信息，读回结果一致"""
+        path = str(tmp_path / "bench" / "baseline.json")
+        save_baseline(path, {"case": _ok(1.5)})
+        data = load_baseline(path)
+        assert data["results"]["case"]["median_ms"] == 1.5
+        assert data["machine"]["cpu_count"] == os.cpu_count()
+
+
+class TestRunner:
+    """测试计时"""
+
+    def test_run_case_statuses(self):
+        """成功、跳过和出错的用例"""
+
+        def skipped(stack):
+            raise BenchmarkSkipped("需要相机硬件")
+
+        def failing(stack):
+            return lambda: 1 / 0
+
+        cleaned = []
+
+        def ok(stack):
+            stack.callback(cleaned.append, True)
+            return lambda: sum(range(100))
+
+        results = run_suite(
+            [
+                BenchmarkCase("ok", "test", ok),
+                BenchmarkCase("skipped", "test", skipped),
+                BenchmarkCase("failing", "test", failing),
+            ],
+            repeats=3,
+        )
+        assert results["ok"]["status"] == "ok"
+        assert results["ok"]["repeats"] == 3
+        assert results["ok"]["number"] > 1
+        assert 0 < results["ok"]["min_ms"] <= results["ok"]["median_ms"]
+        assert cleaned == [True]
+        assert results["skipped"]["status"] == "skipped"
+        assert results["failing"]["status"] == "error"
+        assert "ZeroDivisionError" in results["failing"]["error"]
+
+    def test_build_cases(self):
+        """按分组、分辨率、图像来源和名称过滤构建用例"""
+        assert parse_resolution("20mp") == (5472, 3648)
+        assert parse_resolution("64x48") == (64, 48)
+        with pytest.raises(ValueError):
+            parse_resolution("huge")
+
+        cases = build_cases(
+            ["tools"], ["64x48", "vga"], ["synthetic"], ["高斯滤波"]
+        )
+        assert [case.name for case in cases] == [
+            "tool/ImageFilter.高斯滤波/64x48/synthetic",
+            "tool/ImageFilter.高斯滤波/vga/synthetic",
+        ]
+        names = [
+            case.name
+            for case in build_cases(["imagedata", "solution"], ["vga"])
+        ]
+        assert "imagedata/copy/vga" in names and "solution/load" in names
+
+    @pytest.mark.parametrize(
+        "name",
+        [
+            "tool/Vision.灰度匹配/64x48/sample",
+            "tool/ImageSource.图像读取器/64x48/synthetic",
+            "procedure/blob_inspection/64x48/synthetic",
+            "imagedata/to_gray/64x48",
+            "solution/load",
+            "protocol/tcp_client/echo",
+            "protocol/http_client/post",
+        ],
+    )
+    def test_cases_run(self, name):
+        """工具、流程、ImageData、方案和协议用例均能运行"""
+        cases = {
+            case.name: case
+            for case in build_cases(
+                ["tools", "procedures", "imagedata", "solution", "protocols"],
+                ["64x48"],
+            )
+        }
+        result = run_case(cases[name], repeats=3)
+        assert result["status"] == "ok", result.get("error")
+
+    def test_camera_skipped(self):
+        """需要硬件的工具被跳过"""
+        case = build_cases(
+            ["tools"], ["64x48"], ["synthetic"], ["ImageSource.相机/"]
+        )[0]
+        assert run_case(case)["status"] == "skipped"
+
+
+class TestCommandLine:
+    """测试命令行"""
+
+    def test_regression_exit_code(self, tmp_path):
+        """保存基线后比较；人为调低基线时返回1"""
+        path = str(tmp_path / "baseline.json")
+        args = [
+            "--groups",
+            "imagedata",
+            "--resolutions",
+            "64x48",
+            "--repeats",
+            "3",
+        ]
+        assert main(args + ["--save", path]) == 0
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for result in data["results"].values():
+            result["median_ms"] = 1e-6
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        assert main(args + ["--compare", path, "--min-delta-ms", "0"]) == 1
+        assert main(args + ["--compare", path, "--tolerance", "1e9"]) == 0
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量斑点分析测试
+
+验证批量统计与逐个轮廓调用 OpenCV 的结果一致、孔洞计数和嵌套斑点处理、
+向量化过滤，以及斑点分析工具不再限制斑点数量。
+"""
+
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.image_data import ImageData
+from tools.analysis.analysis import BlobFind
+from tools.analysis.blob_engine import analyze_blobs, filter_blobs
+
+
+@pytest.fixture(scope="module")
+def binary():
+    """随机圆斑，以及一个带两个孔洞、孔洞内嵌套小斑点的矩形"""
+    rng = np.random.default_rng(1)
+    image = np.zeros((600, 800), np.uint8)
+    for _ in range(150):
+        x, y = rng.integers(20, 780), rng.integers(250, 580)
+        cv2.circle(image, (int(x), int(y)), int(rng.integers(3, 15)), 255, -1)
+    cv2.ellipse(image, (600, 100), (60, 20), 30, 0, 360, 255, -1)
+    cv2.rectangle(image, (100, 50), (200, 130), 255, -1)
+    cv2.rectangle(image, (120, 70), (140, 90), 0, -1)
+    cv2.circle(image, (170, 100), 5, 0, -1)
+    cv2.circle(image, (130, 80), 3, 255, -1)
+    image[10, 10:20] = 255
+    return image
+
+
+class TestBlobEngine:
+    """测试批量统计"""
+
+    def test_matches_per_contour(self, binary):
+        """面积、外接矩形、质心、周长与逐个轮廓计算的结果相同"""
+        table = analyze_blobs(binary)
+        contours, _ = cv2.findContours(
+            binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+        )
+        assert len(table) == len(contours)
+
+        expected = []
+        for contour in contours:
+            m = cv2.moments(contour)
+            x, y, w, h = cv2.boundingRect(contour)
+            if m["m00"]:
+                cx, cy = int(m["m10"] / m["m00"]), int(m["m01"] / m["m00"])
+            else:
+                cx, cy = x + w // 2, y + h // 2
+            expected.append(
+                (
+                    cv2.contourArea(contour),
+                    x,
+                    y,
+                    w,
+                    h,
+                    cx,
+                    cy,
+                    cv2.arcLength(contour, True),
+                )
+            )
+        actual = [
+            (
+                b["area"],
+                b["x"],
+                b["y"],
+                b["width"],
+                b["height"],
+                b["cx"],
+                b["cy"],
+                b["perimeter"],
+            )
+            for b in table.to_dicts()
+        ]
+        np.testing.assert_allclose(sorted(actual), sorted(expected), atol=1e-6)
+
+    def test_holes_and_orientation(self, binary):
+        """孔洞计数，嵌套在孔洞中的斑点不单独计；方向为主轴角度"""
+        table = analyze_blobs(binary)
+        rect = int(np.flatnonzero((table["x"] == 100) & (table["y"] == 50))[0])
+        assert table["holes"][rect] == 2
+
+        ellipse = int(
+            np.argmin(np.hypot(table["cx"] - 600, table["cy"] - 100))
+        )
+        assert table["orientation"][ellipse] == pytest.approx(30, abs=2)
+        assert table["holes"][ellipse] == 0
+
+        # 孔洞已填充的掩码包含嵌套斑点和孔洞
+        mask = table.select(np.array([rect])).mask()
+        assert (
+            mask[80, 130] == 255
+            and mask[100, 170] == 255
+            and mask[200, 300] == 0
+        )
+
+    def test_vectorised_filter(self, binary):
+        """按列范围一次过滤，轮廓与行保持对应"""
+        table = analyze_blobs(binary)
+        kept = filter_blobs(
+            table, {"area": (200, None), "circularity": (0.8, 1.0)}
+        )
+        assert 0 < len(kept) < len(table)
+        assert (kept["area"] >= 200).all() and (
+            kept["circularity"] >= 0.8
+        ).all()
+        for i, contour in enumerate(kept.contours):
+            assert cv2.contourArea(contour) == pytest.approx(kept["area"][i])
+
+    def test_empty(self):
+        """没有前景时返回空表"""
+        table = analyze_blobs(np.zeros((20, 20), np.uint8))
+        assert len(table) == 0 and table.to_dicts() == []
+
+
+class TestBlobFind:
+    """测试斑点分析工具"""
+
+    def test_no_blob_limit(self):
+        """斑点数量不再限制为1000，绘制数量由参数控制"""
+        image = np.zeros((400, 500), np.uint8)
+        image[5::10, 5::10] = 255
+        image = cv2.dilate(image, np.ones((5, 5), np.uint8))
+
+        tool = BlobFind("blobs")
+        tool.set_param("min_area", 4)
+        tool.set_param("fill_holes", False)
+        tool.set_param("max_draw", 100)
+        tool.set_param("max_blob_list", 50)
+        tool.set_input(ImageData(data=image))
+        assert tool.run()
+
+        result = tool.get_result()
+        assert result.get_value("blob_count") == 2000
+        # 明细列表受上限限制，统计表包含全部斑点
+        blobs = result.get_value("blobs")
+        assert len(blobs) == 50
+        assert blobs[0]["area"] == 16.0 and blobs[0]["holes"] == 0
+        assert len(result.get_value("blob_table")["area"]) == 2000
+        # 结果值可JSON序列化(数据发送)
+        assert (
+            json.loads(json.dumps(result.get_all_values()))["blob_count"]
+            == 2000
+        )
+        # 轮廓、外接矩形、中心点各100个
+        assert len(result.overlay) == 300
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+码区域定位与并行解码测试
+
+验证缩小图像上的候选区域定位、候选区域并行解码后坐标映射回原图、
+失败区域的放大重试、整图兜底，以及读码工具的快速定位参数。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolRegistry
+from data.image_data import ImageData
+from tools.vision import code_locator
+from tools.vision.code_locator import (
+    CodeDecoder,
+    _transform_crop,
+    locate_code_regions,
+)
+
+# EAN-13 编码表
+_EAN_L = [
+    "0001101",
+    "0011001",
+    "0010011",
+    "0111101",
+    "0100011",
+    "0110001",
+    "0101111",
+    "0111011",
+    "0110111",
+    "0001011",
+]
+_EAN_G = [
+    "0100111",
+    "0110011",
+    "0011011",
+    "0100001",
+    "0011101",
+    "0111001",
+    "0000101",
+    "0010001",
+    "0001001",
+    "0010111",
+]
+_EAN_R = [
+    "1110010",
+    "1100110",
+    "1101100",
+    "1000010",
+    "1011100",
+    "1001110",
+    "1010000",
+    "1000100",
+    "1001000",
+    "1110100",
+]
+_EAN_PARITY = [
+    "LLLLLL",
+    "LLGLGG",
+    "LLGGLG",
+    "LLGGGL",
+    "LGLLGG",
+    "LGGLLG",
+    "LGGGLL",
+    "LGLGLG",
+    "LGLGGL",
+    "LGGLGL",
+]
+
+QR_TEXTS = [
+    ("LOT-A1", 200, 250),
+    ("LOT-B2", 1400, 1000),
+    ("LOT-C3", 1500, 150),
+]
+QR_SIZE = 330  # 含生成时加的静区
+
+
+def _qr(text, module=10):
+    """生成带静区的二维码图像"""
+    code = cv2.QRCodeEncoder.create().encode(text)
+    code = cv2.resize(
+        code, None, fx=module, fy=module, interpolation=cv2.INTER_NEAREST
+    )
+    return cv2.copyMakeBorder(
+        code,
+        4 * module,
+        4 * module,
+        4 * module,
+        4 * module,
+        cv2.BORDER_CONSTANT,
+        value=255,
+    )
+
+
+def _ean13(digits, module=3, height=80):
+    """生成EAN-13条码图像，返回(含校验位的码值, 图像)"""
+    d = [int(c) for c in digits]
+    d.append(
+        (10 - sum(v * (3 if i % 2 else 1) for i, v in enumerate(d)) % 10) % 10
+    )
+    bits = "101"
+    for i, v in enumerate(d[1:7]):
+        bits += (_EAN_L if _EAN_PARITY[d[0]][i] == "L" else _EAN_G)[v]
+    bits += "01010" + "".join(_EAN_R[v] for v in d[7:]) + "101"
+    row = np.repeat(
+        np.array([0 if b == "1" else 255 for b in bits], np.uint8), module
+    )
+    image = np.full((height + 24, row.size + 36 * module), 255, np.uint8)
+    image[12 : 12 + height, 18 * module : 18 * module + row.size] = row
+    return "".join(map(str, d)), image
+
+
+@pytest.fixture(scope="module")
+def canvas():
+    """带噪声背景、三个二维码和一个条码的大图"""
+    rng = np.random.default_rng(0)
+    image = np.full((1600, 2200), 190, np.uint8)
+    image += rng.integers(0, 8, image.shape, dtype=np.uint8)
+    for text, x, y in QR_TEXTS:
+        code = _qr(text)
+        image[y : y + code.shape[0], x : x + code.shape[1]] = code
+    value, barcode = _ean13("590123412345")
+    image[1200 : 1200 + barcode.shape[0], 300 : 300 + barcode.shape[1]] = (
+        barcode
+    )
+    return image, value
+
+
+class TestLocate:
+    """测试候选区域定位"""
+
+    def test_regions_cover_codes(self, canvas):
+        """每个二维码都落在某个候选区域内，区域总面积远小于整图"""
+        image, _ = canvas
+        regions = locate_code_regions(image, "qrcode")
+        for _, x, y in QR_TEXTS:
+            assert any(
+                rx <= x + 40
+                and ry <= y + 40
+                and x + QR_SIZE - 40 <= rx + rw
+                and y + QR_SIZE - 40 <= ry + rh
+                for rx, ry, rw, rh in regions
+            )
+        assert sum(w * h for _, _, w, h in regions) < 0.3 * image.size
+
+    def test_transform_roundtrip(self):
+        """缩放旋转后的坐标经逆变换映射回裁剪图"""
+        crop = np.zeros((60, 100), np.uint8)
+        warped, matrix = _transform_crop(crop, 2.0, 45.0)
+        point = np.float32([[[30, 20]]])
+        moved = cv2.transform(point, matrix)
+        back = cv2.transform(moved, cv2.invertAffineTransform(matrix))
+        assert warped.shape[0] > 120 and warped.shape[1] > 200
+        np.testing.assert_allclose(back, point, atol=1e-3)
+
+
+class TestDecode:
+    """测试候选区域并行解码"""
+
+    def test_parallel_regions(self, canvas):
+        """并行解码各区域，结果按位置排序并映射回原图坐标"""
+        image, _ = canvas
+        decoder = CodeDecoder(max_workers=3)
+        try:
+            codes = decoder.decode(image, "qrcode")
+        finally:
+            decoder.shutdown()
+
+        assert [code.data for code in codes] == ["LOT-C3", "LOT-A1", "LOT-B2"]
+        positions = {text: (x, y) for text, x, y in QR_TEXTS}
+        for code in codes:
+            # 码在生成图像中的黑色模块外接矩形
+            ex, ey, ew, _ = cv2.boundingRect(
+                cv2.findNonZero(255 - _qr(code.data))
+            )
+            px, py = positions[code.data]
+            x, y, w, _ = code.rect
+            assert abs(x - (px + ex)) <= 3 and abs(y - (py + ey)) <= 3
+            assert abs(w - ew) <= 3
+
+    def test_barcode_located(self, canvas):
+        """一维码在候选区域中解码，整图解码时找不到的小条码也能识别"""
+        image, value = canvas
+        codes = CodeDecoder(max_workers=1).decode(image, "barcode")
+        assert [code.data for code in codes] == [value]
+        x, y, _, _ = codes[0].rect
+        assert 300 <= x <= 400 and 1200 <= y <= 1300
+
+    def test_small_code_retry(self):
+        """过小的二维码在区域放大重试后识别，坐标映射回原图"""
+        code = _qr("SMALL-1", module=1)
+        image = np.full((600, 800), 255, np.uint8)
+        image[200 : 200 + code.shape[0], 300 : 300 + code.shape[1]] = code
+        decoder = CodeDecoder(max_workers=1)
+
+        assert decoder.decode(image, "qrcode", retry=False) == []
+        codes = decoder.decode(image, "qrcode")
+        assert [c.data for c in codes] == ["SMALL-1"]
+        x, y, w, h = codes[0].rect
+        ex, ey, ew, eh = cv2.boundingRect(cv2.findNonZero(255 - code))
+        assert abs(x - (300 + ex)) <= 2 and abs(y - (200 + ey)) <= 2
+        assert abs(w - ew) <= 2 and abs(h - eh) <= 2
+
+    def test_full_frame_fallback(self, canvas, monkeypatch):
+        """候选区域都解码失败时退回整图解码"""
+        image, _ = canvas
+        monkeypatch.setattr(
+            code_locator,
+            "locate_code_regions",
+            lambda gray, kind: [(0, 0, 50, 50)],
+        )
+        codes = CodeDecoder(max_workers=1).decode(image[:700, :800], "qrcode")
+        assert [code.data for code in codes] == ["LOT-A1"]
+
+    def test_detector_reused(self, canvas):
+        """同一线程的OpenCV检测器跨帧复用"""
+        image, _ = canvas
+        decoder = CodeDecoder(max_workers=1)
+        decoder.decode(image[:700, :800], "qrcode")
+        detector = decoder._local.qr
+        decoder.decode(image[:700, :800], "qrcode")
+        assert decoder._local.qr is detector
+
+
+class TestReaderTools:
+    """测试读码工具"""
+
+    def test_qrcode_reader_localize(self, canvas):
+        """快速定位与整图解码得到相同的码"""
+        image, _ = canvas
+        tool = ToolRegistry.create_tool("Recognition", "二维码识别")
+        tool.set_input(ImageData(data=image))
+        # 默认整图解码，与已有方案的行为一致
+        assert tool.get_param("localize") is False
+
+        tool.set_param("localize", True)
+        assert tool.run()
+        located = sorted(
+            c["data"] for c in tool.get_result().get_value("codes")
+        )
+
+        tool.set_param("localize", False)
+        assert tool.run()
+        full = sorted(c["data"] for c in tool.get_result().get_value("codes"))
+        assert located == full == ["LOT-A1", "LOT-B2", "LOT-C3"]
+
+    def test_barcode_reader(self, canvas):
+        """条码识别工具输出首个条码的拆分字段"""
+        image, value = canvas
+        tool = ToolRegistry.create_tool("Recognition", "条码识别")
+        tool.set_input(ImageData(data=image))
+        assert tool.run()
+        result = tool.get_result()
+        assert result.get_value("code_data") == value
+        assert result.get_value("code_type") == "EAN_13"
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+坐标变换链测试
+
+验证编译后的变换链与标定工具逐点转换结果一致、去畸变和单应性阶段、
+手眼矩阵批量转换，以及为匹配/斑点/检测结果附加物理和机器人坐标。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.image_data import ImageData, ResultData
+from tools.vision.calibration import CalibrationTool
+from tools.vision.coordinate_transform import TransformChain, annotate_results
+from tools.vision.hand_eye_calibration import HandEyeCalibrationTool
+
+ROBOT_MATRIX = np.array(
+    [[0.0, -0.1, 250.0], [0.1, 0.0, -40.0], [0.0, 0.0, 1.0]]
+)
+
+
+def _calibration(unit="mm"):
+    tool = CalibrationTool(name="TestCalibration")
+    tool.calibrate_with_reference(800, 1000, 100.0, 100.0)
+    tool.set_param("output_unit", unit)
+    return tool
+
+
+def _hand_eye(matrix=ROBOT_MATRIX, mode="eye_to_hand"):
+    tool = HandEyeCalibrationTool(name="TestHandEye")
+    tool.set_param("calibration_mode", mode)
+    tool._T_cam_to_base = matrix
+    tool._is_calibrated = True
+    return tool
+
+
+class TestTransformChain:
+    """测试变换链"""
+
+    @pytest.mark.parametrize("unit", ["mm", "inch", "um"])
+    def test_matches_single_point(self, unit):
+        """批量转换与逐点 pixel_to_physical 结果一致"""
+        tool = _calibration(unit)
+        points = np.random.default_rng(0).uniform(0, 2000, (200, 2))
+
+        bulk = tool.pixel_to_physical_points(points)
+        single = np.array([tool.pixel_to_physical(x, y) for x, y in points])
+        np.testing.assert_allclose(bulk, single)
+        assert tool.get_transform_chain().get_info()["unit"] == unit
+
+    def test_undistort_and_homography(self):
+        """去畸变后经单应性矩阵转换，含透视除法"""
+        K = np.array([[800.0, 0, 320], [0, 800, 240], [0, 0, 1]])
+        dist = np.array([-0.2, 0.05, 0, 0, 0])
+        ideal = np.array([[100.0, 80], [320, 240], [600, 400]])
+        # 理想像素 -> 归一化坐标 -> 带畸变投影
+        normalized = cv2.undistortPoints(
+            ideal.reshape(-1, 1, 2), K, None
+        ).reshape(-1, 2)
+        object_points = np.hstack([normalized, np.ones((len(ideal), 1))])
+        distorted = cv2.projectPoints(
+            object_points, np.zeros(3), np.zeros(3), K, dist
+        )[0]
+        distorted = distorted.reshape(-1, 2)
+        H = np.array([[0.1, 0.01, 5], [0.0, 0.1, -3], [1e-4, 0, 1]])
+
+        chain = TransformChain(camera_matrix=K, dist_coeffs=dist, homography=H)
+        expected = cv2.perspectiveTransform(
+            ideal.reshape(-1, 1, 2), H
+        ).reshape(-1, 2)
+        np.testing.assert_allclose(
+            chain.to_physical(distorted), expected, atol=1e-3
+        )
+        assert chain.get_info()["perspective"] and chain.undistorts
+
+    def test_hand_eye_bulk(self):
+        """手眼批量转换与单点转换一致，4x4矩阵取图像平面部分"""
+        tool = _hand_eye()
+        points = [(10, 20), (300, 400), (0, 0)]
+        bulk = tool.transform_points_to_base(points)
+        for (x, y), row in zip(points, bulk):
+            expected = ROBOT_MATRIX @ [x, y, 1.0]
+            np.testing.assert_allclose(
+                tool.transform_point_to_base((x, y)), expected[:2]
+            )
+            np.testing.assert_allclose(row, expected[:2])
+
+        T = np.eye(4)
+        T[:2, :2] = ROBOT_MATRIX[:2, :2]
+        T[:2, 3] = ROBOT_MATRIX[:2, 2]
+        T[2, 3] = 99.0
+        np.testing.assert_allclose(
+            _hand_eye(T).transform_points_to_base(points), bulk
+        )
+
+    def test_combined_chain(self):
+        """标定工具与手眼标定组合，一次调用得到两种坐标"""
+        chain = _calibration().get_transform_chain(hand_eye=_hand_eye())
+        physical, robot = chain.map([[80, 100], [160, 200]])
+        np.testing.assert_allclose(physical, [[10, 10], [20, 20]])
+        np.testing.assert_allclose(robot, [[240, -32], [230, -24]])
+        assert chain.to_physical(np.empty((0, 2))).shape == (0, 2)
+
+
+class TestAnnotate:
+    """测试结果坐标附加"""
+
+    def test_result_lists(self):
+        """字典结果附加坐标字段，元组结果输出并列的坐标列表"""
+        chain = TransformChain(
+            pixel_per_mm=(10.0, 10.0), robot_matrix=ROBOT_MATRIX
+        )
+        values = {
+            "matches": [(10, 20, 0.9), (30, 40, 0.8)],
+            "template_width": 20,
+            "template_height": 10,
+            "blobs": [{"cx": 50, "cy": 60, "area": 10.0}],
+            "detections": [
+                {"bbox": {"x1": 0.1, "y1": 0.2, "x2": 0.3, "y2": 0.4}}
+            ],
+        }
+        updates = annotate_results(values, chain, image_size=(1000, 500))
+
+        assert updates["matches_physical"] == [(2.0, 2.5), (4.0, 4.5)]
+        assert len(updates["matches_robot"]) == 2
+        blob = updates["blobs"][0]
+        assert (blob["physical_x"], blob["physical_y"]) == (5.0, 6.0)
+        assert blob["robot_x"] == pytest.approx(244.0)
+        assert "physical_x" not in values["blobs"][0]
+        detection = updates["detections"][0]
+        assert detection["physical_x"] == pytest.approx(20.0)
+        assert detection["physical_y"] == pytest.approx(15.0)
+
+    def test_tool_annotates_upstream(self):
+        """标定工具运行时为上游斑点结果附加物理坐标"""
+        tool = CalibrationTool(name="TestCalibration")
+        tool.set_param("pixel_per_mm_x", 5.0)
+        tool.set_param("pixel_per_mm_y", 5.0)
+        tool.set_input(ImageData(data=np.zeros((100, 100, 3), np.uint8)))
+        upstream = ResultData()
+        upstream.set_value("blobs", [{"cx": 50, "cy": 25}])
+        tool.set_upstream_result(upstream)
+
+        assert tool.run()
+        blob = upstream.get_value("blobs")[0]
+        assert (blob["physical_x"], blob["physical_y"]) == (10.0, 5.0)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寄存器解码器测试
+
+验证编译后的解码计划与逐规则提取结果一致。
+"""
+
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.communication.data_extraction_rules import (
+    BitExtractRule,
+    ByteOrder,
+    ConditionalRule,
+    DataExtractionRule,
+    DataType,
+    ExtractionRuleType,
+    RegisterCombineRule,
+    RegisterDecoder,
+    ScaleOffsetRule,
+    TypeConvertRule,
+    extract_field,
+)
+
+
+def _rule(rule_type, **sub_rules):
+    """创建指定类型的规则"""
+    rule = DataExtractionRule(rule_type=rule_type)
+    for attr, value in sub_rules.items():
+        setattr(rule, attr, value)
+    return rule
+
+
+def _float_registers(value, fmt=">f"):
+    """将浮点数打包为大端寄存器"""
+    data = struct.pack(fmt, value)
+    return list(struct.unpack(f">{len(data) // 2}H", data))
+
+
+BIT = _rule(
+    ExtractionRuleType.BIT_EXTRACT, bit_extract_rule=BitExtractRule(4, 4, 1)
+)
+SCALE = _rule(
+    ExtractionRuleType.SCALE_OFFSET,
+    scale_offset_rule=ScaleOffsetRule(
+        scale=0.1, offset=-40.0, decimal_places=1
+    ),
+)
+COMBINE_BIG = _rule(
+    ExtractionRuleType.REGISTER_COMBINE,
+    register_combine_rule=RegisterCombineRule([0, 1], ByteOrder.BIG_ENDIAN),
+)
+COMBINE_LITTLE = _rule(
+    ExtractionRuleType.REGISTER_COMBINE,
+    register_combine_rule=RegisterCombineRule([0, 1], ByteOrder.LITTLE_ENDIAN),
+)
+TO_FLOAT = _rule(
+    ExtractionRuleType.TYPE_CONVERT,
+    type_convert_rule=TypeConvertRule(DataType.UINT32, DataType.FLOAT32),
+)
+TO_INT16 = _rule(
+    ExtractionRuleType.TYPE_CONVERT,
+    type_convert_rule=TypeConvertRule(DataType.UINT16, DataType.INT16),
+)
+TO_BOOL = _rule(
+    ExtractionRuleType.TYPE_CONVERT,
+    type_convert_rule=TypeConvertRule(DataType.UINT32, DataType.BOOL),
+)
+TO_DOUBLE = _rule(
+    ExtractionRuleType.TYPE_CONVERT,
+    type_convert_rule=TypeConvertRule(
+        DataType.FLOAT64, DataType.FLOAT64, ByteOrder.LITTLE_ENDIAN
+    ),
+)
+COMBINE_SINGLE = _rule(
+    ExtractionRuleType.REGISTER_COMBINE,
+    register_combine_rule=RegisterCombineRule([0], ByteOrder.BIG_ENDIAN),
+)
+
+
+class TestRegisterDecoder:
+    """测试寄存器块解码"""
+
+    @pytest.mark.parametrize(
+        "rules",
+        [
+            [BIT],
+            [SCALE],
+            [COMBINE_BIG],
+            [COMBINE_LITTLE],
+            [COMBINE_LITTLE, TO_FLOAT],
+            [COMBINE_BIG, SCALE],
+            [TO_INT16],
+            [TO_FLOAT],
+            [TO_FLOAT, SCALE],
+            [TO_BOOL],
+            [TO_DOUBLE],
+            [COMBINE_SINGLE, TO_INT16],
+            [],
+        ],
+    )
+    def test_matches_rule_chain(self, rules):
+        """编译结果与逐规则提取一致，包括链首的类型转换"""
+        rng = np.random.default_rng(0)
+        block = rng.integers(0, 65536, size=64).tolist()
+        block[9:13] = [0, 0, 0, 0]
+        starts = range(0, 62, 3)
+        decoder = RegisterDecoder.compile(
+            {f"f{start}": (start, rules) for start in starts}
+        )
+
+        values = decoder.decode(block)
+        for start in starts:
+            expected = extract_field(block, start, rules)
+            assert values[f"f{start}"] == pytest.approx(expected, nan_ok=True)
+
+    def test_chain_head_type_convert(self):
+        """链首类型转换按源类型宽度读取寄存器"""
+        registers = [7] + _float_registers(2.5) + _float_registers(-0.75, ">d")
+        double = _rule(
+            ExtractionRuleType.TYPE_CONVERT,
+            type_convert_rule=TypeConvertRule(
+                DataType.FLOAT64, DataType.FLOAT64
+            ),
+        )
+
+        assert TO_FLOAT.extract(registers[1:]) == 2.5
+        assert double.extract(registers[3:]) == -0.75
+        decoder = RegisterDecoder.compile(
+            {"f": (1, TO_FLOAT), "d": (3, double)}
+        )
+        assert decoder.fallback_fields == []
+        assert decoder.decode(registers) == {"f": 2.5, "d": -0.75}
+
+    def test_float_fields_and_order(self):
+        """浮点字段解码，输出保持字段顺序"""
+        high, low = _float_registers(3.25)
+        registers = [high, low] + _float_registers(-1.5)[::-1]
+        decoder = RegisterDecoder.compile(
+            {
+                "b": (2, [COMBINE_LITTLE, TO_FLOAT]),
+                "a": (0, [COMBINE_BIG, TO_FLOAT]),
+            }
+        )
+
+        values = decoder.decode(np.array(registers, dtype=np.uint16))
+        assert list(values) == ["b", "a"]
+        assert values == {"b": -1.5, "a": 3.25}
+
+    def test_short_block_and_fallback(self):
+        """寄存器不足按0处理，条件规则退回逐规则提取"""
+        conditional = _rule(
+            ExtractionRuleType.CONDITIONAL,
+            conditional_rule=ConditionalRule("mode", 1),
+        )
+        decoder = RegisterDecoder.compile(
+            {"temp": (5, SCALE), "raw": (0, []), "cond": (0, conditional)}
+        )
+
+        assert decoder.fallback_fields == ["cond"]
+        values = decoder.decode([7])
+        assert values["temp"] == -40.0
+        assert values["raw"] == 7
+        assert values["cond"] == [7]
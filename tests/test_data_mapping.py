@@ -219,3 +219,19 @@ def test_invalid_nested_path():
     
     # 应该返回默认值
     assert output["output"] == "default"
+
+
+def test_remove_rule_keeps_accessors_aligned():
+    """测试删除中间规则后其余规则仍读取各自字段"""
+    mapper = DataMapper()
+
+    first = DataMappingRule(source_field="a", target_field="x")
+    middle = DataMappingRule(source_field="b.c", target_field="y")
+    last = DataMappingRule(source_field="d", target_field="z")
+    for rule in (first, middle, last):
+        mapper.add_rule(rule)
+
+    mapper.remove_rule(middle)
+    output = mapper.map({"a": 1, "b": {"c": 2}, "d": 3})
+
+    assert output == {"x": 1, "z": 3}
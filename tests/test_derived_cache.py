@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+派生图像缓存测试
+
+验证同一帧的灰度、模糊、边缘、金字塔、梯度和积分图只计算一次、
+结果只读、并发安全，以及多个工具共享同一帧的缓存。
+"""
+
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolRegistry
+from data.derived_cache import get_cache_stats, reset_cache_stats
+from data.image_data import ImageData
+
+
+def _frame(seed=0):
+    """生成彩色测试帧"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    cv2.rectangle(image, (40, 30), (110, 90), (255, 255, 255), -1)
+    return ImageData(data=image)
+
+
+class TestDerivedImageCache:
+    """测试派生图像缓存"""
+
+    def test_results_match_opencv(self):
+        """缓存结果与直接调用OpenCV一致"""
+        frame = _frame()
+        gray = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
+        derived = frame.derived
+
+        assert np.array_equal(derived.gray(), gray)
+        assert np.array_equal(
+            derived.gaussian(5), cv2.GaussianBlur(gray, (5, 5), 0)
+        )
+        assert np.array_equal(derived.canny(50, 150), cv2.Canny(gray, 50, 150))
+        assert np.array_equal(
+            derived.canny(30, 90, blur_ksize=5),
+            cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 30, 90),
+        )
+        assert np.array_equal(
+            derived.gradient(1, 0), cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+        )
+        assert np.array_equal(derived.integral(), cv2.integral(gray))
+
+        pyramid = derived.pyramid(3)
+        assert [layer.shape for layer in pyramid] == [
+            (120, 160),
+            (60, 80),
+            (30, 40),
+        ]
+        assert np.array_equal(pyramid[2], cv2.pyrDown(cv2.pyrDown(gray)))
+
+    def test_memoized_and_read_only(self):
+        """重复请求命中缓存，返回只读数组"""
+        frame = _frame()
+        first = frame.derived.canny(50, 150)
+        second = frame.derived.canny(50, 150)
+
+        assert second is first
+        assert not first.flags.writeable
+        with pytest.raises(ValueError):
+            first[0, 0] = 1
+        # canny未命中一次，内部gray未命中一次；第二次canny命中
+        stats = frame.derived.stats
+        assert stats["hits"] == 1 and stats["misses"] == 2
+        assert stats["entries"] == 2
+
+    def test_gray_frame_shares_source(self):
+        """灰度帧的灰度图直接引用帧数据"""
+        frame = ImageData(data=np.full((10, 10), 7, dtype=np.uint8))
+        gray = frame.derived.gray()
+        assert np.shares_memory(gray, frame.data)
+        # 帧本身仍可写
+        assert frame.data.flags.writeable
+
+    def test_invalidated_on_data_change(self):
+        """帧数据重新赋值后缓存失效"""
+        frame = _frame()
+        old = frame.derived.gray()
+        frame.data = np.zeros((20, 30, 3), dtype=np.uint8)
+        assert frame.derived.gray().shape == (20, 30)
+        assert old.shape == (120, 160)
+
+        frame.release_derived()
+        assert frame.derived.stats["entries"] == 0
+
+    def test_concurrent_requests_compute_once(self):
+        """并发请求同一项只计算一次"""
+        derived = _frame().derived
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return np.ones((4, 4), np.uint8)
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(derived.get(("slow",), slow))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    def test_failed_factory_not_cached(self):
+        """计算失败时不缓存，下次重新计算"""
+        derived = _frame().derived
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            derived.get(("flaky",), fail)
+        assert derived.get(("flaky",), lambda: 3) == 3
+
+
+class TestSharedAcrossTools:
+    """测试多个工具共享同一帧"""
+
+    def test_tools_share_gray(self):
+        """同一帧分发给多个工具时灰度只转换一次"""
+        reset_cache_stats()
+        frame = _frame()
+        for category, name in [
+            ("Analysis", "斑点分析"),
+            ("Analysis", "像素计数"),
+            ("Analysis", "卡尺测量"),
+            ("Vision", "圆查找"),
+        ]:
+            tool = ToolRegistry.create_tool(category, name)
+            tool.set_input(frame)
+            assert tool.run(), name
+
+        gray = get_cache_stats()["operations"]["gray"]
+        assert gray == {"hits": 3, "misses": 1}
+        assert get_cache_stats()["hit_rate"] == 0.75
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+错误恢复测试
+
+验证熔断器状态切换、后台恢复不阻塞调用线程、重复恢复合并、
+以及工具连续失败后快速失败。
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolBase
+from data.image_data import ImageData
+from utils.error_recovery import (
+    CircuitBreaker,
+    CircuitState,
+    ErrorContext,
+    RecoveryAction,
+    RecoveryManager,
+    RecoveryStatus,
+    RecoveryStrategy,
+    get_recovery_metrics,
+)
+from utils.exceptions import ImageException, ToolException
+
+
+class _Clock:
+    """可控的单调时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr("utils.error_recovery.time.monotonic", fake)
+    return fake
+
+
+class FailingTool(ToolBase):
+    """按开关失败的测试工具"""
+
+    tool_name = "FailingTool"
+    tool_category = "Test"
+
+    def __init__(self, name=None):
+        self.calls = 0
+        self.fail = True
+        self.error = RuntimeError("算法内部错误")
+        super().__init__(name)
+
+    def _run_impl(self):
+        self.calls += 1
+        if self.fail:
+            raise self.error
+        return {"result": "ok"}
+
+
+def _context(component="cam", error_type="SlowError"):
+    return ErrorContext(
+        error_code=500,
+        error_message="失败",
+        error_type=error_type,
+        timestamp=time.time(),
+        component=component,
+        details={},
+    )
+
+
+class TestCircuitBreaker:
+    """测试熔断器"""
+
+    def test_open_half_open_close(self, clock):
+        """连续失败熔断，超时后放行一次试探，成功后恢复"""
+        breaker = CircuitBreaker("cam", failure_threshold=2, reset_timeout=5.0)
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.allow()
+        assert breaker.retry_in() == pytest.approx(5.0)
+
+        clock.now += 5
+        assert breaker.allow()
+        assert breaker.state is CircuitState.HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        clock.now += 5
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+        assert breaker.get_stats()["open_count"] == 2
+        assert breaker.get_stats()["rejected"] == 2
+
+    def test_ignored_outcome(self, clock):
+        """输入问题不计入失败，占用的试探周期在下一周期重新试探"""
+        breaker = CircuitBreaker(
+            "tool", failure_threshold=2, reset_timeout=5.0
+        )
+
+        breaker.record_failure()
+        breaker.record_ignored()
+        breaker.record_ignored()
+        assert breaker.state is CircuitState.CLOSED
+        assert breaker.get_stats()["failures"] == 1
+
+        breaker.record_failure()
+        clock.now += 5
+        assert breaker.allow()
+        breaker.record_ignored()
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+
+
+class TestBackgroundRecovery:
+    """测试后台恢复"""
+
+    def test_submit_does_not_block(self):
+        """重试延迟在后台等待，提交立即返回，进行中的同类恢复被合并"""
+        manager = RecoveryManager()
+        manager.register_strategy(
+            "SlowError",
+            RecoveryAction(
+                strategy=RecoveryStrategy.RETRY,
+                action=lambda ctx: False,
+                max_attempts=3,
+                delay=0.2,
+            ),
+        )
+        try:
+            start = time.perf_counter()
+            future = manager.submit(_context())
+            again = manager.submit(_context())
+            assert time.perf_counter() - start < 0.1
+            assert again is future
+
+            assert future.result(timeout=5) == RecoveryStatus.FAILED
+            metrics = manager.get_metrics()
+            assert metrics["submitted"] == 1 and metrics["coalesced"] == 1
+            assert metrics["failed"] == 1
+            assert metrics["recovery_seconds"] >= 0.35
+            assert metrics["component_seconds"]["cam"] >= 0.35
+            assert metrics["submit_seconds"] < 0.1
+        finally:
+            manager.shutdown()
+
+    def test_shutdown_interrupts_retry_delay(self):
+        """关闭时正在等待重试延迟的恢复立即结束"""
+        manager = RecoveryManager()
+        manager.register_strategy(
+            "SlowError",
+            RecoveryAction(
+                strategy=RecoveryStrategy.RETRY,
+                action=lambda ctx: False,
+                max_attempts=3,
+                delay=30.0,
+            ),
+        )
+        future = manager.submit(_context())
+        time.sleep(0.05)
+        start = time.perf_counter()
+        manager.shutdown(wait=True)
+        assert time.perf_counter() - start < 5
+        assert future.result(timeout=1) == RecoveryStatus.FAILED
+
+
+class TestToolCircuit:
+    """测试工具熔断"""
+
+    def _run(self, tool):
+        with pytest.raises(ToolException):
+            tool.run()
+
+    def test_fail_fast_after_repeated_failures(self, clock):
+        """连续失败后不再执行，参数修改或试探成功后恢复"""
+        tool = FailingTool("failing")
+        tool.set_input(ImageData(data=np.zeros((8, 8), np.uint8)))
+
+        for _ in range(3):
+            self._run(tool)
+        assert tool.calls == 3
+        assert tool.circuit_breaker.state is CircuitState.OPEN
+
+        self._run(tool)
+        assert tool.calls == 3
+        assert tool.get_result().error_type == "CircuitOpen"
+
+        # 超时后试探一次，仍失败则重新熔断
+        clock.now += 10
+        self._run(tool)
+        assert tool.calls == 4
+        self._run(tool)
+        assert tool.calls == 4
+
+        # 用户修改参数后重新允许执行
+        tool.fail = False
+        tool.set_param("threshold", 1)
+        assert tool.run()
+        assert tool.calls == 5
+        assert tool.circuit_breaker.state is CircuitState.CLOSED
+
+    def test_input_errors_do_not_open_breaker(self):
+        """缺少输入、图像无效只影响当前帧，之后的正常帧照常执行"""
+        tool = FailingTool("input_errors")
+        tool.error = ImageException("图像无效")
+
+        for _ in range(3):
+            self._run(tool)
+        assert tool.get_result().error_code == 400
+        assert tool.calls == 0
+
+        tool.set_input(ImageData(data=np.zeros((8, 8), np.uint8)))
+        for _ in range(3):
+            self._run(tool)
+        assert tool.get_result().error_code == 422
+        assert tool.circuit_breaker.state is CircuitState.CLOSED
+
+        tool.fail = False
+        assert tool.run()
+        assert tool.calls == 4
+
+    def test_metrics_report_open_breakers(self):
+        """统计中包含快速失败次数和熔断中的组件"""
+        tool = FailingTool("metrics_tool")
+        tool.set_input(ImageData(data=np.zeros((8, 8), np.uint8)))
+        for _ in range(4):
+            self._run(tool)
+
+        metrics = get_recovery_metrics()
+        assert metrics["breakers"]["Tool.metrics_tool"]["state"] == "open"
+        assert metrics["fast_failures"] >= 1
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+位置修正测试
+
+验证刚体变换与区域投影、投影结果按帧共享，
+以及定位工具发布位置修正后下游斑点分析的搜索区域和卡尺跟随工件。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.communication.dynamic_io import Fixture
+from core.fixture import FIXTURE_METADATA_KEY, FixtureTransform
+from core.search_region import REGION_ROTATED_RECT
+from data.image_data import ImageData
+from tools.analysis.analysis import BlobFind, Caliper
+from tools.vision.template_match import GrayMatch, ShapeMatch
+
+# 标记左上角与圆点圆心(基准图像)
+MARK = (60, 60)
+DOTS = [(200, 80), (260, 80), (320, 80), (200, 200)]
+
+
+def _marked_image(dx: int = 0, dy: int = 0) -> np.ndarray:
+    """带十字标记和圆点的图像，整体平移 (dx, dy)"""
+    image = np.zeros((300, 400), np.uint8)
+    x, y = MARK[0] + dx, MARK[1] + dy
+    cv2.rectangle(image, (x, y + 12), (x + 40, y + 28), 255, -1)
+    cv2.rectangle(image, (x + 12, y), (x + 28, y + 40), 255, -1)
+    for cx, cy in DOTS:
+        cv2.circle(image, (cx + dx, cy + dy), 10, 255, -1)
+    return image
+
+
+@pytest.fixture
+def bar_frames():
+    """水平白条(中心 (200, 150)，160x60)及其旋转20度并平移后的图像"""
+    reference = np.zeros((300, 400), np.uint8)
+    cv2.rectangle(reference, (120, 120), (279, 179), 255, -1)
+    transform = FixtureTransform(Fixture(200, 150, 0), Fixture(215, 160, 20))
+    moved = cv2.warpAffine(
+        reference, transform.matrix, (400, 300), flags=cv2.INTER_LINEAR
+    )
+    return reference, moved, transform
+
+
+class TestFixtureTransform:
+    """测试变换与投影"""
+
+    def test_map_points_and_inverse(self):
+        """基准点映射到当前位置，顺时针旋转为正"""
+        transform = FixtureTransform(
+            Fixture(100, 100, 0), Fixture(150, 120, 90)
+        )
+        np.testing.assert_allclose(
+            transform.map_points([(100, 100), (110, 100)]),
+            [[150, 120], [150, 130]],
+            atol=1e-9,
+        )
+        back = cv2.transform(
+            np.float64([[[150, 130]]]),
+            np.vstack([transform.inverse, [0, 0, 1]])[:2],
+        )
+        np.testing.assert_allclose(back[0, 0], [110, 100], atol=1e-9)
+        assert transform.map_angle(15) == pytest.approx(105)
+        assert transform.to_dict()["dx"] == 50
+
+    def test_map_regions_cached_per_frame(self):
+        """矩形在旋转后变为旋转矩形，相同参数的投影只计算一次"""
+        transform = FixtureTransform(Fixture(0, 0, 0), Fixture(10, 0, 30))
+        value = {"x": 0, "y": 0, "width": 20, "height": 10}
+        regions = transform.map_regions(value)
+        assert regions[0].kind == REGION_ROTATED_RECT
+        assert transform.map_regions(dict(value)) is regions
+        np.testing.assert_allclose(
+            regions[0].polygon.mean(axis=0),
+            transform.map_points([(10, 5)])[0],
+            atol=1e-4,
+        )
+
+        translated = FixtureTransform(Fixture(0, 0, 0), Fixture(7, 3, 0))
+        (rect,) = translated.map_regions(value)
+        assert rect.is_rect and rect.bounds(100, 100) == (7, 3, 20, 10)
+
+
+class TestFixturePropagation:
+    """测试定位工具发布位置修正与下游跟随"""
+
+    def _locator(self, tmp_path) -> GrayMatch:
+        template_path = str(tmp_path / "mark.png")
+        cv2.imwrite(template_path, _marked_image()[50:110, 50:110])
+        locator = GrayMatch("locate")
+        locator.set_param("template_path", template_path)
+        locator.set_param("max_count", 1)
+        locator.set_param("publish_fixture", True)
+        locator.set_param("fixture_teach", True)
+        return locator
+
+    def test_search_region_follows_gray_match(self, tmp_path):
+        """基准帧示教，平移帧中下游搜索区域随标记移动"""
+        locator = self._locator(tmp_path)
+        blobs = BlobFind("blobs")
+        blobs.set_param("min_area", 50)
+        # 基准坐标下只框住第一行的三个圆点
+        blobs.set_param(
+            "search_region", {"x": 170, "y": 50, "width": 180, "height": 60}
+        )
+
+        locator.set_input(ImageData(data=_marked_image()))
+        assert locator.run()
+        assert locator.get_param("fixture_teach") is False
+        assert locator.get_param("fixture_x") == pytest.approx(80)
+        assert locator.get_param("fixture_y") == pytest.approx(80)
+
+        for dx, dy in [(0, 0), (37, 21), (-30, 45)]:
+            locator.set_input(ImageData(data=_marked_image(dx, dy)))
+            assert locator.run()
+            fixture = locator.get_output().get_metadata(FIXTURE_METADATA_KEY)
+            assert fixture.to_dict()["dx"] == pytest.approx(dx)
+            assert fixture.to_dict()["dy"] == pytest.approx(dy)
+            assert locator.get_result().get_value("fixture_valid") is True
+
+            blobs.set_input(locator.get_output())
+            assert blobs.run()
+            found = sorted(
+                (b["cx"], b["cy"])
+                for b in blobs.get_result().get_value("blobs")
+            )
+            assert found == [(x + dx, y + dy) for x, y in DOTS[:3]]
+
+    def test_projection_shared_between_tools(self, tmp_path):
+        """同一帧的多个下游工具共享投影结果"""
+        locator = self._locator(tmp_path)
+        locator.set_input(ImageData(data=_marked_image(10, 10)))
+        assert locator.run()
+        output = locator.get_output()
+
+        region = {"x": 170, "y": 50, "width": 180, "height": 60}
+        tools = [BlobFind("a"), BlobFind("b")]
+        for tool in tools:
+            tool.set_param("search_region", dict(region))
+            tool.set_input(output)
+            assert tool.run()
+        assert tools[0].get_search_regions() is tools[1].get_search_regions()
+
+    def test_no_match_publishes_none(self, tmp_path):
+        """定位失败时不发布变换，下游按原始区域执行"""
+        locator = self._locator(tmp_path)
+        locator.set_input(ImageData(data=np.zeros((300, 400), np.uint8)))
+        assert locator.run()
+        assert locator.get_output().get_metadata(FIXTURE_METADATA_KEY) is None
+        assert locator.get_result().get_value("fixture_valid") is False
+
+    def test_caliper_follows_shape_match(self, bar_frames):
+        """形状匹配发布旋转，卡尺沿投影后的直线测得相同宽度"""
+        reference, moved, expected = bar_frames
+        locator = ShapeMatch("locate")
+        locator.set_param(
+            "roi", {"x": 100, "y": 100, "width": 200, "height": 100}
+        )
+        locator.set_param("publish_fixture", True)
+        locator.set_param("fixture_teach", True)
+        caliper = Caliper("caliper")
+
+        locator.set_input(ImageData(data=reference))
+        assert locator.run()
+        caliper.set_input(locator.get_output())
+        assert caliper.run()
+        nominal = caliper.get_result().get_value("caliper_results")
+        assert caliper.get_result().get_value("fixture_applied") is True
+
+        locator.set_input(ImageData(data=moved))
+        assert locator.run()
+        fixture = locator.get_output().get_metadata(FIXTURE_METADATA_KEY)
+        assert fixture.angle == pytest.approx(20, abs=1.0)
+        np.testing.assert_allclose(
+            [fixture.current.x, fixture.current.y], [215, 160], atol=1.0
+        )
+
+        caliper.set_input(locator.get_output())
+        assert caliper.run()
+        results = caliper.get_result().get_value("caliper_results")
+        assert len(results) == len(nominal)
+        for before, after in zip(nominal, results):
+            assert after["distance"] == pytest.approx(
+                before["distance"], abs=2
+            )
+            first = after["edges"][0]
+            nominal_point = (first["position"], first["y"])
+            np.testing.assert_allclose(
+                first["point"],
+                expected.map_points([nominal_point])[0],
+                atol=2.0,
+            )
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+融合几何校正测试
+
+验证去畸变、镜像、旋转和裁剪合成一次插值后与逐步处理结果一致、
+映射表按参数缓存，以及几何变换工具和标定工具的校正输出。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.image_data import ImageData
+from tools.vision.calibration import CalibrationTool
+from tools.vision.geometric_transform import GeometricTransformTool
+from tools.vision.image_correction import CorrectionMaps, CorrectionSpec
+
+K = np.array([[300.0, 0, 160], [0, 300, 120], [0, 0, 1]])
+DIST = np.array([-0.25, 0.08, 0, 0, 0])
+
+
+@pytest.fixture(scope="module")
+def image():
+    """平滑的随机纹理，像素值均大于0以便区分边界填充"""
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 200, (240, 320), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 3) + 50
+
+
+def _rotate(image, angle, scale=1.0):
+    """几何变换工具原有的旋转方式：绕中心旋转并扩大画布"""
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, scale)
+    cos_a, sin_a = abs(np.cos(np.radians(angle))), abs(
+        np.sin(np.radians(angle))
+    )
+    new_w = int((h * sin_a + w * cos_a) * scale)
+    new_h = int((h * cos_a + w * sin_a) * scale)
+    matrix[0, 2] += (new_w - w) / 2
+    matrix[1, 2] += (new_h - h) / 2
+    return cv2.warpAffine(image, matrix, (new_w, new_h))
+
+
+def _assert_close(fused, stepwise):
+    """除图像边界附近外，融合结果与逐步处理结果一致"""
+    assert fused.shape == stepwise.shape
+    inner = cv2.erode((stepwise > 0).astype(np.uint8), np.ones((9, 9))) > 0
+    diff = np.abs(fused.astype(int) - stepwise.astype(int))[inner]
+    assert diff.max() <= 2
+
+
+class TestCorrectionMaps:
+    """测试融合映射"""
+
+    def test_affine_matches_stepwise(self, image):
+        """无畸变时镜像、旋转、缩放、裁剪一次仿射与逐步处理一致"""
+        spec = CorrectionSpec(
+            flip="vertical", angle=30.0, scale=0.8, crop=(10, 20, 200, 150)
+        )
+        fused = CorrectionMaps().apply(image, spec)
+        stepwise = _rotate(cv2.flip(image, 0), 30.0, 0.8)[20:170, 10:210]
+        _assert_close(fused, stepwise)
+
+    def test_undistort_matches_stepwise(self, image):
+        """去畸变与镜像、旋转合成一对remap映射"""
+        spec = CorrectionSpec(flip="horizontal", angle=-20.0)
+        fused = CorrectionMaps().apply(image, spec, K, DIST)
+        stepwise = _rotate(cv2.flip(cv2.undistort(image, K, DIST), 1), -20.0)
+        _assert_close(fused, stepwise)
+
+        # 只去畸变
+        _assert_close(
+            CorrectionMaps().apply(image, CorrectionSpec(), K, DIST),
+            cv2.undistort(image, K, DIST),
+        )
+
+    def test_cached_by_size_and_params(self, image):
+        """参数和尺寸不变时复用映射，变化时重建；无变换时不复制图像"""
+        maps = CorrectionMaps(max_entries=2)
+        spec = CorrectionSpec(angle=10.0)
+        for _ in range(3):
+            maps.apply(image, spec, K, DIST)
+        assert maps.get_stats() == {"entries": 1, "builds": 1, "hits": 2}
+
+        maps.apply(image[:100], spec, K, DIST)
+        maps.apply(image, CorrectionSpec(angle=11.0), K, DIST)
+        stats = maps.get_stats()
+        assert stats["builds"] == 3 and stats["entries"] == 2
+
+        assert maps.apply(image, CorrectionSpec()) is image
+        np.testing.assert_array_equal(
+            maps.apply(image, CorrectionSpec(flip="both")), cv2.flip(image, -1)
+        )
+
+
+class TestTools:
+    """测试工具集成"""
+
+    def test_geometric_transform_with_calibration_file(self, image, tmp_path):
+        """几何变换工具读取标定文件去畸变，并按参数裁剪"""
+        path = str(tmp_path / "camera.npz")
+        np.savez(
+            path,
+            pixel_per_mm_x=10.0,
+            pixel_per_mm_y=10.0,
+            calibration_matrix=K,
+            distortion_coeffs=DIST,
+        )
+
+        tool = GeometricTransformTool("correction")
+        tool.set_param("变换类型", "水平镜像")
+        tool.set_param("畸变校正", True)
+        tool.set_param("标定文件", path)
+        tool.set_param("裁剪X", 40)
+        tool.set_param("裁剪Y", 30)
+        tool.set_param("裁剪宽度", 200)
+        tool.set_param("裁剪高度", 150)
+        tool.set_input(ImageData(data=image))
+
+        assert tool.run()
+        output = tool.get_output().data
+        stepwise = cv2.flip(cv2.undistort(image, K, DIST), 1)[30:180, 40:240]
+        _assert_close(output, stepwise)
+        assert tool.get_result().get_value("undistorted")
+
+        assert tool.run()
+        assert tool._correction.get_stats()["hits"] == 1
+
+    def test_calibration_undistort_output(self, image):
+        """标定工具在有相机内参时输出去畸变图像"""
+        tool = CalibrationTool("calibration")
+        tool._calibration_matrix = K
+        tool._distortion_coeffs = DIST
+        tool.set_param("undistort_output", True)
+        tool.set_input(ImageData(data=image))
+
+        assert tool.run()
+        # 手动标定会在输出上绘制参考框，只比较框外的区域
+        output = tool.get_output().data
+        expected = cv2.undistort(image, K, DIST)
+        np.testing.assert_allclose(
+            output[60:180, 5:40], expected[60:180, 5:40], atol=2
+        )
@@ -42,3 +42,32 @@ def test_image_data_pool_reuse():
     
     # 内存池应该还有可用缓冲区
     assert pool.available_count() > 0
+
+
+def test_image_data_uses_global_pool():
+    """测试大图像的拷贝来自全局内存池，不再被引用时归还"""
+    from core.memory_pool import get_global_pool
+
+    pool = get_global_pool()
+    data = np.full((600, 800), 3, dtype=np.uint8)
+
+    img = ImageData(data=data)
+    assert pool.owns(img.data)
+    view = img.view()
+    copied = img.copy()
+    assert pool.owns(copied.data)
+    del img
+    assert pool.owns(view.data)
+
+    hits = pool.get_stats()["hits"]
+    del view, copied
+    ImageData(data=data)
+    assert pool.get_stats()["hits"] > hits
+
+
+def test_image_data_adopt():
+    """测试直接持有数组，不复制像素"""
+    data = np.zeros((10, 10), dtype=np.uint8)
+    img = ImageData.adopt(data, camera_id="cam0")
+    assert img.data is data
+    assert img.camera_id == "cam0" and img.width == 10
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步图像保存队列测试
+
+验证原子写入、有界队列的丢弃/阻塞策略、磁盘配额与保留时长清理、
+统计信息，以及图像保存工具的异步模式。
+"""
+
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.image_save_queue import (
+    POLICY_BLOCK,
+    POLICY_DROP,
+    DiskRetention,
+    ImageSaveQueue,
+    write_image_atomic,
+)
+from core.tool_base import ToolRegistry
+from data.image_data import ImageData
+from data.overlay import Overlay
+
+
+def _image(seed=0):
+    """生成随机彩色图像"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+
+
+def _gate(image, event):
+    """返回在事件触发前阻塞的图像来源"""
+
+    def source():
+        event.wait(5)
+        return image
+
+    return source
+
+
+class TestWriteAtomic:
+    """测试原子写入"""
+
+    def test_roundtrip_without_temp_files(self, tmp_path):
+        """写入后可读回，不残留临时文件"""
+        image = _image()
+        path = str(tmp_path / "图像.png")
+        size = write_image_atomic(image, path)
+
+        assert size == os.path.getsize(path)
+        assert np.array_equal(
+            cv2.imdecode(np.fromfile(path, np.uint8), -1), image
+        )
+        assert os.listdir(tmp_path) == ["图像.png"]
+
+    def test_encode_failure(self, tmp_path):
+        """编码失败时抛出异常且不留下文件"""
+        with pytest.raises(Exception):
+            write_image_atomic(_image(), str(tmp_path / "bad.unknown"))
+        assert os.listdir(tmp_path) == []
+
+
+class TestImageSaveQueue:
+    """测试异步保存队列"""
+
+    def test_saves_and_reports_stats(self, tmp_path):
+        """任务写盘完成后统计正确"""
+        save_queue = ImageSaveQueue(max_workers=2, max_pending=4)
+        for i in range(3):
+            assert save_queue.submit(_image(i), str(tmp_path / f"{i}.jpg"))
+        assert save_queue.flush(5)
+
+        stats = save_queue.stats
+        assert stats["saved"] == 3 and stats["failed"] == 0
+        assert stats["queue_depth"] == 0
+        assert stats["bytes_written"] == sum(
+            os.path.getsize(tmp_path / f"{i}.jpg") for i in range(3)
+        )
+        assert stats["bytes_per_second"] > 0
+        save_queue.shutdown()
+
+    def test_drop_policy(self, tmp_path):
+        """队列满时丢弃新任务"""
+        release = threading.Event()
+        save_queue = ImageSaveQueue(
+            max_workers=1, max_pending=2, policy=POLICY_DROP
+        )
+        for i in range(2):
+            assert save_queue.submit(
+                _gate(_image(), release), str(tmp_path / f"{i}.png")
+            )
+        assert not save_queue.submit(_image(), str(tmp_path / "dropped.png"))
+        assert save_queue.stats["dropped"] == 1
+        assert save_queue.stats["queue_depth"] == 2
+
+        release.set()
+        assert save_queue.flush(5)
+        assert sorted(os.listdir(tmp_path)) == ["0.png", "1.png"]
+        save_queue.shutdown()
+
+    def test_block_policy(self, tmp_path):
+        """阻塞策略等待空位，超时后计为丢弃"""
+        release = threading.Event()
+        save_queue = ImageSaveQueue(
+            max_workers=1, max_pending=1, policy=POLICY_BLOCK
+        )
+        assert save_queue.submit(
+            _gate(_image(), release), str(tmp_path / "0.png")
+        )
+
+        start = time.time()
+        assert not save_queue.submit(
+            _image(), str(tmp_path / "1.png"), timeout=0.05
+        )
+        assert time.time() - start >= 0.05
+
+        threading.Timer(0.05, release.set).start()
+        assert save_queue.submit(_image(), str(tmp_path / "2.png"))
+        assert save_queue.flush(5)
+        assert sorted(os.listdir(tmp_path)) == ["0.png", "2.png"]
+        save_queue.shutdown()
+
+    def test_failure_counted(self, tmp_path):
+        """写盘失败计入统计，不影响后续任务"""
+        save_queue = ImageSaveQueue(max_workers=1)
+        assert save_queue.submit(_image(), str(tmp_path / "missing" / "0.png"))
+        assert save_queue.submit(_image(), str(tmp_path / "1.png"))
+        assert save_queue.flush(5)
+
+        stats = save_queue.stats
+        assert stats["failed"] == 1 and stats["saved"] == 1
+        assert "0.png" in stats["last_error"]
+        save_queue.shutdown()
+
+
+class TestDiskRetention:
+    """测试磁盘保留策略"""
+
+    def test_quota_removes_oldest(self, tmp_path):
+        """超出配额时从最旧的文件开始删除，包括已有文件"""
+        old = tmp_path / "old.png"
+        old.write_bytes(b"x" * 400)
+        os.utime(old, (time.time() - 100, time.time() - 100))
+        (tmp_path / "notes.txt").write_bytes(b"x" * 1000)
+
+        retention = DiskRetention(max_bytes=1000)
+        for i in range(3):
+            path = tmp_path / f"{i}.png"
+            path.write_bytes(b"x" * 300)
+            retention.record(str(path), 300)
+
+        assert sorted(os.listdir(tmp_path)) == [
+            "0.png",
+            "1.png",
+            "2.png",
+            "notes.txt",
+        ]
+        assert retention.usage(str(tmp_path)) == 900
+        assert retention.removed_count == 1
+
+    def test_age_and_newest_kept(self, tmp_path):
+        """过期文件被删除，最新写入的文件始终保留"""
+        stale = tmp_path / "stale.jpg"
+        stale.write_bytes(b"x")
+        os.utime(stale, (time.time() - 7200, time.time() - 7200))
+
+        retention = DiskRetention(max_bytes=10, max_age_seconds=3600)
+        big = tmp_path / "big.jpg"
+        big.write_bytes(b"x" * 100)
+        retention.record(str(big), 100)
+        assert os.listdir(tmp_path) == ["big.jpg"]
+
+
+class TestImageSaverAsync:
+    """测试图像保存工具的异步模式"""
+
+    def _saver(self, tmp_path, **params):
+        tool = ToolRegistry.create_tool("Vision", "图像保存")
+        tool.set_param("保存路径", str(tmp_path))
+        tool.set_param("文件名格式", "img_{index}")
+        tool.set_param("异步保存", True)
+        for key, value in params.items():
+            tool.set_param(key, value)
+        return tool
+
+    def test_async_save(self, tmp_path):
+        """工具立即返回，写盘完成后文件带标注"""
+        frame = ImageData(data=_image())
+        view = frame.view(Overlay().add_rect(0, 0, 10, 10, (0, 0, 255), -1))
+        tool = self._saver(tmp_path)
+
+        for _ in range(3):
+            tool.set_input(view)
+            assert tool.run()
+            assert tool.get_result().get_value("queued")
+            assert tool.get_output().data is frame.data
+        assert tool.flush(5)
+
+        assert sorted(os.listdir(tmp_path)) == [
+            "img_0001.png",
+            "img_0002.png",
+            "img_0003.png",
+        ]
+        saved = cv2.imread(str(tmp_path / "img_0001.png"))
+        assert saved[5, 5].tolist() == [0, 0, 255]
+        assert tool.get_save_stats()["saved"] == 3
+
+    def test_async_drop_reported(self, tmp_path):
+        """队列满时工具不阻塞，结果中报告丢弃"""
+        tool = self._saver(tmp_path, 最大排队数=1, 编码线程数=1)
+        release = threading.Event()
+
+        tool.set_input(ImageData(data=_image()))
+        queue = tool._get_save_queue()
+        assert queue.submit(
+            _gate(_image(), release), str(tmp_path / "busy.png")
+        )
+
+        tool.set_input(ImageData(data=_image()))
+        assert tool.run()
+        result = tool.get_result()
+        assert not result.get_value("queued")
+        assert result.get_value("dropped_count") == 1
+        assert result.get_value("save_path") == ""
+
+        release.set()
+        assert tool.flush(5)
+        assert os.listdir(tmp_path) == ["busy.png"]
+
+    def test_sync_retention(self, tmp_path):
+        """同步模式同样执行磁盘配额(每张噪声图约700KB，只保留最新一张)"""
+        tool = self._saver(tmp_path, 异步保存=False, 磁盘配额MB=1)
+        noise = np.random.default_rng(0).integers(
+            0, 256, (400, 600, 3), dtype=np.uint8
+        )
+        for _ in range(3):
+            tool.set_input(ImageData(data=noise))
+            assert tool.run()
+
+        assert os.listdir(tmp_path) == ["img_0003.png"]
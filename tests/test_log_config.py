@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置测试
+
+验证后台队列写日志、队列满丢弃、重复警告限流、按工具实例的调试开关，
+以及高频路径在未开启调试时不格式化参数。
+"""
+
+import logging
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.log_config import (
+    AsyncQueueHandler,
+    RateLimitFilter,
+    get_log_stats,
+    setup_logging,
+    shutdown_logging,
+)
+from core.tool_base import ToolRegistry
+from data.image_data import ImageData
+
+
+class _ListHandler(logging.Handler):
+    """收集日志记录"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def restore_root():
+    """测试后恢复根日志器"""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def _record(msg, level=logging.WARNING, name="test", args=()):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestAsyncPipeline:
+    """测试异步日志管道"""
+
+    def test_writes_from_listener_thread(self, restore_root, tmp_path):
+        """多线程日志由后台线程写入文件，异常堆栈保留"""
+        path = tmp_path / "vision.log"
+        setup_logging(log_file=str(path), console=False)
+        logger = logging.getLogger("Test.Async")
+
+        def worker(index):
+            for i in range(50):
+                logger.info("线程%d 第%d条", index, i)
+
+        threads = [
+            threading.Thread(target=worker, args=(i,)) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("处理失败")
+        shutdown_logging()
+
+        text = path.read_text(encoding="utf-8")
+        assert text.count("Test.Async - INFO") == 200
+        assert "线程3 第49条" in text
+        assert "ValueError: boom" in text
+
+    def test_queue_full_drops(self):
+        """队列满时丢弃记录而不阻塞"""
+        handler = AsyncQueueHandler(queue.Queue(maxsize=2))
+        for i in range(5):
+            handler.handle(_record("消息 %d", logging.INFO, args=(i,)))
+        assert handler.queued == 2 and handler.dropped == 3
+        record = handler.queue.get_nowait()
+        assert record.msg == "消息 0" and record.args is None
+
+    def test_stats(self, restore_root):
+        """统计入队和限流次数"""
+        setup_logging(log_file=None, console=False, rate_limit_interval=60)
+        logger = logging.getLogger("Test.Stats")
+        for _ in range(3):
+            logger.warning("相机掉线")
+        stats = get_log_stats()
+        assert stats["queued"] == 1 and stats["suppressed"] == 2
+
+
+class TestRateLimit:
+    """测试重复警告限流"""
+
+    def test_suppress_and_report(self, monkeypatch):
+        """间隔内的重复警告被抑制，之后输出时注明次数"""
+        now = [100.0]
+        monkeypatch.setattr("core.log_config.time.monotonic", lambda: now[0])
+        rate_filter = RateLimitFilter(interval=5.0)
+
+        assert rate_filter.filter(_record("工具正在运行中: %s", args=("A",)))
+        assert not rate_filter.filter(
+            _record("工具正在运行中: %s", args=("A",))
+        )
+        assert rate_filter.filter(_record("工具正在运行中: %s", args=("B",)))
+        assert rate_filter.filter(_record("低级别不限流", logging.INFO))
+        assert rate_filter.filter(_record("低级别不限流", logging.INFO))
+
+        now[0] += 6
+        record = _record("工具正在运行中: %s", args=("A",))
+        assert rate_filter.filter(record)
+        assert record.getMessage() == "工具正在运行中: A (期间重复 1 次已抑制)"
+        assert rate_filter.suppressed_total == 1
+
+
+class TestToolLogging:
+    """测试工具日志"""
+
+    @pytest.fixture
+    def captured(self):
+        logger = logging.getLogger("Tool.ImageFilter.均值滤波")
+        handler = _ListHandler()
+        logger.addHandler(handler)
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        yield handler.records
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+
+    def test_per_tool_debug_toggle(self, captured):
+        """只有打开调试开关的工具实例输出DEBUG日志"""
+        traced = ToolRegistry.create_tool("ImageFilter", "均值滤波", "traced")
+        quiet = ToolRegistry.create_tool("ImageFilter", "均值滤波", "quiet")
+        traced.debug_logging = True
+        image = ImageData(data=np.zeros((20, 20), np.uint8))
+
+        for tool in (traced, quiet):
+            tool.set_input(image)
+            tool.run()
+
+        messages = [record.getMessage() for record in captured]
+        assert any("执行完成: traced" in message for message in messages)
+        assert not any("quiet" in message for message in messages)
+
+        traced.debug_logging = False
+        captured.clear()
+        traced.run()
+        assert captured == []
+
+    def test_hot_path_not_formatted(self, captured):
+        """未开启调试时设置参数不格式化参数值"""
+
+        class Value:
+            formatted = 0
+
+            def __str__(self):
+                Value.formatted += 1
+                return "value"
+
+        tool = ToolRegistry.create_tool("ImageFilter", "均值滤波")
+        tool.set_param("自定义", Value())
+        assert Value.formatted == 0
+
+        tool.debug_logging = True
+        tool.set_param("自定义", Value())
+        assert Value.formatted >= 1
@@ -47,3 +47,107 @@ def test_buffer_exhaustion():
     # 第三个应该阻塞或返回None
     buf3 = pool.acquire(timeout=0.1)
     assert buf3 is None  # 或者阻塞直到有可用
+
+
+def test_size_classes_and_stats():
+    """测试按形状和数据类型分类复用并统计命中"""
+    pool = ImageBufferPool(max_size=2, buffer_shape=None)
+
+    gray = pool.acquire((100, 100))
+    color = pool.acquire((100, 100, 3))
+    wide = pool.acquire((100, 100), np.uint16)
+    assert gray.shape == (100, 100) and color.shape == (100, 100, 3)
+    assert wide.dtype == np.uint16
+
+    del gray
+    again = pool.acquire((100, 100))
+    stats = pool.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["resident_bytes"] == 100 * 100 * (1 + 3 + 2)
+    assert stats["classes"]["100x100/uint8"]["high_water"] == 1
+    assert again is not None and wide is not None and color is not None
+
+
+def test_returned_when_unreferenced():
+    """测试数组及其视图都不再被引用时自动归还，且默认不清零"""
+    pool = ImageBufferPool(max_size=1, buffer_shape=(10, 10))
+
+    buf = pool.acquire()
+    buf[:] = 7
+    view = buf[2:, 3:]
+    del buf
+    assert pool.in_use_count() == 1
+
+    del view
+    assert pool.in_use_count() == 0
+    assert pool.available_count() == 1
+    assert (pool.acquire() == 7).all()
+
+
+def test_zero_on_release_and_borrow():
+    """测试归还时清零选项和with借用"""
+    pool = ImageBufferPool(
+        max_size=1, buffer_shape=(10, 10), zero_on_release=True
+    )
+
+    with pool.borrow() as buf:
+        buf[:] = 5
+        # 尺寸类耗尽时退化为普通分配
+        with pool.borrow() as extra:
+            assert not pool.owns(extra)
+    assert pool.available_count() == 1
+    assert (pool.acquire() == 0).all()
+
+
+def test_resize_keeps_in_use_buffers():
+    """测试调整默认形状后，借出中的旧缓冲区仍归还到旧尺寸类"""
+    pool = ImageBufferPool(max_size=2, buffer_shape=(10, 10))
+    buf = pool.acquire()
+
+    pool.resize((20, 20))
+    assert pool.available_count((10, 10)) == 0
+    assert pool.available_count((20, 20)) == 2
+
+    pool.release(buf)
+    assert pool.available_count((10, 10)) == 1
+    assert pool.acquire().shape == (20, 20)
+
+
+def test_leak_detection():
+    """测试借出超过指定帧数的缓冲区被报告一次"""
+    pool = ImageBufferPool(max_size=2, buffer_shape=(10, 10), leak_frames=2)
+    held = pool.acquire()
+
+    reports = [pool.next_frame() for _ in range(4)]
+    assert [len(r) for r in reports] == [0, 0, 1, 0]
+    assert pool.find_leaks()[0]["size_class"] == "10x10/uint8"
+    assert pool.get_stats()["leaks"] == 1
+    del held
+    assert pool.find_leaks() == []
+
+
+def test_trim_to_high_water_and_budget():
+    """测试空闲缓冲区收缩到近期高水位，超出常驻上限时回收其他尺寸类"""
+    pool = ImageBufferPool(max_size=4, buffer_shape=None, trim_interval=2)
+    burst = [pool.acquire((10, 10)) for _ in range(4)]
+    del burst
+    # 上一个收缩周期内的峰值仍保留，之后一个周期没有再用到才释放
+    for _ in range(2):
+        pool.next_frame()
+    assert pool.available_count((10, 10)) == 4
+    for _ in range(2):
+        pool.next_frame()
+    assert pool.available_count((10, 10)) == 0
+
+    pool = ImageBufferPool(
+        max_size=4, buffer_shape=None, max_resident_bytes=300
+    )
+    first = pool.acquire((10, 10))
+    second = pool.acquire((10, 10))
+    del first, second
+    third = pool.acquire((10, 20))
+    assert third is not None
+    assert pool.available_count((10, 10)) == 1
+    assert pool.resident_bytes == 300
+    assert pool.acquire((10, 20), timeout=0) is None
+    assert pool.get_stats()["exhausted"] == 1
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR引擎测试
+
+验证按语言组合延迟加载和复用模型、常驻模型不被空闲释放、
+已知区域一次批量识别并按区域对应结果，以及OCR工具使用上游区域。
+
+模型通过 reader_factory 注入，返回按区域坐标生成文本的识别器，
+不依赖 EasyOCR 的模型文件。
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolRegistry
+from data.image_data import ImageData, ResultData
+from tools.vision import ocr_engine
+from tools.vision.ocr_engine import (
+    OCREngine,
+    regions_from_results,
+    resolve_languages,
+)
+
+
+class _Reader:
+    """与 easyocr.Reader 接口一致的识别器，文本为区域左上角坐标"""
+
+    def __init__(self, languages):
+        self.languages = languages
+        self.recognize_calls = []
+
+    def readtext(self, image):
+        return [([[0, 0], [10, 0], [10, 5], [0, 5]], "FULL", 0.9)]
+
+    def recognize(self, image, horizontal_list, free_list, batch_size, detail):
+        self.recognize_calls.append(list(horizontal_list))
+        # 与EasyOCR批量模式一致：输出按区域的上边排序，而不是输入顺序
+        results = []
+        for x0, x1, y0, y1 in sorted(horizontal_list, key=lambda box: box[2]):
+            text = f"{x0},{y0}"
+            results.append(
+                ([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], text, 0.8)
+            )
+        return results
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "tools.vision.ocr_engine.time.monotonic", lambda: now[0]
+    )
+    return now
+
+
+def _engine(**kwargs):
+    loads = []
+
+    def factory(languages):
+        loads.append(languages)
+        return _Reader(languages)
+
+    return OCREngine(reader_factory=factory, **kwargs), loads
+
+
+class TestModelPool:
+    """测试按语言的模型池"""
+
+    def test_lazy_per_language(self):
+        """按语言组合延迟加载，等价写法共用模型"""
+        engine, loads = _engine(idle_timeout=300, pin_models=False)
+        assert loads == []
+
+        zh = engine.get_reader("ch_sim")
+        assert engine.get_reader("ch_sim+en") is zh
+        assert engine.get_reader("en+ch_sim") is zh
+        en = engine.get_reader("en")
+        assert en is not zh
+        assert loads == [("ch_sim", "en"), ("en",)]
+        assert resolve_languages("fr+en") == ("en", "fr")
+
+    def test_pinned_not_released(self, clock):
+        """空闲超时只释放未常驻的其他语言模型，常驻模型保留"""
+        engine, loads = _engine(idle_timeout=60, pin_models=False)
+        engine.pin("en", load=True)
+        engine.get_reader("ja")
+
+        clock[0] += 120
+        engine.get_reader("ch_sim")
+        assert engine.is_loaded("en")
+        assert not engine.is_loaded("ja")
+        assert engine.is_loaded("ch_sim")
+
+        # 长时间未使用后再次使用同一语言不会先卸载再加载
+        clock[0] += 120
+        engine.get_reader("ch_sim")
+        assert loads.count(("ch_sim", "en")) == 1
+
+        engine.unpin("en")
+        clock[0] += 120
+        engine.get_reader("ch_sim")
+        assert not engine.is_loaded("en")
+
+        stats = engine.get_stats()
+        assert (
+            stats["ch_sim+en"]["loaded"] and stats["ch_sim+en"]["loads"] == 1
+        )
+
+    def test_config_pins_all(self, clock):
+        """pin_models 开启时所有加载的模型常驻"""
+        engine, _ = _engine(idle_timeout=1, pin_models=True)
+        engine.get_reader("en")
+        clock[0] += 10
+        engine.get_reader("ja")
+        assert engine.release_idle() == 0
+        assert engine.is_loaded("en")
+        assert engine.release(force=True) == 2
+
+
+class TestRegions:
+    """测试已知区域批量识别"""
+
+    def test_single_batched_call(self):
+        """所有区域一次识别，结果与输入区域一一对应，越界区域被裁剪或跳过"""
+        engine, _ = _engine()
+        image = np.zeros((100, 200, 3), np.uint8)
+        regions = [
+            (50, 60, 40, 20),
+            (10, 5, 30, 10),
+            (300, 10, 10, 10),
+            (-5, 30, 20, 10),
+        ]
+
+        results = engine.recognize_regions(image, regions, "en")
+        reader = engine.get_reader("en")
+
+        assert len(reader.recognize_calls) == 1
+        assert [r.text if r else None for r in results] == [
+            "50,60",
+            "10,5",
+            None,
+            "0,30",
+        ]
+        assert [r.region_index for r in results if r] == [0, 1, 3]
+        assert results[0].bbox[2] == [90, 80]
+
+    def test_regions_from_results(self):
+        """从匹配、读码和切片结果中提取区域"""
+        assert regions_from_results(
+            {
+                "matches": [(10, 20, 0.9)],
+                "template_width": 30,
+                "template_height": 12,
+            }
+        ) == [(10, 20, 30, 12)]
+        assert regions_from_results(
+            {
+                "codes": [
+                    {
+                        "data": "A",
+                        "rect": {"x": 1, "y": 2, "width": 3, "height": 4},
+                    }
+                ]
+            }
+        ) == [(1, 2, 3, 4)]
+        assert regions_from_results(
+            {"slice_x": 5, "slice_y": 6, "slice_width": 7, "slice_height": 8}
+        ) == [(5, 6, 7, 8)]
+        assert regions_from_results({"matches": [(1, 2, 0.5)]}) == []
+
+
+class TestOCRTool:
+    """测试OCR工具"""
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        engine, loads = _engine(idle_timeout=300, pin_models=False)
+        monkeypatch.setattr(ocr_engine, "_default_engine", engine)
+        return engine, loads
+
+    def test_upstream_regions(self, engine):
+        """使用上游匹配结果的区域，按语言参数加载模型"""
+        _, loads = engine
+        tool = ToolRegistry.create_tool("Recognition", "OCR识别")
+        tool.set_param("language", "en")
+        tool.set_param("text_regions", "upstream")
+        tool.set_param("text_only", False)
+        tool.set_input(ImageData(data=np.zeros((100, 200), np.uint8)))
+        upstream = ResultData()
+        upstream.set_value("matches", [(10, 40, 0.9), (10, 5, 0.8)])
+        upstream.set_value("template_width", 50)
+        upstream.set_value("template_height", 20)
+        tool.set_upstream_result(upstream)
+
+        assert tool.run()
+        result = tool.get_result()
+        # 结果按上游区域顺序排列
+        assert result.get_value("texts") == ["10,40", "10,5"]
+        assert [r["region_index"] for r in result.get_value("results")] == [
+            0,
+            1,
+        ]
+        assert loads == [("en",)]
+
+    def test_detect_and_pin(self, engine):
+        """整图检测；模型常驻参数使该语言不参与空闲释放"""
+        ocr, _ = engine
+        tool = ToolRegistry.create_tool("Recognition", "英文OCR")
+        tool.set_param("pin_model", True)
+        tool.set_input(ImageData(data=np.zeros((20, 20, 3), np.uint8)))
+
+        assert tool.run()
+        assert tool.get_result().get_value("texts") == ["FULL"]
+        assert ocr.get_stats()["en"]["pinned"]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果叠加图元测试
+
+验证叠加图元的绘制与序列化、工具输出图像与输入共享像素、
+检测结果以图元形式记录，以及显示/保存时才栅格化。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolRegistry
+from data.image_data import ImageData, ResultData
+from data.overlay import Overlay
+from utils.image_processing_utils import draw_detection_result
+
+
+def _blob_frame():
+    """生成带两个亮斑的灰度帧"""
+    image = np.zeros((120, 160), dtype=np.uint8)
+    cv2.circle(image, (40, 60), 15, 255, -1)
+    cv2.rectangle(image, (90, 30), (130, 80), 255, -1)
+    return ImageData(data=image)
+
+
+class TestOverlay:
+    """测试叠加图元"""
+
+    def test_render_matches_opencv(self):
+        """绘制结果与直接调用OpenCV一致"""
+        image = np.full((80, 100, 3), 50, dtype=np.uint8)
+        overlay = Overlay()
+        overlay.add_rect(10, 10, 30, 20, (0, 0, 255), 2)
+        overlay.add_circle((70, 40), 12, (255, 0, 0), -1)
+        overlay.add_line((0, 79), (99, 0), (0, 255, 0), 1)
+        overlay.add_text("OK", (5, 75), (255, 255, 255), 0.5, 1)
+
+        expected = image.copy()
+        cv2.rectangle(expected, (10, 10), (40, 30), (0, 0, 255), 2)
+        cv2.circle(expected, (70, 40), 12, (255, 0, 0), -1)
+        cv2.line(expected, (0, 79), (99, 0), (0, 255, 0), 1)
+        cv2.putText(
+            expected,
+            "OK",
+            (5, 75),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (255, 255, 255),
+            1,
+        )
+
+        rendered = overlay.render(image)
+        assert np.array_equal(rendered, expected)
+        # 原图不被修改
+        assert np.all(image == 50)
+
+    def test_render_gray_and_unicode(self):
+        """灰度图转换为BGR，中文文本使用PIL绘制"""
+        overlay = Overlay().add_text("缺陷", (10, 40), (0, 0, 255), 1.0)
+        rendered = overlay.render(np.zeros((60, 120), dtype=np.uint8))
+        assert rendered.shape == (60, 120, 3)
+        assert rendered[:, :, 2].any()
+
+    def test_serialization_roundtrip(self):
+        """图元可转换为字典列表并还原"""
+        overlay = Overlay()
+        overlay.add_polyline(
+            [[1, 2], [3, 4], [5, 6]], closed=True, color=(1, 2, 3)
+        )
+        overlay.add_text("A", (7, 8), font_scale=0.8)
+        restored = Overlay.from_list(overlay.to_list())
+        image = np.zeros((20, 20, 3), dtype=np.uint8)
+        assert len(restored) == 2
+        assert np.array_equal(restored.render(image), overlay.render(image))
+
+    def test_draw_helper_unchanged(self):
+        """draw_detection_result 仍返回标注后的拷贝"""
+        image = np.zeros((50, 50, 3), dtype=np.uint8)
+        detection = {
+            "type": "scratch",
+            "confidence": 0.9,
+            "location": {"x": 5, "y": 15, "width": 10, "height": 10},
+        }
+        result = draw_detection_result(image, [detection])
+        assert result is not image
+        assert result.any() and not image.any()
+
+
+class TestImageDataView:
+    """测试ImageData视图"""
+
+    def test_view_shares_pixels(self):
+        """视图共享像素和派生缓存，元数据独立"""
+        frame = _blob_frame()
+        frame.set_metadata("source", "camera")
+        gray = frame.derived.gray()
+
+        overlay = Overlay().add_rect(0, 0, 5, 5)
+        view = frame.view(overlay)
+        view.set_metadata("source", "view")
+
+        assert view.data is frame.data
+        assert view.derived.gray() is gray
+        assert view.overlay is overlay and frame.overlay is None
+        assert frame.get_metadata("source") == "camera"
+
+    def test_view_accumulates_overlay(self):
+        """视图的视图保留上游图元，输入的图元不被修改"""
+        frame = _blob_frame()
+        first = Overlay().add_rect(0, 0, 5, 5)
+        second = Overlay().add_circle((50, 50), 4)
+
+        view = frame.view(first).view(second)
+        assert len(view.overlay) == 2
+        assert len(first) == 1 and len(second) == 1
+        assert view.view().overlay is view.overlay
+
+    def test_rendered(self):
+        """没有图元时返回原数据，有图元时返回标注图像"""
+        frame = _blob_frame()
+        assert frame.rendered() is frame.data
+
+        view = frame.view(Overlay().add_rect(0, 0, 20, 20, (0, 0, 255)))
+        rendered = view.rendered()
+        assert rendered.shape == (120, 160, 3)
+        assert rendered[0, 0].tolist() == [0, 0, 255]
+        assert not frame.data[0, 0]
+
+    def test_result_overlay_copy(self):
+        """ResultData 的叠加图元随拷贝复制、随清空重置"""
+        result = ResultData()
+        assert not result.has_overlay
+        result.overlay.add_circle((5, 5), 3)
+
+        copied = result.copy()
+        assert len(copied.overlay) == 1
+        copied.overlay.add_rect(0, 0, 1, 1)
+        assert len(result.overlay) == 1
+
+        result.clear()
+        assert not result.has_overlay
+
+
+class TestToolOverlays:
+    """测试工具输出叠加图元"""
+
+    def test_blob_find(self):
+        """斑点分析输出共享输入像素，检测框记录为图元"""
+        frame = _blob_frame()
+        tool = ToolRegistry.create_tool("Analysis", "斑点分析")
+        tool.set_input(frame)
+        assert tool.run()
+
+        output = tool.get_output()
+        assert np.shares_memory(output.data, frame.data)
+        assert tool.get_result().has_overlay
+        assert output.overlay is tool.get_result().overlay
+        assert output.rendered().shape == (120, 160, 3)
+
+    def test_gray_match(self, tmp_path):
+        """灰度匹配输出共享输入像素，匹配框记录为图元"""
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (120, 160), dtype=np.uint8)
+        template_path = str(tmp_path / "template.png")
+        cv2.imwrite(template_path, image[40:80, 60:110])
+
+        tool = ToolRegistry.create_tool("Vision", "灰度匹配")
+        tool.set_param("template_path", template_path)
+        frame = ImageData(data=image)
+        tool.set_input(frame)
+        assert tool.run()
+
+        assert tool.get_output().data is frame.data
+        assert tool.get_result().has_overlay
+
+    def test_chain_keeps_upstream_annotations(self, tmp_path):
+        """灰度匹配后接斑点分析，输出图像同时带两个工具的标注"""
+        frame = _blob_frame()
+        template_path = str(tmp_path / "template.png")
+        cv2.imwrite(template_path, frame.data[30:90, 20:70])
+
+        match = ToolRegistry.create_tool("Vision", "灰度匹配")
+        match.set_param("template_path", template_path)
+        match.set_input(frame)
+        assert match.run()
+
+        blobs = ToolRegistry.create_tool("Analysis", "斑点分析")
+        blobs.set_input(match.get_output())
+        assert blobs.run()
+
+        match_shapes = len(match.get_result().overlay)
+        blob_shapes = len(blobs.get_result().overlay)
+        assert match_shapes and blob_shapes
+        output = blobs.get_output()
+        assert output.data is frame.data
+        assert len(output.overlay) == match_shapes + blob_shapes
+        # 本工具的结果只记录自己的图元
+        assert len(match.get_output().overlay) == match_shapes
+
+    def test_image_saver_saves_annotated(self, tmp_path):
+        """图像保存工具保存标注图像并透传视图"""
+        frame = _blob_frame()
+        view = frame.view(Overlay().add_rect(0, 0, 20, 20, (0, 0, 255)))
+
+        def save(annotated):
+            tool = ToolRegistry.create_tool("Vision", "图像保存")
+            tool.set_param("保存路径", str(tmp_path))
+            tool.set_param("文件名格式", f"annotated_{annotated}")
+            tool.set_param("保存标注图像", annotated)
+            tool.set_input(view)
+            assert tool.run()
+            output = tool.get_output()
+            assert output.data is frame.data
+            assert output.overlay is view.overlay
+            return cv2.imread(
+                str(tmp_path / f"annotated_{annotated}.png"),
+                cv2.IMREAD_UNCHANGED,
+            )
+
+        assert save(True)[0, 0].tolist() == [0, 0, 255]
+        assert save(False).ndim == 2
@@ -203,7 +203,24 @@ class TestParameterSerializer(unittest.TestCase):
             self.assertTrue(np.array_equal(deserialized, arr))
         except ImportError:
             self.skipTest("numpy not available")
-    
+
+    def test_numpy_legacy_hex(self):
+        """测试旧版本hex编码的numpy数组仍可还原"""
+        try:
+            import numpy as np
+
+            arr = np.arange(6, dtype=np.uint8).reshape(2, 3)
+            legacy = {
+                "__type__": "numpy",
+                "shape": [2, 3],
+                "dtype": "uint8",
+                "data": arr.tobytes().hex()
+            }
+            deserialized = ParameterSerializer.deserialize(legacy)
+            self.assertTrue(np.array_equal(deserialized, arr))
+        except ImportError:
+            self.skipTest("numpy not available")
+
     def test_unsupported_type(self):
         """测试不支持的类型"""
         # 定义一个不支持的类型
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流程并发执行测试
+
+验证独立流程在线程池上并发运行、各流程使用各自的输入、
+耗时报告，以及模型缓存和通讯管理器的并发访问。
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.model_cache import ModelCache
+from core.procedure import Procedure, ProcedureManager
+from core.solution import Solution, SolutionManager
+from core.tool_base import ToolBase
+from data.image_data import ImageData
+from tools.communication.communication import CommunicationManager
+
+
+class SleepTool(ToolBase):
+    """等待固定时间(模拟IO或释放GIL的图像处理)并记录输入的测试工具"""
+
+    tool_name = "SleepTool"
+    tool_category = "Test"
+
+    def __init__(self, name=None, delay=0.2):
+        self.delay = delay
+        self.seen = None
+        super().__init__(name)
+
+    def _run_impl(self):
+        time.sleep(self.delay)
+        self.seen = int(self._input_data.data[0, 0])
+        return {"value": self.seen}
+
+
+def _procedure(name, delay=0.2):
+    procedure = Procedure(name)
+    tool = SleepTool(f"{name}_tool", delay)
+    procedure.add_tool(tool)
+    return procedure, tool
+
+
+def _image(value):
+    return ImageData(data=np.full((8, 8), value, np.uint8))
+
+
+class TestProcedureManager:
+    """测试流程管理器并发执行"""
+
+    def test_sequential_by_default(self):
+        """默认顺序执行，总耗时约等于各流程之和"""
+        manager = ProcedureManager()
+        for i in range(2):
+            manager.add_procedure(_procedure(f"p{i}", 0.1)[0])
+
+        results = manager.run_all(_image(1))
+        timing = manager.get_last_timing()
+
+        assert list(results) == ["p0", "p1"]
+        assert timing["mode"] == "sequential"
+        assert timing["total_ms"] >= timing["sum_ms"] * 0.95
+
+    def test_concurrent_with_own_inputs(self):
+        """并发执行时总耗时小于各流程之和，各流程使用各自的输入"""
+        manager = ProcedureManager()
+        tools = []
+        for i in range(3):
+            procedure, tool = _procedure(f"cam{i}")
+            manager.add_procedure(procedure)
+            tools.append(tool)
+        manager.set_max_workers(3)
+        try:
+            results = manager.run_all(
+                _image(9), inputs={"cam0": _image(10), "cam2": _image(12)}
+            )
+            timing = manager.get_last_timing()
+        finally:
+            manager.shutdown()
+
+        assert list(results) == ["cam0", "cam1", "cam2"]
+        assert [tool.seen for tool in tools] == [10, 9, 12]
+        assert timing["mode"] == "concurrent" and timing["workers"] == 3
+        assert set(timing["procedures"]) == {"cam0", "cam1", "cam2"}
+        assert all(ms >= 190 for ms in timing["procedures"].values())
+        assert timing["total_ms"] < timing["sum_ms"] * 0.6
+
+    def test_solution_persists_workers(self, tmp_path):
+        """方案保存并加载并发线程数，运行后报告各流程耗时"""
+        solution = Solution("concurrent")
+        for i in range(2):
+            solution.add_procedure(_procedure(f"p{i}", 0.05)[0])
+        solution.procedure_workers = 2
+        solution.run(_image(3))
+
+        info = solution.get_info()
+        assert info["procedure_workers"] == 2
+        assert set(info["procedure_timing"]["procedures"]) == {"p0", "p1"}
+        assert solution.copy().procedure_workers == 2
+
+        path = str(tmp_path / "concurrent.vmsol")
+        assert solution.save(path)
+        loaded = Solution()
+        assert loaded.load(path)
+        assert loaded.procedure_workers == 2
+        solution.clear()
+        loaded.clear()
+
+
+class TestSolutionManager:
+    """测试多方案并发运行"""
+
+    def test_run_all_reuses_pool(self):
+        """并发运行方案复用常驻线程池，不再每帧创建线程"""
+        manager = SolutionManager()
+        threads = set()
+
+        class _Solution(Solution):
+            def run(self, input_data=None):
+                threads.add(threading.current_thread().name)
+                return super().run(input_data)
+
+        for i in range(2):
+            solution = _Solution(f"s{i}")
+            solution.add_procedure(_procedure(f"s{i}_p", 0.01)[0])
+            manager.add_solution(solution)
+        try:
+            manager.run_all(_image(1), max_workers=2)
+            executor = manager._executor
+            manager.run_all(_image(2), max_workers=2)
+            assert manager._executor is executor
+            assert len(threads) <= 2
+            assert all(name.startswith("Solution") for name in threads)
+        finally:
+            manager.clear()
+        assert manager._executor is None
+
+
+class TestSharedSingletons:
+    """测试并发流程共享的单例"""
+
+    def test_model_cache_creates_once(self):
+        """多个线程同时获取同一模型只创建一次"""
+        created = []
+
+        def factory(path):
+            time.sleep(0.05)
+            created.append(object())
+            return created[-1]
+
+        ModelCache.clear("concurrency_test")
+        models = []
+        threads = [
+            threading.Thread(
+                target=lambda: models.append(
+                    ModelCache.get_model("concurrency_test", factory, "m")
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(created) == 1
+        assert all(model is created[0] for model in models)
+        assert (
+            "concurrency_test:m"
+            in ModelCache.get_cache_info()["cached_models"]
+        )
+        ModelCache.clear("concurrency_test")
+        assert (
+            "concurrency_test:m"
+            not in ModelCache.get_cache_info()["cached_models"]
+        )
+
+    def test_communication_manager_concurrent_lookup(self):
+        """查找连接与断开连接并发进行时不因字典变化而出错"""
+        manager = CommunicationManager()
+        errors = []
+        stop = threading.Event()
+
+        class _Protocol:
+            def is_connected(self):
+                return True
+
+            def disconnect(self):
+                pass
+
+            def clear_callbacks(self):
+                pass
+
+        def churn():
+            for i in range(300):
+                name = f"concurrency_{i}"
+                with manager._conn_lock:
+                    manager._connections[name] = _Protocol()
+                    manager._device_map[name] = 90000 + i
+                manager.disconnect(name)
+            stop.set()
+
+        def lookup():
+            try:
+                while not stop.is_set():
+                    manager.get_available_connections()
+                    manager.is_device_connect(90001)
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=churn)] + [
+            threading.Thread(target=lookup) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+    def test_communication_manager_connect_outside_lock(self, monkeypatch):
+        """慢连接不阻塞其他线程查找连接，同名连接只建立一次"""
+        manager = CommunicationManager()
+        connects = []
+        connecting = threading.Event()
+
+        class _SlowProtocol:
+            def __init__(self):
+                self.connected = False
+
+            def connect(self, config):
+                connects.append(config)
+                connecting.set()
+                time.sleep(0.3)
+                self.connected = True
+                return True
+
+            def is_connected(self):
+                return self.connected
+
+            def disconnect(self):
+                self.connected = False
+
+            def clear_callbacks(self):
+                pass
+
+        protocol = _SlowProtocol()
+
+        class _ProtocolManager:
+            def create_protocol(self, protocol_type, name):
+                return protocol
+
+        monkeypatch.setattr(manager, "_protocol_manager", _ProtocolManager())
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    manager.create_connection("slow_device", "tcp_client", {})
+                )
+            )
+            for _ in range(2)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            assert connecting.wait(1.0)
+
+            start = time.perf_counter()
+            manager.get_available_connections()
+            manager.get_connection_by_device_id(-1)
+            assert time.perf_counter() - start < 0.1
+
+            for thread in threads:
+                thread.join()
+            assert len(connects) == 1
+            assert results == [protocol, protocol]
+            assert manager.get_device_id("slow_device") is not None
+        finally:
+            manager.disconnect("slow_device")
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程流程执行测试
+
+验证共享内存帧环形缓冲、流程配置的序列化与重建，
+以及常驻工作进程与线程执行结果一致、配置只在变化时发送、
+同一帧只写一次、参数回传、流程在图像源和通讯等主进程工具处拆分，
+工作进程加载失败记录为错误，以及不能跨进程的流程回退到线程。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.procedure import Procedure, ProcedureManager
+from core.process_backend import (
+    ProcedureWorker,
+    SharedFrameRing,
+    _SegmentReader,
+    plan_offload,
+)
+from core.solution import Solution
+from core.tool_base import ToolBase
+from data.image_data import ImageData
+from tools.analysis.analysis import BlobFind
+from tools.vision.image_filter import BoxFilter
+from tools.vision.template_match import GrayMatch
+
+
+class LocalTool(ToolBase):
+    """未在工具注册表中登记的测试工具"""
+
+    tool_name = "LocalTool"
+    tool_category = "Test"
+
+    def _run_impl(self):
+        return {
+            "OutputImage": self._input_data,
+            "value": int(self._input_data.data.sum()),
+        }
+
+
+class GrabTool(ToolBase):
+    """主进程中的图像源"""
+
+    tool_name = "GrabTool"
+    tool_category = "Test"
+    PROCESS_SAFE = False
+
+    def _check_input(self):
+        return True
+
+    def _run_impl(self):
+        return ImageData(data=_dots_image())
+
+
+class SinkTool(ToolBase):
+    """主进程中的发送工具，记录收到的图像和上游结果"""
+
+    tool_name = "SinkTool"
+    tool_category = "Test"
+    PROCESS_SAFE = False
+
+    def __init__(self, name=None):
+        super().__init__(name)
+        self.sent = []
+
+    def _run_impl(self):
+        upstream = self.get_upstream_result()
+        self.sent.append(
+            (self._input_data.shape, len(upstream.get_value("blobs")))
+        )
+
+
+def _dots_image(offset: int = 0) -> np.ndarray:
+    """带若干圆点的图像"""
+    image = np.zeros((240, 320), np.uint8)
+    for cx, cy in [(60, 60), (160, 60), (260, 60), (110, 170)]:
+        cv2.circle(image, (cx + offset, cy + offset), 15, 255, -1)
+    return image
+
+
+def _blob_procedure(name: str) -> Procedure:
+    procedure = Procedure(name)
+    blobs = BlobFind(f"{name}_blobs")
+    blobs.set_param("min_area", 50)
+    procedure.add_tool(blobs)
+    return procedure
+
+
+def _blob_centers(results, procedure_name, tool_name=None):
+    tool_name = tool_name or f"{procedure_name}_blobs"
+    result = results[procedure_name][tool_name]["result"]
+    return sorted((b["cx"], b["cy"]) for b in result.get_value("blobs"))
+
+
+@pytest.fixture
+def manager():
+    manager = ProcedureManager()
+    yield manager
+    manager.shutdown()
+
+
+class TestSharedFrameRing:
+    """测试共享帧环形缓冲"""
+
+    def test_write_read_release(self):
+        """写入的帧可按句柄零拷贝读取，释放后槽位可复用"""
+        ring = SharedFrameRing(slots=2)
+        reader = _SegmentReader()
+        try:
+            image = ImageData(data=_dots_image(), camera_id="cam0")
+            handle = ring.write(image)
+            frame = reader.frame(handle)
+            np.testing.assert_array_equal(frame.data, image.data)
+            assert frame.camera_id == "cam0"
+            assert ring.slot_bytes % 4096 == 0
+            assert ring.get_stats()["free_slots"] == 1
+
+            ring.release(handle)
+            assert ring.get_stats()["free_slots"] == 2
+            del frame
+        finally:
+            reader.close()
+            ring.close()
+
+    def test_full_ring_times_out(self):
+        """槽位全部占用时写入超时"""
+        ring = SharedFrameRing(slots=1)
+        try:
+            ring.write(ImageData(data=_dots_image()))
+            with pytest.raises(TimeoutError):
+                ring.write(ImageData(data=_dots_image()), timeout=0.05)
+        finally:
+            ring.close()
+
+
+class TestProcedureSpec:
+    """测试流程配置的序列化与重建"""
+
+    def test_round_trip(self):
+        """重建的流程工具、参数和连接与原流程一致"""
+        procedure = Procedure("spec")
+        blur = BoxFilter("blur")
+        blur.set_param("kernel_size", 7)
+        blobs = BlobFind("blobs")
+        blobs.set_param("min_area", 80)
+        procedure.add_tool(blur)
+        procedure.add_tool(blobs)
+        procedure.connect("blur", "blobs")
+
+        rebuilt = Procedure.from_dict(procedure.to_dict())
+        assert [tool.name for tool in rebuilt.tools] == ["blur", "blobs"]
+        assert isinstance(rebuilt.get_tool("blobs"), BlobFind)
+        assert rebuilt.get_tool("blur").get_param("kernel_size") == 7
+        assert rebuilt.get_tool("blobs").get_param("min_area") == 80
+        assert (
+            rebuilt.to_dict()["connections"]
+            == procedure.to_dict()["connections"]
+        )
+
+
+class TestProcessBackend:
+    """测试多进程流程执行"""
+
+    def test_matches_thread_results(self, manager):
+        """工作进程的结果与线程执行一致，输入帧视图的输出在主进程中重建"""
+        for name in ("p1", "p2"):
+            manager.add_procedure(_blob_procedure(name))
+        image = ImageData(data=_dots_image())
+        expected = manager.run_all(image)
+
+        manager.set_backend("process")
+        results = manager.run_all(image)
+        timing = manager.get_last_timing()
+        assert timing["mode"] == "process"
+        assert timing["workers"] == 2
+        assert timing["fallback"] == {}
+        for name in ("p1", "p2"):
+            assert _blob_centers(results, name) == _blob_centers(
+                expected, name
+            )
+            output = results[name][f"{name}_blobs"]["output"]
+            assert output is not None and output.shape == image.shape
+            tool = manager.get_procedure(name).get_tool(f"{name}_blobs")
+            assert (
+                tool.get_result() is results[name][f"{name}_blobs"]["result"]
+            )
+
+    def test_persistent_workers_and_single_write(self, manager):
+        """工作进程跨帧常驻，配置只发送一次，同一帧只写入共享内存一次"""
+        for name in ("p1", "p2"):
+            manager.add_procedure(_blob_procedure(name))
+        manager.set_backend("process")
+
+        manager.run_all(ImageData(data=_dots_image()))
+        first = manager.get_backend_stats()
+        results = manager.run_all(ImageData(data=_dots_image(10)))
+        stats = manager.get_backend_stats()
+
+        assert stats["backend"] == "process"
+        for name in ("p1", "p2"):
+            assert (
+                stats["workers"][name]["pid"] == first["workers"][name]["pid"]
+            )
+            assert stats["workers"][name]["loads"] == 1
+        assert stats["ring"]["writes"] == 2
+        assert stats["ring"]["free_slots"] == stats["ring"]["slots"]
+        assert _blob_centers(results, "p1")[0] == (70, 70)
+
+    def test_param_change_reloads(self, manager):
+        """主进程修改参数后重新发送配置"""
+        procedure = _blob_procedure("p1")
+        manager.add_procedure(procedure)
+        manager.set_backend("process")
+        image = ImageData(data=_dots_image())
+
+        assert len(_blob_centers(manager.run_all(image), "p1")) == 4
+        procedure.get_tool("p1_blobs").set_param("min_area", 100000)
+        assert _blob_centers(manager.run_all(image), "p1") == []
+        assert manager.get_backend_stats()["workers"]["p1"]["loads"] == 2
+
+    def test_generated_output_stays_in_worker(self, manager):
+        """工具自己生成的输出图像不回传，只报告形状"""
+        procedure = Procedure("blur")
+        procedure.add_tool(BoxFilter("box"))
+        manager.add_procedure(procedure)
+        manager.set_backend("process")
+
+        item = manager.run_all(ImageData(data=_dots_image()))["blur"]["box"]
+        assert item["output"] is None
+        assert tuple(item["output_shape"]) == (240, 320)
+
+    def test_worker_params_synced_back(self, manager, tmp_path):
+        """工作进程中示教的基准位姿回传主进程，且不触发重新加载"""
+        template_path = str(tmp_path / "dot.png")
+        cv2.imwrite(template_path, _dots_image()[35:85, 135:185])
+        procedure = Procedure("locate")
+        locator = GrayMatch("match")
+        locator.set_param("template_path", template_path)
+        locator.set_param("max_count", 1)
+        locator.set_param("publish_fixture", True)
+        locator.set_param("fixture_teach", True)
+        procedure.add_tool(locator)
+        manager.add_procedure(procedure)
+        manager.set_backend("process")
+
+        results = manager.run_all(ImageData(data=_dots_image()))
+        fixture = results["locate"]["match"]["result"].get_value("fixture")
+        assert locator.get_param("fixture_teach") is False
+        assert locator.get_param("fixture_x") == pytest.approx(
+            fixture["current"]["x"]
+        )
+        assert round(locator.get_param("fixture_x")) in (60, 160, 260)
+
+        manager.run_all(ImageData(data=_dots_image()))
+        assert manager.get_backend_stats()["workers"]["locate"]["loads"] == 1
+
+    def test_unsafe_procedure_falls_back(self, manager):
+        """含未登记工具的流程在线程中执行，其余流程仍在工作进程中执行"""
+        manager.add_procedure(_blob_procedure("p1"))
+        local = Procedure("local")
+        local.add_tool(LocalTool("local_tool"))
+        manager.add_procedure(local)
+        manager.set_backend("process")
+
+        image = ImageData(data=_dots_image())
+        results = manager.run_all(image)
+        timing = manager.get_last_timing()
+        assert list(timing["fallback"]) == ["local"]
+        assert timing["workers"] == 1
+        assert results["local"]["local_tool"]["result"].get_value(
+            "value"
+        ) == int(image.data.sum())
+        assert len(_blob_centers(results, "p1")) == 4
+
+    def test_split_at_host_tools(self, manager):
+        """图像源和发送工具留在主进程，中间的工具段在工作进程中执行"""
+        procedure = Procedure("split")
+        sink = SinkTool("sink")
+        procedure.add_tool(GrabTool("grab"))
+        procedure.add_tool(BoxFilter("box"))
+        procedure.add_tool(BlobFind("blobs"))
+        procedure.add_tool(sink)
+        procedure.get_tool("blobs").set_param("min_area", 50)
+        procedure.connect("grab", "box")
+        procedure.connect("box", "blobs")
+        procedure.connect("blobs", "sink")
+        manager.add_procedure(procedure)
+
+        plan, reason = plan_offload(procedure)
+        assert reason is None and plan.segment == ["box", "blobs"]
+        expected = manager.run_all()["split"]
+
+        manager.set_backend("process")
+        results = manager.run_all()["split"]
+        assert manager.get_last_timing()["fallback"] == {}
+        assert manager.get_last_timing()["workers"] == 1
+        assert list(results) == list(expected)
+        assert _blob_centers({"p": results}, "p", "blobs") == _blob_centers(
+            {"p": expected}, "p", "blobs"
+        )
+        # 连接到主进程工具的输出图像回传，只在工作进程内使用的留在工作进程
+        assert results["box"]["output"] is None
+        np.testing.assert_array_equal(
+            results["blobs"]["output"].data, expected["blobs"]["output"].data
+        )
+        assert sink.sent[0] == sink.sent[1] == ((240, 320), 4)
+
+    def test_branches_get_host_frame(self, manager):
+        """主进程工具连接到段内多个工具时，各工具都收到该工具的输出"""
+        procedure = Procedure("branches")
+        grab = GrabTool("grab")
+        procedure.add_tool(grab)
+        procedure.add_tool(BoxFilter("box"))
+        procedure.add_tool(BlobFind("blobs"))
+        procedure.connect("grab", "box")
+        procedure.connect("grab", "blobs")
+        manager.add_procedure(procedure)
+        manager.set_backend("process")
+
+        results = manager.run_all()["branches"]
+        assert manager.get_last_timing()["fallback"] == {}
+        output = results["blobs"]["output"]
+        assert np.may_share_memory(output.data, grab.get_output().data)
+
+    def test_polluted_sys_path(self, manager, monkeypatch):
+        """其他包把同名 core 包的目录插到 sys.path 最前时工作进程仍能启动"""
+        package_dir = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "modules",
+            "cpu_optimization",
+        )
+        monkeypatch.setattr(sys, "path", [package_dir] + sys.path)
+        manager.add_procedure(_blob_procedure("p1"))
+        manager.set_backend("process")
+
+        results = manager.run_all(ImageData(data=_dots_image()))
+        assert manager.get_last_timing()["fallback"] == {}
+        assert len(_blob_centers(results, "p1")) == 4
+        assert sys.path[0] == package_dir
+
+    def test_worker_lost_during_load_reported(
+        self, manager, monkeypatch, caplog
+    ):
+        """工作进程加载时退出记录为错误，之后重新启动"""
+        start = ProcedureWorker._start
+
+        def start_and_kill(worker):
+            start(worker)
+            worker._process.kill()
+            worker._process.join()
+
+        monkeypatch.setattr(ProcedureWorker, "_start", start_and_kill)
+        manager.add_procedure(_blob_procedure("p1"))
+        manager.set_backend("process")
+        manager._get_process_backend().restart_delay = 0
+        image = ImageData(data=_dots_image())
+
+        results = manager.run_all(image)
+        timing = manager.get_last_timing()
+        assert "工作进程加载流程时退出" in timing["errors"]["p1"]
+        assert "p1" in timing["fallback"]
+        assert any(r.levelname == "ERROR" for r in caplog.records)
+        assert len(_blob_centers(results, "p1")) == 4
+
+        monkeypatch.setattr(ProcedureWorker, "_start", start)
+        results = manager.run_all(image)
+        timing = manager.get_last_timing()
+        assert timing["errors"] == {} and timing["fallback"] == {}
+        assert timing["workers"] == 1
+        assert len(_blob_centers(results, "p1")) == 4
+
+    def test_invalid_backend(self, manager):
+        """未知的执行后端报错"""
+        with pytest.raises(ValueError):
+            manager.set_backend("gpu")
+        assert manager.backend == "thread"
+
+
+class TestSolutionBackend:
+    """测试方案保存执行后端"""
+
+    def test_save_load(self, tmp_path):
+        """执行后端随方案保存和加载"""
+        solution = Solution("backend")
+        solution.procedure_backend = "process"
+        path = str(tmp_path / "backend.vmsol")
+        assert solution.save(path)
+
+        loaded = Solution("loaded")
+        assert loaded.load(path)
+        assert loaded.procedure_backend == "process"
+        assert solution.copy().procedure_backend == "process"
+        assert loaded.get_info()["procedure_backend"] == "process"
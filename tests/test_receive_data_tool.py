@@ -9,11 +9,16 @@ Date: 2026-02-04
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+import struct
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from tools.communication.data_extraction_rules import (
+    DataExtractionRule,
+    extract_field,
+)
 from tools.communication.enhanced_communication import ReceiveDataTool
 
 
@@ -295,6 +300,83 @@ def test_receive_data_with_extraction_rule():
         assert result["接收数据"]["value"] == 999
 
 
+def test_receive_data_with_register_fields():
+    """测试寄存器字段表整块解码，结果与逐规则提取一致"""
+    rules = {
+        "fields": {
+            "状态": {
+                "start": 0,
+                "rules": [
+                    {
+                        "rule_type": "bit_extract",
+                        "bit_extract_rule": {"start_bit": 2, "bit_count": 1},
+                    }
+                ],
+            },
+            "温度": {
+                "start": 1,
+                "rules": [
+                    {
+                        "rule_type": "scale_offset",
+                        "scale_offset_rule": {
+                            "scale": 0.1,
+                            "offset": -40.0,
+                            "decimal_places": 1,
+                        },
+                    }
+                ],
+            },
+            "压力": {
+                "start": 2,
+                "rules": [
+                    {
+                        "rule_type": "type_convert",
+                        "type_convert_rule": {
+                            "source_type": "float32",
+                            "target_type": "float32",
+                        },
+                    }
+                ],
+            },
+        }
+    }
+    registers = [0b100, 650] + list(
+        struct.unpack(">2H", struct.pack(">f", 2.5))
+    )
+    tool = ReceiveDataTool("test_recv")
+    tool.set_param("连接ID", "test_conn")
+    tool.set_param("输出格式", "json")
+    tool.set_param("数据提取规则", rules)
+
+    with patch(
+        "tools.communication.enhanced_communication._get_comm_manager"
+    ) as mock_get_mgr:
+        mock_conn = Mock()
+        mock_conn.is_connected.return_value = True
+        mock_conn.receive.return_value = (
+            '{"registers": %s}' % registers
+        ).encode()
+
+        mock_mgr = Mock()
+        mock_mgr.get_connection.return_value = Mock(
+            is_connected=True,
+            protocol_instance=mock_conn
+        )
+        mock_get_mgr.return_value = mock_mgr
+
+        result = tool._run_impl()
+
+    assert result["status"]
+    assert result["接收数据"] == {"状态": 1, "温度": 25.0, "压力": 2.5}
+    assert tool._extraction_rule.fallback_fields == []
+    for name, field in rules["fields"].items():
+        chain = [DataExtractionRule.from_dict(r) for r in field["rules"]]
+        assert (
+            extract_field(registers, field["start"], chain)
+            == result["接收数据"][name]
+        )
+
+
 def test_receive_data_exception_handling():
     """测试异常处理"""
     tool = ReceiveDataTool("test_recv")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+金样参考模型测试
+
+验证增量训练的均值/方差、相位相关对齐、一次比较得到偏差掩码、
+模型保存加载，以及表面缺陷检测器的学习和参考检测模式。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.image_data import ImageData
+from tools.vision.appearance_detection import SurfaceDefectDetector
+from tools.vision.reference_model import ReferenceModel
+
+
+@pytest.fixture(scope="module")
+def texture():
+    """带纹理的良品图像(纹理会让阈值法产生大量误检)"""
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 255, (300, 400), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 2)
+
+
+def _shift(image, dx, dy):
+    """平移图像(边缘反射填充)"""
+    matrix = np.float32([[1, 0, dx], [0, 1, dy]])
+    return cv2.warpAffine(
+        image, matrix, image.shape[::-1], borderMode=cv2.BORDER_REFLECT
+    )
+
+
+def _samples(texture, count=6, seed=1):
+    """轻微平移并带噪声的良品样本"""
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(count):
+        image = _shift(texture, *rng.uniform(-2, 2, 2)).astype(np.float32)
+        image += rng.normal(0, 2, image.shape)
+        samples.append(np.clip(image, 0, 255).astype(np.uint8))
+    return samples
+
+
+class TestReferenceModel:
+    """测试参考模型"""
+
+    def test_incremental_statistics(self):
+        """增量更新的均值和标准差与一次性计算一致"""
+        rng = np.random.default_rng(3)
+        stack = rng.integers(50, 200, (5, 20, 30)).astype(np.uint8)
+        model = ReferenceModel(min_std=0.0)
+        for image in stack:
+            model.add_sample(image, align=False)
+
+        assert model.count == 5
+        np.testing.assert_allclose(model.mean, stack.mean(axis=0), atol=1e-3)
+        np.testing.assert_allclose(
+            model.std(), stack.std(axis=0, ddof=1), atol=1e-3
+        )
+
+    def test_alignment_and_compare(self, texture):
+        """平移后的图像对齐到模型，只有缺陷处超出范围"""
+        model = ReferenceModel()
+        for sample in _samples(texture):
+            model.add_sample(sample)
+
+        frame = _shift(texture, 6.0, -4.0)
+        dx, dy, response = model.estimate_shift(frame)
+        reference_dx, reference_dy, _ = model.estimate_shift(texture)
+        assert dx - reference_dx == pytest.approx(6.0, abs=0.5)
+        assert dy - reference_dy == pytest.approx(-4.0, abs=0.5)
+        assert response > 0.5
+
+        cv2.circle(frame, (200, 150), 6, 255, -1)
+        mask, aligned, _ = model.compare(frame, 4.0)
+        # 去掉对齐后边缘的反射填充区域
+        inner = mask[10:-10, 10:-10]
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(inner)
+        large = np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] >= 20) + 1
+        assert len(large) == 1
+        cx, cy = centroids[large[0]] + 10
+        assert abs(cx + dx - 200) < 3 and abs(cy + dy - 150) < 3
+
+        # 上下限按倍数缓存，加入样本后失效
+        assert model.bounds(4.0)[0] is model.bounds(4.0)[0]
+
+    @pytest.mark.parametrize(
+        "shift", [(12.0, 0.0), (-12.0, 8.0), (0.0, -10.0)]
+    )
+    def test_shifted_frame_border(self, texture, shift):
+        """大幅平移的良品在边缘没有偏差，移入侧边缘的缺陷仍被检出"""
+        model = ReferenceModel()
+        for sample in _samples(texture):
+            model.add_sample(sample)
+        frame = _shift(texture, *shift)
+        mask, _, (dx, dy) = model.compare(frame, 4.0)
+        assert cv2.countNonZero(mask) < 20
+
+        # 缺陷放在对齐后图像中靠近移入侧边缘的位置(距边缘8像素)
+        h, w = mask.shape
+        x = 8 if shift[0] >= 0 else w - 9
+        y = 8 if shift[1] >= 0 else h - 9
+        if not shift[0]:
+            x = w // 2
+        cv2.circle(frame, (int(round(x + dx)), int(round(y + dy))), 4, 255, -1)
+        mask = model.compare(frame, 4.0)[0]
+        assert mask[y - 2 : y + 3, x - 2 : x + 3].any()
+
+    def test_save_load(self, texture, tmp_path):
+        """保存后加载的模型给出相同的比较结果"""
+        model = ReferenceModel(min_std=3.0)
+        for sample in _samples(texture, 3):
+            model.add_sample(sample)
+        path = str(tmp_path / "golden.npz")
+        model.save(path)
+
+        loaded = ReferenceModel.load(path)
+        assert loaded.get_info() == model.get_info()
+        frame = _samples(texture, 1, seed=9)[0]
+        np.testing.assert_array_equal(
+            loaded.compare(frame, 3.0)[0], model.compare(frame, 3.0)[0]
+        )
+
+        with pytest.raises(ValueError):
+            loaded.add_sample(frame[:100])
+
+
+class TestSurfaceDefectReference:
+    """测试表面缺陷检测器的参考模式"""
+
+    def test_learn_then_detect(self, texture, tmp_path):
+        """学习模式增量训练并按间隔保存模型，参考模式只报告真实缺陷"""
+        path = str(tmp_path / "surface.npz")
+        tool = SurfaceDefectDetector("surface")
+        tool.set_param("reference_file", path)
+        tool.set_param("reference_learn", True)
+        tool.set_param("reference_save_interval", 4)
+        samples = _samples(texture)
+        for sample in samples:
+            tool.set_input(ImageData(data=sample))
+            assert tool.run()
+        assert tool.get_result().get_value("reference_samples") == 6
+        assert ReferenceModel.load(path).count == 4
+
+        # 退出学习模式时保存剩余样本
+        tool.set_param("reference_learn", False)
+        assert tool.run()
+        assert ReferenceModel.load(path).count == 6
+
+        # 新实例从文件加载模型
+        tool = SurfaceDefectDetector("surface")
+        tool.set_param("reference_file", path)
+        tool.set_param("detection_mode", "reference")
+        tool.set_param("min_size", 30)
+
+        frame = _shift(texture, 3.0, 2.0)
+        tool.set_input(ImageData(data=frame))
+        assert tool.run()
+        assert tool.get_result().get_value("defect_count") == 0
+
+        frame = frame.copy()
+        cv2.rectangle(frame, (100, 100), (140, 112), 0, -1)
+        tool.set_input(ImageData(data=frame))
+        assert tool.run()
+        defects = tool.get_result().get_value("defects")
+        assert len(defects) == 1
+        location = defects[0]["location"]
+        assert abs(location["x"] - 100) <= 3 and abs(location["y"] - 100) <= 3
+        assert (
+            defects[0]["type"] == "scratch" and defects[0]["confidence"] > 0.5
+        )
+
+    def test_model_file_without_suffix(self, texture, tmp_path):
+        """没有 .npz 后缀的模型文件按原路径保存和加载"""
+        path = str(tmp_path / "surface_model")
+        tool = SurfaceDefectDetector("surface")
+        tool.set_param("reference_file", path)
+        tool.set_param("reference_learn", True)
+        for sample in _samples(texture, 3):
+            tool.set_input(ImageData(data=sample))
+            assert tool.run()
+        assert tool.save_reference_model()
+        assert os.listdir(tmp_path) == ["surface_model"]
+
+        tool = SurfaceDefectDetector("surface")
+        tool.set_param("reference_file", path)
+        assert tool.get_reference_model().count == 3
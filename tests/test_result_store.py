@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果历史存储测试
+
+验证结果展开、列式追加、内存窗口、SPC统计(良率、Cpk、耗时)、
+后台批量落盘SQLite，以及方案运行时自动记录结果。
+"""
+
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.image_data import ImageData, ResultData
+from data.result_store import (
+    VALUE_SCHEMA,
+    ColumnTable,
+    ResultStore,
+    SQLiteResultSink,
+    flatten_values,
+)
+
+
+def _caliper(width, ok=True):
+    """构造卡尺测量结果"""
+    result = ResultData()
+    result.status = ok
+    result.set_value("width", width)
+    result.set_value("center", {"x": 10, "y": 20})
+    result.set_value("label", "OK")
+    return result
+
+
+def _blobs(areas):
+    """构造斑点分析结果"""
+    result = ResultData()
+    result.set_value("count", len(areas))
+    result.set_value(
+        "blobs",
+        [
+            {"area": area, "location": {"x": i, "y": 0}}
+            for i, area in enumerate(areas)
+        ],
+    )
+    result.set_value("matches", [(1, 2, 0.9)])
+    return result
+
+
+def _frame(width, areas, ok=True, caliper_ms=2.0):
+    """构造 Solution.run 格式的一帧结果"""
+    return {
+        "流程1": {
+            "卡尺测量": {
+                "result": _caliper(width, ok),
+                "execution_time": caliper_ms / 1000,
+            },
+            "斑点分析": {"result": _blobs(areas), "execution_time": 0.005},
+        }
+    }
+
+
+class TestFlatten:
+    """测试结果展开"""
+
+    def test_flatten_values(self):
+        """标量、字典、字典列表和元组列表展开为 (字段, 行号, 数值)"""
+        values = _blobs([5.0, 7.0]).get_all_values()
+        values.update(_caliper(3.5).get_all_values())
+        flat = set(flatten_values(values))
+
+        assert ("count", -1, 2.0) in flat
+        assert ("blobs.area", 1, 7.0) in flat
+        assert ("blobs.location.x", 1, 1.0) in flat
+        assert ("matches.2", 0, 0.9) in flat
+        assert ("center.y", -1, 20.0) in flat
+        assert not any(key == "label" for key, _, _ in flat)
+
+    def test_flatten_all_rows(self):
+        """列表结果默认全部展开，可按需限制行数"""
+        values = _blobs([1.0] * 1500).get_all_values()
+        rows = {
+            row
+            for key, row, _ in flatten_values(values)
+            if key == "blobs.area"
+        }
+        assert len(rows) == 1500
+        limited = {
+            row
+            for key, row, _ in flatten_values(values, max_rows=10)
+            if key == "blobs.area"
+        }
+        assert limited == set(range(10))
+
+
+class TestColumnTable:
+    """测试列式表"""
+
+    def test_grow_and_drop(self):
+        """容量按倍数扩容，删除前部行"""
+        table = ColumnTable(VALUE_SCHEMA, capacity=2)
+        batch = {name: np.arange(5) for name in VALUE_SCHEMA}
+        table.append(batch)
+        table.append(batch)
+        assert table.size == 10 and table.capacity == 16
+
+        table.drop_front(7)
+        assert table.column("seq").tolist() == [2, 3, 4]
+
+
+class TestResultStore:
+    """测试结果存储"""
+
+    def test_queries(self):
+        """良率、Cpk、字段数值和工具耗时"""
+        store = ResultStore()
+        widths = [10.0, 10.1, 9.9, 10.05, 9.95]
+        for i, width in enumerate(widths):
+            store.append_frame(
+                _frame(width, [5.0, 6.0], ok=i != 2, caliper_ms=i + 1)
+            )
+
+        assert store.frame_count == 5
+        assert store.yield_rate() == pytest.approx(0.8)
+        assert store.yield_rate(tool="斑点分析") == 1.0
+        assert store.values("width", tool="卡尺测量").tolist() == widths
+        assert store.values("blobs.area", rows=True).tolist() == [5.0, 6.0] * 5
+
+        cpk = store.cpk("width", lsl=9.7, usl=10.3, tool="卡尺测量")
+        std = np.std(widths, ddof=1)
+        assert cpk["count"] == 5
+        assert cpk["cp"] == pytest.approx(0.6 / (6 * std))
+        assert cpk["cpk"] == pytest.approx(
+            min(10.3 - 10.0, 10.0 - 9.7) / (3 * std)
+        )
+
+        timing = store.tool_timing()
+        assert timing["卡尺测量"]["count"] == 5
+        assert timing["卡尺测量"]["mean_ms"] == pytest.approx(3.0)
+        assert timing["卡尺测量"]["max_ms"] == pytest.approx(5.0)
+
+    def test_result_data_mapping(self):
+        """接受 {工具名: ResultData}，未知字段返回空"""
+        store = ResultStore()
+        store.append_frame({"卡尺测量": _caliper(1.0, ok=False)}, frame_id=42)
+        columns = store.to_columns("tools")
+        assert columns["frame_id"].tolist() == [42]
+        assert columns["tool"].tolist() == ["卡尺测量"]
+        assert store.yield_rate() == 0.0
+        assert store.values("missing").size == 0
+        assert store.cpk("missing")["cpk"] is None
+
+    def test_window_bounded(self):
+        """内存中只保留最近 window 帧"""
+        store = ResultStore(window=10)
+        for i in range(100):
+            store.append_frame(_frame(float(i), [1.0]))
+
+        assert store.frame_count <= 12
+        widths = store.values("width")
+        assert widths[-1] == 99.0
+        assert widths.size == store.frame_count
+        assert store.stats["frames"] == 100
+
+    def test_sqlite_sink(self, tmp_path):
+        """后台按批落盘，窗口裁剪前的行不丢失"""
+        path = str(tmp_path / "history.db")
+        store = ResultStore(
+            window=8, sink=SQLiteResultSink(path), batch_size=4
+        )
+        for i in range(30):
+            store.append_frame(_frame(float(i), [1.0, 2.0]), frame_id=i)
+        store.close()
+
+        connection = sqlite3.connect(path)
+        frames = connection.execute(
+            "SELECT COUNT(DISTINCT frame_id) FROM tool_results"
+        ).fetchone()[0]
+        widths = connection.execute(
+            "SELECT value FROM result_values "
+            "WHERE key='width' AND tool='卡尺测量' ORDER BY seq"
+        ).fetchall()
+        connection.close()
+
+        assert frames == 30
+        assert [row[0] for row in widths] == [float(i) for i in range(30)]
+        assert store.stats["written_rows"]["tools"] == 60
+
+
+class TestSolutionIntegration:
+    """测试方案运行时记录结果"""
+
+    def test_solution_records_history(self):
+        """每次运行的工具结果进入方案的结果存储"""
+        from core.procedure import Procedure
+        from core.solution import Solution
+        from core.tool_base import ToolRegistry
+
+        solution = Solution("history")
+        procedure = Procedure("流程1")
+        procedure.add_tool(ToolRegistry.create_tool("Analysis", "像素计数"))
+        solution.add_procedure(procedure)
+
+        image = ImageData(data=np.full((40, 50), 200, dtype=np.uint8))
+        for _ in range(3):
+            solution.run(image)
+
+        store = solution.result_store
+        assert store.frame_count == 3
+        assert store.yield_rate() == 1.0
+        timing = store.tool_timing(procedure="流程1")
+        assert len(timing) == 1
+        assert next(iter(timing.values()))["count"] == 3
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索区域测试
+
+验证区域参数解析、零拷贝区域视图、结果坐标平移和多区域合并，
+以及斑点分析、像素计数、灰度匹配在搜索区域内执行并统计处理的像素数。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.search_region import offset_coordinates, parse_search_regions
+from data.image_data import ImageData
+from data.overlay import Overlay
+from tools.analysis.analysis import BlobFind, PixelCount
+from tools.vision.template_match import GrayMatch
+from utils.exceptions import ParameterException
+
+
+@pytest.fixture(scope="module")
+def dots():
+    """5行8列的白色圆点，圆心 (40 + 70*列, 40 + 80*行)"""
+    image = np.zeros((400, 600), np.uint8)
+    for row in range(5):
+        for col in range(8):
+            cv2.circle(image, (40 + 70 * col, 40 + 80 * row), 12, 255, -1)
+    return image
+
+
+def _centers():
+    return [
+        (40 + 70 * col, 40 + 80 * row) for row in range(5) for col in range(8)
+    ]
+
+
+class TestSearchRegion:
+    """测试区域解析与视图"""
+
+    def test_parse_and_contains(self):
+        """矩形、旋转矩形、多边形和列表格式"""
+        assert (
+            parse_search_regions(None) == [] and parse_search_regions({}) == []
+        )
+
+        rect, rotated, polygon = parse_search_regions(
+            [
+                {"x": 10, "y": 20, "width": 30, "height": 40},
+                {
+                    "center_x": 100,
+                    "center_y": 100,
+                    "width": 80,
+                    "height": 20,
+                    "angle": 45,
+                },
+                {"points": [[0, 0], [100, 0], [0, 100]]},
+            ]
+        )
+        assert rect.is_rect and rect.bounds(1000, 1000) == (10, 20, 30, 40)
+        assert rect.bounds(25, 1000) == (10, 20, 15, 40)
+        assert rect.contains([10, 39, 40], [20, 59, 30]).tolist() == [
+            True,
+            True,
+            False,
+        ]
+
+        # 沿45度方向的长边内，垂直方向超出短边
+        assert rotated.contains([125, 115], [125, 85]).tolist() == [
+            True,
+            False,
+        ]
+        assert polygon.contains([20, 80], [20, 80]).tolist() == [True, False]
+
+        with pytest.raises(ParameterException):
+            parse_search_regions(["not a region"])
+
+    def test_region_view_is_zero_copy(self, dots):
+        """区域视图与原帧共享像素，已计算的灰度图以切片共享"""
+        color = cv2.cvtColor(dots, cv2.COLOR_GRAY2BGR)
+        frame = ImageData(data=color)
+        gray = frame.derived.gray()
+
+        view = frame.region_view(100, 50, 200, 120)
+        assert view.width == 200 and view.height == 120
+        assert view.roi.to_dict() == {
+            "x": 100,
+            "y": 50,
+            "width": 200,
+            "height": 120,
+        }
+        assert np.shares_memory(view.data, frame.data)
+        assert np.shares_memory(view.derived.gray(), gray)
+        np.testing.assert_array_equal(
+            view.derived.gray(), gray[50:170, 100:300]
+        )
+
+    def test_offset_coordinates(self):
+        """坐标键、点序列、(x, y, ...)元组和列数组平移到整帧坐标"""
+        value = {
+            "rect": {"x": 1, "y": 2, "width": 3, "height": 4},
+            "bbox": [[0, 0], [5, 0]],
+            "matches": [(1, 2, 0.9)],
+            "table": {"cx": np.array([1.5]), "area": np.array([7.0])},
+            "size": (640, 480),
+        }
+        shifted = offset_coordinates(value, 10, 20)
+        assert shifted["rect"] == {"x": 11, "y": 22, "width": 3, "height": 4}
+        assert shifted["bbox"] == [[10, 20], [15, 20]]
+        assert shifted["matches"] == [(11, 22, 0.9)]
+        assert shifted["table"]["cx"].tolist() == [11.5]
+        assert shifted["table"]["area"].tolist() == [7.0]
+        assert shifted["size"] == (640, 480)
+        assert value["rect"]["x"] == 1
+
+        overlay = Overlay().add_rect(1, 2, 3, 4).translate(10, 20)
+        assert overlay.shapes[0].points.tolist() == [[11, 22], [14, 26]]
+
+
+class TestToolSearchRegion:
+    """测试工具在搜索区域内执行"""
+
+    def test_blob_find_rect_region(self, dots):
+        """只分析区域内的斑点，坐标为整帧坐标，统计处理的像素数"""
+        tool = BlobFind("blobs")
+        tool.set_param("min_area", 50)
+        tool.set_input(ImageData(data=dots))
+        assert tool.run()
+        assert tool.get_result().get_value("blob_count") == 40
+
+        tool.set_param(
+            "search_region", {"x": 130, "y": 100, "width": 220, "height": 200}
+        )
+        assert tool.run()
+        result = tool.get_result()
+        found = sorted((b["cx"], b["cy"]) for b in result.get_value("blobs"))
+        expected = [(x, y) for x in (180, 250, 320) for y in (120, 200, 280)]
+        assert found == expected
+        assert min(result.get_value("blob_table")["x"]) == 180 - 12
+        # 叠加图元也在整帧坐标下，输出图像为整帧
+        assert (
+            min(shape.points[:, 0].min() for shape in result.overlay)
+            == 180 - 12
+        )
+        assert tool.get_output().width == 600
+
+        stats = tool.get_pixel_stats()
+        assert stats["frames"] == 2
+        assert stats["processed_pixels"] == 600 * 400 + 220 * 200
+        assert 0 < stats["saved_ratio"] < 1
+
+    def test_blob_find_polygon_and_multiple_regions(self, dots):
+        """多边形区域按质心过滤，多个区域的结果合并"""
+        tool = BlobFind("blobs")
+        tool.set_param("min_area", 50)
+        tool.set_input(ImageData(data=dots))
+
+        triangle = np.float32([[0, 0], [480, 0], [0, 330]])
+        tool.set_param("search_region", {"points": triangle.tolist()})
+        assert tool.run()
+        expected = [
+            (x, y)
+            for x, y in _centers()
+            if cv2.pointPolygonTest(triangle, (float(x), float(y)), False) > 0
+        ]
+        found = [
+            (b["cx"], b["cy"]) for b in tool.get_result().get_value("blobs")
+        ]
+        assert sorted(found) == sorted(expected)
+
+        tool.set_param(
+            "search_region",
+            [
+                {"x": 0, "y": 0, "width": 150, "height": 150},
+                {
+                    "center_x": 390,
+                    "center_y": 280,
+                    "width": 170,
+                    "height": 30,
+                    "angle": 0,
+                },
+            ],
+        )
+        assert tool.run()
+        result = tool.get_result()
+        assert result.get_value("blob_count") == 4 + 3
+        assert sorted(result.get_value("blob_table")["cy"])[-3:] == [280.0] * 3
+        # 各区域从0编号的 id 合并后唯一
+        assert [b["id"] for b in result.get_value("blobs")] == list(range(7))
+        assert result.get_value("blob_table")["id"] == list(range(7))
+
+    def test_pixel_count_masked_region(self, dots):
+        """像素计数只统计掩码内的像素，多个区域合并后重新计算比例"""
+        tool = PixelCount("pixels")
+        tool.set_input(ImageData(data=dots))
+        triangle = [[200, 200], [300, 200], [250, 300]]
+        tool.set_param(
+            "search_region",
+            [
+                {"x": 0, "y": 0, "width": 100, "height": 100},
+                {"points": triangle},
+            ],
+        )
+        assert tool.run()
+        result = tool.get_result()
+
+        mask = np.zeros_like(dots)
+        mask[:100, :100] = 255
+        cv2.fillPoly(mask, [np.int32(triangle)], 255)
+        white = int(np.count_nonzero((dots > 127) & (mask > 0)))
+        assert result.get_value("total_pixels") == np.count_nonzero(mask)
+        assert result.get_value("white_pixels") == white
+        assert result.get_value("white_ratio") == pytest.approx(
+            white / np.count_nonzero(mask)
+        )
+
+    def test_gray_match_template_from_full_frame(self, dots):
+        """ROI模板仍从整帧截取，只在搜索区域内匹配"""
+        tool = GrayMatch("match")
+        tool.set_param("roi", {"x": 28, "y": 28, "width": 25, "height": 25})
+        tool.set_param("max_count", 50)
+        tool.set_param(
+            "search_region", {"x": 150, "y": 150, "width": 200, "height": 200}
+        )
+        tool.set_input(ImageData(data=dots))
+        assert tool.run()
+
+        result = tool.get_result()
+        centers = sorted(
+            (x + 12, y + 12) for x, y, _ in result.get_value("matches")
+        )
+        assert centers == [(x, y) for x in (180, 250, 320) for y in (200, 280)]
+        assert result.get_value("matched") is True
+
+        # 区域小于模板时没有匹配
+        tool.set_param(
+            "search_region", {"x": 0, "y": 0, "width": 10, "height": 10}
+        )
+        assert tool.run()
+        assert tool.get_result().get_value("match_count") == 0
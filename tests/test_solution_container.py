@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+方案容器测试
+
+验证数组以.npy形式存入方案容器、加载时内存映射，
+以及Solution/SolutionFileManager对容器和旧格式的读写。
+"""
+
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.procedure import Procedure
+from core.solution import Solution
+from core.solution_container import (
+    ARRAY_ALIGN,
+    MANIFEST_NAME,
+    is_container,
+    is_mapped,
+    load_solution_data,
+    materialize,
+    save_solution_data,
+)
+from core.tool_base import ToolRegistry
+
+
+def _make_solution(lut):
+    """创建一个参数中带数组的方案"""
+    solution = Solution("容器测试")
+    procedure = Procedure("流程1")
+    tool = ToolRegistry.create_tool("ImageFilter", "高斯滤波", "高斯滤波1")
+    tool.set_param("lut", lut)
+    procedure.add_tool(tool)
+    solution.add_procedure(procedure)
+    return solution
+
+
+class TestSolutionContainer:
+    """测试容器格式"""
+
+    def test_arrays_roundtrip_mapped(self, tmp_path):
+        """数组原样还原，且指向文件映射"""
+        path = str(tmp_path / "data.vmsol")
+        warp = np.random.rand(120, 160, 2).astype(np.float32)
+        mask = np.asfortranarray(np.eye(7, dtype=np.uint8))
+        data = {"name": "demo", "params": {"warp": warp, "items": [mask, 3]}}
+
+        assert save_solution_data(data, path) is True
+        assert is_container(path)
+
+        loaded = load_solution_data(path)
+        assert loaded["name"] == "demo"
+        assert np.array_equal(loaded["params"]["warp"], warp)
+        assert np.array_equal(loaded["params"]["items"][0], mask)
+        assert loaded["params"]["items"][1] == 3
+        assert is_mapped(loaded["params"]["warp"])
+        assert loaded["params"]["warp"].ctypes.data % ARRAY_ALIGN == 0
+
+    def test_mapped_arrays_are_copy_on_write(self, tmp_path):
+        """修改加载的数组不会写回文件"""
+        path = str(tmp_path / "data.vmsol")
+        save_solution_data({"a": np.zeros(16, dtype=np.int32)}, path)
+
+        loaded = load_solution_data(path)
+        loaded["a"][:] = 7
+        assert load_solution_data(path)["a"].sum() == 0
+
+        copied = materialize(loaded)
+        assert not is_mapped(copied["a"])
+        assert copied["a"].sum() == 7 * 16
+
+    def test_plain_data_stays_json(self, tmp_path):
+        """没有数组的方案仍保存为JSON"""
+        path = str(tmp_path / "plain.vmsol")
+        assert (
+            save_solution_data({"name": "plain", "x": (1, 2)}, path) is False
+        )
+
+        with open(path, "r", encoding="utf-8") as f:
+            assert json.load(f) == {"name": "plain", "x": [1, 2]}
+
+    def test_legacy_compressed_vmsol(self, tmp_path):
+        """旧的压缩vmsol可以直接加载"""
+        path = str(tmp_path / "legacy.vmsol")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(MANIFEST_NAME, json.dumps({"name": "legacy"}))
+
+        assert load_solution_data(path) == {"name": "legacy"}
+
+
+class TestSolutionSaveLoad:
+    """测试方案保存和加载"""
+
+    def test_solution_roundtrip(self, tmp_path):
+        """方案参数中的数组保存到容器并映射加载"""
+        path = str(tmp_path / "solution.vmsol")
+        lut = np.arange(256, dtype=np.uint8)[::-1].copy()
+        assert _make_solution(lut).save(path)
+        assert is_container(path)
+
+        solution = Solution()
+        assert solution.load(path)
+        tool = solution.procedures[0].tools[0]
+        assert np.array_equal(tool.get_param("lut"), lut)
+        assert is_mapped(tool.get_param("lut"))
+
+        # 覆盖当前加载的文件
+        assert solution.save(path)
+        assert not is_mapped(tool.get_param("lut"))
+        assert Solution().load(path)
+
+    def test_file_manager_vmsol(self, tmp_path):
+        """SolutionFileManager的vmsol格式使用容器"""
+        from core.solution_file_manager import SolutionFileManager
+
+        path = str(tmp_path / "manager.vmsol")
+        lut = np.linspace(0, 1, 64, dtype=np.float64)
+        manager = SolutionFileManager()
+        assert manager.save_solution(_make_solution(lut), path, format="vmsol")
+        assert is_container(path)
+
+        solution = manager.load_solution(path)
+        tool = solution.procedures[0].tools[0]
+        assert np.array_equal(tool.get_param("lut"), lut)
@@ -5,6 +5,7 @@
 
 import sys
 import os
+import tempfile
 import time
 import cv2
 import numpy as np
@@ -153,7 +154,9 @@ def test_ghosting_reduction():
         stitched_img = result.get_image("stitched_image")
         if stitched_img:
             # 保存结果以便目视检查
-            output_path = "test_stitching_result.jpg"
+            output_path = os.path.join(
+                tempfile.gettempdir(), "test_stitching_result.jpg"
+            )
             cv2.imwrite(output_path, stitched_img.data)
             print(f"结果已保存到: {output_path}")
             print(f"输出尺寸: {stitched_img.width}x{stitched_img.height}")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块并行执行测试
+
+验证带光环的分块结果与整图处理逐像素一致，
+以及滤波工具、表面缺陷检测在分块模式下的输出不变。
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.tile_executor as tile_executor
+from core.tile_executor import TileExecutor, kernel_halo, plan_tiles
+from core.tool_base import ToolRegistry
+from data.image_data import ImageData
+
+
+def _noise_image(height=480, width=360, channels=None, seed=0):
+    """生成随机噪声图像"""
+    rng = np.random.default_rng(seed)
+    shape = (height, width) if channels is None else (height, width, channels)
+    return rng.integers(0, 256, shape, dtype=np.uint8)
+
+
+@pytest.fixture
+def tiled(monkeypatch):
+    """让全局执行器对任意尺寸图像分块"""
+    executor = TileExecutor(max_workers=4, min_pixels=0)
+    monkeypatch.setattr(tile_executor, "_default_executor", executor)
+    yield executor
+    executor.shutdown()
+
+
+class TestTilePlan:
+    """测试分块划分"""
+
+    def test_tiles_cover_image(self):
+        """中心区域不重叠且覆盖全部行"""
+        tiles = plan_tiles(1000, halo=7, count=6)
+        assert len(tiles) == 6
+        assert tiles[0].y0 == 0 and tiles[-1].y1 == 1000
+        for prev, cur in zip(tiles, tiles[1:]):
+            assert prev.y1 == cur.y0
+            assert cur.pad_y0 == cur.y0 - 7
+        assert tiles[0].pad_y0 == 0 and tiles[-1].pad_y1 == 1000
+
+    def test_small_image_single_tile(self):
+        """图像太矮时不分块"""
+        assert len(plan_tiles(100, halo=3, count=8)) == 1
+
+    def test_threshold(self):
+        """低于像素数阈值时整图处理"""
+        executor = TileExecutor(max_workers=4, min_pixels=10_000)
+        assert not executor.should_tile(np.zeros((50, 50), np.uint8))
+        assert executor.should_tile(np.zeros((200, 200), np.uint8))
+        assert not TileExecutor(max_workers=1, min_pixels=0).should_tile(
+            np.zeros((200, 200), np.uint8)
+        )
+
+
+class TestTileExecutor:
+    """测试分块执行"""
+
+    @pytest.mark.parametrize("channels", [None, 3])
+    def test_matches_whole_image(self, channels):
+        """分块结果与整图结果一致"""
+        image = _noise_image(channels=channels)
+
+        def func(patch):
+            return cv2.GaussianBlur(patch, (9, 9), 0)
+
+        executor = TileExecutor(max_workers=4)
+
+        tiled = executor.run(image, func, kernel_halo(9), force=True)
+        assert np.array_equal(tiled, func(image))
+        executor.shutdown()
+
+    def test_writes_preallocated_output(self):
+        """结果写入调用方提供的输出"""
+        image = _noise_image()
+        out = np.zeros_like(image)
+        executor = TileExecutor(max_workers=3)
+
+        result = executor.run(
+            image,
+            lambda p: cv2.medianBlur(p, 5),
+            kernel_halo(5),
+            out=out,
+            force=True,
+        )
+        assert result is out
+        assert np.array_equal(out, cv2.medianBlur(image, 5))
+        executor.shutdown()
+
+    def test_nested_call_runs_whole(self):
+        """处理函数内部再次调用时不再分块"""
+        image = _noise_image()
+        executor = TileExecutor(max_workers=4)
+        inner_shapes = []
+
+        def outer(patch):
+            inner_shapes.append(
+                executor.run(patch, lambda p: p + 1, 0, force=True).shape
+            )
+            return patch
+
+        executor.run(image, outer, 0, force=True)
+        assert len(inner_shapes) == 4
+        assert sum(shape[0] for shape in inner_shapes) == image.shape[0]
+        executor.shutdown()
+
+    def test_process_image_tiles_stitches(self, monkeypatch):
+        """cpu_optimization的分块处理返回拼接后的整图"""
+        # 导入cpu_optimization包会把包目录插到sys.path最前，测试结束后恢复
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        from modules.cpu_optimization.core.parallel_engine import (
+            process_image_tiles,
+        )
+
+        image = _noise_image(300, 400)
+
+        def func(patch):
+            return cv2.blur(patch, (7, 7))
+
+        result = process_image_tiles(
+            image, func, tile_size=96, overlap=3, workers=4
+        )
+        assert np.array_equal(result, func(image))
+
+
+class TestTiledTools:
+    """测试工具在分块模式下输出不变"""
+
+    @pytest.mark.parametrize(
+        "tool_name, params",
+        [
+            ("高斯滤波", {"kernel_size": 7, "sigma_x": 2.5}),
+            ("中值滤波", {"kernel_size": 5}),
+            (
+                "双边滤波",
+                {"diameter": 9, "sigma_color": 50, "sigma_space": 50},
+            ),
+            ("双边滤波", {"diameter": 0, "sigma_color": 50, "sigma_space": 3}),
+            (
+                "形态学处理",
+                {"operation": "open", "kernel_size": 5, "iterations": 2},
+            ),
+            (
+                "形态学处理",
+                {"operation": "gradient", "kernel_size": 3, "iterations": 3},
+            ),
+        ],
+    )
+    def test_filters(self, tiled, monkeypatch, tool_name, params):
+        """滤波工具分块与整图输出一致"""
+        image = _noise_image(channels=3)
+
+        def run_tool():
+            tool = ToolRegistry.create_tool("ImageFilter", tool_name)
+            for key, value in params.items():
+                tool.set_param(key, value)
+            tool.set_input(ImageData(data=image))
+            assert tool.run()
+            return tool.get_output().data
+
+        tiled_output = run_tool()
+        monkeypatch.setattr(tiled, "_min_pixels", image.size * 10)
+        assert np.array_equal(tiled_output, run_tool())
+
+    @pytest.mark.parametrize("adaptive", [True, False])
+    def test_surface_defect_detector(self, tiled, monkeypatch, adaptive):
+        """表面缺陷检测分块与整图结果一致"""
+        image = np.full((600, 400), 200, dtype=np.uint8)
+        for i in range(12):
+            cv2.circle(
+                image, (40 + (i % 4) * 100, 60 + (i // 4) * 200), 8 + i, 40, -1
+            )
+        image = cv2.add(image, _noise_image(600, 400) // 16)
+
+        def detect():
+            tool = ToolRegistry.create_tool("Vision", "表面缺陷检测")
+            tool.set_param("adaptive_threshold", adaptive)
+            tool.set_param("use_multiscale", False)
+            tool.set_input(ImageData(data=image))
+            assert tool.run()
+            return tool.get_result().get_value("defects")
+
+        tiled_defects = detect()
+        monkeypatch.setattr(tiled, "_min_pixels", image.size * 10)
+        assert tiled_defects == detect()
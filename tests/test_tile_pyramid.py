@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+瓦片金字塔测试
+
+验证层级尺寸和后台生成顺序、按缩放选择层级、可见瓦片计算、
+按字节数限制的瓦片缓存，以及图像视图对超大图像的分块显示。
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tile_pyramid import TileCache, TilePyramid
+
+
+@pytest.fixture(scope="module")
+def image():
+    """5000x3000 的渐变图像，像素值随坐标变化便于检查瓦片位置"""
+    x = np.linspace(0, 255, 5000, dtype=np.float32)
+    y = np.linspace(0, 255, 3000, dtype=np.float32)
+    gray = ((x[None, :] + y[:, None]) / 2).astype(np.uint8)
+    return np.dstack([gray, gray, 255 - gray])
+
+
+class TestPyramid:
+    """测试金字塔层级"""
+
+    def test_levels_built_coarse_first(self, image):
+        """后台先生成最粗的概览层，再由细到粗补齐其他层"""
+        ready = []
+        pyramid = TilePyramid(image, 512, on_level_ready=ready.append)
+        assert pyramid.wait_ready(10)
+
+        assert pyramid.level_count == 5
+        assert ready == [4, 1, 2, 3]
+        assert pyramid.level_size(4) == (313, 188)
+        assert pyramid.get_tile(4, 0, 0).shape == (188, 313, 3)
+        # 第0层直接引用原图
+        assert np.shares_memory(pyramid.get_tile(0, 0, 0), image)
+
+        pyramid.close()
+        assert not pyramid.is_ready(1) and pyramid.is_ready(0)
+
+    def test_level_selection(self, image):
+        """按缩放选择层级；所需层级未生成时用更粗的层级代替"""
+        pyramid = TilePyramid(image, 512, background=False)
+        assert pyramid.level_for_scale(2.0) == 0
+        assert pyramid.level_for_scale(0.6) == 0
+        assert pyramid.level_for_scale(0.5) == 1
+        assert pyramid.level_for_scale(0.1) == 3
+        assert pyramid.level_for_scale(0.001) == 4
+
+        pyramid._levels[2] = None
+        assert pyramid.ready_level(2) == 3
+        pyramid._levels[3] = pyramid._levels[4] = None
+        assert pyramid.ready_level(2) is None
+        assert pyramid.ready_level(0) == 0
+
+    def test_visible_tiles(self, image):
+        """只返回与可见区域相交的瓦片，瓦片矩形换算到原图坐标"""
+        pyramid = TilePyramid(image, 512, background=False)
+        assert pyramid.tile_grid(0) == (10, 6)
+        assert pyramid.tiles_in_rect(0, 1000, 600, 100, 100) == [
+            (1, 1),
+            (2, 1),
+        ]
+        assert len(pyramid.tiles_in_rect(0, -50, -50, 6000, 4000)) == 60
+        # 第2层 1250x750，瓦片网格 3x2
+        assert len(pyramid.tiles_in_rect(2, 0, 0, 5000, 3000)) == 6
+        assert pyramid.tiles_in_rect(2, 2100, 2100, 10, 10) == [(1, 1)]
+
+        x, y, w, h = pyramid.tile_rect(0, 9, 5)
+        assert (x, y, w, h) == (4608, 2560, 392, 440)
+        x, y, w, h = pyramid.tile_rect(1, 4, 0)
+        assert x == pytest.approx(4096) and w == pytest.approx(904)
+
+
+class TestTileCache:
+    """测试瓦片缓存"""
+
+    def test_lru_bounded_by_bytes(self):
+        """超过字节上限时淘汰最久未使用的瓦片"""
+        cache = TileCache(max_bytes=300)
+        for i in range(3):
+            cache.put(i, f"tile{i}", 100)
+        assert cache.get(0) == "tile0"
+
+        cache.put(3, "tile3", 100)
+        assert 1 not in cache and 0 in cache
+        stats = cache.get_stats()
+        assert stats["bytes"] == 300 and stats["evictions"] == 1
+        assert cache.get(1) is None and stats["hits"] == 1
+
+
+@pytest.mark.gui
+class TestTiledView:
+    """测试图像视图的分块显示"""
+
+    def test_large_image_tiled(self, image, monkeypatch):
+        """超大图像使用分块图形项，只加载可见瓦片，缩放和自适应窗口接口不变"""
+        from PyQt5.QtWidgets import QApplication
+
+        from core import zoomable_image
+        from core.zoomable_image import TiledImageItem, ZoomableGraphicsView
+
+        app = QApplication.instance() or QApplication(sys.argv)
+        view = ZoomableGraphicsView()
+        view.resize(400, 300)
+        view.show()
+
+        view.set_image_array(image[:300, :400])
+        assert not isinstance(view._pixmap_item, TiledImageItem)
+
+        monkeypatch.setattr(zoomable_image, "TILED_IMAGE_PIXELS", 1000 * 1000)
+        view.set_image_array(image)
+        item = view._pixmap_item
+        assert isinstance(item, TiledImageItem)
+        assert item.pyramid.wait_ready(10)
+
+        view.set_zoom(2.0)
+        view.centerOn(item.mapToScene(100, 100))
+        for _ in range(20):
+            app.processEvents()
+            item._executor.submit(lambda: None).result()
+        loaded = {
+            key
+            for key in item.pyramid.tiles_in_rect(0, 0, 0, 5000, 3000)
+            if (0,) + key in item.cache
+        }
+        assert 0 < len(loaded) < 60
+        assert view.get_zoom() == 2.0
+
+        view.fit_to_window()
+        assert view.get_zoom() == 1.0
+
+        view.set_image_array(image[:10, :10])
+        assert item._closed
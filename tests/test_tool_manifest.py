@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工具清单与按需导入测试
+
+验证工具清单与代码一致、注册表按需导入工具模块，
+以及冷启动耗时没有回退。
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tool_base import ToolRegistry
+from core.tool_manifest import ToolManifest, ToolManifestEntry
+from tests.benchmark_startup import (
+    STARTUP_BUDGET,
+    check_budget,
+    forbidden_imports,
+    run_scenario,
+)
+
+
+class TestToolManifest:
+    """测试工具清单"""
+
+    def test_manifest_in_sync(self):
+        """清单与已注册的工具类一致"""
+        differences = ToolManifest.load().diff(ToolManifest.build())
+        assert differences == [], (
+            "工具清单已过期，请运行 python -m core.tool_manifest: "
+            f"{differences}"
+        )
+
+    def test_manifest_roundtrip(self, tmp_path):
+        """清单保存后可以原样加载"""
+        entry = ToolManifestEntry(
+            category="Test",
+            name="测试工具",
+            module="tests.fake_module",
+            class_name="FakeTool",
+            params={"kernel_size": {"name": "核大小", "default": 3}},
+        )
+        path = str(tmp_path / "manifest.json")
+        ToolManifest([entry]).save(path)
+
+        loaded = ToolManifest.load(path)
+        assert loaded.keys() == ["Test.测试工具"]
+        assert loaded.get("Test.测试工具").to_dict() == entry.to_dict()
+
+    def test_missing_manifest_is_empty(self, tmp_path):
+        """清单不存在时返回空清单"""
+        manifest = ToolManifest.load(str(tmp_path / "missing.json"))
+        assert len(manifest) == 0
+
+
+class TestLazyRegistry:
+    """测试注册表按需导入"""
+
+    def test_categories_without_import(self):
+        """类别和参数定义来自清单"""
+        assert "ImageFilter" in ToolRegistry.get_categories()
+        params = ToolRegistry.get_param_definitions("Vision", "灰度匹配")
+        assert "min_score" in params
+
+    def test_create_tool_imports_only_its_module(self):
+        """创建滤波工具只导入滤波模块"""
+        result = run_scenario("two_filters")
+        tool_modules = [m for m in result["modules"] if m.startswith("tools")]
+        assert tool_modules == [
+            "tools",
+            "tools.vision",
+            "tools.vision.image_filter",
+        ]
+        assert forbidden_imports(result["modules"]) == []
+
+    def test_lazy_package_exports(self):
+        """包级导出仍然可用"""
+        import tools
+
+        assert tools.GaussianFilter.tool_name == "高斯滤波"
+        assert tools.BlobFind.tool_category == "Analysis"
+        assert tools.vision.GrayMatch.tool_name == "灰度匹配"
+
+
+@pytest.mark.parametrize("scenario", sorted(STARTUP_BUDGET))
+def test_cold_start_budget(scenario):
+    """冷启动耗时不得超过预算"""
+    result = check_budget(scenario)
+    assert result["forbidden"] == []
+    assert result["overhead_s"] <= result["budget_s"], (
+        f"{scenario} 冷启动回退: "
+        f"{result['overhead_s'] * 1000:.0f}ms > "
+        f"{result['budget_s'] * 1000:.0f}ms"
+    )
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+方案加载预热测试
+
+验证批量参数恢复、工具并行预热、就绪信号和加载耗时报告。
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.procedure import Procedure
+from core.solution import Solution
+from core.tool_base import ToolBase, ToolRegistry
+from core.tool_warmup import ToolLoadRecord, ToolWarmup, needs_warmup
+
+
+class _SlowTool(ToolBase):
+    """预热耗时固定的测试工具"""
+
+    tool_name = "预热测试"
+    tool_category = "Test"
+
+    def __init__(self, name=None, delay=0.2, fail=False):
+        super().__init__(name)
+        self.delay = delay
+        self.fail = fail
+        self.changed = []
+
+    def _on_param_changed(self, key, old_value, new_value):
+        self.changed.append(key)
+
+    def warmup(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("模型文件不存在")
+        return True
+
+    def _run_impl(self):
+        pass
+
+
+def _record(tool):
+    return ToolLoadRecord("流程1", tool.name, "Test.预热测试")
+
+
+class TestRestoreParams:
+    """测试批量参数恢复"""
+
+    def test_restore_skips_callbacks(self):
+        """批量恢复不触发参数变更回调"""
+        tool = _SlowTool("t")
+        tool.changed.clear()
+        tool.restore_params({"kernel_size": 4, "mode": "fast"})
+
+        assert tool.get_param("kernel_size") == 4
+        assert tool.get_param("mode") == "fast"
+        assert tool.changed == []
+
+
+class TestToolWarmup:
+    """测试并行预热"""
+
+    def test_parallel_warmup_and_report(self):
+        """预热并行执行，失败记录在报告中"""
+        tools = [_SlowTool("a"), _SlowTool("b"), _SlowTool("c", fail=True)]
+        reports = []
+        warmup = ToolWarmup(max_workers=3)
+        warmup.add_ready_callback(reports.append)
+
+        start = time.perf_counter()
+        warmup.start([(tool, _record(tool)) for tool in tools])
+        assert warmup.wait(timeout=5)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.5, f"预热未并行: {elapsed:.2f}s"
+        assert len(reports) == 1
+        by_name = {record.tool: record for record in reports[0]}
+        assert by_name["a"].success and by_name["a"].warmup_time >= 0.2
+        assert not by_name["c"].success
+        assert "模型文件不存在" in by_name["c"].error
+
+    def test_no_heavy_tools_ready_immediately(self):
+        """没有需要预热的工具时立即就绪"""
+        tool = ToolRegistry.create_tool("ImageFilter", "高斯滤波", "g")
+        assert not needs_warmup(tool)
+
+        warmup = ToolWarmup().start([(tool, _record(tool))])
+        assert warmup.is_ready
+        assert not warmup.get_report()[0].warmed
+
+
+class TestSolutionWarmup:
+    """测试方案加载预热"""
+
+    def test_load_warms_template(self, tmp_path):
+        """加载方案后在后台预加载匹配模板"""
+        template_path = str(tmp_path / "template.png")
+        cv2.imwrite(template_path, np.full((20, 20), 128, dtype=np.uint8))
+
+        solution = Solution("预热方案")
+        procedure = Procedure("流程1")
+        tool = ToolRegistry.create_tool("Vision", "灰度匹配", "匹配1")
+        tool.set_param("template_path", template_path)
+        procedure.add_tool(tool)
+        procedure.add_tool(
+            ToolRegistry.create_tool("ImageFilter", "高斯滤波", "滤波1")
+        )
+        solution.add_procedure(procedure)
+        path = str(tmp_path / "warm.vmsol")
+        assert solution.save(path)
+
+        events = []
+        loaded = Solution()
+        loaded.register_callback("load_ready", events.append)
+        assert loaded.load(path)
+        assert loaded.wait_ready(timeout=10)
+        assert loaded.is_ready
+
+        match_tool = loaded.procedures[0].get_tool("匹配1")
+        assert match_tool._template_image is not None
+
+        report = {r["tool"]: r for r in loaded.get_load_report()}
+        assert report["匹配1"]["warmed"] and report["匹配1"]["success"]
+        assert not report["滤波1"]["warmed"]
+        assert len(events) == 1 and len(events[0].data) == 2
+
+    def test_run_does_not_wait_on_stuck_warmup(self):
+        """预热卡住时运行只等待有限时间，之后不再等待"""
+        solution = Solution("卡住的预热")
+        procedure = Procedure("流程1")
+        tool = _SlowTool("慢", delay=3)
+        procedure.add_tool(tool)
+        solution.add_procedure(procedure)
+        solution.warmup_wait_timeout = 0.1
+        solution.start_warmup()
+
+        start = time.perf_counter()
+        solution.run()
+        solution.run()
+        assert time.perf_counter() - start < 1.5
+        assert not solution.is_ready
+
+    def test_template_reloaded_after_edit(self, tmp_path):
+        """模板文件修改后重新加载"""
+        template_path = str(tmp_path / "template.png")
+        cv2.imwrite(template_path, np.full((20, 20), 128, dtype=np.uint8))
+        tool = ToolRegistry.create_tool("Vision", "灰度匹配", "匹配1")
+        tool.set_param("template_path", template_path)
+        assert tool.warmup()
+        first = tool._template_image
+        assert tool.warmup() and tool._template_image is first
+
+        cv2.imwrite(template_path, np.full((30, 30), 64, dtype=np.uint8))
+        mtime = os.path.getmtime(template_path) + 1
+        os.utime(template_path, (mtime, mtime))
+        assert tool.warmup()
+        assert tool._template_image.shape == (30, 30)
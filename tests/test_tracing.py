@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+执行追踪测试
+
+验证区间记录、环形缓冲区覆盖、Chrome trace导出、耗时直方图，
+以及工具执行、流程传递、流水线排队、通信发送和图像拷贝的埋点。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import tracing
+from core.tracing import (
+    clear_trace,
+    collect_spans,
+    disable_tracing,
+    enable_tracing,
+    export_chrome_trace,
+    latency_histogram,
+    record_span,
+    trace_span,
+    traced,
+)
+from data.image_data import ImageData
+
+
+@pytest.fixture
+def tracing_on():
+    """启用追踪，测试结束后停用并清空"""
+    enable_tracing()
+    clear_trace()
+    yield
+    disable_tracing()
+    clear_trace()
+    enable_tracing(tracing.DEFAULT_BUFFER_CAPACITY)
+    disable_tracing()
+
+
+class TestTracer:
+    """测试追踪器"""
+
+    def test_disabled_records_nothing(self):
+        """未启用时返回共享空对象，不记录"""
+        disable_tracing()
+        clear_trace()
+        span = trace_span("noop", "test", value=1)
+        assert span is trace_span("other")
+        with span as inner:
+            inner.set(bytes=10)
+        record_span("noop", "test", 0, 10)
+        assert collect_spans() == []
+
+    def test_spans_and_args(self, tracing_on):
+        """记录区间、附加参数和异常类型"""
+        with trace_span("outer", "test", frame=1) as span:
+            time.sleep(0.002)
+            span.set(bytes=128)
+        with pytest.raises(ValueError):
+            with trace_span("failing", "test"):
+                raise ValueError("boom")
+
+        spans = {span["name"]: span for span in collect_spans("test")}
+        assert spans["outer"]["args"] == {"frame": 1, "bytes": 128}
+        assert spans["outer"]["duration_ns"] >= 2_000_000
+        assert spans["failing"]["args"]["error"] == "ValueError"
+
+    def test_traced_decorator(self, tracing_on):
+        """装饰器记录函数调用"""
+
+        @traced("work", "test", lambda n: {"n": n})
+        def work(n):
+            return n * 2
+
+        assert work(3) == 6
+        assert collect_spans("test")[0]["args"] == {"n": 3}
+
+    def test_ring_buffer_overwrites(self):
+        """缓冲区满后保留最新的区间"""
+        enable_tracing(capacity=16)
+        try:
+            for i in range(40):
+                record_span(f"s{i}", "ring", i, 1)
+            names = [span["name"] for span in collect_spans("ring")]
+            assert names == [f"s{i}" for i in range(24, 40)]
+        finally:
+            enable_tracing(tracing.DEFAULT_BUFFER_CAPACITY)
+            disable_tracing()
+            clear_trace()
+
+    def test_per_thread_buffers(self, tracing_on):
+        """各线程写入自己的缓冲区"""
+
+        def worker():
+            for _ in range(50):
+                with trace_span("threaded", "test"):
+                    pass
+
+        threads = [
+            threading.Thread(target=worker, name=f"T{i}") for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        spans = collect_spans("test")
+        assert len(spans) == 200
+        assert {span["thread"] for span in spans} == {"T0", "T1", "T2", "T3"}
+
+    def test_dead_thread_buffers_dropped(self, tracing_on):
+        """已退出线程的缓冲区收集后丢弃，未收集的数量有上限"""
+
+        def run_threads(count):
+            for i in range(count):
+                thread = threading.Thread(
+                    target=lambda: record_span("short", "dead", 0, 1),
+                    name=f"D{i}",
+                )
+                thread.start()
+                thread.join()
+
+        run_threads(10)
+        assert len(collect_spans("dead")) == 10
+        run_threads(1)
+        with tracing._buffers_lock:
+            dead = [b for b in tracing._buffers if not b.is_alive()]
+        # 已收集的10个已丢弃，只剩最新线程的缓冲区
+        assert len(dead) == 1
+
+        run_threads(tracing.MAX_DEAD_BUFFERS + 20)
+        with tracing._buffers_lock:
+            dead = [b for b in tracing._buffers if not b.is_alive()]
+        assert len(dead) <= tracing.MAX_DEAD_BUFFERS + 1
+        assert len(collect_spans("dead")) == len(dead)
+
+    def test_chrome_trace_export(self, tracing_on, tmp_path):
+        """导出的JSON符合Chrome trace格式"""
+        with trace_span("step", "test", shape=np.int64(3)):
+            pass
+        path = tmp_path / "trace.json"
+        export_chrome_trace(str(path))
+
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        meta = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+        assert complete[0]["name"] == "step" and complete[0]["args"] == {
+            "shape": 3
+        }
+        assert complete[0]["dur"] >= 0
+        assert meta[0]["args"]["name"] == threading.current_thread().name
+
+    def test_latency_histogram(self, tracing_on):
+        """按区间名统计耗时分布"""
+        for duration_ms in [0.3, 0.3, 4, 30]:
+            record_span("tool_a", "tool", 0, int(duration_ms * 1e6))
+        record_span("tool_b", "tool", 0, 1_000)
+
+        histogram = latency_histogram("tool", buckets_ms=(1, 10))
+        assert histogram["tool_a"]["count"] == 4
+        assert histogram["tool_a"]["max_ms"] == pytest.approx(30)
+        assert histogram["tool_a"]["buckets"] == [
+            (1, 2),
+            (10, 1),
+            (float("inf"), 1),
+        ]
+        assert histogram["tool_b"]["count"] == 1
+
+
+class TestInstrumentation:
+    """测试埋点"""
+
+    def test_procedure_spans(self, tracing_on):
+        """流程执行记录流程、工具和传递区间"""
+        from core.procedure import Procedure
+        from core.tool_base import ToolRegistry
+
+        procedure = Procedure("流程1")
+        blob = ToolRegistry.create_tool("Analysis", "斑点分析")
+        count = ToolRegistry.create_tool("Analysis", "像素计数")
+        procedure.add_tool(blob)
+        procedure.add_tool(count)
+        procedure.connect(blob.name, count.name)
+        procedure.run(ImageData(data=np.zeros((40, 50), np.uint8)))
+
+        categories = {span["category"] for span in collect_spans()}
+        assert {"tool", "procedure", "memory"} <= categories
+        assert set(latency_histogram("tool")) == {blob.name, count.name}
+        names = [span["name"] for span in collect_spans("procedure")]
+        assert "propagate" in names and "流程1" in names
+
+    def test_image_copy_bytes(self, tracing_on):
+        """图像拷贝记录字节数，copy只复制一次"""
+        image = ImageData(data=np.zeros((10, 20, 3), np.uint8))
+        clear_trace()
+        image.copy()
+        spans = collect_spans("memory")
+        assert len(spans) == 1
+        assert spans[0]["args"]["bytes"] == 600
+
+    def test_pipeline_queue_wait(self, tracing_on):
+        """流水线阶段记录排队等待和处理区间"""
+        from core.pipeline import DeterministicPipeline, PipelineStage
+
+        done = threading.Event()
+        pipeline = DeterministicPipeline(max_pipeline_depth=2)
+        pipeline.add_stage(
+            PipelineStage(
+                "execute",
+                lambda frame: 1,
+                output_callback=lambda f, r: done.set(),
+            )
+        )
+        pipeline.start()
+        try:
+            pipeline.put_frame(np.zeros((4, 4), np.uint8))
+            assert done.wait(2)
+        finally:
+            pipeline.stop()
+
+        names = [span["name"] for span in collect_spans("pipeline")]
+        assert "queue_wait" in names and "execute" in names
+
+    def test_protocol_send(self, tracing_on):
+        """协议子类的send自动记录字节数"""
+        from core.communication.protocol_base import ProtocolBase
+
+        class EchoProtocol(ProtocolBase):
+            protocol_name = "echo"
+
+            def send(self, data):
+                return True
+
+        assert EchoProtocol().send("héllo")
+        span = collect_spans("communication")[0]
+        assert span["name"] == "comm.send"
+        assert span["args"] == {"protocol": "echo", "bytes": 6}
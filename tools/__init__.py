@@ -4,22 +4,32 @@
 工具模块包
 
 包含各种视觉、通信和分析工具。
+
+注意：子包和工具类均按需导入（模块级 __getattr__），导入本包不会加载
+任何工具模块。工具的注册由 ToolRegistry 依据 tools/tool_manifest.json
+按需完成。
 """
 
-# 导入子包
-from . import vision
-from . import communication
-from . import analysis
+import importlib
 
-# 导入根目录工具文件
-from . import image_source
-from . import camera_parameter_setting
-from . import multi_image_selector
+# 子包和根目录工具模块
+_SUBMODULES = (
+    "vision",
+    "communication",
+    "analysis",
+    "image_source",
+    "camera_parameter_setting",
+    "multi_image_selector",
+)
 
-# 重新导出常用工具
-from .vision import *
-from .communication import *
-from .analysis import *
+# 导出名称 -> 所在模块（相对本包）
+_LAZY_EXPORTS = {
+    # 图像源工具
+    "ImageSource": ".image_source",
+    "CameraSource": ".image_source",
+    "MultiImageSelector": ".multi_image_selector",
+    "CameraParameterSettingTool": ".camera_parameter_setting",
+}
 
 __all__ = [
     # 图像源工具
@@ -69,3 +79,32 @@ __all__ = [
     'communication',
     'analysis'
 ]
+
+
+def _find_export_module(name):
+    """查找导出名称所在模块，子包的导出由子包自身的映射决定"""
+    if name in _LAZY_EXPORTS:
+        return _LAZY_EXPORTS[name]
+    for package in ("vision", "communication", "analysis"):
+        subpackage = importlib.import_module(f".{package}", __name__)
+        if name in subpackage.__all__:
+            return f".{package}"
+    return None
+
+
+def __getattr__(name):
+    """延迟导入子模块和工具类"""
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    module_name = _find_export_module(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -4,14 +4,33 @@
 分析工具包
 
 包含各种数据分析和处理工具。
+
+注意：工具类按需导入。
 """
 
-# 导入所有分析工具
-from .analysis import BlobFind, PixelCount, Histogram, Caliper
+import importlib
+
+# 工具类 -> 所在模块（相对本包）
+_LAZY_EXPORTS = {
+    'BlobFind': '.analysis',
+    'PixelCount': '.analysis',
+    'Histogram': '.analysis',
+    'Caliper': '.analysis',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """延迟导入工具类"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'BlobFind',
-    'PixelCount',
-    'Histogram',
-    'Caliper'
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
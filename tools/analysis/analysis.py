@@ -20,8 +20,15 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import cv2
 import numpy as np
 
-from core.tool_base import ToolParameter, ToolRegistry, VisionAlgorithmToolBase
-from data.image_data import ROI, ImageData, ResultData
+from core.tool_base import (
+    ToolParameter,
+    ToolRegistry,
+    VisionAlgorithmToolBase,
+    search_region_parameter,
+)
+from data.image_data import DataType, ResultData
+from data.overlay import Overlay
+from tools.analysis.blob_engine import analyze_blobs, filter_blobs
 from utils.exceptions import ToolExecutionException as VisionAlgorithmException
 
 
@@ -45,12 +52,25 @@ class BlobFind(VisionAlgorithmToolBase):
     - draw_contours: 是否绘制轮廓
     - draw_centroids: 是否绘制中心点
     - draw_bounding_boxes: 是否绘制外接矩形
+    - max_draw: 最多绘制的斑点数量，0 表示全部(结果中的斑点数量不受限制)
+    - max_blob_list: blobs 字典列表最多包含的斑点数量，0 表示全部
+    - search_region: 搜索区域，只分析区域内的像素，质心在区域外的斑点被丢弃
+
+    结果：
+    - blob_count: 斑点总数
+    - blobs: 前 max_blob_list 个斑点的字典列表(id/area/x/y/width/height/
+      cx/cy/perimeter/circularity/aspect_ratio/orientation/holes)，
+      供界面显示和逐个斑点处理
+    - blob_table: 全部斑点的同样字段的列字典(列名 -> 列表)，斑点很多时
+      用它做批量处理
     """
 
     tool_name = "斑点分析"
     tool_category = "Analysis"
     tool_description = "对图像进行斑点检测和分析"
 
+    SUPPORTS_SEARCH_REGION = True
+
     THRESHOLD_METHODS = {
         "binary": cv2.THRESH_BINARY,
         "binary_inv": cv2.THRESH_BINARY_INV,
@@ -156,6 +176,26 @@ class BlobFind(VisionAlgorithmToolBase):
             default=True,
             description="绘制外接矩形",
         ),
+        "max_draw": ToolParameter(
+            name="最大绘制数量",
+            param_type="integer",
+            default=1000,
+            description="最多绘制的斑点数量，0表示全部",
+            min_value=0,
+            max_value=1000000,
+        ),
+        "max_blob_list": ToolParameter(
+            name="明细数量上限",
+            param_type="integer",
+            default=1000,
+            description=(
+                "斑点明细列表(blobs)最多包含的斑点数量，0表示全部；"
+                "全部斑点见列表形式的统计表(blob_table)"
+            ),
+            min_value=0,
+            max_value=1000000,
+        ),
+        "search_region": search_region_parameter(),
     }
 
     def _init_params(self):
@@ -172,6 +212,9 @@ class BlobFind(VisionAlgorithmToolBase):
         self.set_param("draw_contours", True)
         self.set_param("draw_centroids", True)
         self.set_param("draw_bounding_boxes", True)
+        self.set_param("max_draw", 1000)
+        self.set_param("max_blob_list", 1000)
+        self.set_param("search_region", None)
 
     def _run_impl(self):
         """执行斑点分析"""
@@ -179,11 +222,9 @@ class BlobFind(VisionAlgorithmToolBase):
             raise VisionAlgorithmException("无输入图像")
 
         input_image = self._input_data.data
-        gray = input_image.copy()
 
-        # 如果是彩色图像，转换为灰度图
-        if len(gray.shape) == 3:
-            gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+        # 灰度图(同一帧的工具共享)
+        gray = self._input_data.derived.gray()
 
         # 获取参数
         threshold_method_name = self.get_param("threshold_method", "binary")
@@ -198,6 +239,8 @@ class BlobFind(VisionAlgorithmToolBase):
         draw_contours = self.get_param("draw_contours", True)
         draw_centroids = self.get_param("draw_centroids", True)
         draw_bounding_boxes = self.get_param("draw_bounding_boxes", True)
+        max_draw = self.get_param("max_draw", 1000)
+        max_blob_list = self.get_param("max_blob_list", 1000)
 
         # 确定阈值方法
         threshold_method = self.THRESHOLD_METHODS.get(
@@ -220,111 +263,69 @@ class BlobFind(VisionAlgorithmToolBase):
                 binary, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8)
             )
 
-        # 查找轮廓
-        contours, hierarchy = cv2.findContours(
-            binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-        )
-
-        # 创建输出图像
-        output = (
-            cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-            if len(input_image.shape) == 2
-            else input_image.copy()
+        # 一次提取全部外轮廓并批量统计，按条件向量化过滤
+        table = filter_blobs(
+            analyze_blobs(binary),
+            {
+                "area": (min_area, max_area),
+                "aspect_ratio": (min_aspect_ratio, max_aspect_ratio),
+                "circularity": (min_circularity, max_circularity),
+            },
         )
-
-        # 分析每个轮廓 - 设置最大数量限制以避免内存问题
-        max_blobs = 1000  # 最多保留1000个斑点
-        blobs = []
-        blob_count = 0
-        for i, contour in enumerate(contours):
-            # 计算面积
-            area = cv2.contourArea(contour)
-
-            # 面积过滤
-            if area < min_area or area > max_area:
-                continue
-
-            # 计算边界框
-            x, y, w, h = cv2.boundingRect(contour)
-
-            # 计算长宽比
-            aspect_ratio = float(w) / h if h != 0 else 0
-
-            # 长宽比过滤
-            if (
-                aspect_ratio < min_aspect_ratio
-                or aspect_ratio > max_aspect_ratio
-            ):
-                continue
-
-            # 计算圆度
-            perimeter = cv2.arcLength(contour, True)
-            if perimeter == 0:
-                circularity = 0
-            else:
-                circularity = 4 * np.pi * area / (perimeter * perimeter)
-
-            # 圆度过滤
-            if circularity < min_circularity or circularity > max_circularity:
-                continue
-
-            # 计算中心点
-            M = cv2.moments(contour)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-            else:
-                cx, cy = x + w // 2, y + h // 2
-
-            # 计算最小外接圆
-            (cx_circle, cy_circle), radius = cv2.minEnclosingCircle(contour)
-
-            # 保存斑点信息 - 只存储必要的信息，不存储完整轮廓以避免内存泄漏
-            blob = {
-                "id": i,
-                "area": float(area),
-                "x": int(x),
-                "y": int(y),
-                "width": int(w),
-                "height": int(h),
-                "aspect_ratio": float(aspect_ratio),
-                "circularity": float(circularity) if circularity else 0.0,
-                "cx": int(cx),
-                "cy": int(cy),
-                # 不保存 "contour": contour，避免内存泄漏
-            }
-            blobs.append(blob)
-            blob_count += 1
-
-            # 达到最大数量后停止保存
-            if blob_count >= max_blobs:
-                self._logger.warning(
-                    f"斑点数量已达到最大限制 {max_blobs}，停止保存"
+        # 旋转矩形/多边形搜索区域：丢弃质心在区域外的斑点
+        inside = self.in_search_region(table["cx"], table["cy"])
+        if not inside.all():
+            table = table.select(inside)
+        # 明细列表只转换前 max_blob_list 个，全部斑点以列表形式的统计表返回
+        blobs = table.to_dicts(max_blob_list if max_blob_list > 0 else None)
+
+        # 检测结果记录为叠加图元，显示或保存时再绘制
+        overlay = Overlay()
+        draw_count = len(table) if max_draw <= 0 else min(max_draw, len(table))
+        if draw_count < len(table):
+            self._logger.debug(
+                "斑点数量 %d 超过绘制上限，只绘制前 %d 个",
+                len(table),
+                draw_count,
+            )
+        if draw_contours:
+            for contour in table.contours[:draw_count]:
+                overlay.add_polyline(contour, True, (0, 255, 0), 2)
+        if draw_bounding_boxes:
+            boxes = zip(
+                *(
+                    table[name][:draw_count].tolist()
+                    for name in ("x", "y", "width", "height")
                 )
-                break
-
-            # 绘制结果
-            if draw_contours:
-                cv2.drawContours(output, [contour], -1, (0, 255, 0), 2)
-
-            if draw_bounding_boxes:
-                cv2.rectangle(output, (x, y), (x + w, y + h), (0, 0, 255), 2)
-
-            if draw_centroids:
-                cv2.circle(output, (cx, cy), 5, (255, 0, 0), -1)
+            )
+            for x, y, width, height in boxes:
+                overlay.add_rect(x, y, width, height, (0, 0, 255), 2)
+        if draw_centroids:
+            centers = zip(
+                table["cx"][:draw_count].astype(np.int64).tolist(),
+                table["cy"][:draw_count].astype(np.int64).tolist(),
+            )
+            for center in centers:
+                overlay.add_circle(center, 5, (255, 0, 0), -1)
 
-        # 设置输出数据
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output
+        # 设置输出数据(输入图像视图 + 叠加图元)
+        self._output_data = self._input_data.view(overlay)
 
         # 设置结果
         self._result_data = ResultData()
+        self._result_data.overlay = overlay
         self._result_data.tool_name = self._name
         self._result_data.result_category = "blob"
-        self._result_data.set_value("blob_count", len(blobs))
+        self._result_data.set_value("blob_count", len(table))
         self._result_data.set_value("blobs", blobs)
+        # 结果值保持可JSON序列化(数据发送、变化检测)，列以列表保存
+        self._result_data.set_value(
+            "blob_table",
+            {name: values.tolist() for name, values in table.columns.items()},
+            DataType.DICT,
+        )
 
-        self._logger.info(f"斑点分析完成，检测到 {len(blobs)} 个斑点")
+        self._logger.info(f"斑点分析完成，检测到 {len(table)} 个斑点")
 
 
 @ToolRegistry.register
@@ -342,12 +343,15 @@ class PixelCount(VisionAlgorithmToolBase):
     - count_black: 统计黑色像素
     - count_white: 统计白色像素
     - count_range: 统计指定范围像素
+    - search_region: 搜索区域，只统计区域内的像素(比例以区域像素数为分母)
     """
 
     tool_name = "像素计数"
     tool_category = "Analysis"
     tool_description = "统计图像中不同区域的像素数量"
 
+    SUPPORTS_SEARCH_REGION = True
+
     # 中文参数定义
     PARAM_DEFINITIONS = {
         "threshold_method": ToolParameter(
@@ -406,6 +410,7 @@ class PixelCount(VisionAlgorithmToolBase):
             default=False,
             description="统计指定范围像素",
         ),
+        "search_region": search_region_parameter(),
     }
 
     def _init_params(self):
@@ -417,6 +422,7 @@ class PixelCount(VisionAlgorithmToolBase):
         self.set_param("count_black", True)
         self.set_param("count_white", True)
         self.set_param("count_range", False)
+        self.set_param("search_region", None)
 
     def _run_impl(self):
         """执行像素计数"""
@@ -424,11 +430,9 @@ class PixelCount(VisionAlgorithmToolBase):
             raise VisionAlgorithmException("无输入图像")
 
         input_image = self._input_data.data
-        gray = input_image.copy()
 
-        # 如果是彩色图像，转换为灰度图
-        if len(gray.shape) == 3:
-            gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+        # 灰度图(同一帧的工具共享)
+        gray = self._input_data.derived.gray()
 
         # 获取参数
         threshold_method_name = self.get_param("threshold_method", "binary")
@@ -445,29 +449,39 @@ class PixelCount(VisionAlgorithmToolBase):
         )
         _, binary = cv2.threshold(gray, threshold_value, 255, threshold_method)
 
+        # 旋转矩形/多边形搜索区域只统计掩码内的像素
+        mask = self.search_region_mask()
+
+        def count(image):
+            if mask is not None:
+                image = cv2.bitwise_and(image, mask)
+            return cv2.countNonZero(image)
+
         # 像素计数
-        total_pixels = gray.shape[0] * gray.shape[1]
+        if mask is not None:
+            total_pixels = cv2.countNonZero(mask)
+        else:
+            total_pixels = gray.shape[0] * gray.shape[1]
 
         results = {"total_pixels": total_pixels}
 
         if count_black:
-            black_pixels = cv2.countNonZero(255 - binary)
+            black_pixels = count(255 - binary)
             results["black_pixels"] = black_pixels
             results["black_ratio"] = black_pixels / total_pixels
 
         if count_white:
-            white_pixels = cv2.countNonZero(binary)
+            white_pixels = count(binary)
             results["white_pixels"] = white_pixels
             results["white_ratio"] = white_pixels / total_pixels
 
         if count_range:
-            range_pixels = cv2.inRange(gray, lower_bound, upper_bound)
-            range_count = cv2.countNonZero(range_pixels)
+            range_count = count(cv2.inRange(gray, lower_bound, upper_bound))
             results["range_pixels"] = range_count
             results["range_ratio"] = range_count / total_pixels
 
         # 设置输出数据
-        self._output_data = self._input_data.copy()
+        self._output_data = self._input_data.view()
 
         # 设置结果
         self._result_data = ResultData()
@@ -478,6 +492,22 @@ class PixelCount(VisionAlgorithmToolBase):
 
         self._logger.info(f"像素计数完成，总像素数: {total_pixels}")
 
+    def _merge_region_results(self, results: List[ResultData]) -> ResultData:
+        """合并多个搜索区域：像素数求和后按总像素数重新计算比例"""
+        merged = super()._merge_region_results(results)
+        total_pixels = merged.get_value("total_pixels", 0)
+        for name in ("black", "white", "range"):
+            if merged.has_value(f"{name}_pixels"):
+                merged.set_value(
+                    f"{name}_ratio",
+                    (
+                        merged.get_value(f"{name}_pixels") / total_pixels
+                        if total_pixels
+                        else 0.0
+                    ),
+                )
+        return merged
+
 
 @ToolRegistry.register
 class Histogram(VisionAlgorithmToolBase):
@@ -560,7 +590,7 @@ class Histogram(VisionAlgorithmToolBase):
         show_histogram = self.get_param("show_histogram", True)
 
         # 设置输出数据
-        self._output_data = self._input_data.copy()
+        self._output_data = self._input_data.view()
 
         self._result_data = ResultData()
         self._result_data.tool_name = self._name
@@ -625,6 +655,9 @@ class Caliper(VisionAlgorithmToolBase):
     - draw_caliper: 是否绘制卡尺
     - draw_edges: 是否绘制检测到的边缘
     - draw_result: 是否绘制测量结果
+
+    输入图像带有上游定位工具发布的位置修正时，卡尺按基准位姿定义，
+    沿投影到当前帧的直线采样，边缘另给出当前帧中的坐标 point。
     """
 
     tool_name = "卡尺测量"
@@ -724,11 +757,9 @@ class Caliper(VisionAlgorithmToolBase):
             raise VisionAlgorithmException("无输入图像")
 
         input_image = self._input_data.data
-        gray = input_image.copy()
 
-        # 如果是彩色图像，转换为灰度图
-        if len(gray.shape) == 3:
-            gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+        # 灰度图(同一帧的工具共享)
+        gray = self._input_data.derived.gray()
 
         # 获取参数
         caliper_count = self.get_param("caliper_count", 5)
@@ -741,12 +772,8 @@ class Caliper(VisionAlgorithmToolBase):
         draw_edges = self.get_param("draw_edges", True)
         draw_result = self.get_param("draw_result", True)
 
-        # 创建输出图像
-        output = (
-            cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-            if len(input_image.shape) == 2
-            else input_image.copy()
-        )
+        # 检测结果记录为叠加图元，显示或保存时再绘制
+        overlay = Overlay()
 
         # 定义卡尺测量区域（这里使用默认的水平中心线，实际应用中应从ROI或参数中获取）
         height, width = gray.shape
@@ -754,6 +781,9 @@ class Caliper(VisionAlgorithmToolBase):
         start_x = 50
         end_x = width - 50
 
+        # 上游定位工具发布的位置修正：卡尺线投影到当前帧
+        fixture = self.get_fixture()
+
         # 计算每个卡尺的位置
         caliper_results = []
         for i in range(caliper_count):
@@ -765,7 +795,19 @@ class Caliper(VisionAlgorithmToolBase):
                 continue
 
             # 提取沿卡尺线的像素值
-            profile = gray[caliper_y, start_x:end_x]
+            if fixture is None:
+                profile = gray[caliper_y, start_x:end_x]
+            else:
+                map_x, map_y = fixture.line_samples(
+                    (start_x, caliper_y), (end_x, caliper_y), end_x - start_x
+                )
+                profile = cv2.remap(
+                    gray,
+                    map_x,
+                    map_y,
+                    cv2.INTER_LINEAR,
+                    borderMode=cv2.BORDER_REPLICATE,
+                )[0]
 
             # 计算梯度（边缘检测）
             gradient = np.gradient(profile)
@@ -786,14 +828,15 @@ class Caliper(VisionAlgorithmToolBase):
                     if self.EDGE_POLARITIES[edge_polarity] != current_polarity:
                         continue
 
-                edges.append(
-                    {
-                        "position": start_x + x,
-                        "y": caliper_y,
-                        "gradient": gradient[x],
-                        "polarity": current_polarity,
-                    }
-                )
+                edge = {
+                    "position": start_x + x,
+                    "y": caliper_y,
+                    "gradient": gradient[x],
+                    "polarity": current_polarity,
+                }
+                if fixture is not None:
+                    edge["point"] = (float(map_x[0, x]), float(map_y[0, x]))
+                edges.append(edge)
 
             # 保存卡尺结果
             caliper_result = {
@@ -812,20 +855,32 @@ class Caliper(VisionAlgorithmToolBase):
             caliper_results.append(caliper_result)
 
             # 绘制卡尺
-            if draw_caliper:
+            if draw_caliper and fixture is not None:
+                half = search_region // 2
+                line = fixture.map_points(
+                    [(start_x, caliper_y), (end_x, caliper_y)]
+                )
+                band = fixture.map_points(
+                    [
+                        (start_x, caliper_y - half),
+                        (end_x, caliper_y - half),
+                        (end_x, caliper_y + half),
+                        (start_x, caliper_y + half),
+                    ]
+                )
+                overlay.add_line(line[0], line[1], (0, 255, 0), 1)
+                overlay.add_polyline(band, True, (0, 255, 0), 1)
+            elif draw_caliper:
                 # 绘制卡尺中心线
-                cv2.line(
-                    output,
-                    (start_x, caliper_y),
-                    (end_x, caliper_y),
-                    (0, 255, 0),
-                    1,
+                overlay.add_line(
+                    (start_x, caliper_y), (end_x, caliper_y), (0, 255, 0), 1
                 )
                 # 绘制搜索区域
-                cv2.rectangle(
-                    output,
-                    (start_x, caliper_y - search_region // 2),
-                    (end_x, caliper_y + search_region // 2),
+                overlay.add_rect(
+                    start_x,
+                    caliper_y - search_region // 2,
+                    end_x - start_x,
+                    search_region // 2 * 2,
                     (0, 255, 0),
                     1,
                 )
@@ -833,36 +888,33 @@ class Caliper(VisionAlgorithmToolBase):
             # 绘制边缘
             if draw_edges:
                 for edge in edges:
-                    cv2.circle(
-                        output,
-                        (edge["position"], edge["y"]),
-                        3,
-                        (0, 0, 255),
-                        -1,
-                    )
+                    center = edge.get("point", (edge["position"], edge["y"]))
+                    overlay.add_circle(center, 3, (0, 0, 255), -1)
 
             # 绘制测量结果
             if draw_result and "distance" in caliper_result:
                 mid_x = (start_x + end_x) // 2
-                cv2.putText(
-                    output,
+                text_position = (mid_x, caliper_y - 10)
+                if fixture is not None:
+                    text_position = fixture.map_points([text_position])[0]
+                overlay.add_text(
                     f"{caliper_result['distance']:.1f}",
-                    (mid_x, caliper_y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
+                    text_position,
                     (255, 255, 255),
+                    0.5,
                     1,
                 )
 
-        # 设置输出数据
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output
+        # 设置输出数据(输入图像视图 + 叠加图元)
+        self._output_data = self._input_data.view(overlay)
 
         # 设置结果
         self._result_data = ResultData()
+        self._result_data.overlay = overlay
         self._result_data.tool_name = self._name
         self._result_data.result_category = "caliper"
         self._result_data.set_value("caliper_results", caliper_results)
+        self._result_data.set_value("fixture_applied", fixture is not None)
         self._result_data.set_value(
             "total_edges",
             sum(result["edge_count"] for result in caliper_results),
@@ -67,6 +67,9 @@ class CameraParameterSettingTool(ToolBase):
     tool_category = "ImageSource"
     tool_description = "设置和管理相机的各项参数"
 
+    # 相机由主进程持有
+    PROCESS_SAFE = False
+
     INPUT_PORTS = []
 
     OUTPUT_PORTS = [
@@ -4,11 +4,26 @@
 通信工具包
 
 包含各种通信相关工具。
+
+注意：工具类和通讯管理器按需导入。
 """
 
-from .communication import SendData, ReceiveData, CommunicationManager, get_communication_manager
-from .enhanced_communication import SendDataTool, ReceiveDataTool, EnhancedSendData, EnhancedReceiveData
-from .io_control import IOControlTool, VirtualIOController, get_io_controller
+import importlib
+
+# 导出名称 -> 所在模块（相对本包）
+_LAZY_EXPORTS = {
+    'SendData': '.communication',
+    'ReceiveData': '.communication',
+    'CommunicationManager': '.communication',
+    'get_communication_manager': '.communication',
+    'SendDataTool': '.enhanced_communication',
+    'ReceiveDataTool': '.enhanced_communication',
+    'EnhancedSendData': '.enhanced_communication',
+    'EnhancedReceiveData': '.enhanced_communication',
+    'IOControlTool': '.io_control',
+    'VirtualIOController': '.io_control',
+    'get_io_controller': '.io_control',
+}
 
 __all__ = [
     'SendData',
@@ -22,3 +37,18 @@ __all__ = [
     'IOControlTool',
     'VirtualIOController',
 ]
+
+
+def __getattr__(name):
+    """延迟导入工具类"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -74,14 +74,20 @@ class CommunicationManager:
         return cls._instance
 
     def __init__(self):
-        if self._initialized:
-            return
-        self._initialized = True
-        self._protocol_manager = ProtocolManager()
-        self._connections: Dict[str, Any] = {}
-        self._connection_configs: Dict[str, Dict] = {}
-        self._device_counter = 1000
-        self._device_map: Dict[str, int] = {}
+        with self._lock:
+            if self._initialized:
+                return
+            self._protocol_manager = ProtocolManager()
+            self._connections: Dict[str, Any] = {}
+            self._connection_configs: Dict[str, Dict] = {}
+            self._device_counter = 1000
+            self._device_map: Dict[str, int] = {}
+            # 保护上面的连接表；并发流程中的多个工具会同时查找和创建连接。
+            # 网络收发在锁外进行，避免一个慢设备阻塞其他连接
+            self._conn_lock = threading.RLock()
+            # 正在建立的连接: 名称 -> 完成事件(同名连接只由一个线程建立)
+            self._pending: Dict[str, threading.Event] = {}
+            self._initialized = True
 
     def _get_protocol_type_enum(self, protocol_type: str) -> ProtocolType:
         """将字符串协议类型转换为枚举"""
@@ -98,30 +104,49 @@ class CommunicationManager:
     def create_connection(
         self, name: str, protocol_type: str, config: Dict
     ) -> Optional[Any]:
-        """创建并保存通讯连接（复用 ProtocolManager）"""
-        if name in self._connections:
-            existing = self._connections[name]
+        """创建并保存通讯连接（复用 ProtocolManager）
+
+        连接在锁外建立，慢设备不阻塞其他流程查找连接；
+        同名连接正在建立时等待其完成并返回同一个连接。
+        """
+        with self._conn_lock:
+            existing = self._connections.get(name)
             if existing and existing.is_connected():
                 return existing
+            pending = self._pending.get(name)
+            owner = pending is None
+            if owner:
+                pending = self._pending[name] = threading.Event()
+
+        if not owner:
+            pending.wait()
+            with self._conn_lock:
+                existing = self._connections.get(name)
+            return existing if existing and existing.is_connected() else None
 
-        protocol_type_enum = self._get_protocol_type_enum(protocol_type)
-        protocol = self._protocol_manager.create_protocol(
-            protocol_type_enum, name
-        )
+        try:
+            protocol_type_enum = self._get_protocol_type_enum(protocol_type)
+            protocol = self._protocol_manager.create_protocol(
+                protocol_type_enum, name
+            )
 
-        success = protocol.connect(config)
+            success = protocol.connect(config)
 
-        if success:
-            self._connections[name] = protocol
-            self._connection_configs[name] = {
-                "protocol_type": protocol_type,
-                "config": config.copy(),
-            }
-            self._device_map[name] = self._device_counter
-            self._device_counter += 1
+            if not success:
+                return None
+            with self._conn_lock:
+                self._connections[name] = protocol
+                self._connection_configs[name] = {
+                    "protocol_type": protocol_type,
+                    "config": config.copy(),
+                }
+                self._device_map[name] = self._device_counter
+                self._device_counter += 1
             return protocol
-        else:
-            return None
+        finally:
+            with self._conn_lock:
+                self._pending.pop(name, None)
+            pending.set()
 
     def get_connection(self, name: str) -> Optional[Any]:
         """获取已保存的连接"""
@@ -129,9 +154,10 @@ class CommunicationManager:
 
     def get_connection_by_device_id(self, device_id: int) -> Optional[Any]:
         """根据设备ID获取连接（VisionMaster风格）"""
-        for name, dev_id in self._device_map.items():
-            if dev_id == device_id:
-                return self._connections.get(name)
+        with self._conn_lock:
+            for name, dev_id in self._device_map.items():
+                if dev_id == device_id:
+                    return self._connections.get(name)
         return None
 
     def get_device_id(self, name: str) -> Optional[int]:
@@ -140,12 +166,21 @@ class CommunicationManager:
 
     def get_available_connections(self) -> List[Dict[str, Any]]:
         """获取所有可用的连接列表"""
+        with self._conn_lock:
+            entries = [
+                (
+                    name,
+                    protocol,
+                    self._connection_configs.get(name, {}),
+                    self._device_map.get(name, 0),
+                )
+                for name, protocol in self._connections.items()
+            ]
+
         result = []
-        for name, protocol in self._connections.items():
+        for name, protocol, config, device_id in entries:
             if protocol and protocol.is_connected():
-                config = self._connection_configs.get(name, {})
                 protocol_type = config.get("protocol_type", "unknown")
-                device_id = self._device_map.get(name, 0)
                 host = config.get("config", {}).get(
                     "host", config.get("url", "")
                 )
@@ -197,63 +232,55 @@ class CommunicationManager:
         self, device_id: int, data_type: str, value: Any, address_id: int
     ) -> bool:
         """内部数据设置方法"""
-        for name, dev_id in self._device_map.items():
-            if dev_id == device_id:
-                protocol = self._connections.get(name)
-                if protocol and protocol.is_connected():
-                    if data_type == "string":
-                        return protocol.send(str(value))
-                    elif data_type in ("int", "float"):
-                        formatted = ", ".join(map(str, value))
-                        return protocol.send(formatted)
-                    elif data_type == "bytes":
-                        return protocol.send(value)
-                break
+        protocol = self.get_connection_by_device_id(device_id)
+        if protocol and protocol.is_connected():
+            if data_type == "string":
+                return protocol.send(str(value))
+            elif data_type in ("int", "float"):
+                formatted = ", ".join(map(str, value))
+                return protocol.send(formatted)
+            elif data_type == "bytes":
+                return protocol.send(value)
         return False
 
     def get_read_data(
         self, device_id: int, max_len: int = 4096, address_id: int = -1
     ) -> Optional[bytes]:
         """获取读取数据（VisionMaster风格）"""
-        for name, dev_id in self._device_map.items():
-            if dev_id == device_id:
-                protocol = self._connections.get(name)
-                if protocol and protocol.is_connected():
-                    return protocol.receive(timeout=5.0)
-                break
+        protocol = self.get_connection_by_device_id(device_id)
+        if protocol and protocol.is_connected():
+            return protocol.receive(timeout=5.0)
         return None
 
     def is_device_connect(self, device_id: int) -> bool:
         """检查设备是否处于连接状态"""
-        for name, dev_id in self._device_map.items():
-            if dev_id == device_id:
-                protocol = self._connections.get(name)
-                return protocol.is_connected() if protocol else False
-        return False
+        protocol = self.get_connection_by_device_id(device_id)
+        return protocol.is_connected() if protocol else False
 
     def disconnect(self, name: str):
         """断开指定连接"""
-        if name in self._connections:
-            protocol = self._connections[name]
-            if protocol:
-                protocol.disconnect()
-                protocol.clear_callbacks()
-            del self._connections[name]
-            if name in self._device_map:
-                del self._device_map[name]
+        with self._conn_lock:
+            protocol = self._connections.pop(name, None)
+            self._device_map.pop(name, None)
+        if protocol:
+            protocol.disconnect()
+            protocol.clear_callbacks()
 
     def disconnect_all(self):
         """断开所有连接"""
-        for name, protocol in self._connections.items():
+        with self._conn_lock:
+            protocols = list(self._connections.values())
+            self._connections.clear()
+            self._device_map.clear()
+        for protocol in protocols:
             if protocol:
                 protocol.disconnect()
                 protocol.clear_callbacks()
-        self._connections.clear()
-        self._device_map.clear()
 
     def get_connection_names(self) -> List[str]:
         """获取所有连接名称"""
-        return list(self._connections.keys())
+        with self._conn_lock:
+            return list(self._connections.keys())
 
 
 _comm_manager = None
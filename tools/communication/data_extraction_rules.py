@@ -11,15 +11,18 @@
 - 字节序转换（大端序/小端序）
 - 缩放和偏移（线性变换：value = raw * scale + offset）
 - 条件提取（根据条件选择不同提取方式）
+- 编译解码（将整组规则编译为解码计划，一次调用解码整个寄存器块）
 
 Author: Vision System Team
 Date: 2026-02-05
 """
 
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import struct
 
+import numpy as np
+
 
 class ExtractionRuleType(Enum):
     """数据提取规则类型"""
@@ -190,19 +193,27 @@ class TypeConvertRule:
         self.target_type = target_type
         self.byte_order = byte_order
     
-    def convert(self, value: Union[int, float, bytes]) -> Union[int, float, bool, str]:
+    def convert(
+        self, value: Union[int, float, bytes, List[int]]
+    ) -> Union[int, float, bool, str]:
         """
         转换数据类型
         
         Args:
-            value: 原始值
+            value: 原始值，寄存器列表时从首个寄存器读取源类型宽度的寄存器
+                (每个寄存器按大端字节拼接，不足按0处理)
             
         Returns:
             转换后的值
         """
         try:
             # 首先将值转换为字节
-            if isinstance(value, int):
+            if isinstance(value, (list, tuple)):
+                count = _SOURCE_REGISTERS.get(self.source_type, len(value))
+                words = [int(v) & 0xFFFF for v in value[:count]]
+                words += [0] * (count - len(words))
+                byte_data = struct.pack(f'>{count}H', *words)
+            elif isinstance(value, int):
                 if self.source_type in [DataType.INT16, DataType.UINT16]:
                     byte_data = struct.pack('>H', value & 0xFFFF)
                 elif self.source_type in [DataType.INT32, DataType.UINT32]:
@@ -238,6 +249,8 @@ class TypeConvertRule:
                 fmt = '>d' if self.byte_order == ByteOrder.BIG_ENDIAN else '<d'
                 return struct.unpack(fmt, byte_data[:8])[0]
             elif self.target_type == DataType.BOOL:
+                if isinstance(value, (list, tuple)):
+                    return any(byte_data)
                 return bool(value)
             elif self.target_type == DataType.STRING:
                 return byte_data.decode('utf-8', errors='ignore').strip('\x00')
@@ -438,6 +451,9 @@ class DataExtractionRule:
                 return self.type_convert_rule.convert(data)
             
             elif self.rule_type == ExtractionRuleType.SCALE_OFFSET and self.scale_offset_rule:
+                if isinstance(data, list):
+                    # 寄存器列表按首个寄存器缩放
+                    return self.scale_offset_rule.apply(data[0] if data else 0)
                 return self.scale_offset_rule.apply(data)
             
             elif self.rule_type == ExtractionRuleType.CONDITIONAL and self.conditional_rule:
@@ -524,6 +540,354 @@ class DataExtractionRule:
         return descriptions.get(data_type, "未知数据类型")
 
 
+# ==================== 编译解码 ====================
+
+# 目标数据类型 -> (numpy类型代码, 字节数)
+_NUMPY_TYPES = {
+    DataType.INT16: ("i2", 2),
+    DataType.UINT16: ("u2", 2),
+    DataType.INT32: ("i4", 4),
+    DataType.UINT32: ("u4", 4),
+    DataType.FLOAT32: ("f4", 4),
+    DataType.FLOAT64: ("f8", 8),
+}
+
+# 源数据类型占用的寄存器数
+_SOURCE_REGISTERS = {
+    DataType.INT16: 1,
+    DataType.UINT16: 1,
+    DataType.INT32: 2,
+    DataType.UINT32: 2,
+    DataType.FLOAT32: 2,
+    DataType.FLOAT64: 4,
+}
+
+
+class _FieldPlan:
+    """单个字段的解码计划"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.kind = "typed"  # typed: 按字节解释 / bits: 位提取
+        self.words: List[int] = []  # 参与解码的寄存器(按字节拼接顺序)
+        self.dtype = ">u2"  # 字节解释类型
+        self.size = 2  # 字节数
+        self.as_bool = False
+        self.shift = 0
+        self.mask = 0xFFFF
+        self.scale: Optional[Tuple[float, float, int]] = None  # (缩放, 偏移, 小数位)
+
+    @property
+    def group_key(self) -> Tuple:
+        """同组字段可以一次向量化解码"""
+        return (
+            self.kind,
+            self.dtype,
+            self.size,
+            self.as_bool,
+            self.scale is not None,
+        )
+
+    @property
+    def max_register(self) -> int:
+        return max(self.words)
+
+
+def _compile_chain(
+    name: str, start: int, rules: Sequence[DataExtractionRule]
+) -> Optional[_FieldPlan]:
+    """将规则链编译为解码计划，无法编译时返回None
+
+    支持的规则链：[位提取 | 寄存器组合 | 类型转换 | 寄存器组合+类型转换] + [缩放偏移]
+    """
+    steps = [
+        r
+        for r in rules
+        if r.enabled and r.rule_type != ExtractionRuleType.NONE
+    ]
+    plan = _FieldPlan(name)
+    plan.words = [start]
+    i = 0
+
+    if i < len(steps) and steps[i].rule_type == ExtractionRuleType.BIT_EXTRACT:
+        bit_rule = steps[i].bit_extract_rule
+        if bit_rule is None:
+            return None
+        plan.kind = "bits"
+        plan.words = [start + bit_rule.register_index]
+        plan.shift = bit_rule.start_bit
+        plan.mask = (1 << bit_rule.bit_count) - 1
+        i += 1
+    elif (
+        i < len(steps)
+        and steps[i].rule_type == ExtractionRuleType.REGISTER_COMBINE
+    ):
+        combine_rule = steps[i].register_combine_rule
+        if combine_rule is None:
+            return None
+        indices = combine_rule.register_indices
+        if len(indices) >= 2:
+            first, second = indices[0], indices[1]
+            if combine_rule.byte_order != ByteOrder.BIG_ENDIAN:
+                first, second = second, first
+            plan.words = [start + first, start + second]
+            plan.dtype, plan.size = ">u4", 4
+        i += 1
+
+    if (
+        i < len(steps)
+        and steps[i].rule_type == ExtractionRuleType.TYPE_CONVERT
+    ):
+        convert_rule = steps[i].type_convert_rule
+        if convert_rule is None or plan.kind == "bits":
+            return None
+        if i == 0:
+            count = _SOURCE_REGISTERS.get(convert_rule.source_type)
+            if count is None:
+                return None
+            plan.words = list(range(start, start + count))
+        elif (convert_rule.source_type not in (DataType.INT32, DataType.UINT32)
+              or len(plan.words) != 2):
+            # 组合结果按32位打包，其他源类型和单寄存器组合的截断语义不做编译
+            return None
+
+        source_bytes = 2 * len(plan.words)
+        if convert_rule.target_type == DataType.BOOL:
+            plan.dtype, plan.size = f">u{source_bytes}", source_bytes
+            plan.as_bool = True
+        elif convert_rule.target_type in _NUMPY_TYPES:
+            code, size = _NUMPY_TYPES[convert_rule.target_type]
+            if size > source_bytes:
+                return None
+            order = (
+                ">" if convert_rule.byte_order == ByteOrder.BIG_ENDIAN else "<"
+            )
+            plan.dtype, plan.size = order + code, size
+        else:
+            return None
+        i += 1
+
+    if (
+        i < len(steps)
+        and steps[i].rule_type == ExtractionRuleType.SCALE_OFFSET
+    ):
+        scale_rule = steps[i].scale_offset_rule
+        if scale_rule is None or plan.as_bool:
+            return None
+        plan.scale = (float(scale_rule.scale), float(scale_rule.offset),
+                      int(scale_rule.decimal_places))
+        i += 1
+
+    # 剩余规则(条件、字符串、多次缩放等)无法编译
+    return plan if i == len(steps) else None
+
+
+def extract_field(registers: Sequence[int], start: int,
+                  rules: Sequence[DataExtractionRule]) -> Any:
+    """
+    逐规则提取单个字段
+
+    从起始寄存器开始的寄存器列表依次经过规则链，没有有效规则时
+    取起始寄存器的值(不足按0处理)。解码器的编译计划与此结果一致。
+
+    Args:
+        registers: 寄存器值列表
+        start: 起始寄存器
+        rules: 规则链
+
+    Returns:
+        提取后的值
+    """
+    value: Any = list(registers[start:])
+    steps = [
+        r
+        for r in rules
+        if r.enabled and r.rule_type != ExtractionRuleType.NONE
+    ]
+    if not steps:
+        return value[0] if value else 0
+    for rule in steps:
+        value = rule.extract(value)
+    return value
+
+
+class RegisterDecoder:
+    """
+    寄存器块解码器
+
+    将一组命名字段的提取规则链编译为解码计划：同类型字段的字节位置
+    组成索引矩阵，解码时对整个寄存器块做一次取值和视图转换，
+    缩放偏移按向量计算。无法编译的规则链退回到逐规则提取。
+
+    类型转换作为链首时，从起始寄存器读取源类型宽度的寄存器
+    (每个寄存器按大端字节拼接)，再按目标类型和字节序解释。
+
+    示例：
+        decoder = RegisterDecoder.compile({
+            "状态": (0, bit_rule),
+            "温度": (1, temp_rule),
+            "计数": (2, combine_rule),
+            "压力": (4, [float_rule, scale_rule]),
+        })
+        values = decoder.decode(registers)  # {"状态": 1, "温度": 25.0, ...}
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._groups: List[Tuple[Tuple, List[str], Dict[str, np.ndarray]]] = []
+        self._fallbacks: List[Tuple[str, int, List[DataExtractionRule]]] = []
+        self._register_count = 0
+
+    @classmethod
+    def compile(
+        cls,
+        fields: Dict[
+            str,
+            Tuple[int, Union[DataExtractionRule, List[DataExtractionRule]]],
+        ],
+    ) -> 'RegisterDecoder':
+        """
+        编译解码计划
+
+        Args:
+            fields: 字段名 -> (起始寄存器, 规则或规则链)
+
+        Returns:
+            解码器
+        """
+        decoder = cls()
+        grouped: Dict[Tuple, List[_FieldPlan]] = {}
+
+        for name, (start, rules) in fields.items():
+            if isinstance(rules, DataExtractionRule):
+                rules = [rules]
+            decoder._names.append(name)
+            plan = _compile_chain(name, start, rules)
+            if plan is None:
+                decoder._fallbacks.append((name, start, list(rules)))
+                continue
+            grouped.setdefault(plan.group_key, []).append(plan)
+            decoder._register_count = max(
+                decoder._register_count, plan.max_register + 1
+            )
+
+        for key, plans in grouped.items():
+            arrays: Dict[str, np.ndarray] = {}
+            if key[0] == "bits":
+                arrays["index"] = np.array(
+                    [p.words[0] for p in plans], dtype=np.intp
+                )
+                arrays["shift"] = np.array(
+                    [p.shift for p in plans], dtype=np.uint16
+                )
+                arrays["mask"] = np.array(
+                    [p.mask for p in plans], dtype=np.uint16
+                )
+            else:
+                # 每个字段取其寄存器大端字节中的前size个字节
+                arrays["index"] = np.array(
+                    [
+                        [2 * w + b for w in p.words for b in (0, 1)][: p.size]
+                        for p in plans
+                    ],
+                    dtype=np.intp,
+                )
+            if key[4]:
+                arrays["scale"] = np.array([p.scale[0] for p in plans])
+                arrays["offset"] = np.array([p.scale[1] for p in plans])
+                arrays["decimals"] = np.array([p.scale[2] for p in plans])
+            decoder._groups.append((key, [p.name for p in plans], arrays))
+
+        return decoder
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RegisterDecoder':
+        """
+        从字段配置编译解码器
+
+        Args:
+            data: {"fields": {字段名: {"start": 起始寄存器, "rules": [规则字典, ...]}}}
+
+        Returns:
+            解码器
+        """
+        fields = {}
+        for name, field in data.get("fields", {}).items():
+            rules = [
+                DataExtractionRule.from_dict(r) for r in field.get("rules", [])
+            ]
+            fields[name] = (int(field.get("start", 0)), rules)
+        return cls.compile(fields)
+
+    @property
+    def register_count(self) -> int:
+        """编译字段需要的寄存器数"""
+        return self._register_count
+
+    @property
+    def fallback_fields(self) -> List[str]:
+        """未能编译、逐规则提取的字段"""
+        return [name for name, _, _ in self._fallbacks]
+
+    def decode(
+        self, registers: Union[Sequence[int], np.ndarray]
+    ) -> Dict[str, Any]:
+        """
+        解码整个寄存器块
+
+        Args:
+            registers: 寄存器值(16位)，不足的寄存器按0处理
+
+        Returns:
+            字段名 -> 解码值
+        """
+        original = np.asarray(registers, dtype=np.uint16).ravel()
+        regs = original
+        if regs.size < self._register_count:
+            regs = np.pad(regs, (0, self._register_count - regs.size))
+        block = regs.astype(">u2").view(np.uint8)
+
+        values: Dict[str, Any] = {}
+        for key, names, arrays in self._groups:
+            kind, dtype, size, as_bool, scaled = key
+            if kind == "bits":
+                raw = (regs[arrays["index"]] >> arrays["shift"]) & arrays[
+                    "mask"
+                ]
+            else:
+                raw = np.ascontiguousarray(block[arrays["index"]]).view(dtype)[
+                    :, 0
+                ]
+
+            if as_bool:
+                result = raw != 0
+            elif scaled:
+                result = (
+                    raw.astype(np.float64) * arrays["scale"] + arrays["offset"]
+                )
+                decimals = arrays["decimals"]
+                for d in np.unique(decimals):
+                    mask = decimals == d
+                    result[mask] = np.round(result[mask], int(d))
+            else:
+                result = raw
+            values.update(zip(names, result.tolist()))
+
+        if self._fallbacks:
+            register_list = original.tolist()
+            for name, start, rules in self._fallbacks:
+                values[name] = extract_field(register_list, start, rules)
+
+        return {name: values[name] for name in self._names}
+
+    def __repr__(self) -> str:
+        return (
+            f"RegisterDecoder(fields={len(self._names)}, "
+            f"groups={len(self._groups)}, "
+            f"fallbacks={len(self._fallbacks)})"
+        )
+
+
 # 预定义常用规则模板
 def _create_predefined_rules() -> Dict[str, DataExtractionRule]:
     """创建预定义规则模板"""
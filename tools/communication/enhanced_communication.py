@@ -17,7 +17,9 @@ Author: Vision System Team
 Date: 2026-02-03
 """
 
+import copy
 import json
+import logging
 import os
 import sys
 import threading
@@ -68,9 +70,13 @@ class SendDataTool(ToolBase):
     tool_category = "Communication"
     tool_description = "发送数据到外部设备，通过连接ID使用已有连接"
 
+    # 连接由主进程的连接管理器持有
+    PROCESS_SAFE = False
+
     def __init__(self, name: str = None):
         super().__init__(name)
         self._data_mapper = None  # 数据映射器实例
+        self._data_mapper_source = None  # 数据映射器对应的映射规则JSON
         self._send_count = 0
         self._fail_count = 0
         self._last_send_time = 0
@@ -484,60 +490,50 @@ class SendDataTool(ToolBase):
     def _run_impl(self):
         """执行发送逻辑（重构版）"""
         try:
-            self._logger.info(f"[{self.name}] 开始执行发送数据...")
-            
-            # 调试：查看所有参数及其值
-            all_params = self.get_all_params()
-            self._logger.debug(f"工具所有参数键: {list(all_params.keys())}")
-            self._logger.info(f"【调试】所有参数及其值:")
-            for key, value in all_params.items():
-                if not key.startswith('__'):
-                    self._logger.info(f"  {key}: '{value}' (类型: {type(value).__name__})")
-            
-            # 特别查看目标连接参数
-            target_conn_value = all_params.get("目标连接", "")
-            self._logger.info(f"【调试】目标连接原始值: '{target_conn_value}'")
-            self._logger.info(f"【调试】目标连接类型: {type(target_conn_value)}")
-            self._logger.info(f"【调试】目标连接是否为空: {not target_conn_value}")
-            if target_conn_value:
-                self._logger.info(f"【调试】目标连接长度: {len(str(target_conn_value))}")
-                self._logger.info(f"【调试】目标连接repr: {repr(target_conn_value)}")
-            
+            self._logger.debug("[%s] 开始执行发送数据...", self.name)
+
+            # 调试：查看所有参数及其值(仅在调试日志开启时遍历)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                for key, value in self.get_all_params().items():
+                    if not key.startswith('__'):
+                        self._logger.debug(
+                            "  %s: '%s' (类型: %s)",
+                            key,
+                            value,
+                            type(value).__name__,
+                        )
+
             # 1. 检查目标连接 - 尝试多个可能的参数名
             connection_id = ""
-            
+
             # 尝试不同的参数名（处理可能的参数名不一致问题）
             possible_names = ["目标连接", "连接ID", "connection_id", "target_connection"]
             for name in possible_names:
-                value = all_params.get(name, "")
-                self._logger.info(f"【调试】尝试参数名 '{name}': '{value}'")
+                value = self.get_param(name, "")
                 if value:
                     connection_id = value
-                    self._logger.info(f"【调试】使用参数名 '{name}' 获取连接: '{connection_id}'")
+                    self._logger.debug(
+                        "使用参数名 '%s' 获取连接: '%s'", name, connection_id
+                    )
                     break
-            
-            # 如果没有找到，使用默认的 get_param
-            if not connection_id:
-                connection_id = self.get_param("目标连接", "")
-                self._logger.info(f"【调试】使用get_param获取: '{connection_id}'")
-            
+
             # 检查是否是提示文本，如果是则自动刷新
             prompt_options = ["-- 请选择连接 --", "-- 暂无可用连接 --", "-- 刷新失败，请重试 --",
                             "点击刷新获取连接列表", "暂无可用连接", "刷新失败，请重试"]
             if connection_id in prompt_options:
-                self._logger.info(f"【调试】当前选择的是提示文本 '{connection_id}'，自动刷新连接列表")
+                self._logger.info(f"当前选择的是提示文本 '{connection_id}'，自动刷新连接列表")
                 self._refresh_connection_options()
                 # 重新获取连接ID
                 connection_id = self.get_param("目标连接", "")
-                self._logger.info(f"【调试】刷新后获取的连接ID: '{connection_id}'")
-            
-            self._logger.info(f"【调试】最终目标连接: '{connection_id}'")
-            self._logger.info(f"【调试】最终目标连接类型: {type(connection_id)}")
-            self._logger.info(f"【调试】最终目标连接长度: {len(str(connection_id)) if connection_id else 0}")
-            
+                self._logger.debug("刷新后获取的连接ID: '%s'", connection_id)
+
+            self._logger.debug("最终目标连接: %r", connection_id)
+
             if not connection_id or connection_id in prompt_options:
                 self._logger.error("未选择有效的连接")
-                self._logger.error(f"可用参数: {list(all_params.keys())}")
+                self._logger.error(
+                    f"可用参数: {list(self.get_all_params().keys())}"
+                )
                 return {
                     "status": False,
                     "message": "未选择有效的通讯连接，请在属性面板中选择",
@@ -550,21 +546,25 @@ class SendDataTool(ToolBase):
             
             # 首先尝试直接使用connection_id查找
             connection = conn_manager.get_connection(connection_id)
-            self._logger.debug(f"直接查找连接结果: {connection is not None}")
+            self._logger.debug("直接查找连接结果: %s", connection is not None)
             
             # 如果找不到，尝试解析 device_id: display_name 格式，提取device_id
             if not connection and ": " in connection_id:
                 parts = connection_id.split(": ", 1)
                 if len(parts) == 2:
                     device_id = parts[0]
-                    self._logger.debug(f"尝试使用device_id查找: {device_id}")
+                    self._logger.debug("尝试使用device_id查找: %s", device_id)
                     connection = conn_manager.get_connection(device_id)
-                    self._logger.debug(f"使用device_id查找结果: {connection is not None}")
+                    self._logger.debug(
+                        "使用device_id查找结果: %s", connection is not None
+                    )
 
             # 如果还找不到，尝试使用display_name查找
             if not connection:
                 connection = self._get_connection_by_display_name(connection_id)
-                self._logger.debug(f"通过display_name查找连接结果: {connection is not None}")
+                self._logger.debug(
+                    "通过display_name查找连接结果: %s", connection is not None
+                )
 
             if not connection:
                 self._logger.error(f"未找到连接: {connection_id}")
@@ -576,7 +576,9 @@ class SendDataTool(ToolBase):
                 }
             
             # 3. 检查连接状态
-            self._logger.debug(f"连接状态检查 - is_connected: {connection.is_connected}")
+            self._logger.debug(
+                "连接状态检查 - is_connected: %s", connection.is_connected
+            )
             if not connection.is_connected:
                 self._logger.error(f"连接 {connection.name} 未建立")
                 return {
@@ -588,7 +590,7 @@ class SendDataTool(ToolBase):
             
             # 4. 获取协议实例
             protocol_instance = connection.protocol_instance
-            self._logger.debug(f"协议实例: {protocol_instance is not None}")
+            self._logger.debug("协议实例: %s", protocol_instance is not None)
             if not protocol_instance:
                 self._logger.error("协议实例不存在")
                 return {
@@ -615,7 +617,7 @@ class SendDataTool(ToolBase):
 
             # 6. 检查发送条件
             send_condition = self.get_param("发送条件", "总是")
-            self._logger.debug(f"发送条件: {send_condition}")
+            self._logger.debug("发送条件: %s", send_condition)
             if not self._should_send(send_condition, input_data):
                 self._logger.info("不满足发送条件，跳过发送")
                 return {
@@ -627,7 +629,7 @@ class SendDataTool(ToolBase):
 
             # 7. 直接使用收集的数据
             data_to_send = input_data
-            self._logger.debug(f"准备发送的数据: {data_to_send}")
+            self._logger.debug("准备发送的数据: %s", data_to_send)
 
             # 8. 检查数据变化
             only_on_change = self.get_param("仅发送变化的数据", False)
@@ -642,14 +644,12 @@ class SendDataTool(ToolBase):
 
             # 9. 格式化数据
             format_type = self.get_param("发送格式", "JSON")
-            self._logger.debug(f"格式化数据，格式: {format_type}, 数据: {data_to_send}")
             formatted_data = self._format_data(data_to_send, format_type)
-            self._logger.debug(f"格式化后的数据: {formatted_data}")
+            self._logger.debug("格式化后的数据(%s): %s", format_type, formatted_data)
 
             # 10. 发送数据
-            self._logger.info(f"正在发送数据到 {connection_id}...")
             success = protocol_instance.send(formatted_data)
-            self._logger.info(f"发送结果: {success}")
+            self._logger.debug("发送到 %s 的结果: %s", connection_id, success)
 
             if success:
                 self._send_count += 1
@@ -855,28 +855,35 @@ class SendDataTool(ToolBase):
             return input_data
         
         try:
-            # 解析映射规则
-            mapping_rules = json.loads(mapping_json)
+            # 映射规则未变化时复用已编译的映射器
+            if mapping_json != self._data_mapper_source:
+                self._data_mapper = self._build_data_mapper(mapping_json)
+                self._data_mapper_source = mapping_json
             
-            # 如果有映射规则，应用映射
-            if isinstance(mapping_rules, dict):
-                from core.data_mapping import DataMapper, DataMappingRule
-                
-                mapper = DataMapper()
-                for source_field, target_field in mapping_rules.items():
-                    rule = DataMappingRule(
-                        source_field=source_field,
-                        target_field=target_field
-                    )
-                    mapper.add_rule(rule)
-                
-                return mapper.map(input_data)
+            if self._data_mapper is not None:
+                return self._data_mapper.map(input_data)
             
             return input_data
         except (json.JSONDecodeError, Exception):
             # 解析失败，返回原始数据
             return input_data
 
+    def _build_data_mapper(self, mapping_json: str):
+        """根据映射规则JSON创建数据映射器，规则不是字典时返回None"""
+        mapping_rules = json.loads(mapping_json)
+        if not isinstance(mapping_rules, dict):
+            return None
+
+        from core.data_mapping import DataMapper, DataMappingRule
+
+        mapper = DataMapper()
+        for source_field, target_field in mapping_rules.items():
+            mapper.add_rule(DataMappingRule(
+                source_field=source_field,
+                target_field=target_field
+            ))
+        return mapper
+
     def _is_data_unchanged(self, data: Any) -> bool:
         """检查数据是否未变化"""
         if self._last_sent_data is None:
@@ -924,6 +931,7 @@ class SendDataTool(ToolBase):
         self._last_send_time = 0.0
         self._last_sent_data = None
         self._data_mapper = None
+        self._data_mapper_source = None
         super().reset()
 
 
@@ -948,12 +956,17 @@ class ReceiveDataTool(ToolBase):
     tool_category = "Communication"
     tool_description = "从外部设备接收数据，通过连接ID使用已有连接"
 
+    # 连接由主进程的连接管理器持有
+    PROCESS_SAFE = False
+
     def __init__(self, name: str = None):
         super().__init__(name)
         self._receive_count = 0
         self._fail_count = 0
         self._last_received_data = None
         self._last_receive_time = 0.0
+        self._extraction_rule = None  # 解析后的数据提取规则
+        self._extraction_rule_source = None  # 提取规则对应的参数值
 
     def _init_params(self):
         """初始化参数
@@ -1065,7 +1078,7 @@ class ReceiveDataTool(ToolBase):
         value = super().get_param(key, default)
         
         if key == "数据提取规则" and value is not None:
-            if isinstance(value, dict):
+            if isinstance(value, dict) and "fields" not in value:
                 # 从字典还原为DataExtractionRule对象
                 try:
                     from tools.communication.data_extraction_rules import DataExtractionRule
@@ -1159,11 +1172,13 @@ class ReceiveDataTool(ToolBase):
     def _run_impl(self):
         """执行接收逻辑（重构版）"""
         try:
-            self._logger.info(f"[{self.name}] 开始执行接收数据...")
+            self._logger.debug("[%s] 开始执行接收数据...", self.name)
             
             # 调试：查看所有参数
-            all_params = self.get_all_params()
-            self._logger.debug(f"工具所有参数: {list(all_params.keys())}")
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(
+                    "工具所有参数: %s", list(self.get_all_params().keys())
+                )
             
             # 1. 检查连接ID - 尝试多个可能的参数名
             connection_id = ""
@@ -1171,26 +1186,28 @@ class ReceiveDataTool(ToolBase):
             # 尝试不同的参数名（处理可能的参数名不一致问题）
             possible_names = ["连接ID", "目标连接", "connection_id", "target_connection"]
             for name in possible_names:
-                value = all_params.get(name, "")
+                value = self.get_param(name, "")
                 if value:
                     connection_id = value
-                    self._logger.debug(f"使用参数名 '{name}' 获取连接: {connection_id}")
+                    self._logger.debug(
+                        "使用参数名 '%s' 获取连接: %s", name, connection_id
+                    )
                     break
             
             # 如果没有找到，使用默认的 get_param
             if not connection_id:
                 connection_id = self.get_param("连接ID", "")
             
-            self._logger.debug(f"最终连接ID: '{connection_id}'")
-            self._logger.debug(f"连接ID类型: {type(connection_id)}")
-            self._logger.debug(f"连接ID长度: {len(connection_id) if connection_id else 0}")
+            self._logger.debug("最终连接ID: %r", connection_id)
             
             # 检查是否是提示文本
             prompt_options = ["-- 请选择连接 --", "-- 暂无可用连接 --", "-- 刷新失败，请重试 --",
                             "点击刷新获取连接列表", "暂无可用连接", "刷新失败，请重试"]
             if not connection_id or connection_id in prompt_options:
                 self._logger.error("未选择有效的通讯连接")
-                self._logger.error(f"可用参数: {list(all_params.keys())}")
+                self._logger.error(
+                    f"可用参数: {list(self.get_all_params().keys())}"
+                )
                 return {
                     "status": False,
                     "message": "未选择有效的通讯连接，请在属性面板下拉框中选择一个连接",
@@ -1203,21 +1220,25 @@ class ReceiveDataTool(ToolBase):
             
             # 首先尝试直接使用connection_id查找
             connection = conn_manager.get_connection(connection_id)
-            self._logger.debug(f"直接查找连接结果: {connection is not None}")
+            self._logger.debug("直接查找连接结果: %s", connection is not None)
             
             # 如果找不到，尝试解析 device_id: display_name 格式，提取device_id
             if not connection and ": " in connection_id:
                 parts = connection_id.split(": ", 1)
                 if len(parts) == 2:
                     device_id = parts[0]
-                    self._logger.debug(f"尝试使用device_id查找: {device_id}")
+                    self._logger.debug("尝试使用device_id查找: %s", device_id)
                     connection = conn_manager.get_connection(device_id)
-                    self._logger.debug(f"使用device_id查找结果: {connection is not None}")
+                    self._logger.debug(
+                        "使用device_id查找结果: %s", connection is not None
+                    )
 
             # 如果还找不到，尝试使用display_name查找
             if not connection:
                 connection = self._get_connection_by_display_name(connection_id)
-                self._logger.debug(f"通过display_name查找连接结果: {connection is not None}")
+                self._logger.debug(
+                    "通过display_name查找连接结果: %s", connection is not None
+                )
 
             if not connection:
                 self._logger.error(f"未找到连接: {connection_id}")
@@ -1229,7 +1250,9 @@ class ReceiveDataTool(ToolBase):
                 }
 
             # 3. 检查连接状态
-            self._logger.debug(f"连接状态检查 - is_connected: {connection.is_connected}")
+            self._logger.debug(
+                "连接状态检查 - is_connected: %s", connection.is_connected
+            )
             if not connection.is_connected:
                 self._logger.error(f"连接 {connection.name} 未建立")
                 return {
@@ -1241,7 +1264,7 @@ class ReceiveDataTool(ToolBase):
             
             # 4. 获取协议实例
             protocol_instance = connection.protocol_instance
-            self._logger.debug(f"协议实例: {protocol_instance is not None}")
+            self._logger.debug("协议实例: %s", protocol_instance is not None)
             if not protocol_instance:
                 self._logger.error("协议实例不存在")
                 return {
@@ -1272,11 +1295,11 @@ class ReceiveDataTool(ToolBase):
                 }
 
             # 7. 从已有连接接收数据
-            self._logger.info(f"正在从 {connection.name} 接收数据...")
+            self._logger.debug("正在从 %s 接收数据...", connection.name)
             timeout = self.get_param("超时时间", 5.0)
-            self._logger.debug(f"接收超时: {timeout}秒")
+            self._logger.debug("接收超时: %s秒", timeout)
             raw_data = protocol_instance.receive(timeout)
-            self._logger.debug(f"接收到的原始数据: {raw_data}")
+            self._logger.debug("接收到的原始数据: %s", raw_data)
 
             if raw_data is None:
                 self._fail_count += 1
@@ -1290,13 +1313,13 @@ class ReceiveDataTool(ToolBase):
 
             # 8. 解析数据
             format_type = self.get_param("输出格式", "JSON")
-            self._logger.debug(f"解析数据，格式: {format_type}")
+            self._logger.debug("解析数据，格式: %s", format_type)
             parsed_data = self._parse_data(raw_data, format_type)
-            self._logger.debug(f"解析后的数据: {parsed_data}")
+            self._logger.debug("解析后的数据: %s", parsed_data)
 
             # 9. 应用数据提取规则
             extracted_data = self._extract_data(parsed_data)
-            self._logger.debug(f"提取后的数据: {extracted_data}")
+            self._logger.debug("提取后的数据: %s", extracted_data)
 
             # 10. 更新统计
             self._receive_count += 1
@@ -1314,7 +1337,7 @@ class ReceiveDataTool(ToolBase):
                 "OutputData": extracted_data
             }
 
-            self._logger.info(f"接收数据成功: {extracted_data}")
+            self._logger.debug("接收数据成功: %s", extracted_data)
             return result
 
         except Exception as e:
@@ -1372,18 +1395,49 @@ class ReceiveDataTool(ToolBase):
             return raw_data
 
     def _extract_data(self, data: Any) -> Any:
-        """根据规则提取数据"""
-        extract_rules = self.get_param("数据提取规则", None)
+        """根据规则提取数据
+
+        规则为 {"fields": {字段名: {"start": 起始寄存器, "rules": [...]}}} 时，
+        将寄存器列表(或含 "registers" 的字典)一次解码为命名字段。
+        """
+        # 读取原始参数值，get_param 会把规则字典还原为规则对象
+        extract_rules = super().get_param("数据提取规则", None)
 
         if not extract_rules:
             return data
 
         try:
+            # 寄存器字段表：编译为解码计划后整块解码
+            if isinstance(extract_rules, dict) and "fields" in extract_rules:
+                if extract_rules != self._extraction_rule_source:
+                    from tools.communication.data_extraction_rules import (
+                        RegisterDecoder,
+                    )
+
+                    self._extraction_rule = RegisterDecoder.from_dict(
+                        extract_rules
+                    )
+                    self._extraction_rule_source = copy.deepcopy(extract_rules)
+                registers = (
+                    data.get("registers") if isinstance(data, dict) else data
+                )
+                if not isinstance(registers, (list, tuple)):
+                    return data
+                return self._extraction_rule.decode(registers)
+
             # 检查是否是新的 DataExtractionRule 格式
             if isinstance(extract_rules, dict) and "rule_type" in extract_rules:
-                from tools.communication.data_extraction_rules import DataExtractionRule
-                rule = DataExtractionRule.from_dict(extract_rules)
-                return rule.extract(data)
+                # 规则配置未变化时复用已解析的规则
+                if extract_rules != self._extraction_rule_source:
+                    from tools.communication.data_extraction_rules import (
+                        DataExtractionRule,
+                    )
+
+                    self._extraction_rule = DataExtractionRule.from_dict(
+                        extract_rules
+                    )
+                    self._extraction_rule_source = copy.deepcopy(extract_rules)
+                return self._extraction_rule.extract(data)
             
             # 兼容旧格式（JSON字符串）
             if isinstance(extract_rules, str):
@@ -154,6 +154,9 @@ class IOControlTool(ToolBase):
     tool_category = "IO"
     tool_description = "统一IO控制工具，支持数字输入/输出和触发器功能"
 
+    # IO设备由主进程持有
+    PROCESS_SAFE = False
+
     PARAM_DEFINITIONS = {
         "控制模式": ToolParameter(
             name="控制模式",
@@ -10,7 +10,6 @@ Date: 2026-01-22
 import logging
 import os
 import sys
-import time
 from typing import Any, Dict, Optional
 
 import cv2
@@ -24,6 +23,7 @@ from core.tool_base import (
     ToolParameter,
     ToolRegistry,
 )
+from utils.error_recovery import get_circuit_breaker
 
 USE_FAST_LOAD = False
 try:
@@ -192,6 +192,7 @@ class CameraSource(ImageSourceToolBase):
 
     def _run_impl(self):
         """执行图像采集 - 优先使用已连接相机"""
+        device_breaker = None
         try:
             # 获取相机参数
             camera_id = self.get_param("camera_id", "0")
@@ -213,6 +214,14 @@ class CameraSource(ImageSourceToolBase):
                 f"开始采集图像: camera_id={final_camera_id}, trigger_mode={trigger_mode}"
             )
 
+            # 同一相机连续采集失败时本周期直接失败，不再触发和等待采集超时
+            camera_breaker = get_circuit_breaker(f"Camera.{final_camera_id}")
+            if not camera_breaker.allow():
+                raise Exception(
+                    f"相机连续采集失败，已熔断，{camera_breaker.retry_in():.1f}秒后重试"
+                )
+            device_breaker = camera_breaker
+
             # 使用共享的相机管理器
             self._camera_manager = self._get_shared_camera_manager()
 
@@ -251,8 +260,6 @@ class CameraSource(ImageSourceToolBase):
                     else:
                         retry_count += 1
                         self._logger.warning(f"软件触发失败，正在重试 ({retry_count}/{max_retries})...")
-                        # 添加短暂延迟，确保相机有时间准备
-                        time.sleep(0.1)
                 
                 if not trigger_success:
                     # 尝试重新设置触发模式
@@ -281,6 +288,7 @@ class CameraSource(ImageSourceToolBase):
             self._logger.info(
                 f"成功采集图像: {image_data.width}x{image_data.height}"
             )
+            device_breaker.record_success()
 
             # 返回结果
             return {
@@ -298,6 +306,8 @@ class CameraSource(ImageSourceToolBase):
 
         except Exception as e:
             self._logger.error(f"相机采集失败: {e}")
+            if device_breaker is not None:
+                device_breaker.record_failure()
             # 清除相机引用，避免使用已关闭的相机
             self._camera = None
             raise Exception(f"相机采集失败: {str(e)}")
@@ -4,50 +4,57 @@
 视觉工具包
 
 包含各种视觉处理和检测工具。
+
+注意：工具类按需导入，避免加载easyocr/torch、ultralytics等重量级依赖。
 """
 
-# 导入所有视觉工具
-from .appearance_detection import AppearanceDetector, SurfaceDefectDetector
-from .template_match import GrayMatch, ShapeMatch, LineFind, CircleFind
-from .image_filter import BoxFilter, MeanFilter, GaussianFilter, MedianFilter, BilateralFilter, Morphology, ImageResize
-from .image_stitching import ImageStitchingTool
-from .image_calculation import ImageCalculationTool, ImageAddTool, ImageSubtractTool, ImageBlendTool
-from .ocr import OCRReader, OCREnglish
-from .recognition import BarcodeReader, QRCodeReader
-from .cpu_optimization import CPUDetector
-from .calibration import CalibrationTool
-from .hand_eye_calibration import HandEyeCalibrationTool
-from .geometric_transform import GeometricTransformTool
-from .image_saver import ImageSaverTool
-from .image_slice import ImageSliceTool
-
-__all__ = [
-    'AppearanceDetector',
-    'SurfaceDefectDetector',
-    'GrayMatch',
-    'ShapeMatch',
-    'LineFind',
-    'CircleFind',
-    'BoxFilter',
-    'MeanFilter',
-    'GaussianFilter',
-    'MedianFilter',
-    'BilateralFilter',
-    'Morphology',
-    'ImageResize',
-    'ImageStitchingTool',
-    'ImageCalculationTool',
-    'ImageAddTool',
-    'ImageSubtractTool',
-    'ImageBlendTool',
-    'OCRReader',
-    'OCREnglish',
-    'BarcodeReader',
-    'QRCodeReader',
-    'CPUDetector',
-    'CalibrationTool',
-    'HandEyeCalibrationTool',
-    'GeometricTransformTool',
-    'ImageSaverTool',
-    'ImageSliceTool'
-]
+import importlib
+
+# 工具类 -> 所在模块（相对本包）
+_LAZY_EXPORTS = {
+    'AppearanceDetector': '.appearance_detection',
+    'SurfaceDefectDetector': '.appearance_detection',
+    'GrayMatch': '.template_match',
+    'ShapeMatch': '.template_match',
+    'LineFind': '.template_match',
+    'CircleFind': '.template_match',
+    'BoxFilter': '.image_filter',
+    'MeanFilter': '.image_filter',
+    'GaussianFilter': '.image_filter',
+    'MedianFilter': '.image_filter',
+    'BilateralFilter': '.image_filter',
+    'Morphology': '.image_filter',
+    'ImageResize': '.image_filter',
+    'ImageStitchingTool': '.image_stitching',
+    'ImageCalculationTool': '.image_calculation',
+    'ImageAddTool': '.image_calculation',
+    'ImageSubtractTool': '.image_calculation',
+    'ImageBlendTool': '.image_calculation',
+    'OCRReader': '.ocr',
+    'OCREnglish': '.ocr',
+    'BarcodeReader': '.recognition',
+    'QRCodeReader': '.recognition',
+    'CPUDetector': '.cpu_optimization',
+    'CalibrationTool': '.calibration',
+    'HandEyeCalibrationTool': '.hand_eye_calibration',
+    'GeometricTransformTool': '.geometric_transform',
+    'ImageSaverTool': '.image_saver',
+    'ImageSliceTool': '.image_slice',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """延迟导入工具类"""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -20,8 +20,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import cv2
 import numpy as np
 
-from core.tool_base import ToolParameter, ToolRegistry, VisionAlgorithmToolBase
+from core.tile_executor import kernel_halo, run_tiled
+from core.tool_base import (
+    ToolParameter,
+    ToolRegistry,
+    VisionAlgorithmToolBase,
+    search_region_parameter,
+)
 from data.image_data import ImageData, ResultData
+from data.overlay import Overlay
+from tools.analysis.blob_engine import analyze_blobs, filter_blobs
+from tools.vision.reference_model import ReferenceModel
 from utils.exceptions import ToolException
 from utils.image_processing_utils import (
     preprocess_image,
@@ -30,7 +39,7 @@ from utils.image_processing_utils import (
     classify_defect,
     calculate_confidence,
     get_defect_name,
-    draw_detection_result,
+    add_detection_overlay,
 )
 
 USE_NUMBA = False
@@ -159,7 +168,7 @@ class AppearanceDetector(VisionAlgorithmToolBase):
             raise ToolException("无输入图像")
 
         input_image = self._input_data.data
-        output_image = input_image.copy()
+        overlay = Overlay()
 
         # 获取参数
         detection_type = self.get_param("detection_type", "all")
@@ -231,10 +240,11 @@ class AppearanceDetector(VisionAlgorithmToolBase):
 
             # 绘制结果
             if draw_result:
-                output_image = draw_detection_result(output_image, [defect_info])
+                add_detection_overlay(overlay, [defect_info])
 
         # 保存结果
         self._result_data = ResultData()
+        self._result_data.overlay = overlay
         self._result_data.tool_name = self._name
         self._result_data.result_category = "defect"
         self._result_data.set_value("defects", defects)
@@ -245,9 +255,8 @@ class AppearanceDetector(VisionAlgorithmToolBase):
         self._result_data.set_value("detection_type", detection_type)
         self._result_data.set_value("defect_type", defect_type)
 
-        # 设置输出图像
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        # 设置输出图像(输入图像视图 + 叠加图元)
+        self._output_data = self._input_data.view(overlay)
 
         self._logger.info(f"外观检测完成: 发现 {len(defects)} 个缺陷")
 
@@ -267,12 +276,26 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
     - max_size: 最大缺陷尺寸
     - use_multiscale: 是否使用多尺度检测
     - adaptive_threshold: 是否使用自适应阈值
+    - detection_mode: threshold(多尺度阈值) / reference(与金样参考模型比较)
+    - reference_file: 参考模型文件(.npz)
+    - reference_sigma: 参考模式下超出 均值±k·标准差 判为缺陷的倍数k
+    - reference_min_std: 参考模型的标准差下限
+    - reference_align: 是否用相位相关将图像对齐到参考模型
+    - reference_learn: 学习模式，每次运行把输入作为良品样本加入参考模型
+    - reference_save_interval: 学习模式下每学习多少个样本保存一次模型文件
+    - search_region: 搜索区域；阈值模式只处理区域内的像素，参考模式与整幅
+      参考模型比较后丢弃中心在区域外的缺陷
     """
 
     tool_name = "表面缺陷检测"
     tool_category = "Vision"
     tool_description = "高精度表面缺陷检测"
 
+    SUPPORTS_SEARCH_REGION = True
+
+    # 高斯模糊(5) + 自适应阈值(11) + 闭运算(3) + 开运算(3)
+    _ADAPTIVE_MASK_HALO = kernel_halo(5) + kernel_halo(11) + kernel_halo(3, 4)
+
     PARAM_DEFINITIONS = {
         "sensitivity": ToolParameter(
             name="检测灵敏度",
@@ -308,8 +331,68 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
             default=True,
             description="是否使用自适应阈值",
         ),
+        "detection_mode": ToolParameter(
+            name="检测模式",
+            param_type="enum",
+            default="threshold",
+            description="threshold: 多尺度阈值; reference: 与良品参考模型比较",
+            options=["threshold", "reference"],
+        ),
+        "reference_file": ToolParameter(
+            name="参考模型文件",
+            param_type="file_path",
+            default="",
+            description="良品参考模型文件(.npz)，学习模式下自动保存",
+        ),
+        "reference_sigma": ToolParameter(
+            name="偏差倍数",
+            param_type="float",
+            default=4.0,
+            description="灰度超出 均值±倍数×标准差 判为缺陷",
+            min_value=1.0,
+            max_value=20.0,
+        ),
+        "reference_min_std": ToolParameter(
+            name="最小标准差",
+            param_type="float",
+            default=5.0,
+            description="参考模型标准差下限，抑制样本间无变化区域的噪声",
+            min_value=0.5,
+            max_value=50.0,
+        ),
+        "reference_align": ToolParameter(
+            name="自动对齐",
+            param_type="boolean",
+            default=True,
+            description="用相位相关将图像平移对齐到参考模型",
+        ),
+        "reference_learn": ToolParameter(
+            name="学习良品",
+            param_type="boolean",
+            default=False,
+            description="每次运行将输入图像作为良品样本加入参考模型",
+        ),
+        "reference_save_interval": ToolParameter(
+            name="保存间隔",
+            param_type="integer",
+            default=10,
+            description=(
+                "学习模式下每学习多少个样本保存一次参考模型文件，"
+                "退出学习模式时保存剩余样本"
+            ),
+            min_value=1,
+            max_value=1000,
+        ),
+        "search_region": search_region_parameter(),
     }
 
+    def __init__(self, name: str = None):
+        """初始化表面缺陷检测器"""
+        super().__init__(name)
+        self._reference_model: Optional[ReferenceModel] = None
+        self._reference_key = None
+        self._unsaved_samples = 0
+
     def _init_params(self):
         """初始化默认参数"""
         self.set_param("sensitivity", 0.6)
@@ -317,6 +400,21 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
         self.set_param("max_size", 5000)
         self.set_param("use_multiscale", True)
         self.set_param("adaptive_threshold", True)
+        self.set_param("detection_mode", "threshold")
+        self.set_param("reference_file", "")
+        self.set_param("reference_sigma", 4.0)
+        self.set_param("reference_min_std", 5.0)
+        self.set_param("reference_align", True)
+        self.set_param("reference_learn", False)
+        self.set_param("reference_save_interval", 10)
+        self.set_param("search_region", None)
+
+    def _use_search_region_views(self) -> bool:
+        """参考模型覆盖整幅图像，学习和参考模式处理整帧"""
+        return not (
+            self.get_param("reference_learn", False)
+            or self.get_param("detection_mode", "threshold") == "reference"
+        )
 
     def _run_impl(self):
         """执行表面缺陷检测"""
@@ -324,7 +422,7 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
             raise ToolException("无输入图像")
 
         input_image = self._input_data.data
-        output_image = input_image.copy()
+        overlay = Overlay()
 
         # 获取参数
         sensitivity = self.get_param("sensitivity", 0.6)
@@ -333,11 +431,23 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
         use_multiscale = self.get_param("use_multiscale", True)
         adaptive_threshold = self.get_param("adaptive_threshold", True)
 
-        # 转换为灰度
-        gray_image = preprocess_image(input_image)
+        # 转换为灰度(同一帧的工具共享)
+        gray_image = self._input_data.derived.gray()
 
+        if self.get_param("reference_learn", False):
+            self._learn_reference(gray_image)
+            return
+        if self._unsaved_samples:
+            # 退出学习模式，保存剩余样本
+            self.save_reference_model()
+
+        # 参考模型比较，一次遍历图像
+        if self.get_param("detection_mode", "threshold") == "reference":
+            defects = self._detect_with_reference(
+                gray_image, min_size, max_size
+            )
         # 多尺度检测
-        if use_multiscale:
+        elif use_multiscale:
             defects = []
             scales = [0.5, 1.0, 1.5]
 
@@ -374,12 +484,26 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
         # 去重
         defects = self._remove_duplicates(defects)
 
+        # 旋转矩形/多边形搜索区域：丢弃中心在区域外的缺陷
+        if defects:
+            centers = np.array(
+                [
+                    (
+                        d["location"]["x"] + d["location"]["width"] / 2,
+                        d["location"]["y"] + d["location"]["height"] / 2,
+                    )
+                    for d in defects
+                ]
+            )
+            inside = self.in_search_region(centers[:, 0], centers[:, 1])
+            defects = [d for d, keep in zip(defects, inside.tolist()) if keep]
+
         # 绘制结果
-        for defect in defects:
-            self._draw_defect(output_image, defect)
+        add_detection_overlay(overlay, defects)
 
         # 保存结果
         self._result_data = ResultData()
+        self._result_data.overlay = overlay
         self._result_data.tool_name = self._name
         self._result_data.result_category = "defect"
         self._result_data.set_value("defects", defects)
@@ -388,12 +512,146 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
             "status", "OK" if defects else "No defects found"
         )
 
-        # 设置输出图像
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        # 设置输出图像(输入图像视图 + 叠加图元)
+        self._output_data = self._input_data.view(overlay)
 
         self._logger.info(f"表面缺陷检测完成: 发现 {len(defects)} 个缺陷")
 
+    def get_reference_model(self) -> Optional[ReferenceModel]:
+        """获取参考模型，参考模型文件未变化时复用已加载的模型
+
+        Returns:
+            参考模型，没有模型文件也未学习过样本时为 None
+        """
+        path = self.get_param("reference_file", "")
+        if path and os.path.exists(path):
+            key = (path, os.path.getmtime(path))
+            if key != self._reference_key:
+                try:
+                    self._reference_model = ReferenceModel.load(path)
+                except Exception as e:
+                    raise ToolException(f"读取参考模型失败: {e}")
+                self._reference_key = key
+
+        model = self._reference_model
+        if model is not None:
+            model.set_min_std(self.get_param("reference_min_std", 5.0))
+        return model
+
+    def add_reference_sample(self, image: np.ndarray) -> int:
+        """加入一张良品样本，设置了参考模型文件时每 reference_save_interval
+        个样本保存一次
+
+        Args:
+            image: 良品图像(灰度或彩色)
+
+        Returns:
+            模型中的样本数
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        model = self.get_reference_model()
+        if model is None or (
+            model.shape is not None and model.shape != image.shape
+        ):
+            model = ReferenceModel(self.get_param("reference_min_std", 5.0))
+            self._reference_model = model
+        model.add_sample(image, align=self.get_param("reference_align", True))
+
+        self._unsaved_samples += 1
+        if self._unsaved_samples >= self.get_param(
+            "reference_save_interval", 10
+        ):
+            self.save_reference_model()
+        return model.count
+
+    def save_reference_model(self) -> bool:
+        """把参考模型保存到参考模型文件
+
+        Returns:
+            是否已保存(未设置模型文件或模型未训练时为 False)
+        """
+        path = self.get_param("reference_file", "")
+        model = self._reference_model
+        if not path or model is None or not model.is_trained:
+            return False
+        model.save(path)
+        self._reference_key = (path, os.path.getmtime(path))
+        self._unsaved_samples = 0
+        return True
+
+    def reset_reference_model(self):
+        """清空参考模型(不删除模型文件)"""
+        self._reference_model = None
+        self._reference_key = None
+        self._unsaved_samples = 0
+
+    def _learn_reference(self, gray_image: np.ndarray):
+        """学习模式：加入良品样本，不做检测"""
+        count = self.add_reference_sample(gray_image)
+
+        self._result_data = ResultData()
+        self._result_data.tool_name = self._name
+        self._result_data.result_category = "defect"
+        self._result_data.set_value("defects", [])
+        self._result_data.set_value("defect_count", 0)
+        self._result_data.set_value("reference_samples", count)
+        self._result_data.set_value("status", "Learning")
+        self._output_data = self._input_data
+
+        self._logger.info(f"参考模型已学习 {count} 个良品样本")
+
+    def _detect_with_reference(
+        self, gray_image: np.ndarray, min_size: int, max_size: int
+    ) -> List[Dict[str, Any]]:
+        """与参考模型逐像素比较检测缺陷
+
+        置信度为区域内最大偏差(标准差倍数)与两倍偏差倍数之比，上限为1。
+        """
+        model = self.get_reference_model()
+        if model is None or not model.is_trained:
+            raise ToolException("参考模型未训练，请先在学习模式下运行良品样本")
+        if model.shape != gray_image.shape:
+            raise ToolException(
+                f"图像尺寸 {gray_image.shape[::-1]} 与参考模型 {model.shape[::-1]} 不一致"
+            )
+
+        sigma = self.get_param("reference_sigma", 4.0)
+        mask, aligned, (dx, dy) = model.compare(
+            gray_image, sigma, align=self.get_param("reference_align", True)
+        )
+        mask = self._clean_mask(mask)
+
+        table = filter_blobs(
+            analyze_blobs(mask), {"area": (min_size, max_size)}
+        )
+        defects = []
+        for i, blob in enumerate(table.to_dicts()):
+            x, y, w, h = blob["x"], blob["y"], blob["width"], blob["height"]
+            deviation = float(model.deviation(aligned, x, y, w, h).max())
+            defects.append(
+                {
+                    "type": classify_defect(
+                        table.contours[i],
+                        blob["area"],
+                        blob["circularity"],
+                        blob["aspect_ratio"],
+                    ),
+                    "area": blob["area"],
+                    "confidence": round(min(deviation / (2 * sigma), 1.0), 2),
+                    "deviation": round(deviation, 2),
+                    # 模型坐标 -> 输入图像坐标
+                    "location": {
+                        "x": int(round(x + dx)),
+                        "y": int(round(y + dy)),
+                        "width": w,
+                        "height": h,
+                    },
+                }
+            )
+        return defects
+
     def _resize_image(self, image: np.ndarray, scale: float) -> np.ndarray:
         """调整图像大小"""
         new_width = int(image.shape[1] * scale)
@@ -413,28 +671,22 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
         """在特定尺度上检测缺陷"""
         defects = []
 
-        # 应用高斯模糊
-        blurred = cv2.GaussianBlur(image, (5, 5), 0)
-
-        # 阈值处理
+        # 邻域运算在大图上分块并行，轮廓在拼好的整幅掩码上查找
         if adaptive_threshold:
-            binary = cv2.adaptiveThreshold(
-                blurred,
-                255,
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY_INV,
-                11,
-                2,
+            binary = run_tiled(
+                image, self._adaptive_mask, self._ADAPTIVE_MASK_HALO
             )
         else:
+            # Otsu阈值依赖全图直方图，只对模糊和形态学分块
+            blurred = run_tiled(
+                image,
+                lambda patch: cv2.GaussianBlur(patch, (5, 5), 0),
+                kernel_halo(5),
+            )
             _, binary = cv2.threshold(
                 blurred, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
             )
-
-        # 形态学操作
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+            binary = run_tiled(binary, self._clean_mask, kernel_halo(3, 4))
 
         # 查找轮廓
         contours, _ = cv2.findContours(
@@ -471,10 +723,29 @@ class SurfaceDefectDetector(VisionAlgorithmToolBase):
 
         return defects
 
+    @classmethod
+    def _adaptive_mask(cls, image: np.ndarray) -> np.ndarray:
+        """模糊、自适应阈值并清理得到缺陷掩码"""
+        blurred = cv2.GaussianBlur(image, (5, 5), 0)
+        binary = cv2.adaptiveThreshold(
+            blurred,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY_INV,
+            11,
+            2,
+        )
+        return cls._clean_mask(binary)
+
+    @staticmethod
+    def _clean_mask(binary: np.ndarray) -> np.ndarray:
+        """闭运算填补空洞后开运算去除噪点"""
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+        return cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+
     def _remove_duplicates(
         self, defects: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """去除重复缺陷"""
         return remove_duplicate_defects(defects)
-
-
@@ -10,7 +10,7 @@
 - 圆点标定（自动检测圆点）
 - 手动标定（输入参考尺寸）
 - 像素到实际尺寸转换
-- 畸变校正
+- 畸变校正（输出校正后的图像，映射表按图像尺寸缓存）
 
 Author: Vision System Team
 Date: 2026-02-03
@@ -28,6 +28,11 @@ import numpy as np
 
 from core.tool_base import ToolBase, ToolParameter, ToolRegistry
 from data.image_data import ImageData, ResultData
+from tools.vision.coordinate_transform import (
+    TransformChain,
+    annotate_result_data,
+)
+from tools.vision.image_correction import CorrectionMaps, CorrectionSpec
 from utils.exceptions import ToolException
 
 _logger = logging.getLogger("Calibration")
@@ -127,6 +132,12 @@ class CalibrationTool(ToolBase):
             description="输出结果使用的单位",
             options=["mm", "inch", "um"],
         ),
+        "undistort_output": ToolParameter(
+            name="输出校正图像",
+            param_type="boolean",
+            default=False,
+            description="有相机内参时输出去畸变后的图像",
+        ),
         "save_calibration": ToolParameter(
             name="保存标定参数",
             param_type="boolean",
@@ -149,6 +160,7 @@ class CalibrationTool(ToolBase):
         self._pixel_per_mm_x = 10.0
         self._pixel_per_mm_y = 10.0
         self._calibrated = False
+        self._correction = CorrectionMaps()
 
     def _init_params(self):
         """初始化默认参数"""
@@ -161,6 +173,7 @@ class CalibrationTool(ToolBase):
         self.set_param("reference_width", 100.0)
         self.set_param("reference_height", 100.0)
         self.set_param("output_unit", "mm")
+        self.set_param("undistort_output", False)
         self.set_param("save_calibration", False)
         self.set_param("calibration_file", "")
 
@@ -292,6 +305,72 @@ class CalibrationTool(ToolBase):
 
         return phys_x, phys_y
 
+    def undistort_image(self, image: np.ndarray) -> np.ndarray:
+        """
+        校正图像的镜头畸变
+
+        映射表按图像尺寸和相机参数缓存，连续帧只做一次remap。
+
+        Args:
+            image: 输入图像
+
+        Returns:
+            去畸变后的图像；没有相机内参时返回输入图像
+        """
+        if self._calibration_matrix is None or self._distortion_coeffs is None:
+            return image
+        return self._correction.apply(
+            image,
+            CorrectionSpec(),
+            self._calibration_matrix,
+            self._distortion_coeffs,
+        )
+
+    def get_transform_chain(
+        self, hand_eye=None, undistort: bool = True
+    ) -> TransformChain:
+        """
+        编译当前标定的坐标变换链
+
+        批量转换时先编译一次再复用，避免逐点读取参数。
+        标定结果或输出单位变化后需重新编译。
+
+        Args:
+            hand_eye: 已标定的 HandEyeCalibrationTool，提供时可同时转换机器人坐标
+            undistort: 有畸变参数时是否先去畸变
+
+        Returns:
+            TransformChain 变换链
+        """
+        if not self._calibrated:
+            _logger.warning("工具未标定，使用默认比例")
+            chain_args = {"pixel_per_mm": (10.0, 10.0)}
+        else:
+            chain_args = {
+                "pixel_per_mm": (self._pixel_per_mm_x, self._pixel_per_mm_y),
+                "unit": self.get_param("output_unit", "mm"),
+            }
+            if undistort:
+                chain_args["camera_matrix"] = self._calibration_matrix
+                chain_args["dist_coeffs"] = self._distortion_coeffs
+
+        if hand_eye is not None and hand_eye.is_calibrated():
+            chain_args["robot_matrix"] = hand_eye.get_transform_matrix()
+
+        return TransformChain(**chain_args)
+
+    def pixel_to_physical_points(self, points) -> np.ndarray:
+        """
+        批量将像素坐标转换为物理坐标
+
+        Args:
+            points: Nx2 像素坐标
+
+        Returns:
+            Nx2 物理坐标（输出单位）
+        """
+        return self.get_transform_chain().to_physical(points)
+
     def pixel_to_physical_size(
         self, pixel_width: float, pixel_height: float
     ) -> Tuple[float, float]:
@@ -404,6 +483,9 @@ class CalibrationTool(ToolBase):
                 2,
             )
 
+        if self.get_param("undistort_output", False):
+            output_image = self.undistort_image(output_image)
+
         # 保存标定参数
         save_calibration = self.get_param("save_calibration", False)
         calibration_file = self.get_param("calibration_file", "")
@@ -423,6 +505,12 @@ class CalibrationTool(ToolBase):
         self._result_data.set_value("pixel_per_mm_y", self._pixel_per_mm_y)
         self._result_data.set_value("output_unit", self.get_param("output_unit", "mm"))
 
+        # 为上游的匹配/斑点/检测结果附加物理坐标
+        upstream = self.get_upstream_result()
+        if upstream is not None:
+            h, w = input_image.shape[:2]
+            annotate_result_data(upstream, self.get_transform_chain(), (w, h))
+
         _logger.info(
             f"标定完成: pixel_per_mm = ({self._pixel_per_mm_x:.3f}, {self._pixel_per_mm_y:.3f})"
         )
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+码区域定位与并行解码模块
+
+整幅高分辨率图像直接交给 pyzbar / OpenCV 解码很慢，且多个码时还要再做一次整图兜底。
+这里先在缩小的图像上根据梯度定位候选码区域：
+
+- 一维码：某一方向的梯度远强于正交方向(|Gx|-|Gy| 的绝对值)
+- 二维码：两个方向的梯度都很强(梯度幅值)
+
+梯度图经均值滤波、Otsu 二值化和闭运算连成块，外接矩形放大回原图并留出静区，
+各候选区域在线程池中并行解码；失败的区域再按缩放和旋转重试。
+定位不到区域或区域内都解码失败时退回整图解码，结果与原来的整图解码一致。
+
+解码器对象(cv2.QRCodeDetector / cv2.barcode.BarcodeDetector)按线程缓存，跨帧复用。
+
+使用示例：
+    decoder = get_code_decoder()
+    codes = decoder.decode(gray, kind="qrcode")
+    for code in codes:
+        print(code.type, code.data, code.polygon)
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+# 码类别
+KIND_BARCODE = "barcode"
+KIND_QRCODE = "qrcode"
+KIND_ALL = "all"
+
+# 二维码类型(pyzbar命名)，其余类型视为一维码
+MATRIX_CODE_TYPES = ("QRCODE", "DATA_MATRIX")
+
+# 定位时缩小图像的长边(像素)
+DEFAULT_LOCATE_SIDE = 640
+
+# 候选区域外扩比例(相对区域长边)，留出静区
+REGION_PADDING = 0.2
+
+# 候选区域最小面积(相对缩小图像面积)
+MIN_REGION_AREA_RATIO = 0.0005
+
+# 单帧最多解码的候选区域数
+MAX_REGIONS = 16
+
+# 候选区域覆盖超过该比例时直接整图解码
+MAX_REGION_COVERAGE = 0.6
+
+# 解码失败的区域依次尝试的缩放和旋转(度)
+RETRY_SCALES = (2.0, 0.5)
+RETRY_ANGLES = (45.0, -45.0)
+
+# 默认解码线程数
+DEFAULT_DECODE_WORKERS = min(4, os.cpu_count() or 1)
+
+Region = Tuple[int, int, int, int]
+
+_pyzbar_decode = None
+_pyzbar_checked = False
+
+
+def _get_pyzbar() -> Optional[Callable]:
+    """按需导入pyzbar，未安装时返回None"""
+    global _pyzbar_decode, _pyzbar_checked
+    if not _pyzbar_checked:
+        try:
+            from pyzbar.pyzbar import decode
+
+            _pyzbar_decode = decode
+        except ImportError:
+            _pyzbar_decode = None
+        _pyzbar_checked = True
+    return _pyzbar_decode
+
+
+@dataclass
+class DecodedCode:
+    """解码结果
+
+    属性名与 pyzbar 的结果一致，polygon 为原图坐标下的顶点 (N, 2)。
+    """
+
+    data: str
+    type: str
+    polygon: np.ndarray
+
+    @property
+    def rect(self) -> Region:
+        """外接矩形 (x, y, w, h)"""
+        return cv2.boundingRect(np.asarray(self.polygon, np.float32))
+
+
+def _matches_kind(code_type: str, kind: str) -> bool:
+    if kind == KIND_QRCODE:
+        return code_type == "QRCODE"
+    if kind == KIND_BARCODE:
+        return code_type not in MATRIX_CODE_TYPES
+    return True
+
+
+def locate_code_regions(
+    gray: np.ndarray,
+    kind: str = KIND_ALL,
+    max_side: int = DEFAULT_LOCATE_SIDE,
+    padding: float = REGION_PADDING,
+    max_regions: int = MAX_REGIONS,
+) -> List[Region]:
+    """在缩小的图像上定位候选码区域
+
+    Args:
+        gray: 灰度图像
+        kind: 码类别 barcode / qrcode / all
+        max_side: 定位时缩小图像的长边
+        padding: 区域外扩比例
+        max_regions: 最多返回的区域数
+
+    Returns:
+        原图坐标下的候选区域 (x, y, w, h) 列表，按面积从大到小
+    """
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / float(max(height, width)))
+    small = (
+        cv2.resize(
+            gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+        if scale < 1.0
+        else gray
+    )
+
+    grad_x = cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 1, 0, ksize=3))
+    grad_y = cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 0, 1, ksize=3))
+    if kind == KIND_BARCODE:
+        gradient = cv2.absdiff(grad_x, grad_y)
+    else:
+        gradient = cv2.addWeighted(grad_x, 0.5, grad_y, 0.5, 0)
+
+    gradient = cv2.blur(gradient, (5, 5))
+    _, mask = cv2.threshold(
+        gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
+    )
+
+    close_size = max(3, int(round(min(small.shape[:2]) * 0.02)) | 1)
+    kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT, (close_size, close_size)
+    )
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask = cv2.erode(mask, None, iterations=2)
+    mask = cv2.dilate(mask, None, iterations=2)
+
+    contours, _ = cv2.findContours(
+        mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+    )
+    min_area = MIN_REGION_AREA_RATIO * small.shape[0] * small.shape[1]
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w * h < min_area:
+            continue
+        pad = max(w, h) * padding + 2
+        x0 = max(0, int((x - pad) / scale))
+        y0 = max(0, int((y - pad) / scale))
+        x1 = min(width, int((x + w + pad) / scale) + 1)
+        y1 = min(height, int((y + h + pad) / scale) + 1)
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+
+    boxes.sort(key=lambda box: box[2] * box[3], reverse=True)
+    return boxes[:max_regions]
+
+
+def _transform_crop(crop: np.ndarray, scale: float, angle: float):
+    """缩放并旋转裁剪图(旋转时扩展画布)，返回变换后图像和2x3仿射矩阵"""
+    height, width = crop.shape[:2]
+    center = (width / 2.0, height / 2.0)
+    matrix = cv2.getRotationMatrix2D(center, angle, scale)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    out_w = max(1, int(round(height * sin + width * cos)))
+    out_h = max(1, int(round(height * cos + width * sin)))
+    matrix[0, 2] += out_w / 2.0 - center[0]
+    matrix[1, 2] += out_h / 2.0 - center[1]
+    if angle == 0.0:
+        # 放大时用最近邻保持模块边缘锐利，插值放大反而会让小码的定位图案发虚
+        interpolation = cv2.INTER_NEAREST if scale > 1.0 else cv2.INTER_AREA
+        warped = cv2.resize(crop, (out_w, out_h), interpolation=interpolation)
+    else:
+        warped = cv2.warpAffine(
+            crop,
+            matrix,
+            (out_w, out_h),
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
+    return warped, matrix
+
+
+class CodeDecoder:
+    """
+    码解码器
+
+    解码后端为 pyzbar(已安装时)和 OpenCV；OpenCV 检测器按线程缓存复用。
+    候选区域在线程池中并行解码，区域数为1时在调用线程中解码。
+    """
+
+    def __init__(self, max_workers: int = None):
+        """
+        初始化解码器
+
+        Args:
+            max_workers: 并行解码的线程数，默认为 min(4, CPU核数)
+        """
+        self._max_workers = max_workers or DEFAULT_DECODE_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def max_workers(self) -> int:
+        """并行解码的线程数"""
+        return self._max_workers
+
+    def decode(
+        self,
+        gray: np.ndarray,
+        kind: str = KIND_ALL,
+        localize: bool = True,
+        retry: bool = True,
+    ) -> List[DecodedCode]:
+        """解码图像中的码
+
+        Args:
+            gray: 灰度图像
+            kind: 码类别 barcode / qrcode / all
+            localize: 是否先定位候选区域，只解码候选区域
+            retry: 区域解码失败时是否按缩放和旋转重试
+
+        Returns:
+            解码结果列表(原图坐标)
+        """
+        if localize:
+            regions = locate_code_regions(gray, kind)
+            coverage = sum(w * h for _, _, w, h in regions)
+            if (
+                regions
+                and coverage
+                < MAX_REGION_COVERAGE * gray.shape[0] * gray.shape[1]
+            ):
+                codes = self._decode_regions(gray, regions, kind, retry)
+                if codes:
+                    return codes
+                logger.debug(
+                    "候选区域(%d个)未解码到码，整图解码", len(regions)
+                )
+
+        return self.decode_image(gray, kind)
+
+    def decode_image(
+        self, image: np.ndarray, kind: str = KIND_ALL
+    ) -> List[DecodedCode]:
+        """对整幅图像解码一次
+
+        pyzbar 可用时优先使用；二维码在 pyzbar 未识别到时再用 OpenCV 检测，
+        一维码在 pyzbar 未安装时使用 OpenCV 条码检测器。
+
+        Args:
+            image: 灰度图像
+            kind: 码类别
+
+        Returns:
+            解码结果列表(图像坐标)
+        """
+        codes = []
+        pyzbar_decode = _get_pyzbar()
+        if pyzbar_decode is not None:
+            for obj in pyzbar_decode(image):
+                if not _matches_kind(obj.type, kind):
+                    continue
+                data = (
+                    obj.data.decode("utf-8")
+                    if isinstance(obj.data, bytes)
+                    else obj.data
+                )
+                polygon = np.array(
+                    [(p.x, p.y) for p in obj.polygon], np.float32
+                )
+                codes.append(DecodedCode(data, obj.type, polygon))
+
+        if not codes and kind in (KIND_QRCODE, KIND_ALL):
+            codes.extend(self._decode_qr_opencv(image))
+        if pyzbar_decode is None and kind in (KIND_BARCODE, KIND_ALL):
+            codes.extend(self._decode_barcode_opencv(image))
+        return codes
+
+    def shutdown(self):
+        """关闭线程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _decode_regions(
+        self, gray: np.ndarray, regions: List[Region], kind: str, retry: bool
+    ) -> List[DecodedCode]:
+        """并行解码候选区域，合并重叠区域中的重复结果"""
+        if len(regions) == 1 or self._max_workers < 2:
+            results = [
+                self._decode_region(gray, r, kind, retry) for r in regions
+            ]
+        else:
+            executor = self._get_executor()
+            futures = [
+                executor.submit(self._decode_region, gray, r, kind, retry)
+                for r in regions[1:]
+            ]
+            results = [self._decode_region(gray, regions[0], kind, retry)]
+            results.extend(future.result() for future in futures)
+
+        codes: List[DecodedCode] = []
+        for region_codes in results:
+            for code in region_codes:
+                if not any(self._same_code(code, other) for other in codes):
+                    codes.append(code)
+        # 按从上到下、从左到右排列，与区域大小和完成顺序无关
+        codes.sort(key=lambda code: code.rect[1::-1])
+        return codes
+
+    def _decode_region(
+        self, gray: np.ndarray, region: Region, kind: str, retry: bool
+    ) -> List[DecodedCode]:
+        """解码单个区域，失败时按缩放和旋转重试"""
+        x, y, w, h = region
+        crop = gray[y : y + h, x : x + w]
+        codes = self.decode_image(crop, kind)
+
+        if not codes and retry:
+            attempts = [(scale, 0.0) for scale in RETRY_SCALES]
+            attempts += [(1.0, angle) for angle in RETRY_ANGLES]
+            for scale, angle in attempts:
+                warped, matrix = _transform_crop(crop, scale, angle)
+                codes = self.decode_image(warped, kind)
+                if codes:
+                    inverse = cv2.invertAffineTransform(matrix)
+                    for code in codes:
+                        code.polygon = cv2.transform(
+                            code.polygon.reshape(-1, 1, 2), inverse
+                        ).reshape(-1, 2)
+                    break
+
+        for code in codes:
+            code.polygon = code.polygon + np.float32((x, y))
+        return codes
+
+    @staticmethod
+    def _same_code(code: DecodedCode, other: DecodedCode) -> bool:
+        """同一内容且中心落在对方外接矩形内视为同一个码"""
+        if code.data != other.data or code.type != other.type:
+            return False
+        cx, cy = np.mean(code.polygon, axis=0)
+        x, y, w, h = other.rect
+        return x <= cx <= x + w and y <= cy <= y + h
+
+    def _detector(self, name: str, factory: Callable):
+        """获取当前线程缓存的OpenCV检测器"""
+        detector = getattr(self._local, name, None)
+        if detector is None:
+            detector = factory()
+            setattr(self._local, name, detector)
+        return detector
+
+    def _decode_qr_opencv(self, image: np.ndarray) -> List[DecodedCode]:
+        try:
+            detector = self._detector("qr", cv2.QRCodeDetector)
+            ok, infos, corners, _ = detector.detectAndDecodeMulti(image)
+        except cv2.error as e:
+            logger.debug("OpenCV二维码检测失败: %s", e)
+            return []
+        if not ok or corners is None:
+            return []
+        return [
+            DecodedCode(
+                info, "QRCODE", np.asarray(corner, np.float32).reshape(-1, 2)
+            )
+            for info, corner in zip(infos, corners)
+            if info
+        ]
+
+    def _decode_barcode_opencv(self, image: np.ndarray) -> List[DecodedCode]:
+        try:
+            detector = self._detector("barcode", cv2.barcode.BarcodeDetector)
+            ok, infos, types, corners = detector.detectAndDecodeWithType(image)
+        except (AttributeError, cv2.error) as e:
+            logger.debug("OpenCV条码检测失败: %s", e)
+            return []
+        if not ok or corners is None:
+            return []
+        return [
+            DecodedCode(
+                info, code_type, np.asarray(corner, np.float32).reshape(-1, 2)
+            )
+            for info, code_type, corner in zip(infos, types, corners)
+            if info
+        ]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """按需创建线程池"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers - 1,
+                    thread_name_prefix="CodeDecode",
+                )
+            return self._executor
+
+
+_default_decoder: Optional[CodeDecoder] = None
+_default_lock = threading.Lock()
+
+
+def get_code_decoder() -> CodeDecoder:
+    """获取全局码解码器"""
+    global _default_decoder
+    if _default_decoder is None:
+        with _default_lock:
+            if _default_decoder is None:
+                _default_decoder = CodeDecoder()
+    return _default_decoder
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+坐标变换链模块
+
+将标定工具的畸变参数、像素比例/单应性矩阵和手眼标定矩阵编译为一个变换链，
+一次向量化调用把 Nx2 像素坐标数组转换为物理坐标和机器人坐标，
+避免逐点调用标定工具并每次重新读取参数。
+
+变换顺序：
+    像素 -> 去畸变像素 -> 物理坐标(单应性或比例，含输出单位)
+    去畸变像素 -> 机器人坐标(手眼矩阵，与 transform_point_to_base 一致)
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+_logger = logging.getLogger("CoordinateTransform")
+
+# 1毫米对应的输出单位数值
+UNIT_SCALE = {"mm": 1.0, "inch": 1.0 / 25.4, "um": 1000.0}
+
+# 可附加坐标的结果列表键
+RESULT_LIST_KEYS = ("matches", "match_results", "detections", "blobs", "codes")
+
+
+def _as_points(points) -> np.ndarray:
+    """转换为 float64 的 Nx2 数组"""
+    array = np.asarray(points, dtype=np.float64)
+    if array.size == 0:
+        return array.reshape(0, 2)
+    return array.reshape(-1, 2)
+
+
+def planar_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    取手眼矩阵作用于图像平面(z=0)的3x3部分
+
+    Args:
+        matrix: 3x3 平面变换或 4x4 齐次变换矩阵
+
+    Returns:
+        3x3 矩阵，作用于 [x, y, 1]
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape == (4, 4):
+        return matrix[np.ix_([0, 1, 3], [0, 1, 3])]
+    if matrix.shape != (3, 3):
+        raise ValueError(f"不支持的手眼矩阵形状: {matrix.shape}")
+    return matrix
+
+
+class TransformChain:
+    """
+    编译后的坐标变换链
+
+    构造时合并比例、单位和矩阵，之后每次转换只做一次数组运算。
+    实例不可变，可在多个流程线程间共享。
+    """
+
+    def __init__(
+        self,
+        camera_matrix: Optional[np.ndarray] = None,
+        dist_coeffs: Optional[np.ndarray] = None,
+        pixel_per_mm: Optional[Tuple[float, float]] = None,
+        homography: Optional[np.ndarray] = None,
+        unit: str = "mm",
+        robot_matrix: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            camera_matrix: 相机内参矩阵，与 dist_coeffs 同时提供时先去畸变
+            dist_coeffs: 畸变系数
+            pixel_per_mm: (x, y) 方向每毫米像素数，homography 为空时使用
+            homography: 像素到物理平面(mm)的3x3单应性矩阵
+            unit: 物理坐标输出单位 (mm/inch/um)
+            robot_matrix: 手眼标定矩阵(3x3 或 4x4)，像素到机器人基座坐标
+        """
+        if unit not in UNIT_SCALE:
+            raise ValueError(f"不支持的单位: {unit}")
+        self.unit = unit
+
+        self._camera_matrix = None
+        self._dist_coeffs = None
+        if camera_matrix is not None and dist_coeffs is not None:
+            dist = np.asarray(dist_coeffs, dtype=np.float64).ravel()
+            if np.any(dist):
+                self._camera_matrix = np.asarray(
+                    camera_matrix, dtype=np.float64
+                )
+                self._dist_coeffs = dist
+
+        # 物理坐标：单位换算合并进矩阵，按需透视除法
+        self._physical = None
+        self._perspective = False
+        factor = UNIT_SCALE[unit]
+        if homography is not None:
+            H = np.asarray(homography, dtype=np.float64)
+            H = H / H[2, 2]
+            self._perspective = bool(np.any(H[2, :2]))
+            self._physical = np.diag([factor, factor, 1.0]) @ H
+        elif pixel_per_mm is not None:
+            ppm_x, ppm_y = pixel_per_mm
+            self._physical = np.diag([factor / ppm_x, factor / ppm_y, 1.0])
+
+        # 机器人坐标：只取前两行，与单点接口一样不做透视除法
+        self._robot = None
+        if robot_matrix is not None:
+            self._robot = planar_matrix(robot_matrix)[:2]
+
+    @property
+    def undistorts(self) -> bool:
+        """是否包含去畸变"""
+        return self._camera_matrix is not None
+
+    @property
+    def has_physical(self) -> bool:
+        """是否可转换物理坐标"""
+        return self._physical is not None
+
+    @property
+    def has_robot(self) -> bool:
+        """是否可转换机器人坐标"""
+        return self._robot is not None
+
+    def undistort(self, points) -> np.ndarray:
+        """
+        像素坐标去畸变
+
+        Args:
+            points: Nx2 像素坐标
+
+        Returns:
+            Nx2 去畸变后的像素坐标
+        """
+        pts = _as_points(points)
+        if not self.undistorts or len(pts) == 0:
+            return pts
+        undistorted = cv2.undistortPoints(
+            pts.reshape(-1, 1, 2),
+            self._camera_matrix,
+            self._dist_coeffs,
+            P=self._camera_matrix,
+        )
+        return undistorted.reshape(-1, 2).astype(np.float64)
+
+    def _apply_physical(self, pts: np.ndarray) -> np.ndarray:
+        M = self._physical
+        out = pts @ M[:2, :2].T + M[:2, 2]
+        if self._perspective:
+            w = pts @ M[2, :2] + M[2, 2]
+            out /= w[:, None]
+        return out
+
+    def _apply_robot(self, pts: np.ndarray) -> np.ndarray:
+        R = self._robot
+        return pts @ R[:, :2].T + R[:, 2]
+
+    def to_physical(self, points) -> np.ndarray:
+        """
+        像素坐标转换为物理坐标
+
+        Args:
+            points: Nx2 像素坐标
+
+        Returns:
+            Nx2 物理坐标(输出单位)
+        """
+        if not self.has_physical:
+            raise ValueError("变换链不包含像素比例或单应性矩阵")
+        return self._apply_physical(self.undistort(points))
+
+    def to_robot(self, points) -> np.ndarray:
+        """
+        像素坐标转换为机器人基座坐标
+
+        Args:
+            points: Nx2 像素坐标
+
+        Returns:
+            Nx2 机器人坐标
+        """
+        if not self.has_robot:
+            raise ValueError("变换链不包含手眼标定矩阵")
+        return self._apply_robot(self.undistort(points))
+
+    def map(self, points) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        一次转换出物理坐标和机器人坐标，去畸变只做一次
+
+        Args:
+            points: Nx2 像素坐标
+
+        Returns:
+            (物理坐标, 机器人坐标)，不包含的阶段为 None
+        """
+        pts = self.undistort(points)
+        physical = self._apply_physical(pts) if self.has_physical else None
+        robot = self._apply_robot(pts) if self.has_robot else None
+        return physical, robot
+
+    def get_info(self) -> Dict[str, Any]:
+        """获取变换链信息"""
+        return {
+            "unit": self.unit,
+            "undistort": self.undistorts,
+            "physical": self.has_physical,
+            "perspective": self._perspective,
+            "robot": self.has_robot,
+        }
+
+
+def _item_point(
+    item, template_size: Tuple[float, float], image_size
+) -> Optional[Tuple[float, float]]:
+    """取单个结果项的中心像素坐标"""
+    tw, th = template_size
+    if isinstance(item, (tuple, list)):
+        if len(item) < 2:
+            return None
+        w = item[3] if len(item) > 3 else tw
+        h = item[4] if len(item) > 4 else th
+        return item[0] + w / 2.0, item[1] + h / 2.0
+    if not isinstance(item, dict):
+        return None
+    if "cx" in item and "cy" in item:
+        return item["cx"], item["cy"]
+    if "center_x" in item and "center_y" in item:
+        return item["center_x"], item["center_y"]
+    bbox = item.get("bbox")
+    if isinstance(bbox, dict) and "x1" in bbox:
+        sx, sy = image_size if image_size else (1, 1)
+        return (bbox["x1"] + bbox["x2"]) / 2.0 * sx, (
+            bbox["y1"] + bbox["y2"]
+        ) / 2.0 * sy
+    rect = item.get("rect", item)
+    if "x" in rect and "y" in rect:
+        return (
+            rect["x"] + rect.get("width", tw) / 2.0,
+            rect["y"] + rect.get("height", th) / 2.0,
+        )
+    return None
+
+
+def annotate_results(
+    values: Dict[str, Any],
+    chain: TransformChain,
+    image_size: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """
+    为匹配、斑点、检测和读码结果附加物理坐标和机器人坐标
+
+    每个结果列表的中心点一次批量转换。字典项返回附加了
+    physical_x/physical_y/robot_x/robot_y 的副本；元组项(如模板匹配的
+    (x, y, score))保持原样，坐标放在 <键>_physical/<键>_robot 列表中。
+
+    Args:
+        values: 结果数据的所有值
+        chain: 变换链
+        image_size: (宽, 高)，用于换算归一化的检测框
+
+    Returns:
+        需要写回结果数据的键值
+    """
+    template_size = (
+        values.get("template_width", 0) or 0,
+        values.get("template_height", 0) or 0,
+    )
+    updates: Dict[str, Any] = {}
+
+    for key in RESULT_LIST_KEYS:
+        items = values.get(key)
+        if not items:
+            continue
+        indices: List[int] = []
+        points: List[Tuple[float, float]] = []
+        for i, item in enumerate(items):
+            point = _item_point(item, template_size, image_size)
+            if point is not None:
+                indices.append(i)
+                points.append(point)
+        if not points:
+            continue
+
+        physical, robot = chain.map(points)
+        if all(isinstance(items[i], dict) for i in indices):
+            annotated = list(items)
+            for row, i in enumerate(indices):
+                item = dict(items[i])
+                if physical is not None:
+                    item["physical_x"] = float(physical[row, 0])
+                    item["physical_y"] = float(physical[row, 1])
+                if robot is not None:
+                    item["robot_x"] = float(robot[row, 0])
+                    item["robot_y"] = float(robot[row, 1])
+                annotated[i] = item
+            updates[key] = annotated
+        else:
+            if physical is not None:
+                updates[f"{key}_physical"] = [
+                    tuple(p) for p in physical.tolist()
+                ]
+            if robot is not None:
+                updates[f"{key}_robot"] = [tuple(p) for p in robot.tolist()]
+
+    return updates
+
+
+def annotate_result_data(
+    result_data, chain: TransformChain, image_size=None
+) -> int:
+    """
+    就地为 ResultData 附加坐标
+
+    Args:
+        result_data: 上游工具的结果数据
+        chain: 变换链
+        image_size: (宽, 高)，用于换算归一化的检测框
+
+    Returns:
+        写回的键数量
+    """
+    if result_data is None:
+        return 0
+    updates = annotate_results(result_data.get_all_values(), chain, image_size)
+    for key, value in updates.items():
+        result_data.set_value(key, value)
+    if updates:
+        _logger.debug(f"已附加坐标: {', '.join(updates)}")
+    return len(updates)
@@ -215,6 +215,12 @@ class CPUDetector(VisionAlgorithmToolBase):
             self._logger.error(f"YOLO26-CPU检测器初始化失败: {e}")
             return False
 
+    def warmup(self) -> bool:
+        """预热：按当前参数创建检测器并加载模型"""
+        if self._detector is not None and self._detector.is_loaded:
+            return True
+        return self.initialize(self.get_all_params())
+
     def _run_impl(self) -> Dict[str, Any]:
         """执行目标检测"""
         self._logger.info(f"YOLO26开始执行，检测器状态: {self._detector is not None}")
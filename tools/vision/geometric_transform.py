@@ -6,7 +6,9 @@
 提供图像的几何变换功能，包括：
 - 四种预设变换：无变换、水平镜像、垂直镜像、水平垂直镜像
 - 自定义旋转角度
-- 处理顺序：先应用预设变换，再执行旋转
+- 镜头畸变校正（使用标定工具保存的相机内参）
+- 裁剪
+- 处理顺序：去畸变、预设变换、旋转、裁剪，合成为一次插值
 
 Author: Vision System Team
 Date: 2026-02-06
@@ -22,6 +24,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from core.tool_base import ToolBase, ToolParameter, ToolRegistry
 from data.image_data import ImageData, ResultData
+from tools.vision.image_correction import (
+    CorrectionMaps,
+    CorrectionSpec,
+    load_camera_parameters,
+)
 
 
 @ToolRegistry.register
@@ -33,7 +40,8 @@ class GeometricTransformTool(ToolBase):
     功能特性:
     - 四种预设变换选项
     - 自定义旋转角度
-    - 先镜像后旋转的处理顺序
+    - 镜头畸变校正和裁剪
+    - 先镜像后旋转的处理顺序，全部步骤合成为一次插值，映射按参数缓存
     
     输入端口:
     - InputImage: 输入图像
@@ -56,6 +64,9 @@ class GeometricTransformTool(ToolBase):
     
     def __init__(self, name: str = None):
         super().__init__(name)
+        self._correction = CorrectionMaps()
+        self._camera_params_key = None
+        self._camera_params = (None, None)
         
     def _init_params(self):
         """初始化参数"""
@@ -98,6 +109,37 @@ class GeometricTransformTool(ToolBase):
             param_type="float",
             description="旋转后的缩放比例",
         )
+
+        # 镜头畸变校正
+        self.set_param(
+            "畸变校正",
+            False,
+            param_type="boolean",
+            description="使用标定文件中的相机内参校正镜头畸变",
+        )
+
+        self.set_param(
+            "标定文件",
+            "",
+            param_type="file_path",
+            description="标定工具保存的标定参数文件（.npz）",
+        )
+
+        # 裁剪区域（在旋转后的图像上，宽或高为0表示不裁剪）
+        self.set_param("裁剪X", 0, param_type="integer", description="裁剪区域左上角X")
+        self.set_param("裁剪Y", 0, param_type="integer", description="裁剪区域左上角Y")
+        self.set_param(
+            "裁剪宽度",
+            0,
+            param_type="integer",
+            description="裁剪宽度（0表示不裁剪）",
+        )
+        self.set_param(
+            "裁剪高度",
+            0,
+            param_type="integer",
+            description="裁剪高度（0表示不裁剪）",
+        )
         
     def _get_input_ports(self) -> List[ToolParameter]:
         """获取输入端口定义"""
@@ -124,8 +166,12 @@ class GeometricTransformTool(ToolBase):
         """执行几何变换
         
         处理顺序：
-        1. 应用预设变换（镜像）
-        2. 执行旋转
+        1. 去畸变（可选）
+        2. 应用预设变换（镜像）
+        3. 执行旋转
+        4. 裁剪
+
+        各步骤合成为一个仿射矩阵或一对remap映射表，只做一次插值。
         
         Returns:
             包含变换后图像的字典
@@ -143,33 +189,21 @@ class GeometricTransformTool(ToolBase):
         # 获取参数
         transform_type = self.get_param("变换类型", "无变换")
         rotation_angle = self.get_param("旋转角度", 0.0)
-        center_x = self.get_param("旋转中心X", -1.0)
-        center_y = self.get_param("旋转中心Y", -1.0)
-        scale = self.get_param("缩放比例", 1.0)
+        spec = self._build_spec()
+        camera_matrix, dist_coeffs = self._get_camera_parameters()
         
-        self._logger.info(f"几何变换: 类型={transform_type}, 角度={rotation_angle}°")
+        self._logger.debug(f"几何变换: 类型={transform_type}, 角度={rotation_angle}°")
         
-        # 步骤1: 应用预设变换（镜像）
-        transformed_image = self._apply_preset_transform(image, transform_type)
-        
-        # 步骤2: 执行旋转
-        if rotation_angle != 0.0:
-            result_image = self._apply_rotation(
-                transformed_image, 
-                rotation_angle, 
-                center_x, 
-                center_y, 
-                scale
-            )
-        else:
-            result_image = transformed_image
+        result_image = self._correction.apply(
+            image, spec, camera_matrix, dist_coeffs
+        )
         
         # 创建输出数据
         height, width = result_image.shape[:2]
         channels = 1 if len(result_image.shape) == 2 else result_image.shape[2]
         output_data = ImageData(result_image, width, height, channels)
         
-        self._logger.info(f"几何变换完成: 输出尺寸={width}x{height}")
+        self._logger.debug(f"几何变换完成: 输出尺寸={width}x{height}")
         
         # 设置结果数据
         self._result_data = ResultData()
@@ -177,6 +211,7 @@ class GeometricTransformTool(ToolBase):
         self._result_data.result_category = "transform"
         self._result_data.set_value("transform_type", transform_type)
         self._result_data.set_value("rotation_angle", rotation_angle)
+        self._result_data.set_value("undistorted", camera_matrix is not None)
         self._result_data.set_value("output_width", width)
         self._result_data.set_value("output_height", height)
         
@@ -184,91 +219,57 @@ class GeometricTransformTool(ToolBase):
             "OutputImage": output_data,
         }
     
-    def _apply_preset_transform(self, image: np.ndarray, transform_type: str) -> np.ndarray:
-        """应用预设变换
-        
-        Args:
-            image: 输入图像
-            transform_type: 变换类型名称
-            
-        Returns:
-            变换后的图像
-        """
-        transform_code = self.TRANSFORM_TYPES.get(transform_type, "none")
+    def _build_spec(self) -> CorrectionSpec:
+        """由当前参数生成校正参数"""
+        crop = None
+        crop_w = int(self.get_param("裁剪宽度", 0) or 0)
+        crop_h = int(self.get_param("裁剪高度", 0) or 0)
+        if crop_w > 0 and crop_h > 0:
+            crop = (
+                int(self.get_param("裁剪X", 0) or 0),
+                int(self.get_param("裁剪Y", 0) or 0),
+                crop_w,
+                crop_h,
+            )
         
-        if transform_code == "none":
-            return image.copy()
-        elif transform_code == "horizontal":
-            # 水平镜像（左右翻转）
-            return cv2.flip(image, 1)
-        elif transform_code == "vertical":
-            # 垂直镜像（上下翻转）
-            return cv2.flip(image, 0)
-        elif transform_code == "both":
-            # 水平垂直镜像（180度旋转）
-            return cv2.flip(image, -1)
-        else:
-            return image.copy()
+        return CorrectionSpec(
+            flip=self.TRANSFORM_TYPES.get(
+                self.get_param("变换类型", "无变换"), "none"
+            ),
+            angle=float(self.get_param("旋转角度", 0.0)),
+            center_x=float(self.get_param("旋转中心X", -1.0)),
+            center_y=float(self.get_param("旋转中心Y", -1.0)),
+            scale=float(self.get_param("缩放比例", 1.0)),
+            crop=crop,
+        )
     
-    def _apply_rotation(
-        self, 
-        image: np.ndarray, 
-        angle: float, 
-        center_x: float, 
-        center_y: float, 
-        scale: float
-    ) -> np.ndarray:
-        """应用旋转变换
+    def _get_camera_parameters(self):
+        """读取标定文件中的相机内参，文件未变化时复用
         
-        Args:
-            image: 输入图像
-            angle: 旋转角度（度）
-            center_x: 旋转中心X坐标（-1表示图像中心）
-            center_y: 旋转中心Y坐标（-1表示图像中心）
-            scale: 缩放比例
-            
         Returns:
-            旋转后的图像
+            (camera_matrix, dist_coeffs)，未启用或文件无内参时为 (None, None)
         """
-        height, width = image.shape[:2]
+        path = self.get_param("标定文件", "")
+        if not self.get_param("畸变校正", False) or not path:
+            return None, None
         
-        # 确定旋转中心
-        if center_x < 0:
-            cx = width / 2
-        else:
-            cx = center_x
-            
-        if center_y < 0:
-            cy = height / 2
-        else:
-            cy = center_y
-        
-        # 创建旋转矩阵
-        rotation_matrix = cv2.getRotationMatrix2D((cx, cy), -angle, scale)
-        
-        # 计算输出图像尺寸（保持完整图像）
-        # 获取旋转后图像的边界框
-        cos_angle = np.abs(np.cos(np.radians(angle)))
-        sin_angle = np.abs(np.sin(np.radians(angle)))
-        
-        new_width = int((height * sin_angle + width * cos_angle) * scale)
-        new_height = int((height * cos_angle + width * sin_angle) * scale)
+        try:
+            key = (path, os.path.getmtime(path))
+        except OSError:
+            self._logger.warning(f"标定文件不存在: {path}")
+            return None, None
         
-        # 调整旋转矩阵的平移部分，使图像居中
-        rotation_matrix[0, 2] += (new_width - width) / 2
-        rotation_matrix[1, 2] += (new_height - height) / 2
+        if key != self._camera_params_key:
+            try:
+                self._camera_params = load_camera_parameters(path)
+            except Exception as e:
+                self._logger.warning(f"读取标定文件失败: {e}")
+                self._camera_params = (None, None)
+            if self._camera_params[0] is None:
+                self._logger.warning(f"标定文件中没有相机内参: {path}")
+            self._camera_params_key = key
         
-        # 执行旋转
-        rotated_image = cv2.warpAffine(
-            image, 
-            rotation_matrix, 
-            (new_width, new_height),
-            borderMode=cv2.BORDER_CONSTANT,
-            borderValue=(0, 0, 0)
-        )
-        
-        return rotated_image
-
+        return self._camera_params
 
 if __name__ == "__main__":
     # 测试代码
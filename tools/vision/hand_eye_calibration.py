@@ -28,6 +28,10 @@ import numpy as np
 
 from core.tool_base import ToolBase, ToolParameter, ToolRegistry
 from data.image_data import ImageData, ResultData
+from tools.vision.coordinate_transform import (
+    TransformChain,
+    annotate_result_data,
+)
 from utils.exceptions import ToolException
 
 _logger = logging.getLogger("HandEyeCalibration")
@@ -500,20 +504,36 @@ class HandEyeCalibrationTool(ToolBase):
             point_2d: 像素坐标 (x, y)
 
         Returns:
-            基座坐标系下的坐标 (x, y, z)
+            基座坐标系下的坐标 (x, y)
         """
-        if not self._is_calibrated:
-            raise ToolException("尚未完成标定")
+        point_base = self.transform_points_to_base([point_2d])[0]
+        return (point_base[0], point_base[1])
 
-        x, y = point_2d
+    def transform_points_to_base(self, points) -> np.ndarray:
+        """批量将像素坐标转换到机器人基座坐标系
 
-        point_cam = np.array([x, y, 1.0])
+        Args:
+            points: Nx2 像素坐标
 
-        T = self._T_cam_to_base if self.get_param("calibration_mode") == "eye_to_hand" else self._T_cam_to_end
+        Returns:
+            Nx2 基座坐标
+        """
+        return self.get_transform_chain().to_robot(points)
 
-        point_base = T @ point_cam
+    def get_transform_chain(self, calibration=None) -> TransformChain:
+        """编译像素到机器人坐标的变换链
 
-        return (point_base[0], point_base[1])
+        Args:
+            calibration: 可选的 CalibrationTool，提供时同时包含去畸变和物理坐标
+
+        Returns:
+            TransformChain 变换链
+        """
+        if not self._is_calibrated:
+            raise ToolException("尚未完成标定")
+        if calibration is not None:
+            return calibration.get_transform_chain(hand_eye=self)
+        return TransformChain(robot_matrix=self.get_transform_matrix())
 
     def get_calibration_data_count(self) -> int:
         """获取当前标定数据数量"""
@@ -606,6 +626,13 @@ class HandEyeCalibrationTool(ToolBase):
             result_data.set_value("calibration_mode", self.get_param("calibration_mode"))
             result_data.set_value("T_matrix", T.tolist())
             result_data.set_value("calibrated", True)
+
+            # 为上游的匹配/斑点/检测结果附加机器人坐标
+            upstream = self.get_upstream_result()
+            if upstream is not None:
+                annotate_result_data(
+                    upstream, self.get_transform_chain(), (w, h)
+                )
         else:
             result_data.set_value("calibrated", False)
 
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+融合几何校正模块
+
+将镜头去畸变、镜像、旋转、缩放和裁剪合成为一次插值：
+- 无畸变时，镜像/旋转/缩放/裁剪合成一个仿射矩阵，一次 warpAffine
+- 有畸变时，合成的仿射变换作为新相机矩阵传给 initUndistortRectifyMap，
+  得到一对 remap 映射表，一次 remap 完成全部校正
+
+映射表和矩阵按 (图像尺寸, 校正参数) 缓存，参数不变时直接复用。
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+_logger = logging.getLogger("ImageCorrection")
+
+FLIP_NONE = "none"
+FLIP_HORIZONTAL = "horizontal"
+FLIP_VERTICAL = "vertical"
+FLIP_BOTH = "both"
+
+# cv2.flip 的翻转代码
+_FLIP_CODES = {FLIP_HORIZONTAL: 1, FLIP_VERTICAL: 0, FLIP_BOTH: -1}
+
+DEFAULT_CACHE_ENTRIES = 4
+
+
+@dataclass(frozen=True)
+class CorrectionSpec:
+    """
+    校正参数
+
+    处理顺序与几何变换工具一致：去畸变 -> 镜像 -> 旋转缩放 -> 裁剪。
+    angle 为 0 时不旋转也不缩放；旋转后画布扩大以容纳完整图像。
+
+    Attributes:
+        flip: 镜像方式 (none/horizontal/vertical/both)
+        angle: 旋转角度(度)，正值顺时针
+        center_x: 旋转中心X，负数表示图像中心
+        center_y: 旋转中心Y，负数表示图像中心
+        scale: 旋转时的缩放比例
+        crop: 在旋转结果上的裁剪区域 (x, y, w, h)，None 表示不裁剪
+    """
+
+    flip: str = FLIP_NONE
+    angle: float = 0.0
+    center_x: float = -1.0
+    center_y: float = -1.0
+    scale: float = 1.0
+    crop: Optional[Tuple[int, int, int, int]] = None
+
+
+def compose_transform(
+    size: Tuple[int, int], spec: CorrectionSpec
+) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    合成镜像、旋转缩放和裁剪的正向仿射矩阵
+
+    Args:
+        size: 输入图像尺寸 (宽, 高)
+        spec: 校正参数
+
+    Returns:
+        (3x3 正向矩阵(输入像素 -> 输出像素), 输出尺寸 (宽, 高))
+    """
+    width, height = size
+    matrix = np.eye(3)
+
+    # 镜像：与 cv2.flip 一致，x -> w-1-x
+    if spec.flip in (FLIP_HORIZONTAL, FLIP_BOTH):
+        matrix = (
+            np.array([[-1.0, 0, width - 1], [0, 1, 0], [0, 0, 1]]) @ matrix
+        )
+    if spec.flip in (FLIP_VERTICAL, FLIP_BOTH):
+        matrix = (
+            np.array([[1.0, 0, 0], [0, -1, height - 1], [0, 0, 1]]) @ matrix
+        )
+
+    out_w, out_h = width, height
+    if spec.angle != 0.0:
+        cx = width / 2 if spec.center_x < 0 else spec.center_x
+        cy = height / 2 if spec.center_y < 0 else spec.center_y
+        rotation = cv2.getRotationMatrix2D((cx, cy), -spec.angle, spec.scale)
+
+        cos_angle = np.abs(np.cos(np.radians(spec.angle)))
+        sin_angle = np.abs(np.sin(np.radians(spec.angle)))
+        out_w = int((height * sin_angle + width * cos_angle) * spec.scale)
+        out_h = int((height * cos_angle + width * sin_angle) * spec.scale)
+
+        # 平移使旋转后的图像位于扩大后的画布中央
+        rotation[0, 2] += (out_w - width) / 2
+        rotation[1, 2] += (out_h - height) / 2
+        matrix = np.vstack([rotation, [0, 0, 1]]) @ matrix
+
+    if spec.crop is not None:
+        x, y, w, h = spec.crop
+        x = min(max(int(x), 0), max(out_w - 1, 0))
+        y = min(max(int(y), 0), max(out_h - 1, 0))
+        w = min(int(w), out_w - x)
+        h = min(int(h), out_h - y)
+        if w > 0 and h > 0:
+            matrix = np.array([[1.0, 0, -x], [0, 1, -y], [0, 0, 1]]) @ matrix
+            out_w, out_h = w, h
+
+    return matrix, (max(out_w, 1), max(out_h, 1))
+
+
+def _array_key(array: Optional[np.ndarray]) -> Optional[bytes]:
+    if array is None:
+        return None
+    return np.ascontiguousarray(array, dtype=np.float64).tobytes()
+
+
+class CorrectionMaps:
+    """
+    校正映射缓存
+
+    每个几何变换或标定工具持有一个实例；同一相机的图像尺寸和参数不变时，
+    每帧只做一次插值，不再重复计算映射表。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """
+        Args:
+            max_entries: 缓存的参数组合数量上限(多相机共用时按最近使用淘汰)
+        """
+        self._max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._hits = 0
+
+    def _get_entry(
+        self,
+        size: Tuple[int, int],
+        spec: CorrectionSpec,
+        camera_matrix: Optional[np.ndarray],
+        dist_coeffs: Optional[np.ndarray],
+    ) -> Dict[str, Any]:
+        key = (size, spec, _array_key(camera_matrix), _array_key(dist_coeffs))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+        matrix, out_size = compose_transform(size, spec)
+        entry = {
+            "matrix": matrix,
+            "size": out_size,
+            "maps": None,
+            "flip": None,
+        }
+
+        if camera_matrix is not None:
+            # 新相机矩阵 = 正向仿射 @ K，映射表从输出像素直接求原始(带畸变)像素
+            K = np.asarray(camera_matrix, dtype=np.float64)
+            entry["maps"] = cv2.initUndistortRectifyMap(
+                K,
+                np.asarray(dist_coeffs, dtype=np.float64),
+                np.eye(3),
+                matrix @ K,
+                out_size,
+                cv2.CV_16SC2,
+            )
+        elif spec.angle == 0.0 and spec.crop is None:
+            # 只有镜像时 cv2.flip 是精确的像素重排，比插值更快
+            entry["flip"] = _FLIP_CODES.get(spec.flip)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._builds += 1
+        _logger.debug(
+            f"重建校正映射: 输入={size}, 输出={out_size}, 参数={spec}"
+        )
+        return entry
+
+    def apply(
+        self,
+        image: np.ndarray,
+        spec: CorrectionSpec,
+        camera_matrix: Optional[np.ndarray] = None,
+        dist_coeffs: Optional[np.ndarray] = None,
+        interpolation: int = cv2.INTER_LINEAR,
+    ) -> np.ndarray:
+        """
+        一次插值完成校正
+
+        Args:
+            image: 输入图像
+            spec: 校正参数
+            camera_matrix: 相机内参，与 dist_coeffs 同时提供且畸变非零时去畸变
+            dist_coeffs: 畸变系数
+            interpolation: 插值方式
+
+        Returns:
+            校正后的图像；无任何变换时返回输入图像本身
+        """
+        if (
+            camera_matrix is None
+            or dist_coeffs is None
+            or not np.any(dist_coeffs)
+        ):
+            camera_matrix = dist_coeffs = None
+
+        height, width = image.shape[:2]
+        entry = self._get_entry(
+            (width, height), spec, camera_matrix, dist_coeffs
+        )
+
+        if entry["maps"] is not None:
+            map1, map2 = entry["maps"]
+            return cv2.remap(
+                image,
+                map1,
+                map2,
+                interpolation,
+                borderMode=cv2.BORDER_CONSTANT,
+                borderValue=0,
+            )
+        if entry["flip"] is not None:
+            return cv2.flip(image, entry["flip"])
+        if np.array_equal(entry["matrix"], np.eye(3)) and entry["size"] == (
+            width,
+            height,
+        ):
+            return image
+        return cv2.warpAffine(
+            image,
+            entry["matrix"][:2],
+            entry["size"],
+            flags=interpolation,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=0,
+        )
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "builds": self._builds,
+                "hits": self._hits,
+            }
+
+
+def load_camera_parameters(
+    filepath: str,
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    从标定工具保存的 .npz 文件读取相机内参和畸变系数
+
+    Args:
+        filepath: 标定文件路径
+
+    Returns:
+        (camera_matrix, dist_coeffs)，文件中没有内参(如手动标定)时为 (None, None)
+    """
+    with np.load(filepath, allow_pickle=True) as data:
+        matrix = (
+            data["calibration_matrix"]
+            if "calibration_matrix" in data
+            else None
+        )
+        dist = (
+            data["distortion_coeffs"] if "distortion_coeffs" in data else None
+        )
+        # 手动标定保存的是 None 对象
+        if (
+            matrix is None
+            or matrix.dtype == object
+            or dist is None
+            or dist.dtype == object
+        ):
+            return None, None
+        return np.array(matrix, dtype=np.float64), np.array(
+            dist, dtype=np.float64
+        )
@@ -20,6 +20,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import cv2
 import numpy as np
 
+from core.tile_executor import kernel_halo, run_tiled
 from core.tool_base import ImageProcessToolBase, ToolParameter, ToolRegistry
 from data.image_data import ROI, ImageData
 from utils.exceptions import ImageProcessException
@@ -80,8 +81,8 @@ class BoxFilter(ImageProcessToolBase):
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(
-            f"方框滤波完成: kernel={kernel_size}, normalize={normalize}"
+        self._logger.debug(
+            "方框滤波完成: kernel=%s, normalize=%s", kernel_size, normalize
         )
 
 
@@ -126,7 +127,7 @@ class MeanFilter(ImageProcessToolBase):
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(f"均值滤波完成: kernel={kernel_size}")
+        self._logger.debug("均值滤波完成: kernel=%s", kernel_size)
 
 
 @ToolRegistry.register
@@ -167,19 +168,33 @@ class GaussianFilter(ImageProcessToolBase):
             kernel_size += 1
 
         # 使用Numba加速（仅当sigma为默认0时）
-        if USE_NUMBA and sigma_x == 0 and sigma_y == 0 and len(input_image.shape) == 2:
-            output = fast_gaussian_blur(input_image, kernel_size)
+        use_numba = (
+            USE_NUMBA
+            and sigma_x == 0
+            and sigma_y == 0
+            and len(input_image.shape) == 2
+        )
+        if use_numba:
             self._logger.debug("使用Numba加速高斯滤波")
-        else:
-            output = cv2.GaussianBlur(
-                input_image, (kernel_size, kernel_size), sigma_x, sigma_y
+
+        def blur(image):
+            if use_numba:
+                return fast_gaussian_blur(image, kernel_size)
+            return cv2.GaussianBlur(
+                image, (kernel_size, kernel_size), sigma_x, sigma_y
             )
 
+        # 大图分块并行
+        output = run_tiled(input_image, blur, kernel_halo(kernel_size))
+
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(
-            f"高斯滤波完成: kernel={kernel_size}, sigma_x={sigma_x}, sigma_y={sigma_y}"
+        self._logger.debug(
+            "高斯滤波完成: kernel=%s, sigma_x=%s, sigma_y=%s",
+            kernel_size,
+            sigma_x,
+            sigma_y,
         )
 
 
@@ -210,13 +225,17 @@ class MedianFilter(ImageProcessToolBase):
         input_image = self._input_data.data
         kernel_size = self.get_param("kernel_size", 3)
 
-        # 执行滤波
-        output = cv2.medianBlur(input_image, kernel_size)
+        # 执行滤波(大图分块并行)
+        output = run_tiled(
+            input_image,
+            lambda image: cv2.medianBlur(image, kernel_size),
+            kernel_halo(kernel_size),
+        )
 
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(f"中值滤波完成: kernel={kernel_size}")
+        self._logger.debug("中值滤波完成: kernel=%s", kernel_size)
 
 
 @ToolRegistry.register
@@ -252,16 +271,26 @@ class BilateralFilter(ImageProcessToolBase):
         sigma_color = self.get_param("sigma_color", 75)
         sigma_space = self.get_param("sigma_space", 75)
 
-        # 执行滤波
-        output = cv2.bilateralFilter(
-            input_image, diameter, sigma_color, sigma_space
+        # 直径非正时OpenCV按sigma_space计算邻域半径
+        radius = (
+            diameter // 2 if diameter > 0 else int(round(sigma_space * 1.5))
+        )
+
+        # 执行滤波(大图分块并行)
+        output = run_tiled(
+            input_image,
+            lambda image: cv2.bilateralFilter(
+                image, diameter, sigma_color, sigma_space
+            ),
+            radius,
         )
 
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(
-            f"双边滤波完成: diameter={diameter}, sigma_color={sigma_color}, sigma_space={sigma_space}"
+        self._logger.debug(
+            "双边滤波完成: diameter=%s, sigma_color=%s, sigma_space=%s",
+            diameter, sigma_color, sigma_space,
         )
 
 
@@ -344,25 +373,43 @@ class Morphology(ImageProcessToolBase):
         iterations = self.get_param("iterations", 1)
 
         # 使用Numba加速（仅对腐蚀和膨胀，且为灰度图，单次迭代）
-        if USE_NUMBA and operation_name in ["erode", "dilate"] and iterations == 1 and len(input_image.shape) == 2:
-            for _ in range(iterations):
-                input_image = fast_erode_dilate(input_image, kernel_size, operation_name)
-            output = input_image
+        use_numba = (
+            USE_NUMBA
+            and operation_name in ["erode", "dilate"]
+            and iterations == 1
+            and len(input_image.shape) == 2
+        )
+        if use_numba:
             self._logger.debug(f"使用Numba加速形态学处理: {operation_name}")
         else:
             kernel = cv2.getStructuringElement(
                 cv2.MORPH_RECT, (kernel_size, kernel_size)
             )
-            operation = self.MORPH_OPERATIONS.get(operation_name, cv2.MORPH_OPEN)
-            output = cv2.morphologyEx(
-                input_image, operation, kernel, iterations=iterations
+            operation = self.MORPH_OPERATIONS.get(
+                operation_name, cv2.MORPH_OPEN
+            )
+
+        def morph(image):
+            if use_numba:
+                return fast_erode_dilate(image, kernel_size, operation_name)
+            return cv2.morphologyEx(
+                image, operation, kernel, iterations=iterations
             )
 
+        # 开/闭/顶帽/黑帽为腐蚀与膨胀两步，光环加倍
+        passes = iterations * (
+            1 if operation_name in ("erode", "dilate", "gradient") else 2
+        )
+        output = run_tiled(
+            input_image, morph, kernel_halo(kernel_size, passes)
+        )
+
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(
-            f"形态学处理完成: operation={operation_name}, kernel={kernel_size}, iterations={iterations}"
+        self._logger.debug(
+            "形态学处理完成: operation=%s, kernel=%s, iterations=%s",
+            operation_name, kernel_size, iterations,
         )
 
 
@@ -426,6 +473,7 @@ class ImageResize(ImageProcessToolBase):
         self._output_data = self._input_data.copy()
         self._output_data.data = output
 
-        self._logger.info(
-            f"图像缩放完成: {input_image.shape[1]}x{input_image.shape[0]} -> {width}x{height}"
+        self._logger.debug(
+            "图像缩放完成: %sx%s -> %sx%s",
+            input_image.shape[1], input_image.shape[0], width, height,
         )
@@ -20,6 +20,13 @@ from typing import Any, Dict, List, Optional
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from core.image_save_queue import (
+    POLICY_BLOCK,
+    POLICY_DROP,
+    DiskRetention,
+    ImageSaveQueue,
+    encode_params,
+)
 from core.tool_base import ToolBase, ToolParameter, ToolRegistry
 from data.image_data import ImageData, ResultData
 
@@ -43,6 +50,8 @@ class ImageSaverTool(ToolBase):
     - 支持自定义文件名格式（支持时间戳、序号等变量）
     - 支持自动创建目录
     - 支持保存质量设置（针对JPG格式）
+    - 支持异步保存：有界编码/写盘线程池，队列满时丢弃或等待，工具立即返回
+    - 支持按磁盘配额和保留时长清理旧图像
     
     输入端口:
     - InputImage: 输入图像（通过连线连接上游工具）
@@ -65,9 +74,17 @@ class ImageSaverTool(ToolBase):
         "TIFF": ".tiff",
     }
     
+    # 队列满策略
+    QUEUE_POLICIES = {
+        "丢弃": POLICY_DROP,
+        "等待": POLICY_BLOCK,
+    }
+
     def __init__(self, name: str = None):
         super().__init__(name)
         self._save_count = 0  # 保存计数器
+        self._save_queue: Optional[ImageSaveQueue] = None  # 异步保存队列
+        self._retention = DiskRetention()  # 磁盘保留策略
         
     def _init_params(self):
         """初始化参数"""
@@ -144,6 +161,63 @@ class ImageSaverTool(ToolBase):
             description="如果文件已存在，是否覆盖（False则自动添加序号）"
         )
         
+        # 保存标注图像
+        self.set_param(
+            "保存标注图像",
+            True,
+            param_type="boolean",
+            description="输入图像带有上游工具的叠加图元时，保存绘制标注后的图像",
+        )
+
+        # 异步保存
+        self.set_param(
+            "异步保存",
+            False,
+            param_type="boolean",
+            description="在后台线程池中编码写盘，工具立即返回",
+        )
+
+        # 编码线程数
+        self.set_param(
+            "编码线程数",
+            2,
+            param_type="integer",
+            description="异步保存的编码/写盘线程数",
+        )
+
+        # 最大排队数
+        self.set_param(
+            "最大排队数",
+            8,
+            param_type="integer",
+            description="异步保存时等待写盘的最大图像数",
+        )
+
+        # 队列满策略
+        self.set_param(
+            "队列满策略",
+            "丢弃",
+            param_type="enum",
+            options=list(self.QUEUE_POLICIES.keys()),
+            description="异步保存队列已满时丢弃当前图像，或阻塞等待空位",
+        )
+
+        # 磁盘配额
+        self.set_param(
+            "磁盘配额MB",
+            0,
+            param_type="integer",
+            description="保存目录中图像的总大小上限（MB），超出时删除最旧的图像，0表示不限制",
+        )
+
+        # 保留时长
+        self.set_param(
+            "保留小时数",
+            0.0,
+            param_type="float",
+            description="删除保存超过该时长的图像（小时），0表示不限制",
+        )
+
     def _get_input_ports(self) -> List[ToolParameter]:
         """获取输入端口定义"""
         return [
@@ -196,6 +270,16 @@ class ImageSaverTool(ToolBase):
         index_digits = self.get_param("序号位数", 4)
         timestamp_format = self.get_param("时间戳格式", "%Y%m%d_%H%M%S")
         overwrite = self.get_param("覆盖已存在文件", False)
+        save_annotated = self.get_param("保存标注图像", True)
+        async_save = self.get_param("异步保存", False)
+
+        # 更新保留策略
+        self._retention.max_bytes = (
+            int(self.get_param("磁盘配额MB", 0)) * 1024 * 1024
+        )
+        self._retention.max_age_seconds = (
+            float(self.get_param("保留小时数", 0.0)) * 3600
+        )
         
         # 确保保存目录存在
         if auto_create_dir and not os.path.exists(save_dir):
@@ -225,7 +309,60 @@ class ImageSaverTool(ToolBase):
         # 完整文件路径
         file_path = os.path.join(save_dir, filename)
         
-        # 保存图像
+        if async_save:
+            # 异步保存：标注绘制和编码写盘都在工作线程中完成
+            if save_annotated:
+                source = input_image.rendered
+            else:
+                def source():
+                    return input_image.data
+            params = encode_params(file_path, quality=jpg_quality)
+            queued = self._get_save_queue().submit(source, file_path, params)
+            if queued:
+                self._save_count += 1
+                self._logger.debug(f"图像已提交异步保存: {file_path}")
+            else:
+                file_path = ""
+        else:
+            queued = False
+            # 仅在保存时栅格化上游工具的叠加图元
+            if save_annotated:
+                image = input_image.rendered()
+            self._save_sync(image, file_path, image_format, jpg_quality)
+
+        # 创建输出数据（透传输入图像视图及叠加图元，不复制像素）
+        output_image = input_image.view()
+
+        # 设置结果数据
+        self._result_data = ResultData()
+        self._result_data.tool_name = self._name
+        self._result_data.result_category = "saver"
+        self._result_data.set_value("save_path", file_path)
+        self._result_data.set_value("save_count", self._save_count)
+        self._result_data.set_value("image_format", image_format)
+        if async_save:
+            stats = self._save_queue.stats
+            self._result_data.set_value("queued", queued)
+            self._result_data.set_value("queue_depth", stats["queue_depth"])
+            self._result_data.set_value(
+                "bytes_per_second", stats["bytes_per_second"]
+            )
+            self._result_data.set_value("dropped_count", stats["dropped"])
+            self._result_data.set_value("failed_count", stats["failed"])
+
+        return {
+            "OutputImage": output_image,
+            "SavePath": file_path,
+        }
+
+    def _save_sync(
+        self,
+        image: np.ndarray,
+        file_path: str,
+        image_format: str,
+        jpg_quality: int,
+    ):
+        """在当前线程中保存图像并执行保留策略"""
         try:
             if USE_FAST_SAVE:
                 if image_format in ["JPG", "JPEG"]:
@@ -235,11 +372,11 @@ class ImageSaverTool(ToolBase):
                 success = save_image_fast(image, file_path, quality=quality)
             else:
                 if image_format in ["JPG", "JPEG"]:
-                    encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpg_quality]
-                    success = cv2.imwrite(file_path, image, encode_params)
+                    params = [cv2.IMWRITE_JPEG_QUALITY, jpg_quality]
+                    success = cv2.imwrite(file_path, image, params)
                 elif image_format == "PNG":
-                    encode_params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
-                    success = cv2.imwrite(file_path, image, encode_params)
+                    params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+                    success = cv2.imwrite(file_path, image, params)
                 else:
                     success = cv2.imwrite(file_path, image)
             
@@ -252,26 +389,55 @@ class ImageSaverTool(ToolBase):
         except Exception as e:
             raise Exception(f"保存图像失败: {e}")
         
-        # 创建输出数据（透传输入图像）
-        output_image = ImageData(
-            image.copy(),
-            input_image.width,
-            input_image.height,
-            input_image.channels
+        self._retention.record(file_path, os.path.getsize(file_path))
+
+    def _get_save_queue(self) -> ImageSaveQueue:
+        """获取异步保存队列，线程数、排队数或策略变化时重建"""
+        max_workers = max(1, int(self.get_param("编码线程数", 2)))
+        max_pending = max(1, int(self.get_param("最大排队数", 8)))
+        policy = self.QUEUE_POLICIES.get(
+            self.get_param("队列满策略", "丢弃"), POLICY_DROP
         )
+        queue = self._save_queue
+        if queue is None or (
+            queue.max_workers,
+            queue.max_pending,
+            queue.policy,
+        ) != (
+            max_workers,
+            max_pending,
+            policy,
+        ):
+            if queue is not None:
+                # 已提交的任务继续写盘
+                queue.shutdown(wait=False)
+            queue = ImageSaveQueue(
+                max_workers=max_workers,
+                max_pending=max_pending,
+                policy=policy,
+                retention=self._retention,
+            )
+            self._save_queue = queue
+        return queue
+
+    def get_save_stats(self) -> Dict[str, Any]:
+        """获取异步保存统计（排队深度、写盘速率、丢弃数等）"""
+        if self._save_queue is None:
+            return {}
+        return self._save_queue.stats
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待异步保存任务全部写盘
         
-        # 设置结果数据
-        self._result_data = ResultData()
-        self._result_data.tool_name = self._name
-        self._result_data.result_category = "saver"
-        self._result_data.set_value("save_path", file_path)
-        self._result_data.set_value("save_count", self._save_count)
-        self._result_data.set_value("image_format", image_format)
-        
-        return {
-            "OutputImage": output_image,
-            "SavePath": file_path,
-        }
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否全部完成
+        """
+        if self._save_queue is None:
+            return True
+        return self._save_queue.flush(timeout)
     
     def _generate_filename(
         self,
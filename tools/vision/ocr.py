@@ -9,12 +9,9 @@ Author: Vision System Team
 Date: 2025-01-12
 """
 
-import gc
 import logging
 import os
 import sys
-import time
-from threading import Lock
 from typing import Any, Dict, List, Optional
 
 # 添加项目路径
@@ -22,37 +19,169 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import cv2
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
 
 from config.config_manager import get_config
-from core.tool_base import RecognitionToolBase, ToolParameter, ToolRegistry
+from core.tool_base import (
+    RecognitionToolBase,
+    ToolParameter,
+    ToolRegistry,
+    search_region_parameter,
+)
 from data.image_data import ImageData, ResultData
+from tools.vision.ocr_engine import get_ocr_engine, regions_from_results
 from utils.exceptions import ToolException
 
 _logger = logging.getLogger("OCR")
 
+# 文本区域来源
+TEXT_REGION_OPTIONS = ["detect", "upstream"]
+
+
+def _text_region_param() -> ToolParameter:
+    return ToolParameter(
+        name="文本区域",
+        param_type="enum",
+        default="detect",
+        description="detect: 整图检测文本；upstream: 使用上游结果中的区域"
+        "(匹配结果、读码结果、切片区域)，跳过检测并批量识别",
+        options=TEXT_REGION_OPTIONS,
+    )
+
+
+def _pin_model_param() -> ToolParameter:
+    return ToolParameter(
+        name="模型常驻",
+        param_type="boolean",
+        default=False,
+        description="模型加载后常驻内存，不因空闲被释放(生产环境建议开启)",
+    )
+
+
+def _run_ocr(tool: RecognitionToolBase, language: str, label: str):
+    """执行OCR识别并写入工具结果
+
+    Args:
+        tool: OCR工具
+        language: 语言参数
+        label: 日志中的名称
+    """
+    input_image = tool._input_data.data
+    min_confidence = tool.get_param("min_confidence", 0.5)
+    text_only = tool.get_param("text_only", True)
+    skip_special = tool.get_param("skip_special", True)
+    region_source = tool.get_param("text_regions", "detect")
+
+    tool._logger.debug(
+        "开始%s: language=%s, min_confidence=%s, regions=%s",
+        label, language, min_confidence, region_source,
+    )
+
+    engine = get_ocr_engine()
+    if tool.get_param("pin_model", False):
+        engine.pin(language)
+
+    if len(input_image.shape) == 2:
+        input_image = cv2.cvtColor(input_image, cv2.COLOR_GRAY2BGR)
+
+    try:
+        if region_source == "upstream":
+            regions = regions_from_results(tool.get_upstream_values())
+            if not regions:
+                tool._logger.warning("上游结果中没有可用的文本区域")
+            detections = [
+                r
+                for r in engine.recognize_regions(
+                    input_image, regions, language
+                )
+                if r
+            ]
+        else:
+            detections = engine.readtext(input_image, language)
+    except Exception as e:
+        tool._logger.error(f"{label}失败: {e}")
+        raise ToolException(f"OCR识别失败: {e}")
+
+    texts = []
+    detailed_results = []
+
+    for detection in detections:
+        if detection.confidence < min_confidence:
+            continue
+
+        # 旋转矩形/多边形搜索区域：丢弃中心在区域外的文本
+        center = np.mean(detection.bbox, axis=0)
+        if not tool.in_search_region(center[0], center[1]):
+            continue
+
+        if skip_special:
+            cleaned_text = "".join(
+                c for c in detection.text if c.isprintable()
+            )
+        else:
+            cleaned_text = detection.text
+
+        if cleaned_text.strip():
+            texts.append(cleaned_text)
+
+            if not text_only:
+                detailed = {
+                    "text": cleaned_text,
+                    "confidence": detection.confidence,
+                    "bbox": detection.bbox,
+                }
+                if detection.region_index is not None:
+                    detailed["region_index"] = detection.region_index
+                detailed_results.append(detailed)
+
+    tool._result_data = ResultData()
+    tool._result_data.tool_name = tool._name
+    tool._result_data.result_category = "ocr"
+    tool._result_data.set_value("text_count", len(texts))
+    tool._result_data.set_value("texts", texts)
+    tool._result_data.set_value("full_text", "\n".join(texts))
+
+    if not text_only:
+        tool._result_data.set_value("results", detailed_results)
+
+    # 记录叠加图元，输出图像为输入图像的视图
+    overlay = tool._result_data.overlay
+    for text, result in zip(texts, detailed_results):
+        bbox = result["bbox"]
+        overlay.add_polyline(bbox, True, (0, 255, 0), 2)
+        # 文本位于检测框上方(左下角坐标)
+        overlay.add_text(
+            f"{text} ({result['confidence']:.2f})",
+            (bbox[0][0], bbox[0][1] - 4),
+            (0, 255, 0),
+            0.5,
+        )
+
+    tool._output_data = tool._input_data.view(overlay)
+
+    tool._logger.debug("%s完成: 找到%d个文本", label, len(texts))
+
 
 @ToolRegistry.register
 class OCRReader(RecognitionToolBase):
     """
     OCR文字识别工具
 
-    基于EasyOCR，支持中英文识别。
+    基于EasyOCR，支持中英文识别。模型由OCR引擎按语言组合加载和复用。
 
     参数说明：
     - language: 识别语言，支持ch_sim(简体中文)、en(英文)等
     - min_confidence: 最小置信度阈值
     - text_only: 是否只返回文本（不返回位置信息）
+    - text_regions: 整图检测，或使用上游结果中的区域跳过检测、批量识别
+    - pin_model: 模型常驻内存
+    - search_region: 搜索区域，只在区域内检测文字；使用上游区域时按中心过滤结果
     """
 
     tool_name = "OCR识别"
     tool_category = "Recognition"
     tool_description = "识别图像中的文字"
 
-    _ocr_model = None
-    _ocr_model_lock = Lock()
-    _last_used_time = 0
-    _max_idle_time = 300  # 5分钟无使用则自动释放（秒）
+    SUPPORTS_SEARCH_REGION = True
 
     PARAM_DEFINITIONS = {
         "language": ToolParameter(
@@ -90,6 +219,9 @@ class OCRReader(RecognitionToolBase):
             default=True,
             description="是否过滤非打印字符",
         ),
+        "text_regions": _text_region_param(),
+        "pin_model": _pin_model_param(),
+        "search_region": search_region_parameter(),
     }
 
     def _init_params(self):
@@ -104,183 +236,54 @@ class OCRReader(RecognitionToolBase):
         self.set_param("min_confidence", default_confidence)
         self.set_param("text_only", default_text_only)
         self.set_param("skip_special", default_skip_special)
+        self.set_param("text_regions", "detect")
+        self.set_param("pin_model", get_config("ocr.pin_models", False))
+        self.set_param("search_region", None)
+
+    def _use_search_region_views(self) -> bool:
+        """上游区域为整帧坐标，使用上游区域时处理整帧，只按搜索区域过滤结果"""
+        return self.get_param("text_regions", "detect") != "upstream"
 
     @classmethod
-    def _get_ocr_model(cls):
-        """获取OCR模型（单例模式）"""
-        # 检查是否需要自动释放（超过最大空闲时间）
-        if cls._ocr_model is not None:
-            idle_time = time.time() - cls._last_used_time
-            if idle_time > cls._max_idle_time:
-                _logger.info(f"OCR模型空闲{idle_time:.1f}秒，自动释放内存")
-                cls.release_model()
-
-        if cls._ocr_model is None:
-            with cls._ocr_model_lock:
-                if cls._ocr_model is None:
-                    _logger.info("初始化EasyOCR模型...")
-                    try:
-                        import easyocr
-
-                        cls._ocr_model = easyocr.Reader(
-                            ["ch_sim", "en"], gpu=False
-                        )
-                        cls._last_used_time = time.time()
-                        _logger.info("EasyOCR模型初始化完成")
-                    except Exception as e:
-                        _logger.error(f"初始化EasyOCR失败: {e}")
-                        raise ToolException(f"OCR模型初始化失败: {e}")
-
-        # 更新最后使用时间
-        cls._last_used_time = time.time()
-        return cls._ocr_model
+    def _get_ocr_model(cls, language: str = None):
+        """获取OCR模型(由OCR引擎按语言组合缓存)"""
+        if language is None:
+            language = get_config("ocr.language", "ch_sim")
+        return get_ocr_engine().get_reader(language)
 
     @classmethod
     def release_model(cls):
-        """释放OCR模型内存"""
-        with cls._ocr_model_lock:
-            if cls._ocr_model is not None:
-                _logger.info("释放OCR模型内存...")
-                try:
-                    # 删除模型引用
-                    del cls._ocr_model
-                    cls._ocr_model = None
-                    cls._last_used_time = 0
-                    # 强制垃圾回收
-                    gc.collect()
-                    _logger.info("OCR模型内存已释放")
-                except Exception as e:
-                    _logger.warning(f"释放OCR模型时发生错误: {e}")
+        """释放OCR模型内存(包括常驻模型)"""
+        get_ocr_engine().release(force=True)
+
+    def warmup(self) -> bool:
+        """预热：预先加载当前语言的OCR模型"""
+        self._get_ocr_model(self.get_param("language", "ch_sim"))
+        return True
 
     @classmethod
     def get_model_memory_usage(cls) -> Dict[str, Any]:
         """获取模型内存使用情况"""
-        with cls._ocr_model_lock:
-            if cls._ocr_model is None:
-                return {"loaded": False, "idle_time": 0}
-
-            idle_time = time.time() - cls._last_used_time
-            return {
-                "loaded": True,
-                "idle_time": idle_time,
-                "max_idle_time": cls._max_idle_time,
-                "will_auto_release": idle_time > cls._max_idle_time,
-            }
+        engine = get_ocr_engine()
+        stats = engine.get_stats()
+        loaded = {
+            key: value for key, value in stats.items() if value["loaded"]
+        }
+        return {
+            "loaded": bool(loaded),
+            "idle_time": max(
+                (v["idle_time"] for v in loaded.values()), default=0
+            ),
+            "max_idle_time": engine.idle_timeout,
+            "models": stats,
+        }
 
     def _run_impl(self):
         """执行OCR识别"""
         if not self.has_input():
             raise ToolException("无输入图像")
 
-        input_image = self._input_data.data
-        h, w = input_image.shape[:2]
-
-        language = self.get_param("language", "ch_sim")
-        min_confidence = self.get_param("min_confidence", 0.5)
-        text_only = self.get_param("text_only", True)
-        skip_special = self.get_param("skip_special", True)
-
-        self._logger.info(
-            f"开始OCR识别: language={language}, min_confidence={min_confidence}"
-        )
-
-        try:
-            reader = self._get_ocr_model()
-
-            if len(input_image.shape) == 3:
-                result = reader.readtext(input_image)
-            else:
-                result = reader.readtext(
-                    cv2.cvtColor(input_image, cv2.COLOR_GRAY2BGR)
-                )
-
-            texts = []
-            detailed_results = []
-
-            for detection in result:
-                bbox, text, confidence = detection
-
-                if confidence < min_confidence:
-                    continue
-
-                if skip_special:
-                    cleaned_text = "".join(c for c in text if c.isprintable())
-                else:
-                    cleaned_text = text
-
-                if cleaned_text.strip():
-                    texts.append(cleaned_text)
-
-                    if not text_only:
-                        detailed_results.append(
-                            {
-                                "text": cleaned_text,
-                                "confidence": float(confidence),
-                                "bbox": [[int(x), int(y)] for x, y in bbox],
-                            }
-                        )
-
-            self._result_data = ResultData()
-            self._result_data.tool_name = self._name
-            self._result_data.result_category = "ocr"
-            self._result_data.set_value("text_count", len(texts))
-            self._result_data.set_value("texts", texts)
-            self._result_data.set_value("full_text", "\n".join(texts))
-
-            if not text_only:
-                self._result_data.set_value("results", detailed_results)
-
-            # 绘制结果到输出图像
-            output_image = input_image.copy()
-            if len(output_image.shape) == 2:
-                output_image = cv2.cvtColor(output_image, cv2.COLOR_GRAY2BGR)
-
-            # 转换为PIL图像以支持中文
-            pil_image = Image.fromarray(
-                cv2.cvtColor(output_image, cv2.COLOR_BGR2RGB)
-            )
-            draw = ImageDraw.Draw(pil_image)
-
-            # 尝试加载中文字体
-            try:
-                font_path = "C:/Windows/Fonts/msyh.ttc"
-                font = ImageFont.truetype(font_path, 16)
-            except Exception:
-                font = ImageFont.load_default()
-
-            # 只有当detailed_results存在时才绘制
-            if detailed_results:
-                for i, (text, conf, bbox) in enumerate(
-                    zip(
-                        texts,
-                        [d["confidence"] for d in detailed_results],
-                        [d["bbox"] for d in detailed_results],
-                    )
-                ):
-                    # 绘制检测框
-                    pts = [tuple(p) for p in bbox]
-                    draw.line(pts + [pts[0]], fill=(0, 255, 0), width=2)
-
-                    # 绘制文本（使用PIL支持中文）
-                    text_pos = (bbox[0][0], bbox[0][1] - 20)
-                    draw.text(
-                        text_pos,
-                        f"{text} ({conf:.2f})",
-                        fill=(0, 255, 0),
-                        font=font,
-                    )
-
-            # 转回OpenCV格式
-            output_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-
-            self._output_data = self._input_data.copy()
-            self._output_data.data = output_image
-
-            self._logger.info(f"OCR识别完成: 找到{len(texts)}个文本")
-
-        except Exception as e:
-            self._logger.error(f"OCR识别失败: {e}")
-            raise ToolException(f"OCR识别失败: {e}")
+        _run_ocr(self, self.get_param("language", "ch_sim"), "OCR识别")
 
 
 @ToolRegistry.register
@@ -293,17 +296,14 @@ class OCREnglish(RecognitionToolBase):
     参数说明：
     - min_confidence: 最小置信度阈值
     - text_only: 是否只返回文本
+    - text_regions: 整图检测，或使用上游结果中的区域跳过检测、批量识别
+    - pin_model: 模型常驻内存
     """
 
     tool_name = "英文OCR"
     tool_category = "Recognition"
     tool_description = "识别图像中的英文字符"
 
-    _ocr_model = None
-    _ocr_model_lock = Lock()
-    _last_used_time = 0
-    _max_idle_time = 300  # 5分钟无使用则自动释放（秒）
-
     PARAM_DEFINITIONS = {
         "min_confidence": ToolParameter(
             name="最小置信度",
@@ -325,6 +325,8 @@ class OCREnglish(RecognitionToolBase):
             default=True,
             description="是否过滤非打印字符",
         ),
+        "text_regions": _text_region_param(),
+        "pin_model": _pin_model_param(),
     }
 
     def _init_params(self):
@@ -337,174 +339,39 @@ class OCREnglish(RecognitionToolBase):
         self.set_param("min_confidence", default_confidence)
         self.set_param("text_only", default_text_only)
         self.set_param("skip_special", default_skip_special)
+        self.set_param("text_regions", "detect")
+        self.set_param("pin_model", get_config("ocr.pin_models", False))
 
     @classmethod
     def _get_ocr_model(cls):
-        """获取OCR模型（单例模式）"""
-        # 检查是否需要自动释放（超过最大空闲时间）
-        if cls._ocr_model is not None:
-            idle_time = time.time() - cls._last_used_time
-            if idle_time > cls._max_idle_time:
-                _logger.info(f"英文OCR模型空闲{idle_time:.1f}秒，自动释放内存")
-                cls.release_model()
-
-        if cls._ocr_model is None:
-            with cls._ocr_model_lock:
-                if cls._ocr_model is None:
-                    _logger.info("初始化英文OCR模型...")
-                    try:
-                        import easyocr
-
-                        cls._ocr_model = easyocr.Reader(["en"], gpu=False)
-                        cls._last_used_time = time.time()
-                        _logger.info("英文OCR模型初始化完成")
-                    except Exception as e:
-                        _logger.error(f"初始化英文OCR失败: {e}")
-                        raise ToolException(f"OCR模型初始化失败: {e}")
-
-        # 更新最后使用时间
-        cls._last_used_time = time.time()
-        return cls._ocr_model
+        """获取英文OCR模型(由OCR引擎缓存)"""
+        return get_ocr_engine().get_reader("en")
 
     @classmethod
     def release_model(cls):
-        """释放OCR模型内存"""
-        with cls._ocr_model_lock:
-            if cls._ocr_model is not None:
-                _logger.info("释放英文OCR模型内存...")
-                try:
-                    # 删除模型引用
-                    del cls._ocr_model
-                    cls._ocr_model = None
-                    cls._last_used_time = 0
-                    # 强制垃圾回收
-                    gc.collect()
-                    _logger.info("英文OCR模型内存已释放")
-                except Exception as e:
-                    _logger.warning(f"释放英文OCR模型时发生错误: {e}")
+        """释放英文OCR模型内存"""
+        get_ocr_engine().release("en", force=True)
+
+    def warmup(self) -> bool:
+        """预热：预先初始化OCR模型"""
+        self._get_ocr_model()
+        return True
 
     @classmethod
     def get_model_memory_usage(cls) -> Dict[str, Any]:
         """获取模型内存使用情况"""
-        with cls._ocr_model_lock:
-            if cls._ocr_model is None:
-                return {"loaded": False, "idle_time": 0}
-
-            idle_time = time.time() - cls._last_used_time
-            return {
-                "loaded": True,
-                "idle_time": idle_time,
-                "max_idle_time": cls._max_idle_time,
-                "will_auto_release": idle_time > cls._max_idle_time,
-            }
+        engine = get_ocr_engine()
+        stats = engine.get_stats().get("en", {})
+        return {
+            "loaded": stats.get("loaded", False),
+            "idle_time": stats.get("idle_time", 0),
+            "max_idle_time": engine.idle_timeout,
+            "pinned": stats.get("pinned", False),
+        }
 
     def _run_impl(self):
         """执行英文OCR识别"""
         if not self.has_input():
             raise ToolException("无输入图像")
 
-        input_image = self._input_data.data
-
-        min_confidence = self.get_param("min_confidence", 0.5)
-        text_only = self.get_param("text_only", True)
-        skip_special = self.get_param("skip_special", True)
-
-        self._logger.info(f"开始英文OCR识别: min_confidence={min_confidence}")
-
-        try:
-            reader = self._get_ocr_model()
-
-            if len(input_image.shape) == 3:
-                result = reader.readtext(input_image)
-            else:
-                result = reader.readtext(
-                    cv2.cvtColor(input_image, cv2.COLOR_GRAY2BGR)
-                )
-
-            texts = []
-            detailed_results = []
-
-            for detection in result:
-                bbox, text, confidence = detection
-
-                if confidence < min_confidence:
-                    continue
-
-                if skip_special:
-                    cleaned_text = "".join(c for c in text if c.isprintable())
-                else:
-                    cleaned_text = text
-
-                if cleaned_text.strip():
-                    texts.append(cleaned_text)
-
-                    if not text_only:
-                        detailed_results.append(
-                            {
-                                "text": cleaned_text,
-                                "confidence": float(confidence),
-                                "bbox": [[int(x), int(y)] for x, y in bbox],
-                            }
-                        )
-
-            self._result_data = ResultData()
-            self._result_data.tool_name = self._name
-            self._result_data.result_category = "ocr"
-            self._result_data.set_value("text_count", len(texts))
-            self._result_data.set_value("texts", texts)
-            self._result_data.set_value("full_text", "\n".join(texts))
-
-            if not text_only:
-                self._result_data.set_value("results", detailed_results)
-
-            # 绘制结果到输出图像
-            output_image = input_image.copy()
-            if len(output_image.shape) == 2:
-                output_image = cv2.cvtColor(output_image, cv2.COLOR_GRAY2BGR)
-
-            # 转换为PIL图像以支持中文
-            pil_image = Image.fromarray(
-                cv2.cvtColor(output_image, cv2.COLOR_BGR2RGB)
-            )
-            draw = ImageDraw.Draw(pil_image)
-
-            # 尝试加载中文字体
-            try:
-                font_path = "C:/Windows/Fonts/msyh.ttc"
-                font = ImageFont.truetype(font_path, 16)
-            except Exception:
-                font = ImageFont.load_default()
-
-            # 只有当detailed_results存在时才绘制
-            if detailed_results:
-                for i, (text, conf, bbox) in enumerate(
-                    zip(
-                        texts,
-                        [d["confidence"] for d in detailed_results],
-                        [d["bbox"] for d in detailed_results],
-                    )
-                ):
-                    # 绘制检测框
-                    pts = [tuple(p) for p in bbox]
-                    draw.line(pts + [pts[0]], fill=(0, 255, 0), width=2)
-
-                    # 绘制文本（使用PIL支持中文）
-                    text_pos = (bbox[0][0], bbox[0][1] - 20)
-                    draw.text(
-                        text_pos,
-                        f"{text} ({conf:.2f})",
-                        fill=(0, 255, 0),
-                        font=font,
-                    )
-
-            # 转回OpenCV格式
-            output_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-
-            self._output_data = self._input_data.copy()
-            self._output_data.data = output_image
-
-            self._logger.info(f"英文OCR识别完成: 找到{len(texts)}个文本")
-
-        except Exception as e:
-            self._logger.error(f"英文OCR识别失败: {e}")
-            raise ToolException(f"OCR识别失败: {e}")
+        _run_ocr(self, "en", "英文OCR识别")
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR引擎模块
+
+按语言组合管理OCR模型(默认 EasyOCR)：
+
+- 模型按语言组合延迟加载，"ch_sim" / "ch_sim+en" 等等价写法共用同一个模型
+- 常驻(pin)的模型不会被空闲释放；未常驻的模型只在加载或使用其他语言时、
+  且空闲超过 idle_timeout 后释放，正在使用的语言永远不会在使用前被卸载
+- recognize_regions 对已知文本区域(模板匹配结果、切片区域等)跳过文本检测，
+  所有区域在一次 recognize 调用中批量识别
+
+配置项：
+    ocr.pin_models      - 加载后常驻内存(生产环境建议开启)
+    ocr.idle_timeout    - 未常驻模型的空闲释放时间(秒)
+
+使用示例：
+    engine = get_ocr_engine()
+    engine.pin("en")                                    # 生产班次内常驻
+    lines = engine.readtext(image, "ch_sim")            # 检测+识别
+    texts = engine.recognize_regions(image, rois, "en") # 只识别给定区域
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config.config_manager import get_config
+
+_logger = logging.getLogger("OCR")
+
+# 工具语言参数 -> EasyOCR 语言列表(中日韩模型都需要与英文组合)
+OCR_LANGUAGE_SETS = {
+    "ch_sim": ("ch_sim", "en"),
+    "en": ("en",),
+    "ja": ("ja", "en"),
+    "ko": ("ko", "en"),
+    "ch_sim+en": ("ch_sim", "en"),
+    "en+ch_sim": ("ch_sim", "en"),
+    "all": ("ch_sim", "en"),
+}
+
+# 未常驻模型的默认空闲释放时间(秒)
+DEFAULT_IDLE_TIMEOUT = 300
+
+Region = Tuple[int, int, int, int]
+
+
+def resolve_languages(language: str) -> Tuple[str, ...]:
+    """将工具的语言参数转换为模型语言组合
+
+    Args:
+        language: 语言参数，如 "ch_sim"、"en"、"ch_sim+en"
+
+    Returns:
+        规范化的语言元组，等价写法返回相同结果
+    """
+    if language in OCR_LANGUAGE_SETS:
+        return OCR_LANGUAGE_SETS[language]
+    parts = [p.strip() for p in str(language).split("+") if p.strip()]
+    return tuple(sorted(set(parts))) or ("en",)
+
+
+def _create_easyocr_reader(languages: Tuple[str, ...]):
+    import easyocr
+
+    return easyocr.Reader(list(languages), gpu=False)
+
+
+@dataclass
+class TextResult:
+    """识别结果
+
+    bbox 为原图坐标下的四个顶点；region_index 为对应的输入区域序号(整图检测时为None)。
+    """
+
+    text: str
+    confidence: float
+    bbox: List[List[int]]
+    region_index: Optional[int] = None
+
+
+@dataclass
+class _ModelSlot:
+    """单个语言组合的模型槽位"""
+
+    languages: Tuple[str, ...]
+    reader: Any = None
+    pinned: bool = False
+    last_used: float = 0.0
+    in_use: int = 0
+    loads: int = 0
+    load_seconds: float = 0.0
+    calls: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class OCREngine:
+    """
+    OCR引擎
+
+    reader_factory(languages) 返回与 easyocr.Reader 接口一致的对象
+    (readtext / recognize)，默认创建 EasyOCR 模型。
+    """
+
+    def __init__(
+        self,
+        reader_factory: Callable[[Tuple[str, ...]], Any] = None,
+        idle_timeout: float = None,
+        pin_models: bool = None,
+    ):
+        """
+        初始化OCR引擎
+
+        Args:
+            reader_factory: 模型创建函数，默认创建 EasyOCR 模型
+            idle_timeout: 未常驻模型的空闲释放时间(秒)，默认读取配置 ocr.idle_timeout
+            pin_models: 模型加载后是否常驻，默认读取配置 ocr.pin_models
+        """
+        self._reader_factory = reader_factory or _create_easyocr_reader
+        self._idle_timeout = (
+            idle_timeout
+            if idle_timeout is not None
+            else get_config("ocr.idle_timeout", DEFAULT_IDLE_TIMEOUT)
+        )
+        self._pin_models = (
+            pin_models
+            if pin_models is not None
+            else get_config("ocr.pin_models", False)
+        )
+        self._slots: Dict[Tuple[str, ...], _ModelSlot] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def idle_timeout(self) -> float:
+        """未常驻模型的空闲释放时间(秒)"""
+        return self._idle_timeout
+
+    @idle_timeout.setter
+    def idle_timeout(self, value: float):
+        self._idle_timeout = max(0.0, float(value))
+
+    def _slot(self, language: str) -> _ModelSlot:
+        languages = resolve_languages(language)
+        with self._lock:
+            slot = self._slots.get(languages)
+            if slot is None:
+                slot = _ModelSlot(languages, pinned=bool(self._pin_models))
+                self._slots[languages] = slot
+            return slot
+
+    def pin(self, language: str, load: bool = False):
+        """
+        设置语言模型常驻内存，不参与空闲释放
+
+        Args:
+            language: 语言参数
+            load: 是否立即加载
+        """
+        slot = self._slot(language)
+        slot.pinned = True
+        if load:
+            self.get_reader(language)
+
+    def unpin(self, language: str):
+        """取消语言模型常驻，之后按空闲时间释放"""
+        slot = self._slot(language)
+        slot.pinned = False
+        slot.last_used = time.monotonic()
+
+    def is_loaded(self, language: str) -> bool:
+        """语言模型是否已加载"""
+        with self._lock:
+            slot = self._slots.get(resolve_languages(language))
+        return slot is not None and slot.reader is not None
+
+    def get_reader(self, language: str):
+        """
+        获取语言模型，未加载时加载
+
+        Args:
+            language: 语言参数
+
+        Returns:
+            模型实例
+        """
+        slot = self._slot(language)
+        self._load(slot)
+        slot.last_used = time.monotonic()
+        self.release_idle(exclude=slot.languages)
+        return slot.reader
+
+    def _load(self, slot: _ModelSlot):
+        if slot.reader is not None:
+            return
+        with slot.lock:
+            if slot.reader is not None:
+                return
+            _logger.info("加载OCR模型: %s", "+".join(slot.languages))
+            start = time.perf_counter()
+            slot.reader = self._reader_factory(slot.languages)
+            slot.load_seconds += time.perf_counter() - start
+            slot.loads += 1
+            _logger.info(
+                "OCR模型加载完成: %s, 耗时=%.2fs",
+                "+".join(slot.languages),
+                time.perf_counter() - start,
+            )
+
+    def _acquire(self, language: str) -> _ModelSlot:
+        """取得模型并标记使用中，使用期间不会被释放"""
+        slot = self._slot(language)
+        with slot.lock:
+            slot.in_use += 1
+        try:
+            self.get_reader(language)
+        except Exception:
+            with slot.lock:
+                slot.in_use -= 1
+            raise
+        slot.calls += 1
+        return slot
+
+    def _release_use(self, slot: _ModelSlot):
+        with slot.lock:
+            slot.in_use -= 1
+            slot.last_used = time.monotonic()
+
+    def readtext(self, image: np.ndarray, language: str) -> List[TextResult]:
+        """
+        整图检测并识别文本
+
+        Args:
+            image: 输入图像
+            language: 语言参数
+
+        Returns:
+            识别结果列表
+        """
+        slot = self._acquire(language)
+        try:
+            detections = slot.reader.readtext(image)
+        finally:
+            self._release_use(slot)
+        return [
+            TextResult(text, float(conf), [[int(x), int(y)] for x, y in bbox])
+            for bbox, text, conf in detections
+        ]
+
+    def recognize_regions(
+        self,
+        image: np.ndarray,
+        regions: Sequence[Region],
+        language: str,
+    ) -> List[Optional[TextResult]]:
+        """
+        识别已知文本区域，跳过文本检测
+
+        所有区域在一次 recognize 调用中批量识别。
+
+        Args:
+            image: 输入图像
+            regions: 文本区域 (x, y, w, h) 列表，超出图像的部分被裁掉
+            language: 语言参数
+
+        Returns:
+            与 regions 一一对应的识别结果，区域为空或未识别到时为None
+        """
+        height, width = image.shape[:2]
+        boxes = []
+        indices = []
+        for index, (x, y, w, h) in enumerate(regions):
+            x0, y0 = max(0, int(x)), max(0, int(y))
+            x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+            if x1 > x0 and y1 > y0:
+                boxes.append([x0, x1, y0, y1])
+                indices.append(index)
+
+        results: List[Optional[TextResult]] = [None] * len(regions)
+        if not boxes:
+            return results
+
+        slot = self._acquire(language)
+        try:
+            recognized = slot.reader.recognize(
+                image,
+                horizontal_list=boxes,
+                free_list=[],
+                batch_size=len(boxes),
+                detail=1,
+            )
+        finally:
+            self._release_use(slot)
+
+        # 批量识别的输出顺序可能与输入不同，按区域左上角和右下角对应回输入
+        pending: Dict[Tuple[int, int, int, int], List[int]] = {}
+        for (x0, x1, y0, y1), index in zip(boxes, indices):
+            pending.setdefault((x0, y0, x1, y1), []).append(index)
+        for bbox, text, conf in recognized:
+            points = [[int(px), int(py)] for px, py in bbox]
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            key = (min(xs), min(ys), max(xs), max(ys))
+            if pending.get(key):
+                index = pending[key].pop(0)
+                results[index] = TextResult(text, float(conf), points, index)
+        return results
+
+    def release(self, language: str = None, force: bool = False) -> int:
+        """
+        释放模型
+
+        Args:
+            language: 语言参数，None表示全部
+            force: 是否同时释放常驻模型
+
+        Returns:
+            释放的模型数
+        """
+        with self._lock:
+            if language is None:
+                slots = list(self._slots.values())
+            else:
+                slot = self._slots.get(resolve_languages(language))
+                slots = [slot] if slot is not None else []
+        return sum(
+            self._unload(slot) for slot in slots if force or not slot.pinned
+        )
+
+    def release_idle(self, exclude: Tuple[str, ...] = None) -> int:
+        """
+        释放空闲超过 idle_timeout 的未常驻模型
+
+        Args:
+            exclude: 不参与释放的语言组合(当前正在获取的模型)
+
+        Returns:
+            释放的模型数
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                slot
+                for slot in self._slots.values()
+                if slot.reader is not None
+                and not slot.pinned
+                and slot.languages != exclude
+                and now - slot.last_used > self._idle_timeout
+            ]
+        return sum(self._unload(slot) for slot in idle)
+
+    def _unload(self, slot: _ModelSlot) -> int:
+        with slot.lock:
+            if slot.reader is None or slot.in_use:
+                return 0
+            slot.reader = None
+        gc.collect()
+        _logger.info("释放OCR模型: %s", "+".join(slot.languages))
+        return 1
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各语言模型的状态
+
+        Returns:
+            {语言组合: {"loaded", "pinned", "idle_time", "loads",
+                        "load_seconds", "calls"}}
+        """
+        now = time.monotonic()
+        with self._lock:
+            slots = list(self._slots.values())
+        return {
+            "+".join(slot.languages): {
+                "loaded": slot.reader is not None,
+                "pinned": slot.pinned,
+                "idle_time": (
+                    now - slot.last_used if slot.reader is not None else 0.0
+                ),
+                "loads": slot.loads,
+                "load_seconds": slot.load_seconds,
+                "calls": slot.calls,
+            }
+            for slot in slots
+        }
+
+
+def regions_from_results(values: Dict[str, Any]) -> List[Region]:
+    """
+    从上游工具结果中提取文本区域
+
+    支持匹配结果(matches/match_results/detections，元组或字典)、
+    读码结果(codes，含rect)和图像切片区域(slice_x/slice_y/slice_width/slice_height)。
+
+    Args:
+        values: 上游结果数据的所有值
+
+    Returns:
+        区域 (x, y, w, h) 列表
+    """
+    template_w = values.get("template_width", 0) or 0
+    template_h = values.get("template_height", 0) or 0
+
+    regions: List[Region] = []
+    for key in ("matches", "match_results", "detections", "codes", "regions"):
+        for item in values.get(key) or []:
+            if isinstance(item, (tuple, list)) and len(item) >= 2:
+                w = item[3] if len(item) > 3 else template_w
+                h = item[4] if len(item) > 4 else template_h
+                regions.append((item[0], item[1], w, h))
+            elif isinstance(item, dict):
+                rect = item.get("rect", item)
+                regions.append(
+                    (
+                        rect.get("x", 0),
+                        rect.get("y", 0),
+                        rect.get("width", template_w),
+                        rect.get("height", template_h),
+                    )
+                )
+
+    if not regions and "slice_width" in values:
+        regions.append(
+            (
+                values.get("slice_x", 0),
+                values.get("slice_y", 0),
+                values.get("slice_width", 0),
+                values.get("slice_height", 0),
+            )
+        )
+
+    return [
+        (int(x), int(y), int(w), int(h))
+        for x, y, w, h in regions
+        if w > 0 and h > 0
+    ]
+
+
+_default_engine: Optional[OCREngine] = None
+_default_lock = threading.Lock()
+
+
+def get_ocr_engine() -> OCREngine:
+    """获取全局OCR引擎"""
+    global _default_engine
+    if _default_engine is None:
+        with _default_lock:
+            if _default_engine is None:
+                _default_engine = OCREngine()
+    return _default_engine
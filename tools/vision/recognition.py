@@ -20,8 +20,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import cv2
 import numpy as np
 
-from core.tool_base import RecognitionToolBase, ToolParameter, ToolRegistry
+from core.tool_base import (
+    RecognitionToolBase,
+    ToolParameter,
+    ToolRegistry,
+    search_region_parameter,
+)
 from data.image_data import ImageData, ResultData
+from data.overlay import Overlay
+from tools.vision.code_locator import (
+    KIND_BARCODE,
+    KIND_QRCODE,
+    get_code_decoder,
+)
 from utils.exceptions import ToolException
 
 
@@ -49,12 +60,17 @@ class BarcodeReader(RecognitionToolBase):
     参数说明：
     - barcode_type: 条码类型
     - use_angle: 是否使用角度信息
+    - localize: 先在缩小图像上定位候选条码区域，只并行解码候选区域(默认关闭；
+      有候选区域解码成功时不再整图解码，定位漏掉的码不会被识别)
+    - search_region: 搜索区域，只在区域内定位和解码
     """
 
     tool_name = "条码识别"
     tool_category = "Recognition"
     tool_description = "识别一维条码"
 
+    SUPPORTS_SEARCH_REGION = True
+
     # 中文参数定义
     PARAM_DEFINITIONS = {
         "barcode_type": ToolParameter(
@@ -78,12 +94,21 @@ class BarcodeReader(RecognitionToolBase):
             default=False,
             description="是否使用角度信息",
         ),
+        "localize": ToolParameter(
+            name="快速定位",
+            param_type="boolean",
+            default=False,
+            description="先定位候选条码区域再并行解码，大图多码时更快；定位漏掉的码不会被识别",
+        ),
+        "search_region": search_region_parameter(),
     }
 
     def _init_params(self):
         """初始化默认参数"""
         self.set_param("barcode_type", "all")
         self.set_param("use_angle", False)
+        self.set_param("localize", False)
+        self.set_param("search_region", None)
 
     def _run_impl(self):
         """执行条码识别"""
@@ -92,20 +117,15 @@ class BarcodeReader(RecognitionToolBase):
 
         input_image = self._input_data.data
 
-        # 转换为灰度
-        if len(input_image.shape) == 3:
-            gray_image = cv2.cvtColor(input_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_image = input_image
+        # 转换为灰度(同一帧的工具共享)
+        gray_image = self._input_data.derived.gray()
 
-        # 使用pyzbar进行条码识别
-        try:
-            from pyzbar.pyzbar import decode as decode_barcode
-
-            barcodes = decode_barcode(gray_image)
-        except ImportError:
-            # 如果没有pyzbar，尝试使用OpenCV的条形码检测器
-            barcodes = self._detect_with_opencv(gray_image)
+        # pyzbar识别，未安装时使用OpenCV的条形码检测器
+        barcodes = get_code_decoder().decode(
+            gray_image,
+            KIND_BARCODE,
+            localize=self.get_param("localize", False),
+        )
 
         # 处理结果
         self._result_data = ResultData()
@@ -114,7 +134,7 @@ class BarcodeReader(RecognitionToolBase):
 
         if barcodes:
             results = []
-            output_image = input_image.copy()
+            overlay = self._result_data.overlay
 
             for barcode in barcodes:
                 barcode_data = (
@@ -131,6 +151,11 @@ class BarcodeReader(RecognitionToolBase):
                 # 获取位置信息
                 points = barcode.polygon
                 if len(points) >= 4:
+                    # 旋转矩形/多边形搜索区域：丢弃中心在区域外的条码
+                    center = np.mean(points, axis=0)
+                    if not self.in_search_region(center[0], center[1]):
+                        continue
+
                     rect = cv2.boundingRect(np.array(points))
                     x, y, w, h = rect
 
@@ -149,22 +174,14 @@ class BarcodeReader(RecognitionToolBase):
 
                     # 绘制检测框
                     pts = np.array(points, np.int32)
-                    cv2.polylines(
-                        output_image,
-                        [pts],
-                        isClosed=True,
-                        color=(0, 255, 0),
-                        thickness=2,
-                    )
+                    overlay.add_polyline(pts, True, (0, 255, 0), 2)
 
                     # 绘制文本
-                    cv2.putText(
-                        output_image,
+                    overlay.add_text(
                         f"{barcode_type}: {barcode_data}",
                         (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
                         (0, 255, 0),
+                        0.5,
                         2,
                     )
 
@@ -191,52 +208,9 @@ class BarcodeReader(RecognitionToolBase):
             self._result_data.set_value("count", 0)
             self._result_data.set_value("barcodes", [])
             self._result_data.set_value("status", "No barcode found")
-            output_image = input_image.copy()
             self._logger.info("未识别到条码")
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
-
-    def _detect_with_opencv(self, gray_image: np.ndarray) -> list:
-        """使用OpenCV的条形码检测器"""
-        try:
-            # OpenCV 4.x 以上的版本有条形码检测器
-            detector = cv2.barcode_BarcodeDetector()
-            if detector is not None:
-                ret, decoded_info, decoded_type, corners = (
-                    detector.detectAndDecode(gray_image)
-                )
-
-                if ret and len(decoded_info) > 0:
-                    barcodes = []
-                    for i, (info, type_id) in enumerate(
-                        zip(decoded_info, decoded_type)
-                    ):
-                        if info:
-                            # 创建模拟的barcode对象
-                            class MockBarcode:
-                                def __init__(self, data, btype, corner):
-                                    self.data = (
-                                        data.encode()
-                                        if isinstance(data, str)
-                                        else data
-                                    )
-                                    self.type = btype
-                                    self.polygon = corner
-
-                            barcodes.append(
-                                MockBarcode(
-                                    info,
-                                    type_id,
-                                    corners[i] if corners is not None else [],
-                                )
-                            )
-
-                    return barcodes
-        except Exception:
-            pass
-
-        return []
+        self._output_data = self._input_data.view(self._result_data.overlay)
 
 
 @ToolRegistry.register
@@ -249,6 +223,8 @@ class QRCodeReader(RecognitionToolBase):
     参数说明：
     - qr_type: QR码类型
     - use_angle: 是否使用角度信息
+    - localize: 先在缩小图像上定位候选二维码区域，只并行解码候选区域(默认关闭；
+      有候选区域解码成功时不再整图解码，定位漏掉的码不会被识别)
     """
 
     tool_name = "二维码识别"
@@ -270,12 +246,19 @@ class QRCodeReader(RecognitionToolBase):
             default=False,
             description="是否使用角度信息",
         ),
+        "localize": ToolParameter(
+            name="快速定位",
+            param_type="boolean",
+            default=False,
+            description="先定位候选二维码区域再并行解码，大图多码时更快；定位漏掉的码不会被识别",
+        ),
     }
 
     def _init_params(self):
         """初始化默认参数"""
         self.set_param("qr_type", "all")
         self.set_param("use_angle", False)
+        self.set_param("localize", False)
 
     def _run_impl(self):
         """执行二维码识别"""
@@ -284,50 +267,13 @@ class QRCodeReader(RecognitionToolBase):
 
         input_image = self._input_data.data
 
-        # 转换为灰度
-        if len(input_image.shape) == 3:
-            gray_image = cv2.cvtColor(input_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_image = input_image
-
-        # 使用pyzbar进行二维码识别
-        try:
-            from pyzbar.pyzbar import decode as decode_barcode
-
-            objects = decode_barcode(gray_image)
+        # 转换为灰度(同一帧的工具共享)
+        gray_image = self._input_data.derived.gray()
 
-            # 筛选二维码
-            qr_objects = [obj for obj in objects if obj.type == "QRCODE"]
-        except ImportError:
-            qr_objects = []
-
-        # 尝试使用OpenCV的QRCode检测器
-        if not qr_objects:
-            try:
-                detector = cv2.QRCodeDetector()
-                ret, decoded_info, decoded_type, corners = (
-                    detector.detectAndDecodeMulti(gray_image)
-                )
-
-                if ret:
-                    qr_objects = []
-                    for i, info in enumerate(decoded_info):
-                        if info:
-
-                            class MockQRCode:
-                                def __init__(self, data, corner):
-                                    self.data = data
-                                    self.type = "QRCODE"
-                                    self.polygon = corner
-
-                            qr_objects.append(
-                                MockQRCode(
-                                    info,
-                                    corners[i] if corners is not None else [],
-                                )
-                            )
-            except Exception:
-                pass
+        # pyzbar识别，未识别到时使用OpenCV的二维码检测器
+        qr_objects = get_code_decoder().decode(
+            gray_image, KIND_QRCODE, localize=self.get_param("localize", False)
+        )
 
         # 处理结果
         self._result_data = ResultData()
@@ -336,7 +282,7 @@ class QRCodeReader(RecognitionToolBase):
 
         if qr_objects:
             results = []
-            output_image = input_image.copy()
+            overlay = self._result_data.overlay
 
             for qr in qr_objects:
                 qr_data = (
@@ -365,24 +311,12 @@ class QRCodeReader(RecognitionToolBase):
 
                     # 绘制检测框
                     pts = np.array(qr.polygon, np.int32)
-                    cv2.polylines(
-                        output_image,
-                        [pts],
-                        isClosed=True,
-                        color=(0, 255, 255),
-                        thickness=2,
-                    )
+                    overlay.add_polyline(pts, True, (0, 255, 255), 2)
 
                     # 绘制文本
                     display_text = f"QR: {qr_data}" if len(qr_data) <= 30 else f"QR: {qr_data[:30]}..."
-                    cv2.putText(
-                        output_image,
-                        display_text,
-                        (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (0, 255, 255),
-                        2,
+                    overlay.add_text(
+                        display_text, (x, y - 10), (0, 255, 255), 0.5, 2
                     )
 
             self._result_data.set_value("count", len(results))
@@ -407,11 +341,9 @@ class QRCodeReader(RecognitionToolBase):
             self._result_data.set_value("count", 0)
             self._result_data.set_value("qrcodes", [])
             self._result_data.set_value("status", "No QR code found")
-            output_image = input_image.copy()
             self._logger.info("未识别到二维码")
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        self._output_data = self._input_data.view(self._result_data.overlay)
 
 
 @ToolRegistry.register
@@ -464,7 +396,7 @@ class CodeReader(RecognitionToolBase):
             raise ToolException("无输入图像")
 
         input_image = self._input_data.data
-        output_image = input_image.copy()
+        overlay = Overlay()
 
         read_barcode = self.get_param("read_barcode", True)
         read_qrcode = self.get_param("read_qrcode", True)
@@ -472,11 +404,8 @@ class CodeReader(RecognitionToolBase):
 
         all_results = []
 
-        # 转换为灰度
-        if len(input_image.shape) == 3:
-            gray_image = cv2.cvtColor(input_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray_image = input_image
+        # 转换为灰度(同一帧的工具共享)
+        gray_image = self._input_data.derived.gray()
 
         # 使用pyzbar识别所有码
         try:
@@ -519,22 +448,8 @@ class CodeReader(RecognitionToolBase):
                         else f"{barcode_type}: {data}"
                     )
 
-                    cv2.polylines(
-                        output_image,
-                        [pts],
-                        isClosed=True,
-                        color=color,
-                        thickness=2,
-                    )
-                    cv2.putText(
-                        output_image,
-                        label,
-                        (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        color,
-                        2,
-                    )
+                    overlay.add_polyline(pts, True, color, 2)
+                    overlay.add_text(label, (x, y - 10), color, 0.5, 2)
 
                     all_results.append(
                         {
@@ -579,18 +494,8 @@ class CodeReader(RecognitionToolBase):
                             else f"{barcode_type}: {data}"
                         )
 
-                        cv2.rectangle(
-                            output_image, (x, y), (x + w, y + h), color, 2
-                        )
-                        cv2.putText(
-                            output_image,
-                            label,
-                            (x, y - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.5,
-                            color,
-                            2,
-                        )
+                        overlay.add_rect(x, y, w, h, color, 2)
+                        overlay.add_text(label, (x, y - 10), color, 0.5, 2)
 
                         all_results.append(
                             {
@@ -609,6 +514,7 @@ class CodeReader(RecognitionToolBase):
 
         # 保存结果
         self._result_data = ResultData()
+        self._result_data.overlay = overlay
         self._result_data.tool_name = self._name
         self._result_data.result_category = "code"
         self._result_data.set_value("count", len(all_results))
@@ -629,7 +535,6 @@ class CodeReader(RecognitionToolBase):
             "status", "OK" if all_results else "No code found"
         )
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        self._output_data = self._input_data.view(overlay)
 
         self._logger.info(f"综合读码完成: 识别到 {len(all_results)} 个码")
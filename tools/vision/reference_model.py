@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+金样参考模型模块
+
+用N张良品图像学习逐像素的灰度均值和方差，检测时把新图像对齐到模型，
+灰度超出 均值 ± k·标准差 的像素即为缺陷候选：
+
+- 训练是增量的(Welford算法)，可随时追加良品样本，不需要保存全部样本
+- 对齐使用缩小图上的相位相关(一次FFT)估计平移，也可由外部传入定位变换
+- 上下限按 k 预先计算为 uint8 图像并缓存，检测时 cv2.inRange 一次遍历完成比较
+- 模型以 .npz 保存和加载
+
+Author: Vision System Team
+Date: 2026-10-18
+"""
+
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+_logger = logging.getLogger("ReferenceModel")
+
+# 相位相关在长边不超过该尺寸的缩小图上计算
+ALIGN_MAX_SIZE = 512
+
+DEFAULT_MIN_STD = 5.0
+
+
+class ReferenceModel:
+    """
+    逐像素灰度统计参考模型
+
+    所有样本和检测图像须为同一尺寸的灰度图(uint8)。
+    """
+
+    def __init__(self, min_std: float = DEFAULT_MIN_STD):
+        """
+        Args:
+            min_std: 标准差下限，避免样本间几乎无变化的区域对噪声过于敏感
+        """
+        self.min_std = float(min_std)
+        self.count = 0
+        self._mean: Optional[np.ndarray] = None
+        self._m2: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._bounds: Dict[float, Tuple[np.ndarray, np.ndarray]] = {}
+        self._align_reference: Optional[
+            Tuple[float, np.ndarray, np.ndarray]
+        ] = None
+
+    @property
+    def shape(self) -> Optional[Tuple[int, int]]:
+        """模型图像尺寸 (高, 宽)，未训练时为 None"""
+        return None if self._mean is None else self._mean.shape
+
+    @property
+    def is_trained(self) -> bool:
+        """是否已有样本"""
+        return self.count > 0
+
+    @property
+    def mean(self) -> Optional[np.ndarray]:
+        """逐像素均值(float32)"""
+        return self._mean
+
+    def std(self) -> Optional[np.ndarray]:
+        """逐像素标准差(float32，不低于 min_std)"""
+        if self._mean is None:
+            return None
+        variance = self._m2 / max(self.count - 1, 1)
+        return np.maximum(np.sqrt(variance), np.float32(self.min_std))
+
+    def set_min_std(self, min_std: float):
+        """修改标准差下限(清除已缓存的上下限)"""
+        with self._lock:
+            if float(min_std) != self.min_std:
+                self.min_std = float(min_std)
+                self._bounds.clear()
+
+    def _check_shape(self, gray: np.ndarray):
+        if gray.ndim != 2:
+            raise ValueError("参考模型只接受灰度图像")
+        if self._mean is not None and gray.shape != self._mean.shape:
+            raise ValueError(
+                f"图像尺寸 {gray.shape[::-1]} 与参考模型 {self._mean.shape[::-1]} 不一致"
+            )
+
+    def add_sample(
+        self,
+        gray: np.ndarray,
+        align: bool = True,
+        matrix: Optional[np.ndarray] = None,
+    ) -> Tuple[float, float]:
+        """
+        增量加入一张良品样本
+
+        Args:
+            gray: 灰度图像
+            align: 是否先用相位相关对齐到当前均值图(第一张样本不对齐)
+            matrix: 外部给定的 2x3 变换(样本像素 -> 模型像素)，优先于 align
+
+        Returns:
+            对齐时估计的平移 (dx, dy)
+        """
+        self._check_shape(gray)
+        shift = (0.0, 0.0)
+        if self.count > 0:
+            gray, shift = self.align(gray, align, matrix)
+
+        sample = gray.astype(np.float32)
+        with self._lock:
+            if self._mean is None:
+                self._mean = sample.copy()
+                self._m2 = np.zeros_like(sample)
+                self.count = 1
+            else:
+                self.count += 1
+                delta = sample - self._mean
+                self._mean += delta / self.count
+                self._m2 += delta * (sample - self._mean)
+            self._bounds.clear()
+            self._align_reference = None
+        return shift
+
+    def reset(self):
+        """清空模型"""
+        with self._lock:
+            self.count = 0
+            self._mean = None
+            self._m2 = None
+            self._bounds.clear()
+            self._align_reference = None
+
+    def estimate_shift(self, gray: np.ndarray) -> Tuple[float, float, float]:
+        """
+        相位相关估计图像相对模型的平移
+
+        Args:
+            gray: 灰度图像
+
+        Returns:
+            (dx, dy, 响应值)，图像内容相对模型向右下移动为正
+        """
+        scale, reference, window = self._get_align_reference()
+        small = gray
+        if scale < 1.0:
+            small = cv2.resize(
+                gray, reference.shape[::-1], interpolation=cv2.INTER_AREA
+            )
+        # 部分OpenCV版本会把加窗结果写回输入，传入副本保护缓存的均值图
+        (dx, dy), response = cv2.phaseCorrelate(
+            reference.copy(), small.astype(np.float32), window
+        )
+        return dx / scale, dy / scale, response
+
+    def _get_align_reference(self) -> Tuple[float, np.ndarray, np.ndarray]:
+        """缩小的均值图和汉宁窗(模型更新后重建)"""
+        cached = self._align_reference
+        if cached is not None:
+            return cached
+        h, w = self._mean.shape
+        scale = min(1.0, ALIGN_MAX_SIZE / max(h, w))
+        reference = self._mean
+        if scale < 1.0:
+            size = (
+                max(1, int(round(w * scale))),
+                max(1, int(round(h * scale))),
+            )
+            reference = cv2.resize(
+                self._mean, size, interpolation=cv2.INTER_AREA
+            )
+            scale = size[0] / w
+        window = cv2.createHanningWindow(reference.shape[::-1], cv2.CV_32F)
+        cached = (scale, reference, window)
+        self._align_reference = cached
+        return cached
+
+    def align(
+        self,
+        gray: np.ndarray,
+        estimate: bool = True,
+        matrix: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """
+        将图像变换到模型坐标
+
+        Args:
+            gray: 灰度图像
+            estimate: 未给定 matrix 时是否用相位相关估计平移
+            matrix: 外部给定的 2x3 变换(图像像素 -> 模型像素)
+
+        Returns:
+            (对齐后的图像, 平移 (dx, dy))；无需变换时返回原图
+        """
+        if matrix is None:
+            if not estimate:
+                return gray, (0.0, 0.0)
+            dx, dy, _ = self.estimate_shift(gray)
+            if abs(dx) < 0.5 and abs(dy) < 0.5:
+                return gray, (dx, dy)
+            matrix = np.array([[1.0, 0.0, -dx], [0.0, 1.0, -dy]])
+        matrix = np.asarray(matrix, dtype=np.float64)[:2]
+        aligned = cv2.warpAffine(
+            gray,
+            matrix,
+            gray.shape[::-1],
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
+        return aligned, (-float(matrix[0, 2]), -float(matrix[1, 2]))
+
+    def bounds(self, k: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        允许的灰度上下限(uint8，按 k 缓存)
+
+        Args:
+            k: 标准差倍数
+
+        Returns:
+            (下限, 上限)
+        """
+        key = round(float(k), 4)
+        with self._lock:
+            cached = self._bounds.get(key)
+            if cached is not None:
+                return cached
+            if self._mean is None:
+                raise ValueError("参考模型未训练")
+            margin = self.std() * np.float32(k)
+            low = np.clip(np.floor(self._mean - margin), 0, 255).astype(
+                np.uint8
+            )
+            high = np.clip(np.ceil(self._mean + margin), 0, 255).astype(
+                np.uint8
+            )
+            self._bounds[key] = (low, high)
+            return low, high
+
+    def compare(
+        self,
+        gray: np.ndarray,
+        k: float = 4.0,
+        align: bool = True,
+        matrix: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, Tuple[float, float]]:
+        """
+        与模型比较，得到偏差掩码
+
+        Args:
+            gray: 灰度图像
+            k: 标准差倍数
+            align: 是否用相位相关对齐
+            matrix: 外部给定的 2x3 变换(图像像素 -> 模型像素)，优先于 align
+
+        Returns:
+            (偏差掩码(uint8, 255为超出范围), 对齐后的图像, 平移 (dx, dy))，
+            掩码和对齐图像均在模型坐标下；对齐时移入画面的边缘不计为偏差
+        """
+        if not self.is_trained:
+            raise ValueError("参考模型未训练")
+        self._check_shape(gray)
+        aligned, (dx, dy) = self.align(gray, align, matrix)
+        low, high = self.bounds(k)
+
+        mask = cv2.bitwise_not(cv2.inRange(aligned, low, high))
+
+        # 平移后图像外的区域由边缘像素复制填充，不参与判断：
+        # 对齐图像 aligned(x) = gray(x + dx)，dx > 0 时右侧越界，dx < 0 时左侧越界
+        h, w = mask.shape
+        mx, my = int(np.ceil(abs(dx))), int(np.ceil(abs(dy)))
+        if mx and dx > 0:
+            mask[:, max(w - mx, 0) :] = 0
+        elif mx:
+            mask[:, : min(mx, w)] = 0
+        if my and dy > 0:
+            mask[max(h - my, 0) :] = 0
+        elif my:
+            mask[: min(my, h)] = 0
+        return mask, aligned, (dx, dy)
+
+    def deviation(
+        self, aligned: np.ndarray, x: int, y: int, w: int, h: int
+    ) -> np.ndarray:
+        """
+        区域内每个像素偏离均值的标准差倍数
+
+        Args:
+            aligned: compare 返回的对齐图像
+            x, y, w, h: 区域
+
+        Returns:
+            |灰度 - 均值| / 标准差 (float32)
+        """
+        region = np.s_[y : y + h, x : x + w]
+        std = np.maximum(
+            np.sqrt(self._m2[region] / max(self.count - 1, 1)),
+            np.float32(self.min_std),
+        )
+        return (
+            np.abs(aligned[region].astype(np.float32) - self._mean[region])
+            / std
+        )
+
+    def save(self, filepath: str):
+        """
+        保存模型
+
+        Args:
+            filepath: 文件路径(按原样使用，不追加 .npz 后缀)
+        """
+        if not self.is_trained:
+            raise ValueError("参考模型未训练")
+        # 写入文件对象，np.savez 不会给没有后缀的路径追加 .npz
+        with self._lock, open(filepath, "wb") as f:
+            np.savez(
+                f,
+                mean=self._mean,
+                m2=self._m2,
+                count=self.count,
+                min_std=self.min_std,
+            )
+        _logger.info(f"参考模型已保存: {filepath} ({self.count} 个样本)")
+
+    @classmethod
+    def load(cls, filepath: str) -> "ReferenceModel":
+        """
+        加载模型
+
+        Args:
+            filepath: save 保存的 .npz 文件路径
+
+        Returns:
+            参考模型
+        """
+        with np.load(filepath) as data:
+            model = cls(float(data["min_std"]))
+            model._mean = data["mean"].astype(np.float32)
+            model._m2 = data["m2"].astype(np.float32)
+            model.count = int(data["count"])
+        return model
+
+    def get_info(self) -> Dict[str, Any]:
+        """获取模型信息"""
+        return {
+            "trained": self.is_trained,
+            "samples": self.count,
+            "size": None if self._mean is None else self._mean.shape[::-1],
+            "min_std": self.min_std,
+        }
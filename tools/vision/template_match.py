@@ -21,16 +21,23 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import cv2
 import numpy as np
 
+from core.communication.dynamic_io import Fixture
+from core.fixture_tool_mixin import FixtureToolMixin
 from core.roi_tool_mixin import ROIToolMixin
-from core.tool_base import ToolParameter, ToolRegistry, VisionAlgorithmToolBase
+from core.tool_base import (
+    ToolParameter,
+    ToolRegistry,
+    VisionAlgorithmToolBase,
+    search_region_parameter,
+)
 from data.image_data import ImageData, ResultData
 from utils.exceptions import ToolException
 from utils.image_processing_utils import (
     preprocess_image,
     non_maximum_suppression,
-    draw_matches,
-    draw_lines,
-    draw_circles,
+    add_match_overlay,
+    add_line_overlay,
+    add_circle_overlay,
     extract_contour,
     compute_hu_moments,
     rotate_contour,
@@ -64,7 +71,7 @@ class SearchMode(Enum):
 
 
 @ToolRegistry.register
-class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
+class GrayMatch(ROIToolMixin, FixtureToolMixin, VisionAlgorithmToolBase):
     """
     灰度匹配工具
 
@@ -79,12 +86,17 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
     - angle_start: 起始角度
     - angle_end: 结束角度
     - angle_step: 角度步长
+    - search_region: 搜索区域，只在区域内搜索(ROI模板仍从整幅图像截取)
+    - publish_fixture: 发布位置修正，以最佳匹配的中心为位姿(不含旋转)
+    - fixture_teach / fixture_x / fixture_y / fixture_angle: 基准位姿
     """
 
     tool_name = "灰度匹配"
     tool_category = "Vision"
     tool_description = "在图像中搜索与模板最匹配的位置"
 
+    SUPPORTS_SEARCH_REGION = True
+
     # 中文参数定义
     PARAM_DEFINITIONS = {
         "template_path": ToolParameter(
@@ -129,6 +141,8 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
             default=None,
             description="ROI模板区域（点击按钮绘制ROI作为模板）",
         ),
+        "search_region": search_region_parameter(),
+        **FixtureToolMixin.get_fixture_param_definitions(),
     }
 
     def _init_params(self):
@@ -138,8 +152,11 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
         self.set_param("min_score", 0.7)
         self.set_param("max_count", 10)
         self.set_param("roi", None)
+        self.set_param("search_region", None)
         self._init_roi_params()  # 使用mixin的初始化方法
+        self._init_fixture_params()
         self._template_image = None
+        self._loaded_template_key = None
 
     MATCH_MODE_MAP = {
         "sqdiff": cv2.TM_SQDIFF,
@@ -154,6 +171,18 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
         """加载模板图像"""
         template_path = self.get_param("template_path", "")
 
+        # 模板文件(路径和修改时间)未变化时复用已加载的模板
+        try:
+            template_key = (template_path, os.path.getmtime(template_path))
+        except OSError:
+            template_key = None
+        if (
+            template_key is not None
+            and template_key == self._loaded_template_key
+            and self._template_image is not None
+        ):
+            return True
+
         if template_path:
             try:
                 self._template_image = cv2.imread(
@@ -168,6 +197,7 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
                 if self._template_image is None:
                     raise ToolException(f"无法加载模板图像: {template_path}")
 
+                self._loaded_template_key = template_key
                 return True
             except Exception as e:
                 self._logger.error(f"加载模板失败: {e}")
@@ -180,11 +210,8 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
         if not self.has_input():
             raise ToolException("无输入图像")
 
-        input_image = self._input_data.data
-        h, w = input_image.shape[:2]
-
-        # 转换为灰度
-        gray_image = preprocess_image(input_image)
+        # 转换为灰度(同一帧的工具共享)
+        gray_image = self._input_data.derived.gray()
 
         template_path = self.get_param("template_path", "")
 
@@ -192,22 +219,24 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
             if not self._load_template():
                 raise ToolException("无法加载模板")
         else:
-            # 使用mixin的通用ROI获取方法
-            roi = self.get_roi_from_params(w, h)
+            # 使用mixin的通用ROI获取方法(ROI为整帧坐标)
+            frame = self.frame_input
+            roi = self.get_roi_from_params(frame.width, frame.height)
             if roi:
                 roi_x, roi_y, roi_width, roi_height = roi
-                self._template_image = gray_image[
+                self._template_image = frame.derived.gray()[
                     roi_y : roi_y + roi_height, roi_x : roi_x + roi_width
                 ].copy()
+                self._loaded_template_key = None
                 self._logger.info(
                     f"使用ROI模板: x={roi_x}, y={roi_y}, width={roi_width}, height={roi_height}"
                 )
             else:
-                self._output_data = self._input_data.copy()
+                self._output_data = self._input_data.view()
                 raise ToolException("请设置模板图像路径或使用ROI绘制模板")
 
         if self._template_image is None or self._template_image.size == 0:
-            self._output_data = self._input_data.copy()
+            self._output_data = self._input_data.view()
             raise ToolException("未设置模板")
 
         match_mode_name = self.get_param("match_mode", "ccoeff_normed")
@@ -221,7 +250,14 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
         # 使用Numba加速SSD匹配（仅在使用ssd模式时）
         use_numba = USE_NUMBA and match_mode_name == "ssd"
 
-        if use_numba:
+        template_h, template_w = self._template_image.shape[:2]
+        if (
+            gray_image.shape[0] < template_h
+            or gray_image.shape[1] < template_w
+        ):
+            # 搜索区域小于模板
+            result = np.zeros((0, 0), np.float32)
+        elif use_numba:
             result = ssd_match_parallel(
                 gray_image.astype(np.float32),
                 self._template_image.astype(np.float32)
@@ -243,7 +279,7 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
             valid_mask = result >= min_score
         elif match_mode in [cv2.TM_CCORR, cv2.TM_CCOEFF]:
             # 非标准化模式返回原始值，需要根据最大值计算阈值
-            max_val = result.max()
+            max_val = result.max() if result.size else 0
             threshold = max_val * min_score
             valid_mask = result >= threshold
         else:
@@ -275,10 +311,24 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
 
             # 非极大值抑制
             filtered_locations = non_maximum_suppression(
-                locations,
-                self._template_image.shape[1],
-                self._template_image.shape[0],
-            )[:max_count]
+                locations, template_w, template_h
+            )
+
+            # 旋转矩形/多边形搜索区域：丢弃中心在区域外的匹配
+            if filtered_locations:
+                corners = np.array(
+                    [loc[:2] for loc in filtered_locations], np.float64
+                )
+                inside = self.in_search_region(
+                    corners[:, 0] + template_w / 2,
+                    corners[:, 1] + template_h / 2,
+                )
+                filtered_locations = [
+                    loc
+                    for loc, keep in zip(filtered_locations, inside.tolist())
+                    if keep
+                ]
+            filtered_locations = filtered_locations[:max_count]
 
         # 保存结果
         self._result_data = ResultData()
@@ -312,25 +362,41 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
             self._result_data.set_value("center", {})
             self._result_data.set_value("match_score", 0.0)
 
-        # 绘制结果
-        output_image = draw_matches(
-            input_image,
+        # 匹配框作为叠加图元，输出图像保持为输入视图
+        overlay = add_match_overlay(
+            self._result_data.overlay,
             filtered_locations,
             self._template_image.shape[1],
             self._template_image.shape[0]
         )
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        self._output_data = self._input_data.view(overlay)
 
         self._logger.info(
             f"灰度匹配完成: 找到 {len(filtered_locations)} 个匹配"
         )
 
+    def _fixture_pose(self) -> Optional[Fixture]:
+        """最佳匹配的模板中心(灰度匹配不估计旋转)"""
+        if not self._result_data.get_value("match_count", 0):
+            return None
+        template_h, template_w = self._template_image.shape[:2]
+        return Fixture(
+            x=self._result_data.get_value("best_x") + template_w / 2,
+            y=self._result_data.get_value("best_y") + template_h / 2,
+        )
+
+    def _post_process(self):
+        """发布位置修正"""
+        self._publish_fixture(self._fixture_pose())
 
+    def warmup(self) -> bool:
+        """预热：预先加载模板图像"""
+        return self._load_template()
 
     def set_template(self, template_image: ImageData):
         """设置模板图像"""
+        self._loaded_template_key = None
         if template_image.is_gray:
             self._template_image = template_image.data.copy()
         else:
@@ -341,7 +407,7 @@ class GrayMatch(ROIToolMixin, VisionAlgorithmToolBase):
 
 
 @ToolRegistry.register
-class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
+class ShapeMatch(ROIToolMixin, FixtureToolMixin, VisionAlgorithmToolBase):
     """
     形状匹配工具
 
@@ -355,12 +421,17 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
     - canny_threshold1: Canny边缘检测低阈值
     - canny_threshold2: Canny边缘检测高阈值
     - roi: ROI模板区域（点击按钮绘制ROI作为模板）
+    - search_region: 搜索区域，只在区域内查找轮廓(ROI模板仍从整幅图像截取)
+    - publish_fixture: 发布位置修正，以最佳匹配轮廓的质心和主轴方向为位姿
+    - fixture_teach / fixture_x / fixture_y / fixture_angle: 基准位姿
     """
 
     tool_name = "形状匹配"
     tool_category = "Vision"
     tool_description = "使用边缘特征进行形状匹配"
 
+    SUPPORTS_SEARCH_REGION = True
+
     # 中文参数定义
     PARAM_DEFINITIONS = {
         "min_score": ToolParameter(
@@ -417,6 +488,8 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
             default=None,
             description="ROI模板区域（点击按钮绘制ROI作为模板）",
         ),
+        "search_region": search_region_parameter(),
+        **FixtureToolMixin.get_fixture_param_definitions(),
     }
 
     def _init_params(self):
@@ -428,7 +501,9 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
         self.set_param("canny_threshold1", 50)
         self.set_param("canny_threshold2", 150)
         self.set_param("roi", None)
+        self.set_param("search_region", None)
         self._init_roi_params()  # 使用mixin的初始化方法
+        self._init_fixture_params()
         self._template_contour = None
         self._template_hu_moments = None
         self._template_mask = None
@@ -480,10 +555,6 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
         if not self.has_input():
             raise ToolException("无输入图像")
 
-        input_image = self._input_data.data
-        h, w = input_image.shape[:2]
-        gray_image = preprocess_image(input_image)
-
         min_score = self.get_param("min_score", 0.7)
         max_count = self.get_param("max_count", 10)
         angle_start = self.get_param("angle_start", -30)
@@ -492,8 +563,9 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
         canny_t1 = self.get_param("canny_threshold1", 50)
         canny_t2 = self.get_param("canny_threshold2", 150)
 
-        # 使用mixin的通用ROI获取方法
-        template_roi = self.get_roi_from_params(w, h)
+        # 使用mixin的通用ROI获取方法(ROI为整帧坐标)
+        frame = self.frame_input
+        template_roi = self.get_roi_from_params(frame.width, frame.height)
         if template_roi:
             roi_x, roi_y, roi_width, roi_height = template_roi
             self._logger.info(
@@ -503,7 +575,7 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
         # 如果没有模板轮廓，尝试从ROI区域提取
         if self._template_contour is None and template_roi is not None:
             roi_x, roi_y, roi_width, roi_height = template_roi
-            roi_image = gray_image[
+            roi_image = frame.derived.gray()[
                 roi_y : roi_y + roi_height, roi_x : roi_x + roi_width
             ]
             self._template_contour = extract_contour(
@@ -523,12 +595,12 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
             self._result_data.set_value(
                 "message", "请先设置模板图像或使用ROI绘制模板"
             )
-            self._output_data = self._input_data.copy()
+            self._output_data = self._input_data.view()
             self._logger.warning("形状匹配失败: 未设置模板")
             return
 
         # 提取所有轮廓
-        edges = cv2.Canny(gray_image, canny_t1, canny_t2)
+        edges = self._input_data.derived.canny(canny_t1, canny_t2)
         kernel = np.ones((3, 3), np.uint8)
         edges = cv2.dilate(edges, kernel, iterations=1)
         edges = cv2.erode(edges, kernel, iterations=1)
@@ -539,11 +611,21 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
         # 过滤有效轮廓（面积大于100）
         valid_contours = [c for c in contours if cv2.contourArea(c) >= 100]
 
+        # 旋转矩形/多边形搜索区域：丢弃中心在区域外的轮廓
+        if valid_contours:
+            centers = np.array(
+                [c.reshape(-1, 2).mean(axis=0) for c in valid_contours]
+            )
+            inside = self.in_search_region(centers[:, 0], centers[:, 1])
+            valid_contours = [
+                c for c, keep in zip(valid_contours, inside.tolist()) if keep
+            ]
+
         if not valid_contours:
             self._result_data = ResultData()
             self._result_data.set_value("match_count", 0)
             self._result_data.set_value("message", "未检测到有效轮廓")
-            self._output_data = self._input_data.copy()
+            self._output_data = self._input_data.view()
             self._logger.warning("形状匹配失败: 未检测到有效轮廓")
             return
 
@@ -562,6 +644,18 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
 
             if score >= min_score:
                 x, y, cw, ch = cv2.boundingRect(contour)
+                # 质心和主轴方向(图像坐标系顺时针为正，180度歧义)，用于位置修正
+                moments = cv2.moments(contour)
+                if moments["m00"]:
+                    center_x = moments["m10"] / moments["m00"]
+                    center_y = moments["m01"] / moments["m00"]
+                else:
+                    center_x, center_y = x + cw / 2, y + ch / 2
+                orientation = 0.5 * np.degrees(
+                    np.arctan2(
+                        2 * moments["mu11"], moments["mu20"] - moments["mu02"]
+                    )
+                )
                 matches.append(
                     {
                         "x": int(x),
@@ -570,6 +664,9 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
                         "height": int(ch),
                         "score": float(score),
                         "angle": float(best_angle),
+                        "center_x": float(center_x),
+                        "center_y": float(center_y),
+                        "orientation": float(orientation),
                     }
                 )
 
@@ -590,7 +687,7 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
             self._result_data.set_value("best_score", best["score"])
             self._result_data.set_value("best_angle", best["angle"])
 
-        output_image = input_image.copy()
+        overlay = self._result_data.overlay
         for match in matches:
             x, y, w, h = (
                 match["x"],
@@ -598,23 +695,33 @@ class ShapeMatch(ROIToolMixin, VisionAlgorithmToolBase):
                 match["width"],
                 match["height"],
             )
-            cv2.rectangle(output_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            label = f"{match['score']:.2f}"
-            cv2.putText(
-                output_image,
-                label,
-                (x, y - 5),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                1,
+            overlay.add_rect(x, y, w, h, (0, 255, 0), 2)
+            overlay.add_text(
+                f"{match['score']:.2f}", (x, y - 5), (0, 255, 0), 0.5, 1
             )
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        self._output_data = self._input_data.view(overlay)
 
         self._logger.info(f"形状匹配完成: 找到 {len(matches)} 个匹配")
 
+    def _fixture_pose(self) -> Optional[Fixture]:
+        """分数最高的匹配轮廓的质心和主轴方向
+
+        主轴方向有180度歧义，取与基准角度相差最小的方向。
+        """
+        matches = self._result_data.get_value("matches") or []
+        if not matches:
+            return None
+        best = max(matches, key=lambda m: m["score"])
+        reference_angle = self.get_param("fixture_angle", 0.0)
+        angle = best["orientation"]
+        angle += 180.0 * round((reference_angle - angle) / 180.0)
+        return Fixture(x=best["center_x"], y=best["center_y"], angle=angle)
+
+    def _post_process(self):
+        """发布位置修正"""
+        self._publish_fixture(self._fixture_pose())
+
     def set_template(self, template_image: ImageData):
         """设置模板图像"""
         if template_image is None:
@@ -728,7 +835,7 @@ class LineFind(ROIToolMixin, VisionAlgorithmToolBase):
         input_image = self._input_data.data
         h, w = input_image.shape[:2]
 
-        gray_image = preprocess_image(input_image)
+        gray_image = self._input_data.derived.gray()
 
         rho = self.get_param("rho", 1)
         theta = self.get_param("theta", 3.14159 / 180)
@@ -751,7 +858,10 @@ class LineFind(ROIToolMixin, VisionAlgorithmToolBase):
         roi_gray = gray_image[
             roi_y : roi_y + roi_height, roi_x : roi_x + roi_width
         ]
-        edges = cv2.Canny(roi_gray, 50, 150)
+        if roi_gray.shape == gray_image.shape:
+            edges = self._input_data.derived.canny(50, 150)
+        else:
+            edges = cv2.Canny(roi_gray, 50, 150)
         lines = cv2.HoughLinesP(
             edges,
             rho,
@@ -780,13 +890,11 @@ class LineFind(ROIToolMixin, VisionAlgorithmToolBase):
             self._result_data.set_value("line_count", len(lines_list))
             self._result_data.set_value("lines", lines_list)
 
-            output_image = draw_lines(input_image, lines_list)
+            add_line_overlay(self._result_data.overlay, lines_list)
         else:
             self._result_data.set_value("line_count", 0)
-            output_image = input_image.copy()
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        self._output_data = self._input_data.view(self._result_data.overlay)
 
         self._logger.info(
             f"直线查找完成: 找到 {self._result_data.get_value('line_count', 0)} 条直线"
@@ -882,7 +990,7 @@ class CircleFind(ROIToolMixin, VisionAlgorithmToolBase):
         input_image = self._input_data.data
         h, w = input_image.shape[:2]
 
-        gray_image = preprocess_image(input_image)
+        gray_image = self._input_data.derived.gray()
 
         min_radius = self.get_param("min_radius", 10)
         max_radius = self.get_param("max_radius", 100)
@@ -935,13 +1043,11 @@ class CircleFind(ROIToolMixin, VisionAlgorithmToolBase):
             self._result_data.set_value("circle_count", len(circles_list))
             self._result_data.set_value("circles", circles_list)
 
-            output_image = draw_circles(input_image, circles_list)
+            add_circle_overlay(self._result_data.overlay, circles_list)
         else:
             self._result_data.set_value("circle_count", 0)
-            output_image = input_image.copy()
 
-        self._output_data = self._input_data.copy()
-        self._output_data.data = output_image
+        self._output_data = self._input_data.view(self._result_data.overlay)
 
         self._logger.info(
             f"圆查找完成: 找到 {self._result_data.get_value('circle_count', 0)} 个圆"
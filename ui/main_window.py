@@ -191,11 +191,7 @@ from pathlib import Path
 import cv2
 import numpy as np
 
-# 导入所有工具模块，确保它们被注册到ToolRegistry
-import tools
-# 显式导入所有工具子模块，确保工具被注册到ToolRegistry
-from tools import vision, communication, analysis
-from tools import image_source, camera_parameter_setting
+# 工具模块由ToolRegistry根据工具清单按需导入，无需在此全部导入
 from core.procedure import Procedure
 from core.solution import Solution
 from core.solution_file_manager import (
@@ -473,7 +469,11 @@ class PortItem(QGraphicsEllipseItem):
             super().mouseReleaseEvent(event)
 
 
-from core.zoomable_image import ZoomableGraphicsView
+from core.zoomable_image import (
+    ZoomableGraphicsView,
+    create_image_item,
+    release_image_item,
+)
 
 
 class ImageView(ZoomableGraphicsView):
@@ -2841,6 +2841,7 @@ class MainWindow(QMainWindow):
             # 斑点分析
             "blob_count": "blob个数",
             "blobs": "blob列表",
+            "blob_table": "blob统计表",
             "blob_area": "blob面积",
             "blob_centroid": "blob中心",
             # 几何测量
@@ -3333,6 +3334,8 @@ class MainWindow(QMainWindow):
         self.current_display_tool_name = None
 
         # 清除场景中的图像
+        for item in self.image_scene.items():
+            release_image_item(item)
         self.image_scene.clear()
 
         # 显示提示
@@ -3361,35 +3364,13 @@ class MainWindow(QMainWindow):
         # 清除场景 - QGraphicsItem没有deleteLater，使用removeItem
         for item in list(self.image_scene.items()):
             self.image_scene.removeItem(item)
+            release_image_item(item)
 
-        # 获取图像数据
+        # 获取图像数据(工具的检测结果以叠加图元形式在此绘制)
         if image_data.is_valid:
-            image = image_data.data
-
-            # 转换为RGB格式用于显示
-            if len(image.shape) == 2:
-                # 灰度图像
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-            else:
-                # BGR图像（OpenCV默认格式）
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-            # 创建QImage
-            h, w, c = image_rgb.shape
-            bytes_per_line = c * w
-
-            # 根据PyQt版本选择正确的Format
-            if PYQT_VERSION == 6:
-                qimage_format = QImage.Format.Format_RGB888
-            else:
-                qimage_format = QImage.Format_RGB888
-
-            qimage = QImage(
-                image_rgb.data, w, h, bytes_per_line, qimage_format
-            )
-
-            # 创建QPixmap
-            pixmap = QPixmap.fromImage(qimage)
+            image = image_data.rendered()
+            h, w = image.shape[:2]
+            c = 1 if image.ndim == 2 else image.shape[2]
 
             # 设置场景背景为专业的深灰色网格
             self.image_scene.setBackgroundBrush(QBrush(QColor(40, 40, 40)))
@@ -3403,11 +3384,8 @@ class MainWindow(QMainWindow):
             # 添加到场景
             self.image_scene.addItem(container)
 
-            # 创建图像项 - 使用原始图像大小
-            pixmap_item = QGraphicsPixmapItem(pixmap)
-            pixmap_item.setTransformationMode(
-                Qt.TransformationMode.SmoothTransformation
-            )
+            # 创建图像项 - 使用原始图像大小，超大图像(如拼接结果)分块显示
+            pixmap_item = create_image_item(image)
             pixmap_item.setZValue(-1)
 
             # 添加到场景并居中
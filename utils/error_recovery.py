@@ -8,6 +8,8 @@
 - 系统状态监控和恢复
 - 自动重试机制
 - 故障转移和降级策略
+- 后台执行恢复操作(检测线程只提交，不等待重试延迟)
+- 按组件熔断：连续失败后本周期直接失败，超时后放行一次试探
 
 Author: Vision System Team
 Date: 2025-01-04
@@ -16,10 +18,21 @@ Date: 2025-01-04
 import logging
 import threading
 import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+# 连续失败多少次后熔断
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# 熔断后多少秒放行一次试探
+DEFAULT_RESET_TIMEOUT = 5.0
+
+# 后台恢复线程数
+RECOVERY_WORKERS = 2
+
 
 class RecoveryStrategy(Enum):
     """错误恢复策略"""
@@ -53,6 +66,139 @@ class RecoveryAction:
     description: Optional[str] = None
 
 
+class CircuitState(Enum):
+    """熔断器状态"""
+
+    CLOSED = "closed"  # 正常
+    OPEN = "open"  # 熔断，直接失败
+    HALF_OPEN = "half_open"  # 试探中
+
+
+# 所有熔断器(用于统计)
+_all_breakers: "weakref.WeakSet[CircuitBreaker]" = weakref.WeakSet()
+
+
+class CircuitBreaker:
+    """组件熔断器
+
+    连续失败 failure_threshold 次后进入熔断状态，allow() 直接返回False，
+    调用方本周期立即失败；reset_timeout 秒后放行一次试探，试探成功恢复正常，
+    失败则重新熔断。只有组件故障才调用 record_failure()，输入数据问题
+    调用 record_ignored()，不会让后续的正常周期被熔断。
+
+    示例：
+        breaker = get_circuit_breaker("Camera.hik_0")
+        if not breaker.allow():
+            raise CameraException("相机熔断中")
+        try:
+            frame = camera.capture_frame()
+            breaker.record_success()
+        except Exception:
+            breaker.record_failure()
+            raise
+    """
+
+    def __init__(
+        self,
+        component: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        """
+        Args:
+            component: 组件名称
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多少秒放行一次试探
+        """
+        self.component = component
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_count = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        _all_breakers.add(self)
+
+    @property
+    def state(self) -> CircuitState:
+        """当前状态"""
+        return self._state
+
+    def allow(self) -> bool:
+        """本周期是否允许执行
+
+        Returns:
+            熔断中返回False
+        """
+        if self._state is CircuitState.CLOSED:
+            return True
+        with self._lock:
+            if (
+                self._state is CircuitState.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._state = CircuitState.HALF_OPEN
+                return True
+            self._rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        """距离下次试探的秒数"""
+        if self._state is not CircuitState.OPEN:
+            return 0.0
+        return max(
+            0.0, self.reset_timeout - (time.monotonic() - self._opened_at)
+        )
+
+    def record_success(self):
+        """记录一次成功"""
+        if self._state is CircuitState.CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        """记录一次失败"""
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state is CircuitState.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state is not CircuitState.OPEN:
+                    self._open_count += 1
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_ignored(self):
+        """记录一次不判定组件好坏的执行(例如输入数据或图像无效)
+
+        不计入连续失败次数；试探周期被输入问题占用时回到熔断状态，
+        下一周期立即重新试探。
+        """
+        if self._state is not CircuitState.HALF_OPEN:
+            return
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN:
+                self._state = CircuitState.OPEN
+
+    def reset(self):
+        """恢复正常状态(例如参数修改后)"""
+        self.record_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "state": self._state.value,
+            "failures": self._failures,
+            "open_count": self._open_count,
+            "rejected": self._rejected,
+        }
+
+
 @dataclass
 class ErrorContext:
     """错误上下文"""
@@ -77,6 +223,20 @@ class RecoveryManager:
             Tuple[ErrorContext, RecoveryStatus, Optional[str]]
         ] = []
 
+        # 后台恢复
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._stop_event = threading.Event()
+        self._metrics = {
+            "submitted": 0,
+            "coalesced": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "recovery_seconds": 0.0,
+            "submit_seconds": 0.0,
+        }
+        self._component_seconds: Dict[str, float] = {}
+
     def register_strategy(self, error_type: str, strategy: RecoveryAction):
         """
         注册错误恢复策略
@@ -204,9 +364,10 @@ class RecoveryManager:
             except Exception as e:
                 self._logger.warning(f"重试失败: {str(e)}")
 
-            # 等待延迟
+            # 等待延迟(关闭时立即结束)
             if attempt < strategy.max_attempts - 1:
-                time.sleep(strategy.delay)
+                if self._stop_event.wait(strategy.delay):
+                    break
 
         self._logger.error("重试次数达到上限，恢复失败")
         return RecoveryStatus.FAILED
@@ -347,6 +508,88 @@ class RecoveryManager:
             self._recovery_history.clear()
             self._logger.debug("恢复历史已清空")
 
+    def submit(self, error_context: ErrorContext) -> Future:
+        """
+        在后台线程执行错误恢复，立即返回
+
+        同一组件、同一错误类型的恢复尚未结束时不重复提交，返回进行中的任务。
+
+        Args:
+            error_context: 错误上下文
+
+        Returns:
+            结果为恢复状态的Future
+        """
+        start = time.perf_counter()
+        key = (error_context.component, error_context.error_type)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None and not future.done():
+                self._metrics["coalesced"] += 1
+            else:
+                if self._executor is None:
+                    self._stop_event.clear()
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=RECOVERY_WORKERS,
+                        thread_name_prefix="ErrorRecovery",
+                    )
+                future = self._executor.submit(
+                    self._recover_in_background, error_context
+                )
+                self._pending[key] = future
+                self._metrics["submitted"] += 1
+            self._metrics["submit_seconds"] += time.perf_counter() - start
+        return future
+
+    def _recover_in_background(
+        self, error_context: ErrorContext
+    ) -> RecoveryStatus:
+        """后台执行恢复并统计耗时"""
+        start = time.perf_counter()
+        status = self.recover(error_context)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._metrics["recovery_seconds"] += elapsed
+            if status == RecoveryStatus.SUCCESS:
+                self._metrics["succeeded"] += 1
+            else:
+                self._metrics["failed"] += 1
+            component = error_context.component
+            self._component_seconds[component] = (
+                self._component_seconds.get(component, 0.0) + elapsed
+            )
+        return status
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        获取恢复统计
+
+        Returns:
+            提交/合并/成功/失败次数、后台恢复耗时、检测线程提交耗时、
+            各组件恢复耗时和进行中的恢复数
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["component_seconds"] = dict(self._component_seconds)
+            metrics["pending"] = sum(
+                1 for f in self._pending.values() if not f.done()
+            )
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        """
+        停止后台恢复线程，正在等待重试延迟的恢复立即结束
+
+        Args:
+            wait: 是否等待进行中的恢复结束
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        self._stop_event.set()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
 
 class SystemRecovery:
     """系统级错误恢复"""
@@ -355,6 +598,8 @@ class SystemRecovery:
         """初始化系统恢复"""
         self._recovery_manager = RecoveryManager()
         self._logger = logging.getLogger("SystemRecovery")
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
         self._initialize_default_strategies()
 
     def _initialize_default_strategies(self):
@@ -490,6 +735,79 @@ class SystemRecovery:
 
         return self._recovery_manager.recover(error_context)
 
+    def submit_recovery(
+        self,
+        error_type: str,
+        error_code: int,
+        error_message: str,
+        component: str,
+        details: Dict[str, Any],
+    ) -> Future:
+        """
+        在后台从错误中恢复，不阻塞调用线程
+
+        Args:
+            error_type: 错误类型
+            error_code: 错误代码
+            error_message: 错误消息
+            component: 组件名称
+            details: 详细信息
+
+        Returns:
+            结果为恢复状态的Future
+        """
+        error_context = ErrorContext(
+            error_code=error_code,
+            error_message=error_message,
+            error_type=error_type,
+            timestamp=time.time(),
+            component=component,
+            details=details,
+        )
+
+        return self._recovery_manager.submit(error_context)
+
+    def get_circuit_breaker(self, component: str, **kwargs) -> CircuitBreaker:
+        """
+        获取组件共享的熔断器(例如同一台相机)
+
+        Args:
+            component: 组件名称
+            **kwargs: 首次创建时传给CircuitBreaker的参数
+
+        Returns:
+            熔断器
+        """
+        with self._breakers_lock:
+            breaker = self._breakers.get(component)
+            if breaker is None:
+                breaker = CircuitBreaker(component, **kwargs)
+                self._breakers[component] = breaker
+            return breaker
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        获取恢复和熔断统计
+
+        Returns:
+            后台恢复统计，以及熔断器的快速失败总数和非正常状态的熔断器
+        """
+        metrics = self._recovery_manager.get_metrics()
+        breakers = list(_all_breakers)
+        metrics["fast_failures"] = sum(
+            b.get_stats()["rejected"] for b in breakers
+        )
+        metrics["breakers"] = {
+            b.component: b.get_stats()
+            for b in breakers
+            if b.state is not CircuitState.CLOSED
+        }
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        """停止后台恢复线程"""
+        self._recovery_manager.shutdown(wait)
+
     def register_custom_strategy(
         self, error_type: str, strategy: RecoveryAction
     ):
@@ -548,6 +866,59 @@ def recover_from_error(
     )
 
 
+def submit_recovery(
+    error_type: str,
+    error_code: int,
+    error_message: str,
+    component: str,
+    details: Dict[str, Any] = None,
+) -> Future:
+    """
+    在后台从错误中恢复，立即返回(检测线程使用)
+
+    Args:
+        error_type: 错误类型
+        error_code: 错误代码
+        error_message: 错误消息
+        component: 组件名称
+        details: 详细信息
+
+    Returns:
+        结果为恢复状态的Future
+    """
+    return system_recovery.submit_recovery(
+        error_type=error_type,
+        error_code=error_code,
+        error_message=error_message,
+        component=component,
+        details=details or {},
+    )
+
+
+def get_circuit_breaker(component: str, **kwargs) -> CircuitBreaker:
+    """
+    获取组件共享的熔断器
+
+    Args:
+        component: 组件名称
+        **kwargs: 首次创建时传给CircuitBreaker的参数
+
+    Returns:
+        熔断器
+    """
+    return system_recovery.get_circuit_breaker(component, **kwargs)
+
+
+def get_recovery_metrics() -> Dict[str, Any]:
+    """
+    获取恢复和熔断统计
+
+    Returns:
+        统计字典
+    """
+    return system_recovery.get_metrics()
+
+
 def register_recovery_strategy(error_type: str, strategy: RecoveryAction):
     """
     注册恢复策略
@@ -13,6 +13,8 @@ import cv2
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 
+from data.overlay import Overlay
+
 
 def preprocess_image(image: np.ndarray) -> np.ndarray:
     """
@@ -155,28 +157,26 @@ def remove_duplicate_defects(
     return unique_defects
 
 
-def draw_detection_result(
-    image: np.ndarray,
+def add_detection_overlay(
+    overlay: Overlay,
     detections: List[Dict[str, Any]],
     label_key: str = "type",
     score_key: str = "confidence",
     location_key: str = "location"
-) -> np.ndarray:
+) -> Overlay:
     """
-    绘制检测结果
+    将检测结果添加为叠加图元
     
     Args:
-        image: 输入图像
+        overlay: 叠加图元列表
         detections: 检测结果列表
         label_key: 标签键名
         score_key: 分数键名
         location_key: 位置键名
     
     Returns:
-        绘制后的图像
+        叠加图元列表
     """
-    output_image = image.copy()
-    
     for detection in detections:
         location = detection[location_key]
         x, y, w, h = (
@@ -189,111 +189,132 @@ def draw_detection_result(
         # 随机颜色
         color = tuple(np.random.randint(0, 255, 3).tolist())
         
-        # 绘制边界框
-        cv2.rectangle(output_image, (x, y), (x + w, y + h), color, 2)
-        
-        # 绘制标签
+        # 边界框和标签
+        overlay.add_rect(x, y, w, h, color, 2)
         label = f"{detection[label_key]}: {detection[score_key]:.2f}"
-        cv2.putText(
-            output_image,
-            label,
-            (x, y - 10),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            color,
-            2,
-        )
+        overlay.add_text(label, (x, y - 10), color, 0.5, 2)
     
-    return output_image
+    return overlay
 
 
-def draw_matches(
-    image: np.ndarray,
+def add_match_overlay(
+    overlay: Overlay,
     matches: List[Tuple[int, int, float]],
     template_width: int,
     template_height: int
-) -> np.ndarray:
+) -> Overlay:
     """
-    绘制匹配结果
+    将匹配结果添加为叠加图元
     
     Args:
-        image: 输入图像
+        overlay: 叠加图元列表
         matches: 匹配位置列表 [(x, y, score), ...]
         template_width: 模板宽度
         template_height: 模板高度
     
     Returns:
-        绘制后的图像
+        叠加图元列表
     """
-    output_image = image.copy()
-    
     for x, y, score in matches:
-        pt1 = (x, y)
-        pt2 = (
-            x + template_width,
-            y + template_height,
-        )
-        cv2.rectangle(output_image, pt1, pt2, (0, 255, 0), 2)
-        cv2.putText(
-            output_image,
-            f"{score:.2f}",
-            (x, y - 5),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            (0, 255, 0),
-            1,
-        )
+        overlay.add_rect(x, y, template_width, template_height, (0, 255, 0), 2)
+        overlay.add_text(f"{score:.2f}", (x, y - 5), (0, 255, 0), 0.5, 1)
     
-    return output_image
+    return overlay
 
 
-def draw_lines(
-    image: np.ndarray,
+def add_line_overlay(
+    overlay: Overlay,
     lines: List[Dict[str, int]]
-) -> np.ndarray:
+) -> Overlay:
     """
-    绘制直线
+    将直线添加为叠加图元
     
     Args:
-        image: 输入图像
+        overlay: 叠加图元列表
         lines: 直线列表 [{x1, y1, x2, y2}, ...]
     
     Returns:
-        绘制后的图像
+        叠加图元列表
     """
-    output_image = image.copy()
-    
     for line in lines:
-        pt1 = (line["x1"], line["y1"])
-        pt2 = (line["x2"], line["y2"])
-        cv2.line(output_image, pt1, pt2, (0, 255, 0), 2)
+        overlay.add_line(
+            (line["x1"], line["y1"]), (line["x2"], line["y2"]), (0, 255, 0), 2
+        )
     
-    return output_image
+    return overlay
 
 
-def draw_circles(
-    image: np.ndarray,
+def add_circle_overlay(
+    overlay: Overlay,
     circles: List[Dict[str, int]]
-) -> np.ndarray:
+) -> Overlay:
     """
-    绘制圆
+    将圆添加为叠加图元
     
     Args:
-        image: 输入图像
+        overlay: 叠加图元列表
         circles: 圆列表 [{x, y, radius}, ...]
     
     Returns:
-        绘制后的图像
+        叠加图元列表
     """
-    output_image = image.copy()
-    
     for circle in circles:
         center = (circle["x"], circle["y"])
-        radius = circle["radius"]
-        cv2.circle(output_image, center, radius, (0, 255, 0), 2)
-        cv2.circle(output_image, center, 3, (0, 0, 255), -1)
+        overlay.add_circle(center, circle["radius"], (0, 255, 0), 2)
+        overlay.add_circle(center, 3, (0, 0, 255), -1)
     
-    return output_image
+    return overlay
+
+
+def draw_detection_result(
+    image: np.ndarray,
+    detections: List[Dict[str, Any]],
+    label_key: str = "type",
+    score_key: str = "confidence",
+    location_key: str = "location"
+) -> np.ndarray:
+    """
+    绘制检测结果(返回BGR拷贝)
+    """
+    overlay = add_detection_overlay(
+        Overlay(), detections, label_key, score_key, location_key
+    )
+    return overlay.render(image)
+
+
+def draw_matches(
+    image: np.ndarray,
+    matches: List[Tuple[int, int, float]],
+    template_width: int,
+    template_height: int
+) -> np.ndarray:
+    """
+    绘制匹配结果(返回BGR拷贝)
+    """
+    overlay = add_match_overlay(
+        Overlay(), matches, template_width, template_height
+    )
+    return overlay.render(image)
+
+
+def draw_lines(
+    image: np.ndarray,
+    lines: List[Dict[str, int]]
+) -> np.ndarray:
+    """
+    绘制直线(返回BGR拷贝)
+    """
+    return add_line_overlay(Overlay(), lines).render(image)
+
+
+def draw_circles(
+    image: np.ndarray,
+    circles: List[Dict[str, int]]
+) -> np.ndarray:
+    """
+    绘制圆(返回BGR拷贝)
+    """
+    return add_circle_overlay(Overlay(), circles).render(image)
 
 
 def extract_contour(